@@ -25,8 +25,16 @@ MODULE commModule
         num streamJ4;
         num streamJ5;
         num streamJ6;
+        ! Clock probe id, echoed in the answer
+        num probeId;
     ENDRECORD
 
+    ! Clock probe ("C;id;0;0"): answered with CLOCK_REPLY, receive time, send time, id (clock_sync.py on the host).
+    ! The host sends probes only with Config.CLOCK_SYNC_ENABLED, which needs this module on the controller first.
+    CONST num CLOCK_REPLY := 8;
+    ! num is single precision: the clock restarts hourly to stay below 0.25 ms resolution
+    CONST num CLOCK_RESTART_S := 3600;
+
     CONST num R1_PortNo := 5024;
     CONST string R1_IPAddress := "127.0.0.1";
 
@@ -35,6 +43,8 @@ MODULE commModule
     VAR string clientIP;
     VAR dataPacket receivedDataPkg;
     VAR string mydata;
+    VAR clock commClock;
+    VAR num clkReceived;
 
     PERS bool initialRun;
 
@@ -58,6 +68,8 @@ MODULE commModule
 
     ! PHASE 2: Operation mode toggle
     ! "d" = standard (pre-defined state motion), "j" = joint streaming
+    ! "J" (12-value ROB1 + ROB2 pair) is not parsed: it does not fit the 80-character \str of SocketReceive.
+    ! The host rejects pairs while Config.STREAM_DUAL_ARM_ENABLED is off.
     PERS string operationMode := "d";
 
     ! PHASE 2: Shared joint streaming target for R1
@@ -74,6 +86,8 @@ MODULE commModule
         wasInterrupted_R2 := FALSE;
         reconnectComm := FALSE;
         initialRun := TRUE;
+        ClkReset commClock;
+        ClkStart commClock;
         cmdExe;
     ENDPROC
 
@@ -126,6 +140,7 @@ MODULE commModule
 
             ! Wait for data from the client
             SocketReceive client_socket\str:mydata\Time:=WAIT_MAX;
+            clkReceived := ClkRead(commClock\HighRes);
 
             ! If receipt, trigger:
             IF NOT mydata = "" THEN
@@ -199,6 +214,15 @@ MODULE commModule
             wasInterrupted_R1 := FALSE;
             wasInterrupted_R2 := FALSE;
             SocketSend client_socket\str:='1,1,1,1,1,1'; ! send a signal to the client that the connection is established
+        CASE "C":
+            ! Clock probe: no motion, so no ACK_DONE in the next cycle
+            initialRun := TRUE;
+            SocketSend client_socket\str:=NumToStr(CLOCK_REPLY,0) + "," + NumToStr(clkReceived,6) + "," + NumToStr(ClkRead(commClock\HighRes),6) + "," + NumToStr(receivedDataPkg.probeId,0) + ",0,0";
+            IF clkReceived > CLOCK_RESTART_S THEN
+                ! the host sees a clock step and restarts its estimate
+                ClkReset commClock;
+                ClkStart commClock;
+            ENDIF
         CASE "T":
             TPWrite "TCP/IP connection closed";
             reconnectComm := TRUE; ! set the reconnect flag to true to trigger reconnection in the main loop
@@ -247,6 +271,11 @@ MODULE commModule
             bResult := StrToVal(StrPart(message, data_4 + 1, data_5 - data_4 - 1), packet_receive.streamJ5);
             bResult := StrToVal(StrPart(message, data_5 + 1, data_6 - data_5 - 1), packet_receive.streamJ6);
 
+        ELSEIF packet_receive.commHeader = "C" THEN
+            ! Clock probe: C;id;0;0
+            data_1 := StrFind(message, pkgHeader + 1, ";");
+            bResult := StrToVal(StrPart(message, pkgHeader + 1, data_1 - pkgHeader - 1), packet_receive.probeId);
+
         ENDIF
     RETURN packet_receive
 
@@ -0,0 +1,103 @@
+"""
+Bulk trajectory upload benchmark.
+
+Uploads one large (N, width) float64 trajectory from a PUSH socket to a PULL
+socket and times it until the receiver holds the targets as a NumPy array:
+    pack_data      one pack_data frame of every value (the existing framing),
+                   unpacked with unpack_data
+    copy           multipart header + array bytes, sent and received with copies
+    zero_copy      send_trajectory (copy=False), received by a PriorityCommandLane
+                   and read in place with unpack_trajectory
+Reports upload time, targets/s and MB/s, and the peak of the Python memory
+allocated while uploading (tracemalloc, separate run) against the size of
+the trajectory itself.
+
+Run from the PythonHMI directory:
+    python -m benchmarks.bench_bulk_upload [--points 1000000] [--width 6] [--endpoint tcp://127.0.0.1:8099]
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+import zmq
+
+from config.settings import Config
+from src.communication.priority_lane import PriorityCommandLane
+from src.communication.protocol import pack_data, send_trajectory, unpack_data, unpack_trajectory
+
+
+def upload_pack_data(send: zmq.Socket, recv: zmq.Socket, lane: PriorityCommandLane, points: np.ndarray) -> np.ndarray:
+    send.send(pack_data(points.ravel().tolist()))
+    return np.asarray(unpack_data(recv.recv())).reshape(-1, points.shape[1])
+
+
+def upload_copy(send: zmq.Socket, recv: zmq.Socket, lane: PriorityCommandLane, points: np.ndarray) -> np.ndarray:
+    send.send_multipart([pack_data([Config.TRAJECTORY_OP, points.shape[1]]), points.tobytes()])
+    header, buffer = recv.recv_multipart()
+    return np.frombuffer(buffer).reshape(-1, points.shape[1])
+
+
+def upload_zero_copy(send: zmq.Socket, recv: zmq.Socket, lane: PriorityCommandLane, points: np.ndarray) -> np.ndarray:
+    send_trajectory(send, points)
+    item = None
+    while item is None:
+        item = lane.next(1000)
+    return unpack_trajectory(unpack_data(item.payload), item.parts)
+
+
+MODES = {"pack_data": upload_pack_data, "copy": upload_copy, "zero_copy": upload_zero_copy}
+
+
+def run(mode: str, points: np.ndarray, endpoint: str, traced: bool) -> tuple:
+    """(seconds, peak traced MB) of one upload; the received targets are checked against the sent ones."""
+    context = zmq.Context()
+    recv = context.socket(zmq.PULL)
+    recv.bind(endpoint)
+    control = context.socket(zmq.PULL)
+    control.bind("inproc://bench_bulk_upload_control")
+    send = context.socket(zmq.PUSH)
+    send.connect(endpoint)
+    lane = PriorityCommandLane(recv, control)
+    try:
+        send.send(pack_data([0]))
+        recv.recv() # connected
+        if traced:
+            tracemalloc.start()
+        start = time.perf_counter()
+        received = MODES[mode](send, recv, lane, points)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] / 1e6 if traced else 0.0
+        tracemalloc.stop()
+        if not np.array_equal(received, points):
+            raise RuntimeError(f"{mode}: received targets differ from the sent ones")
+        del received, lane
+    finally:
+        for socket in (send, recv, control):
+            socket.close(linger=0)
+        context.term()
+    return elapsed, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--points", type=int, default=1_000_000)
+    parser.add_argument("--width", type=int, default=6, help="Values per target, 6 or 12 (ROB1 + ROB2)")
+    parser.add_argument("--endpoint", default="tcp://127.0.0.1:8099", help="PULL endpoint, e.g. inproc://upload")
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=list(MODES))
+    args = parser.parse_args()
+
+    t = np.linspace(0, 2 * np.pi, args.points)[:, None]
+    points = 90 * np.sin(t * (1 + np.arange(args.width)))
+    size = points.nbytes / 1e6
+    print(f"{args.points:,} targets x {args.width} joints = {size:.1f} MB over {args.endpoint}")
+    print(f"{'mode':>10} {'seconds':>8} {'targets/s':>12} {'MB/s':>8} {'peak MB':>8} {'x size':>7}")
+    for mode in args.modes:
+        elapsed, _ = run(mode, points, args.endpoint, traced=False)
+        _, peak = run(mode, points, args.endpoint, traced=True)
+        print(f"{mode:>10} {elapsed:8.3f} {args.points / elapsed:12,.0f} {size / elapsed:8,.0f} {peak:8.1f} {peak / size:7.2f}")
+
+
+if __name__ == "__main__":
+    main()
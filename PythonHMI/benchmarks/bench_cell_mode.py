@@ -0,0 +1,120 @@
+"""
+Round-trip benchmark: multi-process (TCP loopback) vs single-process (inproc) cell mode.
+
+Drives the real server_multiMove main loop in internal-socket-only mode, so
+every command is unpacked, dispatched and acknowledged without a controller.
+Reports server startup time (launch -> first ACK) and command round-trip latency.
+
+Run from the PythonHMI directory:
+    python -m benchmarks.bench_cell_mode [--commands N]
+"""
+
+import argparse
+import contextlib
+import io
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+import zmq
+
+from config.settings import Config
+from src.communication.protocol import pack_data
+
+INTERNAL_SOCKET_ONLY = [3, 3, 3]
+
+
+def run_session(context: zmq.Context, launch, commands: int) -> tuple[float, list[float]]:
+    """Bind the client side, start the server and time `commands` round-trips.
+
+    Returns:
+        (startup time in seconds, list of round-trip times in seconds)
+    """
+    command_endpoint, ack_endpoint = Config.cell_endpoints("MM", bind=True)
+    send = context.socket(zmq.PUSH)
+    send.bind(command_endpoint)
+    recv = context.socket(zmq.PULL)
+    recv.setsockopt(zmq.RCVTIMEO, 10000)  # fail instead of hanging if the server dies
+    recv.bind(ack_endpoint)
+
+    start = time.perf_counter()
+    launch()
+    recv.recv()  # server ready
+    startup = time.perf_counter() - start
+
+    send.send(pack_data(INTERNAL_SOCKET_ONLY))
+    recv.recv()  # handshake done
+
+    rtts = []
+    command = pack_data([1, 1, 1])
+    for _ in range(commands):
+        t0 = time.perf_counter()
+        send.send(command)
+        recv.recv()
+        rtts.append(time.perf_counter() - t0)
+
+    send.send(pack_data(Config.TERMINATION_CODE))
+    send.close(linger=1000)
+    recv.close()
+    return startup, rtts
+
+
+def bench_multi_process(commands: int) -> tuple[float, list[float]]:
+    Config.CELL_MODE = "multi_process"
+    context = zmq.Context()
+    processes = []
+
+    def launch() -> None:
+        processes.append(subprocess.Popen([sys.executable, "server_multiMove.py"],
+                                          stdout=subprocess.DEVNULL))
+
+    try:
+        result = run_session(context, launch, commands)
+        processes[0].wait(timeout=10)
+    finally:
+        for process in processes:
+            process.kill()
+    context.term()
+    return result
+
+
+def bench_single_process(commands: int) -> tuple[float, list[float]]:
+    Config.CELL_MODE = "single_process"
+    context = zmq.Context()
+    threads = []
+
+    def launch() -> None:
+        import server_multiMove
+        thread = threading.Thread(target=server_multiMove.main, kwargs={"cell_context": context},
+                                  daemon=True)
+        thread.start()
+        threads.append(thread)
+
+    with contextlib.redirect_stdout(io.StringIO()):  # the server loop prints every command
+        result = run_session(context, launch, commands)
+        threads[0].join(timeout=10)
+    context.term()
+    return result
+
+
+def _summary(name: str, startup: float, rtts: list[float]) -> None:
+    micros = sorted(rtt * 1e6 for rtt in rtts)
+    p99 = micros[int(len(micros) * 0.99) - 1]
+    print(f"{name:>14}: startup {startup * 1e3:8.1f} ms   RTT median {statistics.median(micros):8.1f} us   "
+          f"p99 {p99:8.1f} us")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--commands", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"Cell mode round-trip, {args.commands} commands")
+    _summary("multi_process", *bench_multi_process(args.commands))
+    _summary("single_process", *bench_single_process(args.commands))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Checkpoint cost and restart recovery benchmark with fake controllers.
+
+1. Cost of appending one checkpoint record per step (buffered and fsync).
+2. A long sequence on one cell is cancelled part way (stand-in for a crash),
+   then a fresh orchestrator is started: with checkpoints it resumes at the
+   last confirmed step, without them it has to run the whole sequence again.
+
+Run from the PythonHMI directory:
+    python -m benchmarks.bench_checkpoint [--steps 200] [--crash-at 150] [--motion-ms 2]
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+
+from src.cell.orchestrator import CellOrchestrator, compile_sequence
+from src.cell.registry import CellRegistry, CellSpec, ControllerEndpoint
+from src.communication.fake_controller import FakeController
+from src.execution.cancellation import SequenceCancelled
+from src.execution.checkpoint import SequenceCheckpoint
+
+STEPS = [("Home", "CB_Home"), ("Standby", "CB_Standby")]
+
+
+def append_cost(directory: str, fsync: bool, records: int = 2000) -> float:
+    """Mean seconds per appended record."""
+    checkpoint = SequenceCheckpoint(f"append_fsync_{fsync}", directory, fsync=fsync)
+    start = time.perf_counter()
+    for i in range(records):
+        checkpoint.append(1234, i, i)
+    elapsed = time.perf_counter() - start
+    checkpoint.close()
+    return elapsed / records
+
+
+async def run_once(registry: CellRegistry, sequence: list, checkpoint_dir, crash_at: int = 0) -> tuple[float, int]:
+    """Run the sequence on every cell, cancelling after `crash_at` steps (0 = never).
+
+    Returns:
+        (wall time in seconds, steps executed)
+    """
+    orchestrator = CellOrchestrator(registry, checkpoint_dir)
+    await orchestrator.start()
+    executor = next(iter(orchestrator.executors.values()))
+
+    async def crash() -> None:
+        while executor.steps_completed < crash_at:
+            await asyncio.sleep(0.0005)
+        orchestrator.cancel(reason="simulated crash")
+
+    watcher = asyncio.create_task(crash()) if crash_at else None
+    start = time.perf_counter()
+    errors = await orchestrator.run({name: sequence for name in registry.names()})
+    wall = time.perf_counter() - start
+    if watcher is not None:
+        watcher.cancel()
+    await orchestrator.stop()
+    unexpected = {name: e for name, e in errors.items() if not isinstance(e, SequenceCancelled)}
+    if unexpected:
+        raise RuntimeError(f"cells failed: {unexpected}")
+    return wall, executor.steps_completed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--steps", type=int, default=200)
+    parser.add_argument("--crash-at", type=int, default=150)
+    parser.add_argument("--motion-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"append: {append_cost(directory, False) * 1e6:.1f} us/record buffered, "
+              f"{append_cost(directory, True) * 1e6:.1f} us/record fsync")
+
+        controllers = [FakeController(motion_time=args.motion_ms / 1000).start_in_thread() for _ in range(2)]
+        try:
+            registry = CellRegistry([CellSpec("bench_cell",
+                                              ControllerEndpoint("127.0.0.1", controllers[0].port),
+                                              ControllerEndpoint("127.0.0.1", controllers[1].port))])
+            sequence = (compile_sequence("1A", STEPS) * args.steps)[:args.steps]
+            _, done = asyncio.run(run_once(registry, sequence, directory, crash_at=args.crash_at))
+            print(f"interrupted after {done}/{args.steps} steps")
+            resumed_wall, resumed_steps = asyncio.run(run_once(registry, sequence, directory))
+            full_wall, full_steps = asyncio.run(run_once(registry, sequence, None))
+            print(f"recovery with checkpoint: {resumed_steps:>4} steps {resumed_wall:.3f} s")
+            print(f"recovery from step 0:     {full_steps:>4} steps {full_wall:.3f} s")
+        finally:
+            for controller in controllers:
+                controller.stop_thread()
+
+
+if __name__ == "__main__":
+    main()
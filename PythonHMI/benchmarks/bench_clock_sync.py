@@ -0,0 +1,156 @@
+"""
+Clock offset estimation benchmark.
+
+Measures ClockOffsetEstimator (src/telemetry/clock_sync.py) against clocks
+with a known offset and drift:
+    synthetic      simulated probes, CLOCK_PROBE_INTERVAL_S apart, with one-sided
+                   queuing delays (exponential, on either leg): error of the
+                   estimator against the last sample and the plain mean of the
+                   window, and the fitted drift
+    controller     'C;' probes of ExtSocketServer.probe_clock() to a fake
+                   controller whose clock runs --offset seconds ahead and
+                   --drift-ppm fast
+    zmq            CLOCK_PROBE_OP round trips to server_multiMove in a
+                   single-process cell, over the clientUI command socket and a
+                   front-end DEALER (same clock, true offset 0)
+Reports the offset error, the drift error and the error bound (half the
+shortest round trip), and the probe round trips. The real links are probed
+--interval apart, too short a span for a drift fit (CLOCK_DRIFT_MIN_SPAN_S):
+their drift error is the drift itself.
+
+Run from the PythonHMI directory:
+    python -m benchmarks.bench_clock_sync [--probes 200] [--interval 0.005] [--offset 12.5] [--drift-ppm 200]
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import statistics
+import threading
+import time
+
+import zmq
+
+from config.settings import Config
+from src.communication.fake_controller import FakeController
+from src.communication.priority_lane import connect_frontend
+from src.communication.protocol import pack_data, probe_clock
+from src.communication.socket_manager import ExtSocketServer
+from src.telemetry.clock_sync import ClockOffsetEstimator, ClockSample
+from src.telemetry.logger import set_level
+
+INTERNAL_SOCKET_ONLY = [3, 3, 3]
+
+
+def synthetic(probes: int, offset: float, drift: float, seed: int = 1) -> None:
+    """Simulated probes: 50 us per leg plus queuing delays of 1 ms mean on a random leg."""
+    rng = random.Random(seed)
+    estimator = ClockOffsetEstimator("bench-synthetic")
+    errors = {"estimator": [], "last sample": [], "window mean": []}
+    interval = Config.CLOCK_PROBE_INTERVAL_S
+    for index in range(probes):
+        t0 = index * interval
+        up = 50e-6 + (rng.expovariate(1e3) if rng.random() < 0.5 else 0.0)
+        down = 50e-6 + (rng.expovariate(1e3) if rng.random() < 0.5 else 0.0)
+        t1 = (t0 + up) * (1 + drift) + offset
+        t2 = t1 + 20e-6
+        t3 = t0 + up + 20e-6 / (1 + drift) + down
+        sample = ClockSample(t0, t1, t2, t3)
+        estimator.add(sample)
+        truth = offset + drift * t3
+        errors["estimator"].append(estimator.offset_at(t3) - truth)
+        errors["last sample"].append(sample.offset - truth)
+        window = estimator.samples
+        errors["window mean"].append(sum(s.offset for s in window) / len(window) - truth)
+    settled = probes // 2 # once the window is full
+    print(f"synthetic: {probes} probes {interval:.1f} s apart, asymmetric queuing 1 ms mean")
+    print(f"{'method':>12} {'mean |err| us':>13} {'max |err| us':>12}")
+    for name, values in errors.items():
+        values = [abs(value) for value in values[settled:]]
+        print(f"{name:>12} {statistics.mean(values) * 1e6:13.1f} {max(values) * 1e6:12.1f}")
+    print(f"drift {estimator.drift * 1e6:+.1f} ppm (true {drift * 1e6:+.1f}), bound {estimator.error_bound * 1e6:.1f} us")
+
+
+def report(name: str, estimator: ClockOffsetEstimator, rtts: list, truth, drift: float) -> None:
+    now = time.monotonic()
+    error = estimator.offset_at(now) - truth(now)
+    rtts = sorted(rtts)
+    print(f"{name:>18} {len(rtts):>6} {rtts[len(rtts) // 2] * 1e6:9.0f} {rtts[int(len(rtts) * 0.99)] * 1e6:9.0f} "
+          f"{error * 1e6:+10.1f} {estimator.error_bound * 1e6:9.1f} {(estimator.drift - drift) * 1e6:+10.1f}")
+
+
+def controller(probes: int, interval: float, offset: float, drift: float) -> None:
+    fake = FakeController(clock_offset=offset, clock_drift=drift).start_in_thread()
+    socket_ext = ExtSocketServer("127.0.0.1", fake.port, robot="bench").create_socket()
+    try:
+        time.sleep(0.05) # non-blocking connect
+        rtts = []
+        for _ in range(probes):
+            sample = socket_ext.probe_clock(timeout=1.0)
+            if sample is not None:
+                rtts.append(sample.t3 - sample.t0)
+            time.sleep(interval)
+        report("controller 'C;'", socket_ext.clock, rtts, lambda now: fake.clock(now) - now, drift)
+        socket_ext.send_data([0, 0, 0], 'T;')
+    finally:
+        socket_ext.close_socket()
+        fake.stop_thread()
+
+
+def zmq_links(probes: int, interval: float) -> None:
+    import server_multiMove
+    context = zmq.Context()
+    command_endpoint, ack_endpoint = Config.cell_endpoints("MM", bind=True)
+    send = context.socket(zmq.PUSH)
+    send.bind(command_endpoint)
+    recv = context.socket(zmq.PULL)
+    recv.setsockopt(zmq.RCVTIMEO, 10000)
+    recv.bind(ack_endpoint)
+    with contextlib.redirect_stdout(io.StringIO()):
+        thread = threading.Thread(target=server_multiMove.main, kwargs={"cell_context": context}, daemon=True)
+        thread.start()
+        recv.recv() # server ready
+        send.send(pack_data(INTERNAL_SOCKET_ONLY))
+        recv.recv() # handshake done
+    dealer = connect_frontend(context, "MM", "bench-clock")
+    try:
+        for name, pair in (("zmq command socket", (send, recv)), ("zmq front-end", (dealer, dealer))):
+            estimator = ClockOffsetEstimator(f"bench-{name}")
+            rtts = []
+            for _ in range(probes):
+                sample = probe_clock(*pair, estimator)
+                if sample is not None:
+                    rtts.append(sample.t3 - sample.t0)
+                time.sleep(interval)
+            report(name, estimator, rtts, lambda now: 0.0, 0.0)
+    finally:
+        with contextlib.redirect_stdout(io.StringIO()):
+            send.send(pack_data(Config.TERMINATION_CODE))
+            thread.join(timeout=10)
+        for socket in (send, recv, dealer):
+            socket.close(linger=0)
+        context.term()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--probes", type=int, default=200, help="Probes per link")
+    parser.add_argument("--interval", type=float, default=0.005, help="Seconds between two probes")
+    parser.add_argument("--offset", type=float, default=12.5, help="Fake controller clock ahead of the host, seconds")
+    parser.add_argument("--drift-ppm", type=float, default=200.0, help="Fake controller clock rate error")
+    args = parser.parse_args()
+
+    Config.CELL_MODE = "single_process"
+    Config.RECORDER_ENABLED = False
+    set_level("WARNING") # no server log lines between the rows
+    drift = args.drift_ppm * 1e-6
+    synthetic(args.probes, args.offset, drift)
+    print(f"\nwindow {Config.CLOCK_WINDOW}, fit over the {Config.CLOCK_FILTER_SHARE:.0%} shortest round trips")
+    print(f"{'link':>18} {'probes':>6} {'rtt p50':>9} {'rtt p99':>9} {'err us':>10} {'bound us':>9} {'drift err':>10}")
+    controller(args.probes, args.interval, args.offset, drift)
+    zmq_links(args.probes, args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Redundant-command suppression benchmark with fake controllers.
+
+Runs a sequence with repeated states (e.g. consecutive jobs that all start
+and end at Home) on one cell, with and without the per-robot command cache,
+and reports wall time, controller round-trips and hit/miss counters.
+
+Run from the PythonHMI directory:
+    python -m benchmarks.bench_command_cache [--jobs 50] [--motion-ms 5]
+"""
+
+import argparse
+import asyncio
+import time
+
+from src.cell.orchestrator import CellExecutor, compile_sequence
+from src.cell.registry import CellSpec, ControllerEndpoint
+from src.communication.fake_controller import FakeController
+
+# one job: Home -> Standby -> Home, so every job after the first starts at a confirmed Home
+JOB = [("Home", "CB_Home"), ("Standby", "CB_Standby"), ("Home", "CB_Home")]
+
+
+async def run(controllers: list[FakeController], steps: list, use_cache: bool) -> tuple[float, CellExecutor]:
+    executor = CellExecutor(CellSpec("bench_cell",
+                                     ControllerEndpoint("127.0.0.1", controllers[0].port),
+                                     ControllerEndpoint("127.0.0.1", controllers[1].port)))
+    if not use_cache:
+        executor.mm_link.command_cache = None
+        executor.cb_link.command_cache = None
+    await executor.connect()
+    start = time.perf_counter()
+    await executor.run_sequence(steps)
+    wall = time.perf_counter() - start
+    await executor.close()
+    return wall, executor
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--jobs", type=int, default=50)
+    parser.add_argument("--motion-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    controllers = [FakeController(motion_time=args.motion_ms / 1000).start_in_thread() for _ in range(2)]
+    steps = compile_sequence("1A", JOB) * args.jobs
+    try:
+        for use_cache in (False, True):
+            sent_before = sum(controller.commands_received for controller in controllers)
+            wall, executor = asyncio.run(run(controllers, steps, use_cache))
+            sent = sum(controller.commands_received for controller in controllers) - sent_before
+            print(f"cache {'on ' if use_cache else 'off'}: {wall:.3f} s, {sent} controller commands")
+            if use_cache:
+                print(f"  {executor.mm_link.command_cache}")
+                print(f"  {executor.cb_link.command_cache}")
+    finally:
+        for controller in controllers:
+            controller.stop_thread()
+
+
+if __name__ == "__main__":
+    main()
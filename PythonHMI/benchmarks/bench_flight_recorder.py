@@ -0,0 +1,83 @@
+"""
+Flight recorder cost and replay benchmark.
+
+1. Mean cost of recording one message (typical ZMQ command / controller
+   message sizes), including segment rollover, against the cost of the
+   ExtSocketServer send path it is attached to.
+2. A session against a fake controller is recorded through
+   AsyncControllerLink, then replayed at original and accelerated speed.
+
+Run from the PythonHMI directory:
+    python -m benchmarks.bench_flight_recorder [--messages 200000] [--steps 50]
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+
+from src.cell.orchestrator import CellExecutor, compile_sequence
+from src.cell.registry import CellSpec, ControllerEndpoint
+from src.communication.fake_controller import FakeController
+from src.communication.protocol import pack_data
+from src.communication.socket_manager import encode_command
+from src.telemetry.flight_recorder import CH_CONTROLLER, CH_ZMQ_COMMAND, DIR_IN, FlightRecorder, segment_paths
+from src.telemetry.replay import load, replay
+
+STEPS = [("Home", "CB_Home"), ("Standby", "CB_Standby")]
+
+
+def record_cost(directory: str, messages: int) -> tuple[float, float, int]:
+    """Mean seconds per recorded message, mean seconds to encode the same command, segments used."""
+    recorder = FlightRecorder("bench", directory, segment_bytes=1024 * 1024, max_segments=4)
+    zmq_frame = pack_data([1, 2, 1])
+    controller_reply = b"9,0,0,0,0,0"
+    start = time.perf_counter()
+    for i in range(messages):
+        recorder.record(CH_ZMQ_COMMAND, DIR_IN, zmq_frame)
+        recorder.record(CH_CONTROLLER, DIR_IN, controller_reply)
+    elapsed = time.perf_counter() - start
+    start = time.perf_counter()
+    for i in range(messages):
+        encode_command([1, 2, 1, 1], 'd;')
+    encode_elapsed = time.perf_counter() - start
+    segments = recorder._index + 1
+    recorder.close()
+    return elapsed / (2 * messages), encode_elapsed / messages, segments
+
+
+async def record_session(directory: str, controller: FakeController, steps: int) -> None:
+    executor = CellExecutor(CellSpec("replay_cell", ControllerEndpoint("127.0.0.1", controller.port)),
+                            recorder_dir=directory)
+    executor.mm_link.command_cache = None  # keep every command in the recording
+    await executor.connect()
+    await executor.run_sequence(compile_sequence("1A", STEPS) * (steps // len(STEPS)))
+    await executor.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, default=200000)
+    parser.add_argument("--steps", type=int, default=50)
+    parser.add_argument("--motion-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        per_message, per_encode, segments = record_cost(directory, args.messages)
+        print(f"record: {per_message * 1e6:.2f} us/message over {2 * args.messages} messages "
+              f"({segments} x 1 MiB segments), encode_command alone {per_encode * 1e6:.2f} us")
+
+        controller = FakeController(motion_time=args.motion_ms / 1000).start_in_thread()
+        try:
+            asyncio.run(record_session(directory, controller, args.steps))
+        finally:
+            controller.stop_thread()
+        target = segment_paths(f"{directory}/replay_cell-MultiMove")[-1]
+        records = load(target)
+        print(f"recorded session: {len(records)} records in {target.rsplit('/', 1)[-1]}")
+        for speed in (1.0, 10.0):
+            replay(records, speed, args.motion_ms / 1000 / speed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Joint frame format benchmark.
+
+Streams a dense joint trajectory (STREAM_MAX_RATE_HZ samples of a smooth
+motion, with one large jump that forces an early keyframe) through every
+frame format a joint target can travel in:
+    text           controller 'j;' command (encode_command), decimal text on TCP
+    float64        pack_data frame, one per target (ZMQ today)
+    delta_i16      compact frames, float32 keyframes + int16 deltas
+    delta_f16      compact frames, float32 keyframes + float16 deltas
+Compact frames are measured one target per frame (interactive streaming) and
+in batches (StreamRouter.send_points). Reports bytes per target, encode and
+decode throughput in targets/s, and the round-trip error against its bound
+(half a FRAME_DELTA_QUANTUM for int16, half a float16 step of the largest
+delta for float16, the float32 rounding of the keyframes); exits with status
+1 if a format exceeds its bound.
+
+Run from the PythonHMI directory:
+    python -m benchmarks.bench_frame_codec [--points 5000] [--width 6] [--batches 1 32 255]
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from config.settings import Config
+from src.communication.protocol import CompactFrameDecoder, CompactFrameEncoder, pack_data, unpack_data
+from src.communication.socket_manager import encode_command
+
+
+def trajectory(points: int, width: int) -> np.ndarray:
+    """(points, width) joint values in degrees, sampled at STREAM_MAX_RATE_HZ."""
+    t = np.arange(points)[:, None] / Config.STREAM_MAX_RATE_HZ
+    joints = np.arange(width)[None, :]
+    values = (150 - 10 * joints) * np.sin(2 * np.pi * 0.2 * (1 + joints % 6) * t + joints)
+    values[points // 2:, 0] += 60 # jump out of the int16 delta range
+    return values
+
+
+def measure(encode, decode, points: np.ndarray):
+    """(bytes per target, encode targets/s, decode targets/s, decoded targets)."""
+    start = time.perf_counter()
+    frames = encode(points)
+    encoded = time.perf_counter() - start
+    start = time.perf_counter()
+    decoded = decode(frames)
+    decoded_time = time.perf_counter() - start
+    size = sum(len(frame) for frame in frames)
+    return size / len(points), len(points) / encoded, len(points) / decoded_time, np.asarray(decoded)
+
+
+def compact(frame_format: int, batch: int):
+    """Encode and decode functions of one compact session, `batch` targets per encode call."""
+    decoder = CompactFrameDecoder(frame_format)
+
+    def encode(points):
+        encoder = CompactFrameEncoder(frame_format, points.shape[1])
+        return [frame for first in range(0, len(points), batch) for frame in encoder.encode(points[first:first + batch])]
+
+    def decode(frames):
+        return np.vstack([decoder.decode(frame) for frame in frames])
+    return encode, decode
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--points", type=int, default=5000)
+    parser.add_argument("--width", type=int, default=6, help="Values per target, 6 or 12 (ROB1 + ROB2)")
+    parser.add_argument("--batches", type=int, nargs="+", default=[1, 32, 255], help="Targets per compact encode call")
+    args = parser.parse_args()
+
+    points = trajectory(args.points, args.width)
+    key_error = float(np.abs(points).max()) * 2.0 ** -24 # float32 rounding of a keyframe
+    largest_delta = float(np.abs(np.diff(points, axis=0)).max())
+    bounds = {
+        "delta_i16": max(Config.FRAME_DELTA_QUANTUM / 2, key_error) * (1 + 1e-6),
+        "delta_f16": largest_delta * 2.0 ** -11 + key_error,
+    }
+    formats = [
+        ("text", 1, lambda values: [encode_command(list(target), 'j;') for target in values],
+         lambda frames: [[float(value) for value in frame[2:].split(b";")] for frame in frames]),
+        ("float64", 1, lambda values: [pack_data(list(target)) for target in values],
+         lambda frames: [unpack_data(frame) for frame in frames]),
+    ]
+    for name, frame_format in (("delta_i16", Config.FRAME_FORMAT_DELTA_I16), ("delta_f16", Config.FRAME_FORMAT_DELTA_F16)):
+        for batch in args.batches:
+            formats.append((name, batch, *compact(frame_format, batch)))
+
+    print(f"{args.points} targets x {args.width} joints, keyframe every {Config.FRAME_KEYFRAME_INTERVAL}, "
+          f"quantum {Config.FRAME_DELTA_QUANTUM} deg, largest step {largest_delta:.3f} deg")
+    print(f"{'format':>10} {'batch':>5} {'bytes/pt':>9} {'vs f64':>7} {'encode/s':>11} {'decode/s':>11} "
+          f"{'max err deg':>11} {'bound':>9}")
+    float64_size = 4 + 8 * args.width
+    failed = False
+    for name, batch, encode, decode in formats:
+        size, encode_rate, decode_rate, decoded = measure(encode, decode, points)
+        error = float(np.abs(decoded - points).max())
+        bound = bounds.get(name)
+        within = bound is None or error <= bound
+        failed |= not within
+        print(f"{name:>10} {batch:5d} {size:9.1f} {size / float64_size:7.1%} {encode_rate:11,.0f} {decode_rate:11,.0f} "
+              f"{error:11.2e} {'' if bound is None else f'{bound:.2e}':>9}{'' if within else '  FAIL'}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Multi-client front-end benchmark.
+
+Runs server_multiMove in a single-process cell (internal socket only, every
+command is acknowledged without a controller) and drives it from many
+DEALER clients on its ROUTER front-end (connect_frontend), each keeping a
+window of commands in flight:
+    clients        throughput in commands/s and ACK latency for 1..64 clients,
+                   and the spread of the per-client shares (every ACK must
+                   come back to the client that sent the command)
+    scheduling     one greedy client (job runner, deep window) against light
+                   clients with one command in flight, under "fifo", "fair" and
+                   "priority" FRONTEND_SCHEDULING: latency of the light clients
+                   and the share of the greedy one
+
+Run from the PythonHMI directory:
+    python -m benchmarks.bench_frontend [--clients 1 4 16 64] [--window 4] [--seconds 1.0]
+"""
+
+import argparse
+import contextlib
+import io
+import statistics
+import threading
+import time
+from collections import deque
+
+import zmq
+
+from config.settings import Config
+from src.communication.priority_lane import connect_frontend
+from src.communication.protocol import pack_data, unpack_data
+
+INTERNAL_SOCKET_ONLY = [3, 3, 3]
+COMMAND = pack_data([1, 1, 1])
+
+
+def start_server(context: zmq.Context):
+    """Start server_multiMove in a thread; returns the clientUI (command, ACK) sockets and the thread."""
+    import server_multiMove
+    command_endpoint, ack_endpoint = Config.cell_endpoints("MM", bind=True)
+    send = context.socket(zmq.PUSH)
+    send.bind(command_endpoint)
+    recv = context.socket(zmq.PULL)
+    recv.setsockopt(zmq.RCVTIMEO, 10000)
+    recv.bind(ack_endpoint)
+    thread = threading.Thread(target=server_multiMove.main, kwargs={"cell_context": context}, daemon=True)
+    thread.start()
+    recv.recv() # server ready
+    send.send(pack_data(INTERNAL_SOCKET_ONLY))
+    recv.recv() # handshake done
+    return send, recv, thread
+
+
+def drive(clients: list, windows: list, seconds: float) -> list:
+    """Keep `windows[i]` commands in flight on clients[i] for `seconds`; ACK latencies per client."""
+    poller = zmq.Poller()
+    sent = [deque() for _ in clients]
+    latencies = [[] for _ in clients]
+    for index, client in enumerate(clients):
+        poller.register(client, zmq.POLLIN)
+        for _ in range(windows[index]):
+            client.send(COMMAND)
+            sent[index].append(time.perf_counter())
+    index_of = {client: index for index, client in enumerate(clients)}
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        for client, _ in poller.poll(100):
+            index = index_of[client]
+            while True:
+                try:
+                    ack = client.recv(zmq.NOBLOCK)
+                except zmq.Again:
+                    break
+                if unpack_data(ack) != Config.ACK_MOTION_COMPLETE:
+                    raise RuntimeError(f"unexpected ACK {unpack_data(ack)}")
+                now = time.perf_counter()
+                latencies[index].append(now - sent[index].popleft())
+                client.send(COMMAND)
+                sent[index].append(now)
+    for index, client in enumerate(clients): # collect the ACKs still in flight
+        while sent[index]:
+            client.recv()
+            sent[index].popleft()
+    return latencies
+
+
+def percentile(values: list, share: float) -> float:
+    return sorted(values)[min(len(values) - 1, int(share * len(values)))] if values else 0.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--window", type=int, default=4, help="Commands in flight per client")
+    parser.add_argument("--seconds", type=float, default=1.0, help="Duration of every run")
+    parser.add_argument("--greedy-window", type=int, default=64)
+    parser.add_argument("--light", type=int, default=7, help="Light clients of the scheduling runs")
+    args = parser.parse_args()
+
+    Config.CELL_MODE = "single_process"
+    Config.RECORDER_ENABLED = False
+    Config.FRONTEND_ENABLED = True
+    context = zmq.Context()
+    with contextlib.redirect_stdout(io.StringIO()):
+        send, recv, thread = start_server(context)
+
+    print(f"{'clients':>7} {'cmds/s':>9} {'p50 us':>8} {'p99 us':>8} {'min share':>9} {'max share':>9}")
+    Config.FRONTEND_SCHEDULING = "fair"
+    for count in args.clients:
+        clients = [connect_frontend(context, "MM", f"client{index}") for index in range(count)]
+        latencies = drive(clients, [args.window] * count, args.seconds)
+        done = [len(values) for values in latencies]
+        merged = [value for values in latencies for value in values]
+        print(f"{count:>7} {sum(done) / args.seconds:9,.0f} {percentile(merged, 0.5) * 1e6:8.0f} "
+              f"{percentile(merged, 0.99) * 1e6:8.0f} {min(done) / sum(done):9.1%} {max(done) / sum(done):9.1%}")
+        for client in clients:
+            client.close(linger=0)
+
+    print(f"\n1 greedy client (window {args.greedy_window}, class 2) + {args.light} light clients (window 1, class 1)")
+    print(f"{'scheduling':>10} {'cmds/s':>9} {'light p50 us':>12} {'light p99 us':>12} {'greedy share':>12}")
+    for scheduling in ("fifo", "fair", "priority"):
+        Config.FRONTEND_SCHEDULING = scheduling
+        clients = [connect_frontend(context, "MM", f"{scheduling}-greedy", scheduling_class=2)]
+        clients += [connect_frontend(context, "MM", f"{scheduling}-light{index}", scheduling_class=1)
+                    for index in range(args.light)]
+        latencies = drive(clients, [args.greedy_window] + [1] * args.light, args.seconds)
+        light = [value for values in latencies[1:] for value in values]
+        total = sum(len(values) for values in latencies)
+        print(f"{scheduling:>10} {total / args.seconds:9,.0f} {statistics.median(light) * 1e6:12.0f} "
+              f"{percentile(light, 0.99) * 1e6:12.0f} {len(latencies[0]) / total:12.1%}")
+        for client in clients:
+            client.close(linger=0)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        send.send(pack_data(Config.TERMINATION_CODE))
+        thread.join(timeout=10)
+    send.close(linger=0)
+    recv.close(linger=0)
+    context.term()
+
+
+if __name__ == "__main__":
+    main()
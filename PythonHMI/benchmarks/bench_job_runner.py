@@ -0,0 +1,81 @@
+"""
+Batch runner benchmark: back-to-back jobs on one cell with fake controllers.
+
+Compares the BatchRunner (next job compiled while the current one runs)
+with a plain loop that compiles each job only after the previous one has
+finished, and reports cycle time and jobs/hour for both.
+
+Run from the PythonHMI directory:
+    python -m benchmarks.bench_job_runner [--jobs 50] [--motion-ms 5]
+"""
+
+import argparse
+import asyncio
+import threading
+import time
+
+from src.cell.orchestrator import CellExecutor, compile_sequence
+from src.cell.registry import CellSpec, ControllerEndpoint
+from src.communication.fake_controller import FakeController
+from src.execution.job_queue import BatchRunner, CompiledJob, Job, JobQueue, compile_job
+
+
+def compile_for_cell(job: Job) -> CompiledJob:
+    """Validate the job and pre-compile its controller commands."""
+    compiled = compile_job(job)
+    compiled.cell_steps = compile_sequence(job.path, compiled.steps)
+    return compiled
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--jobs", type=int, default=50)
+    parser.add_argument("--motion-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    controllers = [FakeController(motion_time=args.motion_ms / 1000).start_in_thread() for _ in range(2)]
+    loop = asyncio.new_event_loop()
+    loop_thread = threading.Thread(target=loop.run_forever, daemon=True)
+    loop_thread.start()
+    executor = CellExecutor(CellSpec("bench_cell",
+                                     ControllerEndpoint("127.0.0.1", controllers[0].port),
+                                     ControllerEndpoint("127.0.0.1", controllers[1].port)))
+    asyncio.run_coroutine_threadsafe(executor.connect(), loop).result()
+
+    def execute(compiled: CompiledJob) -> None:
+        asyncio.run_coroutine_threadsafe(executor.run_sequence(compiled.cell_steps), loop).result()
+
+    jobs = [Job("1A", "object4") for _ in range(args.jobs)]
+    try:
+        start = time.perf_counter()
+        for job in jobs:
+            execute(compile_for_cell(job))
+        sequential = time.perf_counter() - start
+
+        job_queue = JobQueue()
+        for job in jobs:
+            job_queue.submit(job)
+        runner = BatchRunner(job_queue, execute, compile_fn=compile_for_cell)
+        start = time.perf_counter()
+        runner.run()
+        batched = time.perf_counter() - start
+        runner.close()
+
+        start = time.perf_counter()
+        for job in jobs:
+            compile_for_cell(job)
+        compile_ms = (time.perf_counter() - start) / args.jobs * 1e3
+
+        print(f"{args.jobs} jobs, simulated motion {args.motion_ms} ms, compile {compile_ms:.3f} ms/job")
+        print(f"compile-then-run: {sequential / args.jobs * 1e3:>7.2f} ms/job {args.jobs / sequential * 3600:>10.0f} jobs/h")
+        print(f"batch runner:     {batched / args.jobs * 1e3:>7.2f} ms/job {args.jobs / batched * 3600:>10.0f} jobs/h")
+        print(f"runner summary: {runner.summary()}")
+    finally:
+        asyncio.run_coroutine_threadsafe(executor.close(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        for controller in controllers:
+            controller.stop_thread()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Batch IK/FK throughput benchmark.
+
+Builds a smooth joint trajectory for the ROB1 model of Config.KINEMATICS,
+turns it into tool0 poses with the vectorized forward kinematics, and solves
+the poses back with BatchIKSolver in batches of different sizes (batch 1 is
+the per-point IK call the streaming path would otherwise need). Reports FK
+and IK throughput in poses/s, the share of converged poses, the largest
+remaining position error and the largest joint step between two consecutive
+solutions (seed continuity across batches).
+
+Run from the PythonHMI directory:
+    python -m benchmarks.bench_kinematics [--poses 2000] [--batches 1 10 100 1000]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from src.kinematics import BatchIKSolver, RobotModel
+
+
+def trajectory(poses: int) -> np.ndarray:
+    """(poses, 6) joint values in degrees, away from the wrist singularity."""
+    t = np.linspace(0, 2 * np.pi, poses)
+    return np.stack([40 * np.sin(t), 20 + 15 * np.sin(2 * t), -10 + 20 * np.cos(t),
+                     30 * np.sin(t), 45 + 20 * np.cos(3 * t), 60 * np.sin(t)], axis=1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--poses", type=int, default=2000)
+    parser.add_argument("--batches", type=int, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument("--robot", default="ROB1", help="Robot of Config.KINEMATICS")
+    args = parser.parse_args()
+
+    model = RobotModel.from_config(args.robot)
+    joints = trajectory(args.poses)
+    start = time.perf_counter()
+    poses = model.forward(joints)
+    fk_rate = args.poses / (time.perf_counter() - start)
+
+    print(f"{args.poses} poses, {args.robot}, FK {fk_rate:,.0f} poses/s")
+    print(f"{'batch':>6} {'IK poses/s':>11} {'converged':>9} {'max err mm':>10} {'max step deg':>12} {'iter/batch':>10}")
+    for batch in args.batches:
+        solver = BatchIKSolver(model, seed_deg=joints[0])
+        results = []
+        start = time.perf_counter()
+        for first in range(0, args.poses, batch):
+            results.append(solver.solve(poses[first:first + batch]))
+        elapsed = time.perf_counter() - start
+        solved = np.vstack([result.joints for result in results])
+        converged = np.concatenate([result.converged for result in results])
+        error = max(float(result.position_error.max()) for result in results)
+        step = float(np.abs(np.diff(solved, axis=0)).max())
+        iterations = np.mean([result.iterations for result in results])
+        print(f"{batch:>6} {args.poses / elapsed:11,.0f} {converged.mean():9.1%} {error:10.2e} {step:12.3f} {iterations:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
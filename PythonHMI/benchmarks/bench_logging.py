@@ -0,0 +1,66 @@
+"""
+Hot-loop logging overhead: print() versus the queue-backed logger.
+
+Simulates the controller wait loop (parse one controller message, report it)
+and measures the caller-side cost per iteration for:
+  - print()           what the servers did before (stdout to /dev/null)
+  - logger, DEBUG     every message enabled, rate limited, written by the background thread
+  - logger, INFO      per-message DEBUG records filtered by level
+  - no logging        lower bound
+
+Run from the PythonHMI directory:
+    python -m benchmarks.bench_logging [--iterations 200000]
+"""
+
+import argparse
+import contextlib
+import os
+import time
+
+from src.communication.socket_manager import parse_position
+from src.telemetry import logger as structured_log
+from src.telemetry.logger import LogWriter, StructuredLogger
+
+MESSAGE = "9,412.5,-12.25,733.0,0.0,1.0"
+
+
+def run(iterations: int, report) -> float:
+    """Seconds per iteration of parse + report."""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        values = parse_position(MESSAGE)
+        report(values)
+    return (time.perf_counter() - start) / iterations
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=200000)
+    args = parser.parse_args()
+
+    with open(os.devnull, "w") as devnull:
+        with contextlib.redirect_stdout(devnull):
+            print_cost = run(args.iterations,
+                             lambda values: print(f"Response received from external socket: {values}"))
+
+        writer = LogWriter(stream=devnull)
+        log = StructuredLogger("bench", writer, structured_log.DEBUG)
+        debug_cost = run(args.iterations,
+                         lambda values: log.debug("Response received from external socket", values=values))
+        writer.flush()
+        written, dropped = writer.written, writer.dropped
+        log.level = structured_log.INFO
+        info_cost = run(args.iterations,
+                        lambda values: log.debug("Response received from external socket", values=values))
+        writer.close()
+    none_cost = run(args.iterations, lambda values: None)
+
+    print(f"{args.iterations} iterations of the controller wait loop")
+    print(f"  print()          {print_cost * 1e6:>7.3f} us/iter")
+    print(f"  logger DEBUG     {debug_cost * 1e6:>7.3f} us/iter ({written} written, {dropped} dropped, rest rate limited)")
+    print(f"  logger INFO      {info_cost * 1e6:>7.3f} us/iter")
+    print(f"  no logging       {none_cost * 1e6:>7.3f} us/iter")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Lookahead staging benchmark: controller idle gap per step, off vs on.
+
+Runs the real server_multiMove and server_cobot loops in single-process cell
+mode against one fake controller (virtual controller mode) and executes the
+same server-side sequence in rounds:
+    learning      lookahead off, measures the motion durations
+    lookahead off every 'd;' sent after the previous ACK
+    lookahead on  the next step staged LOOKAHEAD_LEAD_S before the predicted end
+and reports the idle time of the robots between two motions (measured in the
+fake controller), the servers' own estimate (abb_step_idle_seconds), steps per
+second and the number of staged commands.
+
+Run from the PythonHMI directory:
+    python -m benchmarks.bench_lookahead [--steps 100] [--motion-ms 20] [--lead-ms 5]
+"""
+
+import argparse
+import contextlib
+import io
+import statistics
+import threading
+import time
+
+import zmq
+
+from config.settings import Config
+from src.communication.data_structures import LinkedList
+from src.communication.fake_controller import FakeController
+from src.communication.protocol import pack_data
+
+VIRTUAL_CONTROLLER = [1, 1, 1]
+VC_PORT = 5024 # the servers connect to 127.0.0.1:5024 in virtual controller mode
+
+
+def build(steps: int) -> LinkedList:
+    sequence = LinkedList()
+    states = [("Home", "CB_Home"), ("Standby", "CB_Standby")] # alternate, so no step is a cache hit
+    for index in range(steps):
+        mm_state, cb_state = states[index % 2]
+        sequence.append(mm_state, cb_state, 1 if index == 0 else 3 if index == steps - 1 else 2)
+    return sequence
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--steps", type=int, default=100)
+    parser.add_argument("--motion-ms", type=float, default=20.0, help="Simulated motion time per state command")
+    parser.add_argument("--lead-ms", type=float, default=5.0, help="LOOKAHEAD_LEAD_S, in ms")
+    args = parser.parse_args()
+
+    Config.CELL_MODE = "single_process"
+    Config.RECORDER_ENABLED = False
+    Config.LOOKAHEAD_SAVE = False
+    Config.LOOKAHEAD_LEAD_S = args.lead_ms / 1000
+    controller = FakeController(port=VC_PORT, motion_time=args.motion_ms / 1000).start_in_thread()
+    context = zmq.Context()
+    sockets = []
+    for robot in ("MM", "CB"):
+        command_endpoint, ack_endpoint = Config.cell_endpoints(robot, bind=True)
+        send = context.socket(zmq.PUSH)
+        send.bind(command_endpoint)
+        recv = context.socket(zmq.PULL)
+        recv.setsockopt(zmq.RCVTIMEO, 10000)
+        recv.bind(ack_endpoint)
+        sockets += [send, recv]
+
+    import server_multiMove
+    import server_cobot
+    servers = [threading.Thread(target=server.main, kwargs={"cell_context": context}, daemon=True)
+               for server in (server_multiMove, server_cobot)]
+    lookaheads = [server_multiMove.lookahead, server_cobot.lookahead]
+    results = {}
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            for server in servers:
+                server.start()
+            for send, recv in (sockets[0:2], sockets[2:4]):
+                recv.recv() # server ready
+                send.send(pack_data(VIRTUAL_CONTROLLER))
+                recv.recv() # controller connected
+
+            for name, enabled in (("learning", False), ("lookahead off", False), ("lookahead on", True)):
+                Config.LOOKAHEAD_ENABLED = enabled
+                controller.state_idle_gaps.clear()
+                staged = sum(lookahead.metric_staged.value for lookahead in lookaheads)
+                estimated = [(lookahead.metric_idle.sum, lookahead.metric_idle.count) for lookahead in lookaheads]
+                sequence = build(args.steps)
+                start = time.perf_counter()
+                LinkedList.execute_on_servers(sequence, sequence.head, "1A", *sockets)
+                elapsed = time.perf_counter() - start
+                gaps = sorted(controller.state_idle_gaps)
+                idle_sum = sum(lookahead.metric_idle.sum - before for lookahead, (before, _) in zip(lookaheads, estimated))
+                idle_count = sum(lookahead.metric_idle.count - before for lookahead, (_, before) in zip(lookaheads, estimated))
+                results[name] = {
+                    "steps_per_second": args.steps / elapsed,
+                    "idle_ms": statistics.mean(gaps) * 1e3 if gaps else 0.0,
+                    "idle_p95_ms": gaps[int(0.95 * (len(gaps) - 1))] * 1e3 if gaps else 0.0,
+                    "estimated_ms": idle_sum / idle_count * 1e3 if idle_count else 0.0,
+                    "staged": sum(lookahead.metric_staged.value for lookahead in lookaheads) - staged,
+                }
+
+            for send in sockets[0::2]:
+                send.send(pack_data(Config.TERMINATION_CODE))
+            for server in servers:
+                server.join(timeout=10)
+    finally:
+        for socket in sockets:
+            socket.close(linger=0)
+        context.term()
+        controller.stop_thread()
+
+    print(f"{args.steps} steps x 2 robots, {args.motion_ms} ms motion, lead {args.lead_ms} ms")
+    print(f"{'':>14} {'steps/s':>8} {'idle ms/step':>12} {'idle p95 ms':>11} {'server est. ms':>14} {'staged':>6}")
+    for name, run in results.items():
+        print(f"{name:>14} {run['steps_per_second']:8.1f} {run['idle_ms']:12.3f} {run['idle_p95_ms']:11.3f} "
+              f"{run['estimated_ms']:14.3f} {run['staged']:6d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Metrics cost and scrape-interference benchmark.
+
+1. Cost of Counter.inc() and Histogram.observe() on the hot path.
+2. Command round-trip through the single-process server_multiMove loop,
+   with and without a scraper process pulling /metrics every few milliseconds,
+   to show that a scrape does not stall the control loop.
+
+Run from the PythonHMI directory:
+    python -m benchmarks.bench_metrics [--commands 5000] [--scrape-ms 5]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks.bench_cell_mode import bench_single_process
+from config.settings import Config
+from src.telemetry.metrics import Counter, Histogram
+
+
+def update_cost(iterations: int = 1000000) -> tuple[float, float]:
+    """Mean seconds per Counter.inc() and per Histogram.observe()."""
+    counter = Counter("bench_total", ())
+    histogram = Histogram("bench_seconds", ())
+    start = time.perf_counter()
+    for _ in range(iterations):
+        counter.inc()
+    inc = (time.perf_counter() - start) / iterations
+    start = time.perf_counter()
+    for i in range(iterations):
+        histogram.observe(i % 1000 * 1e-4)
+    observe = (time.perf_counter() - start) / iterations
+    return inc, observe
+
+
+SCRAPER = """
+import sys, time, urllib.request
+url, interval = sys.argv[1], float(sys.argv[2])
+scrapes, total = 0, 0.0
+while True:
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=1) as response:
+            response.read()
+        scrapes += 1
+        total += time.perf_counter() - start
+        print(scrapes, total / scrapes, flush=True)
+    except OSError:
+        pass  # server not up yet
+    time.sleep(interval)
+"""
+
+
+def start_scraper(interval: float) -> subprocess.Popen:
+    """Scrape /metrics from another process, like Prometheus would."""
+    url = f"http://{Config.METRICS_HOST}:{Config.MM_METRICS_PORT}/metrics"
+    return subprocess.Popen([sys.executable, "-c", SCRAPER, url, str(interval)],
+                            stdout=subprocess.PIPE, text=True)
+
+
+def _summary(name: str, rtts: list[float]) -> None:
+    micros = sorted(rtt * 1e6 for rtt in rtts)
+    print(f"{name:>16}: RTT median {statistics.median(micros):8.1f} us   p99 {micros[int(len(micros) * 0.99) - 1]:8.1f} us")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--commands", type=int, default=5000)
+    parser.add_argument("--scrape-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    inc, observe = update_cost()
+    print(f"Counter.inc {inc * 1e9:.0f} ns, Histogram.observe {observe * 1e9:.0f} ns")
+
+    _, rtts = bench_single_process(args.commands)
+    _summary("no scraping", rtts)
+
+    scraper = start_scraper(args.scrape_ms / 1000)
+    try:
+        _, rtts = bench_single_process(args.commands)
+    finally:
+        scraper.kill()
+    _summary(f"scrape {args.scrape_ms:g} ms", rtts)
+    lines = scraper.stdout.read().split()
+    if lines:
+        print(f"{lines[-2]} scrapes, mean {float(lines[-1]) * 1e3:.2f} ms per scrape")
+
+if __name__ == "__main__":
+    main()
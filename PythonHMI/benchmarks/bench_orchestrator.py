@@ -0,0 +1,74 @@
+"""
+Scaling benchmark for the multi-cell orchestrator with fake controllers.
+
+Runs the same sequence on 1, 8 and 32 cells from one event loop. The fake
+controllers (two per cell) run on their own event loop thread and simulate
+a fixed motion time per command.
+
+Run from the PythonHMI directory:
+    python -m benchmarks.bench_orchestrator [--cells 1 8 32] [--steps 50] [--motion-ms 5]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from src.cell.orchestrator import CellOrchestrator, compile_sequence
+from src.cell.registry import CellRegistry, CellSpec, ControllerEndpoint
+from src.communication.fake_controller import FakeController
+
+STEPS = [("Home", "CB_Home"), ("Standby", "CB_Standby")]
+
+
+async def run_scale(controllers: list[FakeController], n_cells: int, steps: int) -> tuple[float, list[float]]:
+    """Drive `steps` steps on `n_cells` cells.
+
+    Returns:
+        (wall time in seconds, all step durations)
+    """
+    registry = CellRegistry(
+        CellSpec(f"cell_{i}",
+                 ControllerEndpoint("127.0.0.1", controllers[2 * i].port),
+                 ControllerEndpoint("127.0.0.1", controllers[2 * i + 1].port))
+        for i in range(n_cells))
+    sequence = (compile_sequence("1A", STEPS) * steps)[:steps]
+
+    orchestrator = CellOrchestrator(registry)
+    await orchestrator.start()
+    start = time.perf_counter()
+    errors = await orchestrator.run({name: sequence for name in registry.names()})
+    wall = time.perf_counter() - start
+    await orchestrator.stop()
+    if errors:
+        raise RuntimeError(f"cells failed: {errors}")
+    durations = [d for executor in orchestrator.executors.values() for d in executor.step_durations]
+    return wall, durations
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--cells", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--steps", type=int, default=50)
+    parser.add_argument("--motion-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    controllers = [FakeController(motion_time=args.motion_ms / 1000).start_in_thread()
+                   for _ in range(2 * max(args.cells))]
+    print(f"{args.steps} steps per cell, simulated motion {args.motion_ms} ms")
+    print(f"{'cells':>6} {'wall s':>8} {'steps/s':>10} {'median ms':>10} {'p99 ms':>8} {'overhead ms':>12}")
+    try:
+        for n_cells in args.cells:
+            wall, durations = asyncio.run(run_scale(controllers, n_cells, args.steps))
+            durations_ms = sorted(d * 1e3 for d in durations)
+            median = statistics.median(durations_ms)
+            p99 = durations_ms[int(len(durations_ms) * 0.99) - 1]
+            print(f"{n_cells:>6} {wall:>8.3f} {n_cells * args.steps / wall:>10.1f} {median:>10.2f} "
+                  f"{p99:>8.2f} {median - args.motion_ms:>12.2f}")
+    finally:
+        for controller in controllers:
+            controller.stop_thread()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Control-lane propagation benchmark: STOP behind a backlog of motion commands.
+
+Queues N motion commands on the command socket, then sends one STOP and
+measures how long the server side takes to see it:
+  - fifo:  STOP on the command socket, read in order (previous behaviour)
+  - lane:  STOP on the control socket through PriorityCommandLane
+  - wait:  STOP while the server is busy in a motion wait loop that calls
+           check_control() once per simulated controller read
+
+Run from the PythonHMI directory:
+    python -m benchmarks.bench_priority_lane [--backlog 0 100 1000] [--runs 50]
+"""
+
+import argparse
+import statistics
+import threading
+import time
+
+import zmq
+
+from config.settings import Config
+from src.communication.priority_lane import ControlClient, PriorityCommandLane
+from src.communication.protocol import pack_data, unpack_data
+
+MOTION_PACKET = pack_data([1, 2, 1])
+
+
+def make_pair(context: zmq.Context, name: str) -> tuple[zmq.Socket, zmq.Socket]:
+    push = context.socket(zmq.PUSH)
+    push.bind(f"inproc://{name}")
+    pull = context.socket(zmq.PULL)
+    pull.connect(f"inproc://{name}")
+    return push, pull
+
+
+def run_fifo(command_push: zmq.Socket, command_pull: zmq.Socket, backlog: int) -> float:
+    """STOP queued behind the backlog on the single command socket."""
+    for _ in range(backlog):
+        command_push.send(MOTION_PACKET)
+    command_push.send(pack_data([Config.CONTROL_STOP, 0, time.time()]))
+    while True:
+        data = unpack_data(command_pull.recv())
+        if data is not None and len(data) == 3 and data[0] == Config.CONTROL_STOP:
+            return time.time() - data[2]
+
+
+def run_lane(command_push: zmq.Socket, lane: PriorityCommandLane, client: ControlClient, backlog: int) -> float:
+    """STOP on the control socket; the lane hands it out first and flushes the backlog."""
+    for _ in range(backlog):
+        command_push.send(MOTION_PACKET)
+    client.stop()
+    while True:
+        item = lane.next(100)
+        if item is not None and item.is_control:
+            if len(item.flushed) + len(lane) < backlog:
+                raise RuntimeError("motion commands lost before the flush")
+            return lane.stats.last
+
+
+def run_wait_loop(lane: PriorityCommandLane, client: ControlClient, read_period: float) -> float:
+    """STOP sent while the server thread is inside a motion wait loop."""
+    seen = threading.Event()
+
+    def wait_loop() -> None:
+        while not seen.is_set():
+            if lane.check_control() is not None:
+                seen.set()
+            time.sleep(read_period)  # stands in for ExtSocketServer.receive_data()
+
+    worker = threading.Thread(target=wait_loop)
+    worker.start()
+    time.sleep(read_period * 2)
+    client.stop()
+    worker.join()
+    return lane.stats.last
+
+
+def summary(latencies: list[float]) -> str:
+    latencies_us = sorted(latency * 1e6 for latency in latencies)
+    return (f"median {statistics.median(latencies_us):>9.1f} us  "
+            f"p99 {latencies_us[max(0, int(len(latencies_us) * 0.99) - 1)]:>9.1f} us")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--backlog", type=int, nargs="+", default=[0, 100, 1000])
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--read-ms", type=float, default=1.0, help="simulated controller read period")
+    args = parser.parse_args()
+
+    context = zmq.Context()
+    command_push, command_pull = make_pair(context, "bench_command")
+    control_push, control_pull = make_pair(context, "bench_control")
+    lane = PriorityCommandLane(command_pull, control_pull)
+    client = ControlClient(control_push)
+    try:
+        for backlog in args.backlog:
+            fifo = [run_fifo(command_push, command_pull, backlog) for _ in range(args.runs)]
+            lane_latencies = [run_lane(command_push, lane, client, backlog) for _ in range(args.runs)]
+            print(f"backlog {backlog:>5}  fifo: {summary(fifo)}   lane: {summary(lane_latencies)}")
+        waits = [run_wait_loop(lane, client, args.read_ms / 1000) for _ in range(args.runs)]
+        print(f"in motion wait loop ({args.read_ms} ms reads): {summary(waits)}")
+    finally:
+        for socket in (command_push, command_pull, control_push, control_pull):
+            socket.close()
+        context.term()
+
+
+if __name__ == "__main__":
+    main()
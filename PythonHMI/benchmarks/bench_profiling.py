@@ -0,0 +1,89 @@
+"""
+On-demand profiling overhead benchmark.
+
+Command round-trip through the single-process server_multiMove loop with
+profiling off, then with a sampling session, a cProfile session and a
+sampling session with tracemalloc, each started through the PROFILE
+control on the priority lane, exactly as clientUI's 'p' option does. The session results are written to a
+temporary folder and listed.
+
+Run from the PythonHMI directory:
+    python -m benchmarks.bench_profiling [--commands 5000]
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+import zmq
+
+from config.settings import Config
+from src.communication.priority_lane import ControlClient
+from src.communication.protocol import pack_data
+from src.telemetry import profiling
+
+INTERNAL_SOCKET_ONLY = [3, 3, 3]
+
+
+def run_session(commands: int, mode: str, memory: bool = False) -> list[float]:
+    """Round-trips through one server run, profiling with `mode` (None = off) for the whole run."""
+    import server_multiMove
+    Config.CELL_MODE = "single_process"
+    Config.PROFILE_MODE = mode or profiling.MODE_SAMPLE
+    Config.PROFILE_MEMORY = memory
+    context = zmq.Context()
+    command_endpoint, ack_endpoint = Config.cell_endpoints("MM", bind=True)
+    send = context.socket(zmq.PUSH)
+    send.bind(command_endpoint)
+    recv = context.socket(zmq.PULL)
+    recv.setsockopt(zmq.RCVTIMEO, 10000)
+    recv.bind(ack_endpoint)
+    control_socket = context.socket(zmq.PUSH)
+    control_socket.bind(Config.control_endpoint("MM", bind=True))
+    control = ControlClient(control_socket)
+
+    thread = threading.Thread(target=server_multiMove.main, kwargs={"cell_context": context}, daemon=True)
+    thread.start()
+    recv.recv()
+    send.send(pack_data(INTERNAL_SOCKET_ONLY))
+    recv.recv()
+    command = pack_data([1, 1, 1])
+    if mode is not None:
+        control.profile()
+        send.send(command)  # the control is handed out before this command
+        recv.recv()
+    rtts = []
+    for _ in range(commands):
+        t0 = time.perf_counter()
+        send.send(command)
+        recv.recv()
+        rtts.append(time.perf_counter() - t0)
+    send.send(pack_data(Config.TERMINATION_CODE))  # the server stops the session on shutdown
+    thread.join(timeout=30)
+    for socket in (send, recv, control_socket):
+        socket.close(linger=0)
+    context.term()
+    return rtts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--commands", type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        Config.PROFILE_DIR = directory
+        for mode, memory in ((None, False), (profiling.MODE_SAMPLE, False), (profiling.MODE_CPROFILE, False),
+                             (profiling.MODE_SAMPLE, True)):
+            micros = sorted(rtt * 1e6 for rtt in run_session(args.commands, mode, memory))
+            label = (mode or "off") + ("+memory" if memory else "")
+            print(f"{label:>14}: RTT median {statistics.median(micros):8.1f} us   "
+                  f"p99 {micros[int(len(micros) * 0.99) - 1]:8.1f} us")
+        for name in sorted(os.listdir(directory)):
+            print(f"  {name:<48} {os.path.getsize(os.path.join(directory, name)):>9} bytes")
+
+if __name__ == "__main__":
+    main()
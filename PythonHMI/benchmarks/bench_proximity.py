@@ -0,0 +1,108 @@
+"""
+ROB1/ROB2 proximity check benchmark.
+
+Measures the capsule distance check of src/kinematics/proximity.py:
+    check          one batch of N synchronized ROB1 + ROB2 targets, time per
+                   batch and per target, and the share of the stream period
+                   (1 / STREAM_MAX_RATE_HZ) a target costs
+    trajectory     both arms swinging towards each other: minimum distance
+                   and first index closer than the clearance
+    ring stream    ROB1 + ROB2 pairs drained from the shared-memory ring by
+                   server_multiMove.server.drain_stream_ring into a fake controller,
+                   with the check off and on
+and reports targets per second for each.
+
+Run from the PythonHMI directory:
+    python -m benchmarks.bench_proximity [--points 2000] [--chunks 1 32 1000 10000]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from config.settings import Config
+from src.communication.fake_controller import FakeController
+from src.communication.shared_memory_ring import SharedJointRing
+from src.communication.socket_manager import ExtSocketServer
+from src.kinematics import ProximityChecker
+
+RING_NAME = "abb_bench_proximity"
+
+
+def clear_pairs(points: int) -> np.ndarray:
+    """(points, 12) ROB1 + ROB2 targets that never come closer than the clearance."""
+    t = np.linspace(0, 2 * np.pi, points)
+    rob1 = np.stack([30 * np.sin(t), -20 + 10 * np.sin(2 * t), 10 * np.cos(t), 0 * t, 30 + 0 * t, 0 * t], axis=1)
+    return np.hstack([rob1, rob1 * [-1, 1, 1, 1, 1, 1]])
+
+
+def colliding(points: int) -> np.ndarray:
+    """(points, 12) targets with both arms leaning forward, towards each other."""
+    pairs = np.zeros((points, 12))
+    pairs[:, 1] = pairs[:, 7] = np.linspace(0, 60, points)
+    return pairs
+
+
+def stream(pairs: np.ndarray, enabled: bool) -> float:
+    """Targets per second through drain_stream_ring, proximity check on or off."""
+    import server_multiMove
+    controller = FakeController(stream_buffer=10).start_in_thread()
+    socket_ext = ExtSocketServer("127.0.0.1", controller.port, robot="bench").create_socket()
+    ring = SharedJointRing.create(RING_NAME, slots=len(pairs) + 1)
+    Config.STREAM_DUAL_ARM_ENABLED = True # the fake controller takes 'J;' pairs
+    server_multiMove.server.proximity_checker = ProximityChecker.from_config() if enabled else None
+    server_multiMove.server.joint_streamer = None
+    try:
+        time.sleep(0.05) # non-blocking connect
+        socket_ext.send_data([0, 0, 0], 'I;')
+        while not socket_ext.receive_data(): # handshake
+            time.sleep(0.001)
+        for pair in pairs:
+            ring.push(pair)
+        start = time.perf_counter()
+        queued = server_multiMove.server.drain_stream_ring(ring, socket_ext)
+        server_multiMove.server.finish_joint_stream()
+        elapsed = time.perf_counter() - start
+        socket_ext.send_data([0, 0, 0], 'T;')
+    finally:
+        server_multiMove.server.proximity_checker = None
+        ring.close()
+        socket_ext.close_socket()
+        controller.stop_thread()
+    return queued / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--points", type=int, default=2000, help="Targets of the trajectory and ring stream runs")
+    parser.add_argument("--chunks", type=int, nargs="+", default=[1, 32, 1000, 10000])
+    args = parser.parse_args()
+
+    checker = ProximityChecker.from_config()
+    period = 1 / Config.STREAM_MAX_RATE_HZ
+    print(f"clearance {checker.clearance} mm, stream period {period * 1e3:.1f} ms")
+    print(f"{'chunk':>6} {'us/chunk':>10} {'us/target':>9} {'targets/s':>10} {'of period':>9}")
+    for chunk in args.chunks:
+        pairs = clear_pairs(chunk)
+        repeats = max(3, 20000 // chunk)
+        start = time.perf_counter()
+        for _ in range(repeats):
+            checker.check_pairs(pairs)
+        elapsed = (time.perf_counter() - start) / repeats
+        print(f"{chunk:>6} {elapsed * 1e6:10.1f} {elapsed / chunk * 1e6:9.2f} {chunk / elapsed:10,.0f} "
+              f"{elapsed / chunk / period:9.2%}")
+
+    report = checker.check_pairs(colliding(args.points))
+    print(f"colliding trajectory: min distance {report.min_distance:.1f} mm at index {report.min_index}, "
+          f"first violation at index {report.first_violation} of {args.points}")
+
+    pairs = clear_pairs(args.points)
+    off = stream(pairs, False)
+    on = stream(pairs, True)
+    print(f"ring stream ({Config.PROXIMITY_CHUNK}-target chunks): check off {off:,.0f} targets/s, "
+          f"check on {on:,.0f} targets/s ({on / off - 1:+.1%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Sequence execution benchmark: client-released steps vs server-side programs.
+
+Runs the real server_multiMove and server_cobot loops in single-process cell
+mode against one fake controller (virtual controller mode) and executes the
+same state sequence twice:
+    client released  traverse_and_execute, every step released by clientUI
+                     after both server ACKs (the 5 Hz pacing left out)
+    server side      execute_on_servers, one upload per server, barriers only
+                     on the sync steps
+and reports steps per second and the overhead per step over the motion time.
+
+Run from the PythonHMI directory:
+    python -m benchmarks.bench_server_sequence [--steps 100] [--motion-ms 10] [--sync-every 0]
+"""
+
+import argparse
+import contextlib
+import io
+import sys
+import threading
+import time
+
+import zmq
+
+from config.settings import Config
+from src.communication.data_structures import LinkedList
+from src.communication.fake_controller import FakeController
+from src.communication.protocol import pack_data
+
+VIRTUAL_CONTROLLER = [1, 1, 1]
+VC_PORT = 5024 # the servers connect to 127.0.0.1:5024 in virtual controller mode
+
+
+def build(steps: int, sync_every: int) -> LinkedList:
+    sequence = LinkedList()
+    states = [("Home", "CB_Home"), ("Standby", "CB_Standby")] # alternate, so no step is a cache hit
+    for index in range(steps):
+        mm_state, cb_state = states[index % 2]
+        sequence.append(mm_state, cb_state, 1 if index == 0 else 3 if index == steps - 1 else 2,
+                        sync=bool(sync_every) and index % sync_every == 0)
+    return sequence
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--steps", type=int, default=100)
+    parser.add_argument("--motion-ms", type=float, default=10.0, help="Simulated motion time per state command")
+    parser.add_argument("--sync-every", type=int, default=0, help="Barrier every N steps, 0 = none")
+    args = parser.parse_args()
+
+    Config.CELL_MODE = "single_process"
+    Config.RECORDER_ENABLED = False
+    Config.EXECUTION_LOOP_FREQ = 0 # measure the step round trips, not the 5 Hz pacing
+    controller = FakeController(port=VC_PORT, motion_time=args.motion_ms / 1000).start_in_thread()
+    context = zmq.Context()
+    sockets = []
+    for robot in ("MM", "CB"):
+        command_endpoint, ack_endpoint = Config.cell_endpoints(robot, bind=True)
+        send = context.socket(zmq.PUSH)
+        send.bind(command_endpoint)
+        recv = context.socket(zmq.PULL)
+        recv.setsockopt(zmq.RCVTIMEO, 10000)
+        recv.bind(ack_endpoint)
+        sockets += [send, recv]
+
+    import server_multiMove
+    import server_cobot
+    servers = [threading.Thread(target=server.main, kwargs={"cell_context": context}, daemon=True)
+               for server in (server_multiMove, server_cobot)]
+    results = {}
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(max(limit, args.steps * 10)) # traverse_and_execute recurses once per node
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            for server in servers:
+                server.start()
+            for send, recv in (sockets[0:2], sockets[2:4]):
+                recv.recv() # server ready
+                send.send(pack_data(VIRTUAL_CONTROLLER))
+                recv.recv() # controller connected
+
+            for name, execute in (("client released", LinkedList.traverse_and_execute),
+                                  ("server side", LinkedList.execute_on_servers)):
+                sequence = build(args.steps, args.sync_every)
+                start = time.perf_counter()
+                execute(sequence, sequence.head, "1A", *sockets)
+                results[name] = time.perf_counter() - start
+
+            for send in sockets[0::2]:
+                send.send(pack_data(Config.TERMINATION_CODE))
+            for server in servers:
+                server.join(timeout=10)
+    finally:
+        sys.setrecursionlimit(limit)
+        for socket in sockets:
+            socket.close(linger=0)
+        context.term()
+        controller.stop_thread()
+
+    print(f"{args.steps} steps, {args.motion_ms} ms motion, "
+          f"{'no barriers' if not args.sync_every else f'barrier every {args.sync_every} steps'}")
+    print(f"{'':>16} {'steps/s':>8} {'overhead ms/step':>16}")
+    for name, elapsed in results.items():
+        print(f"{name:>16} {args.steps / elapsed:8.1f} {(elapsed / args.steps - args.motion_ms / 1000) * 1e3:16.3f}")
+
+
+if __name__ == "__main__":
+    main()
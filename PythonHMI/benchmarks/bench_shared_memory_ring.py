@@ -0,0 +1,118 @@
+"""
+Latency benchmark: shared-memory joint ring vs ZMQ TCP loopback.
+
+Measures the round-trip time of one 6-axis joint target between two processes
+(ping-pong, one-way latency = RTT / 2) for both transports.
+
+Run from the PythonHMI directory:
+    python -m benchmarks.bench_shared_memory_ring [--points N]
+"""
+
+import argparse
+import multiprocessing as mp
+import statistics
+import time
+
+import zmq
+
+from src.communication.protocol import pack_data, unpack_data
+from src.communication.shared_memory_ring import SharedJointRing
+
+PING_RING = "bench_joint_ping"
+PONG_RING = "bench_joint_pong"
+ZMQ_PING = "tcp://127.0.0.1:18080"
+ZMQ_PONG = "tcp://127.0.0.1:18081"
+
+
+def _shm_echo(points: int) -> None:
+    """Child process: pop every target from the ping ring and push it back."""
+    ping = SharedJointRing.attach(PING_RING, untrack=False)
+    pong = SharedJointRing.attach(PONG_RING, untrack=False)
+    for _ in range(points):
+        values = None
+        while values is None:
+            values = ping.pop_wait(1.0)
+        pong.push(values)
+    ping.close()
+    pong.close()
+
+
+def _zmq_echo(points: int) -> None:
+    """Child process: receive every target over ZMQ and send it back."""
+    context = zmq.Context()
+    recv = context.socket(zmq.PULL)
+    recv.connect(ZMQ_PING)
+    send = context.socket(zmq.PUSH)
+    send.connect(ZMQ_PONG)
+    for _ in range(points):
+        data = unpack_data(recv.recv())
+        send.send(pack_data(list(data)))
+    recv.close()
+    send.close()
+    context.term()
+
+
+def _summary(name: str, rtts: list[float]) -> None:
+    """Print one-way latency statistics in microseconds."""
+    one_way = sorted(rtt / 2 * 1e6 for rtt in rtts)
+    p99 = one_way[int(len(one_way) * 0.99) - 1]
+    print(f"{name:>5}: median {statistics.median(one_way):8.2f} us   "
+          f"p99 {p99:8.2f} us   mean {statistics.fmean(one_way):8.2f} us")
+
+
+def bench_shm(points: int) -> list[float]:
+    ping = SharedJointRing.create(PING_RING, slots=64)
+    pong = SharedJointRing.create(PONG_RING, slots=64)
+    child = mp.Process(target=_shm_echo, args=(points,))
+    child.start()
+    joints = [0.0, 10.0, 20.0, 30.0, 40.0, 50.0]
+    rtts = []
+    for i in range(points):
+        joints[0] = float(i)
+        start = time.perf_counter()
+        ping.push(joints)
+        values = None
+        while values is None:
+            values = pong.pop_wait(1.0)
+        rtts.append(time.perf_counter() - start)
+    child.join()
+    ping.close()
+    pong.close()
+    return rtts
+
+
+def bench_zmq(points: int) -> list[float]:
+    context = zmq.Context()
+    send = context.socket(zmq.PUSH)
+    send.bind(ZMQ_PING)
+    recv = context.socket(zmq.PULL)
+    recv.bind(ZMQ_PONG)
+    child = mp.Process(target=_zmq_echo, args=(points,))
+    child.start()
+    joints = [0.0, 10.0, 20.0, 30.0, 40.0, 50.0]
+    rtts = []
+    for i in range(points):
+        joints[0] = float(i)
+        start = time.perf_counter()
+        send.send(pack_data(joints))
+        unpack_data(recv.recv())
+        rtts.append(time.perf_counter() - start)
+    child.join()
+    send.close()
+    recv.close()
+    context.term()
+    return rtts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--points", type=int, default=10000)
+    args = parser.parse_args()
+
+    print(f"Joint target latency, {args.points} points (one-way = RTT / 2)")
+    _summary("shm", bench_shm(args.points))
+    _summary("zmq", bench_zmq(args.points))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Buffered joint streaming benchmark.
+
+Streams joint targets to a fake controller with a simulated motion time:
+    single point   one target per motion-complete ACK (current commModule)
+    unthrottled    leaky-bucket controller, targets sent as fast as possible
+    adaptive       leaky-bucket controller, rate controller steering the fill
+    adaptive slow  same, with the controller slowing down 2x halfway through
+    adaptive dual  adaptive, with 12-value ROB1 + ROB2 pairs in one message
+    pair MM/Cobot  one source feeding MultiMove and a 1.5x slower Cobot, each
+                   through its own streamer, buffer and rate controller
+and reports throughput, controller messages per target, the controller
+buffer fill, the stops of the robot between targets (underruns) and the
+targets dropped by a full buffer.
+
+Run from the PythonHMI directory:
+    python -m benchmarks.bench_streaming [--points 400] [--motion-ms 10] [--buffer 10]
+"""
+
+import argparse
+import statistics
+import threading
+import time
+
+from config.settings import Config
+from src.communication.fake_controller import FakeController
+from src.communication.socket_manager import ExtSocketServer
+from src.streaming.joint_streamer import JointStreamer
+from src.streaming.rate_controller import StreamRateController
+
+
+def connect(controller: FakeController) -> ExtSocketServer:
+    socket_ext = ExtSocketServer("127.0.0.1", controller.port, robot="bench").create_socket()
+    time.sleep(0.05)  # non-blocking connect
+    socket_ext.send_data([0, 0, 0], 'I;')
+    while not socket_ext.receive_data():  # handshake
+        time.sleep(0.001)
+    return socket_ext
+
+
+def run_stream(points: int, motion_time: float, controller_buffer: int, capacity: int,
+               rate_control: bool = True, slow_down: bool = False, width: int = 6) -> dict:
+    """Stream `points` targets and return the measurements of the run."""
+    controller = FakeController(motion_time=motion_time, stream_buffer=controller_buffer).start_in_thread()
+    socket_ext = connect(controller)
+    if rate_control:
+        rate = StreamRateController("bench", capacity=capacity)
+    else:
+        rate = StreamRateController("bench", capacity=capacity, min_rate=1e6, max_rate=1e6, max_batch=capacity)
+    streamer = JointStreamer(socket_ext, "bench", capacity=points, controller=rate)
+    fills = []
+
+    def sample() -> None:
+        fills.append(rate.fill)
+        if slow_down and streamer.acknowledged >= points // 2:
+            controller.motion_time = motion_time * 2
+
+    try:
+        for i in range(points):
+            streamer.push([float(i % 10)] + [0.0] * (width - 1))
+        start = time.perf_counter()
+        # a target dropped by the controller is never acknowledged: stop once every reply is in
+        while streamer.acknowledged + streamer.rejected < points:
+            streamer.pump(Config.SOCKET_RETRY_DELAY)
+            sample()
+        elapsed = time.perf_counter() - start
+        socket_ext.send_data([0, 0, 0], 'T;')
+    finally:
+        socket_ext.close_socket()
+        controller.stop_thread()
+    return {
+        "points_per_second": streamer.acknowledged / elapsed,
+        "messages_per_point": (controller.commands_received - 2) / points, # without handshake and T;
+        "mean_fill": statistics.mean(fills) if fills else 0.0,
+        "max_fill": controller.stream_max_fill if controller_buffer else 1,
+        "robot_stops": controller.stream_underruns if controller_buffer else streamer.acknowledged - 1,
+        "dropped": controller.stream_overflows,
+        "rate_hz": rate.rate,
+        "consumption_hz": rate.consumption_rate,
+        "rtt_ms": rate.rtt * 1e3,
+    }
+
+
+def run_pair(points: int, motion_time: float, controller_buffer: int) -> list:
+    """Stream the same source to two controllers at once; returns the MultiMove and Cobot measurements."""
+    robots = [("MultiMove", motion_time), ("Cobot", motion_time * 1.5)]
+    controllers = [FakeController(motion_time=motion, stream_buffer=controller_buffer).start_in_thread()
+                   for _, motion in robots]
+    sockets = [connect(controller) for controller in controllers]
+    streamers = [JointStreamer(socket_ext, robot, capacity=points,
+                               controller=StreamRateController(robot, capacity=controller_buffer))
+                 for socket_ext, (robot, _) in zip(sockets, robots)]
+    fills: list = [[] for _ in streamers]
+    elapsed = [0.0 for _ in streamers]
+
+    def feed(index: int, streamer: JointStreamer) -> None:
+        # each server pumps its own streamer from its own loop
+        start = time.perf_counter()
+        while streamer.acknowledged + streamer.rejected < points:
+            streamer.pump(Config.SOCKET_RETRY_DELAY)
+            fills[index].append(streamer.rate.fill)
+        elapsed[index] = time.perf_counter() - start
+
+    try:
+        for i in range(points):
+            for streamer in streamers:
+                streamer.push([float(i % 10)] + [0.0] * 5)
+        threads = [threading.Thread(target=feed, args=(index, streamer)) for index, streamer in enumerate(streamers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for socket_ext in sockets:
+            socket_ext.send_data([0, 0, 0], 'T;')
+    finally:
+        for socket_ext in sockets:
+            socket_ext.close_socket()
+        for controller in controllers:
+            controller.stop_thread()
+    return [{
+        "points_per_second": streamer.acknowledged / elapsed[index],
+        "messages_per_point": (controller.commands_received - 2) / points,
+        "mean_fill": statistics.mean(fills[index]) if fills[index] else 0.0,
+        "max_fill": controller.stream_max_fill,
+        "robot_stops": controller.stream_underruns,
+        "dropped": controller.stream_overflows,
+        "rate_hz": streamer.rate.rate,
+        "consumption_hz": streamer.rate.consumption_rate,
+        "rtt_ms": streamer.rate.rtt * 1e3,
+    } for index, (streamer, controller) in enumerate(zip(streamers, controllers))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--points", type=int, default=400)
+    parser.add_argument("--motion-ms", type=float, default=10.0, help="Simulated motion time per target")
+    parser.add_argument("--buffer", type=int, default=10, help="Controller buffer size (commModule BUF_SIZE)")
+    args = parser.parse_args()
+    motion_time = args.motion_ms / 1000
+
+    runs = [
+        ("single point", run_stream(args.points, motion_time, 0, 1)),
+        ("unthrottled", run_stream(args.points, motion_time, args.buffer, 1000, rate_control=False)),
+        ("adaptive", run_stream(args.points, motion_time, args.buffer, args.buffer)),
+        ("adaptive slow", run_stream(args.points, motion_time, args.buffer, args.buffer, slow_down=True)),
+        ("adaptive dual", run_stream(args.points, motion_time, args.buffer, args.buffer, width=12)),
+    ]
+    runs += zip(("pair MM", "pair Cobot"), run_pair(args.points, motion_time, args.buffer))
+    print(f"{args.points} targets, {args.motion_ms} ms motion, controller buffer {args.buffer}, "
+          f"target fill {min(Config.STREAM_TARGET_FILL, args.buffer)}")
+    print(f"{'':>14} {'points/s':>9} {'msgs/pt':>7} {'mean fill':>9} {'max fill':>8} {'stops':>6} {'dropped':>7} "
+          f"{'rate Hz':>8} {'consumed Hz':>11} {'rtt ms':>7}")
+    for name, run in runs:
+        print(f"{name:>14} {run['points_per_second']:9.1f} {run['messages_per_point']:7.2f} "
+              f"{run['mean_fill']:9.2f} {run['max_fill']:8d} {run['robot_stops']:6d} {run['dropped']:7d} {run['rate_hz']:8.1f} {run['consumption_hz']:11.1f} "
+              f"{run['rtt_ms']:7.2f}")
+
+
+if __name__ == "__main__":
+    main()
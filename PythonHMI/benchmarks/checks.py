@@ -0,0 +1,197 @@
+"""
+Deterministic correctness checks run ahead of the performance suite.
+
+The benchmarks measure speed on whatever the code computes; these checks pin
+down what it computes, on fixed inputs, so a regression fails the suite even
+when it makes the stack faster. Each check raises CheckFailed with the first
+mismatch it finds.
+
+Checks:
+    frame_keyframe        float32 keyframe rounding of CompactFrameEncoder/Decoder
+    frame_i16_limits      int16 deltas at +/- 32767 quanta, rounding within half a quantum
+    frame_f16_deltas      float16 deltas within half a float16 step, no accumulation, format fallback
+    frame_overflow        a delta out of the int16 / float16 range starts a keyframe early
+    frame_malformed       short, truncated, padded, foreign and out-of-sequence frames
+
+Run from the PythonHMI directory (also run by `python -m benchmarks.suite run`):
+    python -m benchmarks.suite check [--only frame_keyframe frame_malformed]
+"""
+
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from config.settings import Config
+from src.communication.protocol import (COMPACT_FLAG_KEYFRAME, COMPACT_HEADER, COMPACT_MAGIC, CompactFrameDecoder,
+                                        CompactFrameEncoder, is_compact_frame, negotiate_frame_format, pack_data)
+from src.telemetry.logger import set_level
+
+I16 = Config.FRAME_FORMAT_DELTA_I16
+F16 = Config.FRAME_FORMAT_DELTA_F16
+QUANTUM = 0.001 # fixed here so the checks do not follow a retuned Config.FRAME_DELTA_QUANTUM
+INT16_MAX = 32767
+
+
+class CheckFailed(AssertionError):
+    """A check found a result other than the expected one."""
+
+
+def expect(condition: bool, message: str) -> None:
+    if not condition:
+        raise CheckFailed(message)
+
+
+def round_trip(frame_format: int, points, keyframe_interval: int = 1000):
+    """(frames, decoded targets) of one encode call through a fresh encoder/decoder pair."""
+    points = np.atleast_2d(np.asarray(points, dtype=np.float64))
+    encoder = CompactFrameEncoder(frame_format, points.shape[1], keyframe_interval, QUANTUM)
+    decoder = CompactFrameDecoder(frame_format, QUANTUM)
+    frames = encoder.encode(points)
+    decoded = [decoder.decode(frame) for frame in frames]
+    expect(all(targets is not None for targets in decoded), "a frame of a clean stream was not decoded")
+    return frames, np.vstack(decoded)
+
+
+def check_frame_keyframe() -> None:
+    target = [123.456789, -179.987654, 0.1, 359.999, -0.000123, 42.0]
+    frames, decoded = round_trip(I16, target)
+    expect(len(frames) == 1 and len(frames[0]) == COMPACT_HEADER.size + 4 * len(target),
+           f"one keyframe of {COMPACT_HEADER.size + 4 * len(target)} bytes expected, got {[len(f) for f in frames]}")
+    expect(frames[0][1] & COMPACT_FLAG_KEYFRAME, "the first frame of a session is not a keyframe")
+    expect(np.array_equal(decoded[0], np.asarray(target, dtype=np.float32).astype(np.float64)),
+           f"keyframe is not the float32 rounding of the target: {decoded[0]}")
+    error = np.abs(decoded[0] - target)
+    expect((error <= np.abs(target) * 2.0 ** -24).all(), f"keyframe error beyond float32 rounding: {error}")
+
+
+def check_frame_i16_limits() -> None:
+    limit = INT16_MAX * QUANTUM
+    key = np.array([0.0, 0.5, -90.0, 10.25, 180.0, -0.75]) # exact in float32
+    steps = np.array([0, INT16_MAX, 0, -INT16_MAX, 0, INT16_MAX]) # quanta from the keyframe, deltas of +/- 32767
+    points = key + steps[:, None] * QUANTUM
+    frames, decoded = round_trip(I16, points)
+    expect(len(frames) == 1, f"deltas of +/- {limit:.3f} deg fit int16, got {len(frames)} frames")
+    deltas = np.frombuffer(frames[0], ">i2", offset=COMPACT_HEADER.size + 4 * len(key))
+    expect(deltas.max() == INT16_MAX and deltas.min() == -INT16_MAX,
+           f"range limit deltas not sent as +/- {INT16_MAX}: {deltas.min()} .. {deltas.max()}")
+    expect(np.abs(decoded - points).max() <= 1e-9, "targets on the quantum grid not decoded exactly")
+
+    # off the grid: every target rounds to the nearest quantum, without accumulating over the stream
+    offsets = np.tile([0.49, -0.49, 0.25, -0.25, 0.0, 0.3], (200, 1)) * QUANTUM
+    walk = key + np.cumsum(np.full((200, len(key)), 0.1234), axis=0) + offsets
+    _, decoded = round_trip(I16, np.vstack([key, walk]))
+    error = float(np.abs(decoded[1:] - walk).max())
+    expect(error <= QUANTUM / 2 + 1e-9, f"int16 error {error:.6f} deg beyond half a quantum")
+
+
+def check_frame_f16_deltas() -> None:
+    steps = np.full((500, 6), 0.0123)
+    steps[:, 4] = 1e-5 # float16 subnormal deltas
+    steps[250:, 2] = 3.6
+    walk = np.cumsum(np.vstack([np.full(6, 15.0), steps]), axis=0)
+    _, decoded = round_trip(F16, walk)
+    previous = np.vstack([decoded[:1], decoded[:-1]])[1:] # deltas are taken from the decoded previous target
+    delta = np.abs(walk[1:] - previous)
+    bound = np.maximum(delta * 2.0 ** -11, 2.0 ** -25) * (1 + 1e-6) # half a float16 step, normal or subnormal
+    error = np.abs(decoded[1:] - walk[1:])
+    expect((error <= bound).all(), f"float16 delta error {float(error.max()):.2e} deg beyond half a float16 step")
+    expect(float(error[:, [0, 1, 3, 5]].max()) <= 0.0123 * 2.0 ** -11 * (1 + 1e-6),
+           "float16 rounding accumulates over the stream")
+
+    expect(negotiate_frame_format(F16) == F16, "DELTA_F16 not granted")
+    expect(negotiate_frame_format(99) == Config.FRAME_FORMAT_FLOAT64, "unknown format not answered with FLOAT64")
+    for frame_format in (Config.FRAME_FORMAT_FLOAT64, 99):
+        try:
+            CompactFrameEncoder(frame_format, 6)
+        except ValueError:
+            continue
+        raise CheckFailed(f"encoder accepted frame format {frame_format}")
+
+
+def check_frame_overflow() -> None:
+    limit = INT16_MAX * QUANTUM
+    points = np.zeros((4, 6))
+    points[1] = limit
+    points[2] = 2 * limit + QUANTUM # 32768 quanta from the previous target
+    points[3] = 2 * limit
+    encoder = CompactFrameEncoder(I16, 6, 1000, QUANTUM)
+    decoder = CompactFrameDecoder(I16, QUANTUM)
+    frames = encoder.encode(points)
+    expect(len(frames) == 2 and encoder.keyframes == 2, f"int16 overflow: {len(frames)} frames, "
+           f"{encoder.keyframes} keyframes, expected 2 and 2")
+    _, flags, _, count, sequence = COMPACT_HEADER.unpack_from(frames[1])
+    expect(flags & COMPACT_FLAG_KEYFRAME and count == 2 and sequence == 2,
+           f"frame after the overflow: flags {flags:#x}, count {count}, sequence {sequence}")
+    decoded = np.vstack([decoder.decode(frame) for frame in frames])
+    expect(np.array_equal(decoded[2], points[2].astype(np.float32).astype(np.float64)),
+           "overflowing target not sent as a keyframe")
+    expect(np.abs(decoded - points).max() <= QUANTUM / 2 + 1e-9, "targets around the overflow decoded wrong")
+
+    jump = np.array([[0.0] * 6, [0.0] * 5 + [70000.0]]) # beyond the float16 maximum (65504)
+    frames, decoded = round_trip(F16, jump)
+    expect(len(frames) == 2 and frames[1][1] & COMPACT_FLAG_KEYFRAME, "float16 overflow did not start a keyframe")
+    expect(np.array_equal(decoded, jump), "targets around the float16 overflow decoded wrong")
+
+
+def check_frame_malformed() -> None:
+    points = np.array([[1.0, 2.0, 3.0, 4.0, 5.0, 6.0], [1.5, 2.5, 3.5, 4.5, 5.5, 6.5]])
+    frame = CompactFrameEncoder(I16, 6, 1000, QUANTUM).encode(points)[0]
+    expect(frame[0] == COMPACT_MAGIC == 0xC5, f"compact frame starts with {frame[0]:#x}, not the magic 0xc5")
+    expect(not is_compact_frame(pack_data([COMPACT_MAGIC] * 12)), "a pack_data frame taken for a compact frame")
+    decoder = CompactFrameDecoder(I16, QUANTUM)
+    malformed = {
+        "empty": b"",
+        "short header": frame[:COMPACT_HEADER.size - 1],
+        "header only": frame[:COMPACT_HEADER.size],
+        "truncated": frame[:-1],
+        "padded": frame + b"\x00",
+        "wrong magic": bytes([COMPACT_MAGIC ^ 0xFF]) + frame[1:],
+        "pack_data": pack_data(points[0].tolist()),
+        "other format": CompactFrameEncoder(F16, 6).encode(points)[0],
+        "no targets": COMPACT_HEADER.pack(COMPACT_MAGIC, I16 | COMPACT_FLAG_KEYFRAME, 6, 0, 0),
+    }
+    for name, message in malformed.items():
+        expect(decoder.decode(message) is None, f"{name} frame decoded")
+    expect(np.abs(decoder.decode(frame) - points).max() <= QUANTUM / 2, "decoder state changed by a malformed frame")
+
+    # a delta frame after a gap (a frame flushed by STOP) is dropped until the next keyframe
+    encoder = CompactFrameEncoder(I16, 6, 4, QUANTUM)
+    decoder = CompactFrameDecoder(I16, QUANTUM)
+    frames = [frame for index in range(12) for frame in encoder.encode(points[index % 2] + index)]
+    decoded = [decoder.decode(frame) for index, frame in enumerate(frames) if index != 1]
+    expect([targets is None for targets in decoded] == [False, True, True, False, False, False, False, False,
+                                                        False, False, False],
+           "deltas after a gap not dropped until the next keyframe")
+    expect(decoder.lost == 2, f"{decoder.lost} targets counted lost after the gap, expected 2")
+
+
+CHECKS: Dict[str, Callable[[], None]] = {
+    "frame_keyframe": check_frame_keyframe,
+    "frame_i16_limits": check_frame_i16_limits,
+    "frame_f16_deltas": check_frame_f16_deltas,
+    "frame_overflow": check_frame_overflow,
+    "frame_malformed": check_frame_malformed,
+}
+
+
+def run_checks(names: List[str]) -> List[str]:
+    """Run the named checks, printing one line each.
+
+    Returns:
+        Names of the checks that failed
+    """
+    failed = []
+    level = Config.LOG_LEVEL
+    set_level("ERROR") # the malformed frames are logged as warnings on purpose
+    try:
+        for name in names:
+            try:
+                CHECKS[name]()
+            except CheckFailed as e:
+                failed.append(name)
+                print(f"{name:<20} FAILED: {e}")
+            else:
+                print(f"{name:<20} ok")
+    finally:
+        set_level(level)
+    return failed
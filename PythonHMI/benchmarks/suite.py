@@ -0,0 +1,395 @@
+"""
+Performance regression suite for the communication stack.
+
+Runs every benchmark locally (fake controllers, inproc ZMQ) and writes the
+results as JSON. A stored baseline is compared against a result file and
+every metric that got worse by more than the threshold is flagged; the
+compare command exits with status 1 if there is a regression, so it can
+gate a CI job.
+
+Benchmarks:
+    protocol       pack_data / unpack_data
+    controller     ExtSocketServer command encode / position parse
+    linked_list    LinkedList build and traverse (servers answered on inproc, without the step pacing)
+    lookup         command lookup through retrieve_motion_settings
+    zmq_rtt        command round-trip through the server_multiMove main loop
+    sequence       end-to-end sequence steps/s against fake controllers
+    streaming      joint streaming points/s through send_joint_stream and the JointStreamer
+
+The deterministic checks of benchmarks/checks.py run first; a failed check
+stops the run with status 1 before any timing.
+
+Run from the PythonHMI directory:
+    python -m benchmarks.suite check [--only frame_keyframe]
+    python -m benchmarks.suite run [--only protocol zmq_rtt] [--output results.json] [--quick] [--repeat 3]
+    python -m benchmarks.suite run --save-baseline
+    python -m benchmarks.suite compare results.json [--threshold 0.25]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from typing import Callable, Dict, List
+
+import zmq
+
+from benchmarks.checks import CHECKS, run_checks
+from config.settings import Config
+from config.lookup_tables import retrieve_motion_settings
+from src import state_machines
+from src.cell.orchestrator import CellExecutor, compile_sequence
+from src.cell.registry import CellSpec, ControllerEndpoint
+from src.communication.data_structures import LinkedList
+from src.communication.fake_controller import FakeController
+from src.communication.protocol import pack_data, unpack_data
+from src.communication.socket_manager import ExtSocketServer, encode_command, parse_position
+from src.streaming.joint_streamer import JointStreamer
+from src.streaming.rate_controller import StreamRateController
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baselines", "baseline.json")
+DEFAULT_THRESHOLD = 0.25  # flag metrics more than 25 % worse than the baseline
+
+# metric name -> {"value": float, "unit": str, "higher_is_better": bool[, "tolerance": float]}
+Metrics = Dict[str, Dict]
+
+
+def metric(value: float, unit: str, higher_is_better: bool, tolerance: float = 0.0) -> Dict:
+    """One result; `tolerance` widens the regression threshold for inherently noisy metrics."""
+    result = {"value": round(value, 3), "unit": unit, "higher_is_better": higher_is_better}
+    if tolerance:
+        result["tolerance"] = tolerance
+    return result
+
+
+def ops_per_second(function: Callable[[], object], iterations: int, repeats: int = 5) -> float:
+    """Best of `repeats` timed loops, in calls per second."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            function()
+        best = min(best, time.perf_counter() - start)
+    return iterations / best
+
+
+def cpu_reference() -> float:
+    """Speed of a fixed pure-Python workload, in loops per second.
+
+    Stored with every result so a comparison can factor out a slower or
+    faster machine (or a throttled CPU) before flagging regressions.
+    """
+    def workload() -> int:
+        total = 0
+        for i in range(1000):
+            total += i * i % 7
+        return total
+    return ops_per_second(workload, 200)
+
+
+def bench_protocol(quick: bool) -> Metrics:
+    iterations = 20000 if quick else 200000
+    packet = pack_data([1, 2, 1])
+    joint_packet = pack_data([10.0, 20.0, 30.0, 40.0, 50.0, 60.0])
+    return {
+        "pack_data_3": metric(ops_per_second(lambda: pack_data([1, 2, 1]), iterations), "ops/s", True),
+        "unpack_data_3": metric(ops_per_second(lambda: unpack_data(packet), iterations), "ops/s", True),
+        "unpack_data_6": metric(ops_per_second(lambda: unpack_data(joint_packet), iterations), "ops/s", True),
+    }
+
+
+def bench_controller(quick: bool) -> Metrics:
+    iterations = 20000 if quick else 200000
+    joints = [10.5, -20.25, 30.0, 0.0, 45.125, -90.0]
+    return {
+        "encode_state_command": metric(ops_per_second(lambda: encode_command([1, 2, 1, 1], 'd;'), iterations),
+                                       "ops/s", True),
+        "encode_joint_command": metric(ops_per_second(lambda: encode_command(joints, 'j;'), iterations),
+                                       "ops/s", True),
+        "parse_position": metric(ops_per_second(lambda: parse_position("9,12.5,-3.25,100.0,0.5,1"), iterations),
+                                 "ops/s", True),
+    }
+
+
+def _ack_responder(context: zmq.Context, name: str, stop: threading.Event) -> None:
+    """Stand-in server: acknowledge every command with ACK_MOTION_COMPLETE."""
+    command = context.socket(zmq.PULL)
+    command.bind(f"inproc://{name}_command")
+    ack = context.socket(zmq.PUSH)
+    ack.bind(f"inproc://{name}_ack")
+    ack_packet = pack_data(list(Config.ACK_MOTION_COMPLETE))
+    while not stop.is_set():
+        if command.poll(50):
+            command.recv()
+            ack.send(ack_packet)
+    command.close(linger=0)
+    ack.close(linger=0)
+
+
+def bench_linked_list(quick: bool) -> Metrics:
+    steps = 100 if quick else 500
+    states = [("Home", "CB_Home"), ("Standby", "CB_Standby")]
+
+    def build() -> LinkedList:
+        sequence = LinkedList()
+        for index in range(steps):
+            mm_state, cb_state = states[index % 2]
+            sequence.append(mm_state, cb_state, 1 if index == 0 else 3 if index == steps - 1 else 2)
+        return sequence
+
+    builds = ops_per_second(build, 5 if quick else 20, repeats=3)
+
+    context = zmq.Context()
+    stop = threading.Event()
+    responders = [threading.Thread(target=_ack_responder, args=(context, name, stop), daemon=True)
+                  for name in ("suite_mm", "suite_cb")]
+    for responder in responders:
+        responder.start()
+    time.sleep(0.05)  # let the responders bind
+    sockets = []
+    for name in ("suite_mm", "suite_cb"):
+        send = context.socket(zmq.PUSH)
+        send.connect(f"inproc://{name}_command")
+        recv = context.socket(zmq.PULL)
+        recv.connect(f"inproc://{name}_ack")
+        sockets += [send, recv]
+    sequence = build()
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(max(limit, steps * 10))  # traverse_and_execute recurses once per node
+    pacing, Config.EXECUTION_LOOP_FREQ = Config.EXECUTION_LOOP_FREQ, 0  # measure the traversal, not the 5 Hz pacing
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            sequence.traverse_and_execute(sequence.head, "1A", *sockets)
+            elapsed = time.perf_counter() - start
+    finally:
+        Config.EXECUTION_LOOP_FREQ = pacing
+        sys.setrecursionlimit(limit)
+        stop.set()
+        for responder in responders:
+            responder.join()
+        for socket in sockets:
+            socket.close(linger=0)
+        context.term()
+    return {
+        "build_steps": metric(builds * steps, "nodes/s", True),
+        "traverse_steps": metric(steps / elapsed, "steps/s", True),
+    }
+
+
+def bench_lookup(quick: bool) -> Metrics:
+    iterations = 5000 if quick else 50000
+    client_state = state_machines.MM_Home()
+
+    def lookup() -> list:
+        return list(retrieve_motion_settings(client_state, "1A", "Standby").grab_data_MM(1))
+
+    return {"retrieve_motion_settings": metric(ops_per_second(lookup, iterations), "ops/s", True)}
+
+
+def bench_zmq_rtt(quick: bool) -> Metrics:
+    from benchmarks.bench_cell_mode import bench_single_process
+    _, rtts = bench_single_process(500 if quick else 5000)
+    micros = sorted(rtt * 1e6 for rtt in rtts)
+    return {
+        "rtt_median": metric(micros[len(micros) // 2], "us", False),
+        "rtt_p99": metric(micros[int(len(micros) * 0.99) - 1], "us", False, tolerance=0.5),
+    }
+
+
+def bench_sequence(quick: bool) -> Metrics:
+    steps = compile_sequence("1A", [("Home", "CB_Home"), ("Standby", "CB_Standby")]) * (50 if quick else 500)
+    controllers = [FakeController().start_in_thread() for _ in range(2)]
+
+    async def run() -> float:
+        executor = CellExecutor(CellSpec("suite_cell",
+                                         ControllerEndpoint("127.0.0.1", controllers[0].port),
+                                         ControllerEndpoint("127.0.0.1", controllers[1].port)))
+        executor.mm_link.command_cache = None  # every step goes to the controllers
+        executor.cb_link.command_cache = None
+        await executor.connect()
+        start = time.perf_counter()
+        await executor.run_sequence(steps)
+        elapsed = time.perf_counter() - start
+        await executor.close()
+        return elapsed
+
+    try:
+        elapsed = asyncio.run(run())
+    finally:
+        for controller in controllers:
+            controller.stop_thread()
+    return {"steps_per_second": metric(len(steps) / elapsed, "steps/s", True)}
+
+
+def bench_streaming(quick: bool) -> Metrics:
+    import server_multiMove
+    # standalone stream path: no control lane or telemetry left over from a server run (zmq_rtt)
+    server_multiMove.server.command_lane = None
+    server_multiMove.server.telemetry_publisher = None
+    points = 500 if quick else 5000
+    controller = FakeController().start_in_thread()
+    socket_ext = ExtSocketServer("127.0.0.1", controller.port).create_socket()
+    try:
+        time.sleep(0.05)  # non-blocking connect
+        socket_ext.send_data([0, 0, 0], 'I;')
+        while not socket_ext.receive_data():  # handshake
+            time.sleep(0.001)
+        # rate bound lifted: this measures the per-point cost of the stack, not the pacing
+        server_multiMove.server.joint_streamer = JointStreamer(
+            socket_ext, "MultiMove", controller=StreamRateController("MultiMove", max_rate=1e9))
+        joints = [10.0, 20.0, 30.0, 40.0, 50.0, 60.0]
+        start = time.perf_counter()
+        for _ in range(points):
+            server_multiMove.server.send_joint_stream(joints, socket_ext)
+        server_multiMove.server.finish_joint_stream()
+        elapsed = time.perf_counter() - start
+        socket_ext.send_data([0, 0, 0], 'T;')
+    finally:
+        socket_ext.close_socket()
+        controller.stop_thread()
+    return {"points_per_second": metric(points / elapsed, "points/s", True)}
+
+
+BENCHMARKS: Dict[str, Callable[[bool], Metrics]] = {
+    "protocol": bench_protocol,
+    "controller": bench_controller,
+    "linked_list": bench_linked_list,
+    "lookup": bench_lookup,
+    "zmq_rtt": bench_zmq_rtt,
+    "sequence": bench_sequence,
+    "streaming": bench_streaming,
+}
+
+
+def run_suite(names: List[str], quick: bool = False, repeat: int = 3) -> Dict:
+    """Run the named benchmarks `repeat` times, keeping the best value of every metric.
+
+    Metrics are keyed "<benchmark>.<metric>". Keeping the best run filters out
+    scheduler noise, which otherwise dominates the end-to-end numbers. Each
+    metric carries the cpu_reference measured right before the run it came
+    from, so compare() can factor out machine speed changes during the run.
+    """
+    results: Metrics = {}
+    for name in names:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            reference = round(cpu_reference(), 3)
+            for key, value in BENCHMARKS[name](quick).items():
+                key = f"{name}.{key}"
+                value["cpu_reference"] = reference
+                best = results.get(key)
+                if best is None or (value["value"] > best["value"]) == value["higher_is_better"]:
+                    results[key] = value
+        print(f"{name:<12} done in {time.perf_counter() - start:6.2f} s")
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "zmq": zmq.zmq_version(),
+        "quick": quick,
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def compare(current: Dict, baseline: Dict, threshold: float = DEFAULT_THRESHOLD,
+            normalize: bool = True) -> List[str]:
+    """Print a comparison table.
+
+    Args:
+        normalize: Scale each baseline value by the ratio of the two runs' cpu_reference scores
+
+    Returns:
+        Names of the metrics that regressed by more than the threshold
+    """
+    regressions = []
+    print(f"{'metric':<36} {'expected':>14} {'current':>14} {'change':>8}")
+    for key, result in current["results"].items():
+        reference = baseline["results"].get(key)
+        if reference is None or reference["value"] == 0:
+            print(f"{key:<36} {'-':>14} {result['value']:>14.3f} {'new':>8}")
+            continue
+        speed = 1.0
+        if normalize and result.get("cpu_reference") and reference.get("cpu_reference"):
+            speed = result["cpu_reference"] / reference["cpu_reference"]
+        expected = reference["value"] * speed if result["higher_is_better"] else reference["value"] / speed
+        change = (result["value"] - expected) / expected
+        worse = -change if result["higher_is_better"] else change
+        flag = ""
+        if worse > max(threshold, result.get("tolerance", 0.0)):
+            regressions.append(key)
+            flag = "  REGRESSION"
+        print(f"{key:<36} {expected:>14.3f} {result['value']:>14.3f} {change:>+7.1%} "
+              f"{result['unit']}{flag}")
+    return regressions
+
+
+def _write(path: str, data: Dict) -> None:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+        f.write("\n")
+
+
+def _read(path: str) -> Dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    check_parser = subparsers.add_parser("check", help="Run the deterministic correctness checks only")
+    check_parser.add_argument("--only", nargs="+", choices=list(CHECKS), default=list(CHECKS))
+    run_parser = subparsers.add_parser("run", help="Run the suite and write JSON results")
+    run_parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    run_parser.add_argument("--output", default="bench_results.json")
+    run_parser.add_argument("--quick", action="store_true", help="Fewer iterations, for a smoke run")
+    run_parser.add_argument("--repeat", type=int, default=3, help="Runs per benchmark, the best one is kept")
+    run_parser.add_argument("--save-baseline", action="store_true", help=f"Also store the results as {BASELINE_PATH}")
+    run_parser.add_argument("--baseline", default=BASELINE_PATH)
+    run_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    compare_parser = subparsers.add_parser("compare", help="Compare a result file against the baseline")
+    compare_parser.add_argument("results")
+    compare_parser.add_argument("--baseline", default=BASELINE_PATH)
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    compare_parser.add_argument("--no-normalize", action="store_true",
+                                help="Compare raw values, without the cpu_reference scaling")
+    args = parser.parse_args()
+
+    if args.command in ("check", "run"):
+        failed = run_checks(args.only if args.command == "check" else list(CHECKS))
+        if failed:
+            print(f"{len(failed)} check(s) failed: {', '.join(failed)}")
+            sys.exit(1)
+        if args.command == "check":
+            return
+    if args.command == "run":
+        current = run_suite(args.only, args.quick, args.repeat)
+        _write(args.output, current)
+        print(f"results written to {args.output}")
+        if args.save_baseline:
+            _write(args.baseline, current)
+            print(f"baseline written to {args.baseline}")
+            return
+        if not os.path.exists(args.baseline):
+            return
+    else:
+        current = _read(args.results)
+    regressions = compare(current, _read(args.baseline), args.threshold,
+                          not getattr(args, "no_normalize", False))
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+    print(f"no regression beyond {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,27 @@
 import zmq
 import subprocess
+import threading
 import time
 import struct
 import sys
 from typing import Optional
 from src.communication.data_structures import LinkedList
-from src.communication.protocol import pack_data, unpack_data
+from src.communication.protocol import pack_data, probe_clock, unpack_data
+from src.communication.priority_lane import ControlClient, CONTROL_NAMES
 from config.constants import (
     object_group_1,
     object_group_2,
     STREAMING_STATE_NAME,
 )
 from config.settings import Config
+from src.telemetry.publisher import TelemetrySubscriber
+from src.telemetry.clock_sync import ClockOffsetEstimator
+from src.telemetry import metrics
+from src.telemetry.profiling import OnDemandProfiler
+from src.execution.checkpoint import SequenceCheckpoint, STATUS_CANCELLED
+from src.execution.job_queue import BatchRunner, CompiledJob, JobQueue
+from src.streaming.router import StreamRouter
+from src.communication.shared_memory_ring import JointStreamProducer
 import math
 
 
@@ -30,104 +40,182 @@ fmt_elen = '!I'  # Format
 PACKET_OFFSET = 4  # Number of bytes used to store the length of the packet. 4 Is the size of an unsigned int (4 bytes)
 
 
-def interactive_streaming_handler(socket_send: zmq.Socket, socket_recv: zmq.Socket,
+def interactive_streaming_handler(socket_send: StreamRouter, socket_recv: StreamRouter,
                                   max_points: int = 0) -> None:
     """Interactive streaming handler for PHASE 2 testing.
 
-    Provides a sub-menu for manual joint input, sine-wave test, or 'q' to exit.
+    Provides a sub-menu for manual joint input (6 values for ROB1, 12 for a
+    synchronized ROB1 + ROB2 target, plus 6 Cobot values at the end when the
+    Cobot streams too), sine-wave tests, or 'q' to exit.
     Used both from the top-level 's' menu and as a callback for Stream nodes
     in traverse_and_execute.
 
     Args:
-        socket_send: ZMQ PUSH socket to the MultiMove server
-        socket_recv: ZMQ PULL socket from the MultiMove server
+        socket_send: StreamRouter to the streaming server(s)
+        socket_recv: The same StreamRouter, for the ACKs (read by the JointStreamProducer)
         max_points: 0 = open-ended (only 'q' exits), >0 = auto-terminate after N points.
                     Operator can always type 'q' to exit early.
     """
+    widths = socket_send.widths
     print("--- Streaming mode ---")
-    print("Enter 6 comma-separated joint values (e.g., 0,0,0,0,0,0)")
+    if Config.FRAME_FORMAT != Config.FRAME_FORMAT_FLOAT64:
+        print(f"Frame format granted: {socket_send.negotiate()}") # compact frames where the server accepts them
+    print(f"Enter {' or '.join(map(str, widths))} comma-separated joint values (e.g., {','.join(['0'] * widths[0])})")
     print("  'test' - Run 20-point sine wave test on J1 (+/- 5 deg)")
+    print("  'dual' - Run 20-point sine wave test on J1 of every arm, mirrored")
     print("  'q'    - Return to state mode")
     if max_points > 0:
         print(f"  Auto-exit after {max_points} points")
 
-    points_sent = 0
-    streaming = True
-    while streaming:
-        # Auto-terminate check
-        if max_points > 0 and points_sent >= max_points:
-            print(f"Reached {max_points} points. Exiting streaming mode.")
-            break
-
-        remaining = f" ({max_points - points_sent} remaining)" if max_points > 0 else ""
-        stream_input = input(f"Stream{remaining}> ")
-
-        if stream_input.lower() == 'q':
-            streaming = False
-        elif stream_input.lower() == 'test':
-            # 20-point sine wave on J1, safe amplitude
-            base_joints = [0.0, 0.0, 0.0, 0.0, 0.0, 0.0]
-            t = 0
-            test_count = 20
-            # If max_points is set, cap the test to remaining points
-            if max_points > 0:
-                test_count = min(test_count, max_points - points_sent)
-            print(f"Running {test_count}-point sine wave test...")
-            for i in range(test_count):
-                joints = base_joints.copy()
-                joints[0] = 5.0 * math.sin(t)
-                dataPkg = pack_data(joints)
-                socket_send.send(dataPkg)
-                print(f"  Point {i+1}/{test_count}: J1={joints[0]:.2f}")
-                try:
-                    ack = socket_recv.recv(MAX_PACKET_SIZE)
-                    print(f"  ACK received")
-                except zmq.Again:
-                    print(f"  ACK timeout")
-                t += 0.3
-                points_sent += 1
-                time.sleep(0.5)
-            print("Streaming test completed.")
-        else:
-            try:
-                joints = [float(x.strip()) for x in stream_input.split(',')]
-                if len(joints) == 6:
-                    dataPkg = pack_data(joints)
-                    socket_send.send(dataPkg)
-                    print(f"Sent: {joints}")
+    # shared memory ring to a local MultiMove server when enabled, else the router (one ACK per target)
+    producer = JointStreamProducer(socket_send)
+    try:
+        points_sent = 0
+        streaming = True
+        while streaming:
+            # Auto-terminate check
+            if max_points > 0 and points_sent >= max_points:
+                print(f"Reached {max_points} points. Exiting streaming mode.")
+                break
+
+            remaining = f" ({max_points - points_sent} remaining)" if max_points > 0 else ""
+            stream_input = input(f"Stream{remaining}> ")
+
+            if stream_input.lower() == 'q':
+                streaming = False
+            elif stream_input.lower() in ('test', 'dual'):
+                # 20-point sine wave on J1, safe amplitude; 'dual' streams ROB1 + ROB2 pairs
+                dual = stream_input.lower() == 'dual'
+                base_joints = [0.0] * (widths[-1] if dual else widths[0])
+                t = 0
+                test_count = 20
+                # If max_points is set, cap the test to remaining points
+                if max_points > 0:
+                    test_count = min(test_count, max_points - points_sent)
+                print(f"Running {test_count}-point sine wave test...")
+                for i in range(test_count):
+                    joints = base_joints.copy()
+                    joints[0] = 5.0 * math.sin(t)
+                    for arm in range(6, len(joints), 6):
+                        joints[arm] = -joints[arm - 6] if dual else joints[0]
+                    print(f"  Point {i+1}/{test_count}: J1={joints[0]:.2f}")
                     try:
-                        ack = socket_recv.recv(MAX_PACKET_SIZE)
-                        print("ACK received")
+                        print("  Queued" if producer.send(joints) else "  Not queued (flushed or ring full)")
                     except zmq.Again:
-                        print("ACK timeout")
+                        print(f"  ACK timeout")
+                    t += 0.3
                     points_sent += 1
-                else:
-                    print(f"Need 6 values, got {len(joints)}")
-            except ValueError:
-                print("Invalid input. Use comma-separated numbers.")
+                    # no fixed pacing: the server ACKs once the point is queued and its
+                    # streamer paces the controller from the measured consumption rate
+                print("Streaming test completed.")
+            else:
+                try:
+                    joints = [float(x.strip()) for x in stream_input.split(',')]
+                    if len(joints) in widths:
+                        print(f"Sent: {joints}")
+                        try:
+                            print("Queued" if producer.send(joints) else "Not queued (flushed or ring full)")
+                        except zmq.Again:
+                            print("ACK timeout")
+                        points_sent += 1
+                    else:
+                        print(f"Need {' or '.join(map(str, widths))} values, got {len(joints)}")
+                except ValueError:
+                    print("Invalid input. Use comma-separated numbers.")
+    finally:
+        producer.close()
 
     print("--- Exited streaming mode ---")
 
 
+def sync_server_clocks(servers: dict, clocks: dict, probes: int = 8) -> None:
+    """Probe the clock of every server a few times, between two commands.
+
+    Args:
+        servers: (send, recv) command sockets per server name
+        clocks: ClockOffsetEstimator per server name, created on the first call
+        probes: Round trips per server
+    """
+    for name, (socket_send, socket_recv) in servers.items():
+        clock = clocks.setdefault(name, ClockOffsetEstimator(f"clientUI-{name}"))
+        for _ in range(probes):
+            probe_clock(socket_send, socket_recv, clock)
+        print(f"  clock {clock}")
+
+
+def monitor_telemetry(subscriber: TelemetrySubscriber, duration: float = 2.0, clocks: Optional[dict] = None) -> None:
+    """Print the telemetry published by the servers for a short time window.
+
+    Args:
+        subscriber: SUB socket connected to the server telemetry streams
+        duration: How long to listen, in seconds
+        clocks: Optional ClockOffsetEstimator per server name; progress and control
+                frames then show their age on the clientUI timeline
+    """
+    print("--- Telemetry monitor ---")
+    clocks = clocks or {}
+    deadline = time.monotonic() + duration
+    latest = {}
+    while time.monotonic() < deadline:
+        for robot, kind, fields in subscriber.poll(timeout_ms=100):
+            clock = clocks.get(robot)
+            age = f" ({(time.monotonic() - clock.to_local(fields[0])) * 1e3:.3f} ms ago)" if clock is not None and clock.synchronized else ""
+            if kind == "progress":
+                print(f"  [{robot}] command {fields[1]} status {fields[2]}{age}")
+            elif kind == "control":
+                print(f"  [{robot}] {CONTROL_NAMES.get(fields[2], fields[2])} #{fields[1]} "
+                      f"handled after {fields[3] * 1e3:.3f} ms{age}")
+            else:
+                latest[(robot, kind)] = fields
+    for (robot, kind), fields in sorted(latest.items()):
+        print(f"  [{robot}] {kind}: {fields[1:]}")
+    print("--- Exited telemetry monitor ---")
+
+
+def launch_server(server_module: str, server_script: str, context: zmq.Context) -> None:
+    """Start one robot server according to Config.CELL_MODE.
+
+    Args:
+        server_module: Module name of the server ("server_multiMove" or "server_cobot")
+        server_script: Path to the server script, used in multi-process mode on the lab computer
+        context: ZMQ context of clientUI, shared with the server thread in single-process mode
+    """
+    if Config.CELL_MODE == "single_process":
+        # import lazily: the server modules are only needed in this process in single-process mode
+        server = __import__(server_module)
+        threading.Thread(target=server.main, kwargs={"cell_context": context},
+                         name=server_module, daemon=True).start()
+    elif is_this_simulation:
+        subprocess.Popen(['start', 'cmd', '/k', 'python', f'{server_module}.py'], shell=True)
+    else:
+        subprocess.Popen(['start', 'cmd', '/k', PATH_OF_THIS_ENV, server_script], shell=True)
+
+
 def main() -> None:
     global fmt_elen, PACKET_OFFSET, MAX_PACKET_SIZE
+    context = zmq.Context.instance()
+    metrics.serve(Config.UI_METRICS_PORT) # sequence step metrics; every metric of the cell in single_process mode
+    profiler = OnDemandProfiler("clientUI")
+    profiler.install_signal_handler() # SIGUSR1 toggles profiling of clientUI
     
     # Initialize the ZMQ context and sockets according to the given condition.
     userInput_modeExe = input("Enter '1' for simulation mode or '2' for real robot mode: ")
     if userInput_modeExe == '1':
         # 1. Establish the server, internal socket for multiMove
-        socket_int_multiMove_send = zmq.Context().socket(zmq.PUSH)
-        socket_int_multiMove_send.setsocketopt(zmq.RCVTIMEO, 500)  # Set a timeout of 500 milliseconds (0.5 second)
-        socket_int_multiMove_send.bind("tcp://*:8080")
-        socket_int_multiMove_recv = zmq.Context().socket(zmq.PULL)
-        socket_int_multiMove_recv.setsocketopt(zmq.RCVTIMEO, 500)  # Set a timeout of 500 milliseconds (0.5 second)
-        socket_int_multiMove_recv.bind("tcp://*:8060")
+        command_endpoint_mm, ack_endpoint_mm = Config.cell_endpoints("MM", bind=True)
+        socket_int_multiMove_send = context.socket(zmq.PUSH)
+        socket_int_multiMove_send.setsockopt(zmq.RCVTIMEO, 500)  # Set a timeout of 500 milliseconds (0.5 second)
+        socket_int_multiMove_send.bind(command_endpoint_mm)
+        socket_int_multiMove_recv = context.socket(zmq.PULL)
+        socket_int_multiMove_recv.setsockopt(zmq.RCVTIMEO, 500)  # Set a timeout of 500 milliseconds (0.5 second)
+        socket_int_multiMove_recv.bind(ack_endpoint_mm)
+        # priority lane for stop/pause/abort, never queued behind motion commands
+        socket_int_multiMove_control = context.socket(zmq.PUSH)
+        socket_int_multiMove_control.bind(Config.control_endpoint("MM", bind=True))
+        control_multiMove = ControlClient(socket_int_multiMove_control)
         
-        # 2. Establish the client, internal socket
-        if is_this_simulation:
-            subprocess.Popen(['start', 'cmd', '/k', 'python', 'server_multiMove.py'], shell=True)
-        else:
-            subprocess.Popen(['start', 'cmd', '/k', PATH_OF_THIS_ENV, PATH_TO_MULTIMOVE], shell=True)
+        # 2. Establish the client, internal socket (separate process or worker thread, see Config.CELL_MODE)
+        launch_server("server_multiMove", PATH_TO_MULTIMOVE, context)
         time.sleep(1)  # Wait for the server to start
 
         # 3. Acknowledge from the server
@@ -190,18 +278,20 @@ def main() -> None:
                 time.sleep(0.5)  # Wait before retrying
 
         # 6. Establish the server, internal socket for cobot
-        socket_int_cobot_send = zmq.Context().socket(zmq.PUSH)
-        socket_int_cobot_send.setsocketopt(zmq.RCVTIMEO, 500)  # Set a timeout of 500 milliseconds (0.5 second)
-        socket_int_cobot_send.bind("tcp://*:5555")
-        socket_int_cobot_recv = zmq.Context().socket(zmq.PULL)
-        socket_int_cobot_recv.setsocketopt(zmq.RCVTIMEO, 500)  # Set a timeout of 500 milliseconds (0.5 second)
-        socket_int_cobot_recv.bind("tcp://*:5556")
+        command_endpoint_cb, ack_endpoint_cb = Config.cell_endpoints("CB", bind=True)
+        socket_int_cobot_send = context.socket(zmq.PUSH)
+        socket_int_cobot_send.setsockopt(zmq.RCVTIMEO, 500)  # Set a timeout of 500 milliseconds (0.5 second)
+        socket_int_cobot_send.bind(command_endpoint_cb)
+        socket_int_cobot_recv = context.socket(zmq.PULL)
+        socket_int_cobot_recv.setsockopt(zmq.RCVTIMEO, 500)  # Set a timeout of 500 milliseconds (0.5 second)
+        socket_int_cobot_recv.bind(ack_endpoint_cb)
+        # priority lane for stop/pause/abort, never queued behind motion commands
+        socket_int_cobot_control = context.socket(zmq.PUSH)
+        socket_int_cobot_control.bind(Config.control_endpoint("CB", bind=True))
+        control_cobot = ControlClient(socket_int_cobot_control)
 
         # 7. Execute the internal socket for cobot
-        if is_this_simulation:
-            subprocess.Popen(['start', 'cmd', '/k', 'python', 'server_cobot.py'], shell=True)
-        else:
-            subprocess.Popen(['start', 'cmd', '/k', PATH_OF_THIS_ENV, PATH_TO_COBOT], shell=True)
+        launch_server("server_cobot", PATH_TO_COBOT, context)
  
         # 8. Acknowledge from the server cobot
         toggle_listeningFromServer = False
@@ -261,9 +351,28 @@ def main() -> None:
                 print("No acknowledgment received from the cobot server. Retrying...")
                 time.sleep(0.5)  # Wait before retrying
 
+            # Telemetry stream from both servers (separate from the command channel)
+            telemetry_subscriber = TelemetrySubscriber([
+                f"tcp://localhost:{Config.MM_PUB_PORT}",
+                f"tcp://localhost:{Config.CB_PUB_PORT}",
+            ])
+
+            # Confirmed steps of the last sequence, so an interrupted run can be resumed
+            sequence_checkpoint = SequenceCheckpoint("clientUI")
+
+            # Jobs for the batch runner ('b'), also accepted on Config.JOB_QUEUE_ENDPOINT meanwhile
+            job_queue = JobQueue()
+            job_queue.serve_socket(context=context)
+            batch_runner = BatchRunner(job_queue, execute=None)
+
+            # Server clocks against clientUI (telemetry timestamps are each server's time.monotonic())
+            server_clocks = {}
+
             while True:
                 try:
-                    userInput_execution = input("Enter 'y' for state motion, 's' for streaming, 'n' to quit: ")
+                    if profiler.active:
+                        profiler.poll() # close the session once its window has passed
+                    userInput_execution = input("Enter 'y' for state motion, 's' for streaming, 'b' for batch jobs, 'm' for telemetry, 'x' to abort, 'p' to profile, 'n' to quit: ")
 
                     if userInput_execution.lower() == 'y':
                         userPathSelection = input("Input desired path for the robot to execute (1A, 1B, 2A, 2B): ")
@@ -284,18 +393,88 @@ def main() -> None:
                         else:
                             print(f'wrong path selected')
 
-                        stateExeList.traverse_and_execute(
-                            stateExeList.head, userPathSelection,
-                            socket_int_multiMove_send, socket_int_multiMove_recv,
-                            socket_int_cobot_send, socket_int_cobot_recv,
-                            streaming_handler=interactive_streaming_handler
-                        )
+                        fingerprint = stateExeList.sequence_fingerprint(userPathSelection)
+                        resume_step = sequence_checkpoint.resume_step(fingerprint)
+                        if resume_step and input(f"Resume from step {resume_step}? (y/n): ").lower() != 'y':
+                            sequence_checkpoint.append(fingerprint, 0, sequence_checkpoint.last_command_id(), STATUS_CANCELLED)
+
+                        try:
+                            stateExeList.execute_resumable(
+                                userPathSelection,
+                                socket_int_multiMove_send, socket_int_multiMove_recv,
+                                socket_int_cobot_send, socket_int_cobot_recv,
+                                streaming_handler=interactive_streaming_handler,
+                                checkpoint=sequence_checkpoint
+                            )
+                        except KeyboardInterrupt:
+                            # Ctrl+C: preempt everything still queued on both servers
+                            control_multiMove.stop()
+                            control_cobot.stop()
+                            print("STOP sent to both servers.")
 
                     elif userInput_execution.lower() == 's':
                         # PHASE 2: Standalone streaming mode (not linked to a state sequence)
-                        interactive_streaming_handler(
-                            socket_int_multiMove_send, socket_int_multiMove_recv
-                        )
+                        stream_target = input("Stream to (m)ultimove, (c)obot or (b)oth [m]: ").strip().lower() or 'm'
+                        if stream_target in ('m', 'c', 'b'):
+                            router = StreamRouter(
+                                (socket_int_multiMove_send, socket_int_multiMove_recv) if stream_target in ('m', 'b') else None,
+                                (socket_int_cobot_send, socket_int_cobot_recv) if stream_target in ('c', 'b') else None
+                            )
+                            try:
+                                interactive_streaming_handler(router, router)
+                            except KeyboardInterrupt:
+                                control_multiMove.stop()
+                                control_cobot.stop()
+                                print("STOP sent to both servers.")
+                        else:
+                            print(f'wrong stream target selected')
+
+                    elif userInput_execution.lower() == 'b':
+                        # Back-to-back jobs from a JSON-lines file and the local job socket
+                        jobs_file = input("Jobs file (JSON lines, empty for socket only): ").strip()
+                        if jobs_file:
+                            print(f"{job_queue.load_file(jobs_file)} jobs queued from {jobs_file}")
+
+                        def execute_job(compiled: CompiledJob) -> None:
+                            sequence = compiled.sequence
+                            execute = sequence.execute_on_servers if Config.SEQUENCE_SERVER_SIDE else sequence.traverse_and_execute
+                            if not execute(
+                                sequence.head, compiled.job.path,
+                                socket_int_multiMove_send, socket_int_multiMove_recv,
+                                socket_int_cobot_send, socket_int_cobot_recv,
+                                streaming_handler=interactive_streaming_handler
+                            ):
+                                raise RuntimeError("stopped from the control lane") # recorded as a failed job
+
+                        batch_runner.execute = execute_job
+                        try:
+                            batch_runner.run(wait_for_jobs=Config.JOB_QUEUE_WAIT)
+                        except KeyboardInterrupt:
+                            control_multiMove.stop()
+                            control_cobot.stop()
+                            print("STOP sent to both servers.")
+                        print(f"[Batch] {batch_runner.summary()}")
+
+                    elif userInput_execution.lower() == 'm':
+                        sync_server_clocks({"MultiMove": (socket_int_multiMove_send, socket_int_multiMove_recv),
+                                            "Cobot": (socket_int_cobot_send, socket_int_cobot_recv)}, server_clocks)
+                        monitor_telemetry(telemetry_subscriber, clocks=server_clocks)
+
+                    elif userInput_execution.lower() == 'p':
+                        # start/stop a bounded profiling window on clientUI and both servers
+                        control_multiMove.profile()
+                        control_cobot.profile()
+                        session = profiler.toggle()
+                        if session is not None:
+                            print(f"Profiling started for {session.window:.0f} s, enter 'p' again to stop early.")
+                        else:
+                            print(f"Profiling stopped, results in {Config.PROFILE_DIR}/")
+
+                    elif userInput_execution.lower() == 'x':
+                        # flush queued motion and reset the servers' sequence state
+                        control_multiMove.abort()
+                        control_cobot.abort()
+                        print("ABORT sent to both servers.")
 
                     else:
                         # send termination code to the connected servers before breaking the loop and terminating the program
@@ -307,6 +486,14 @@ def main() -> None:
                         socket_int_cobot_send.send(dataPkg_to_internal_socket)
                         socket_int_cobot_recv.close()
                         socket_int_cobot_send.close()
+                        socket_int_multiMove_control.close()
+                        socket_int_cobot_control.close()
+                        telemetry_subscriber.close()
+                        sequence_checkpoint.close()
+                        job_queue.close()
+                        batch_runner.close()
+                        if profiler.active:
+                            profiler.toggle()
                         print("Program terminated by the user.")
                         sys.exit()
 
@@ -27,6 +27,105 @@ class Config:
     CB_SEND_PORT =8082
     CB_RECV_PORT =8083
 
+    # Priority control lane ports (stop/pause/abort, clientUI -> server)
+    MM_CONTROL_PORT =8086
+    CB_CONTROL_PORT =8087
+
+    # Multi-client front-end ROUTER ports (any number of DEALER clients -> server, see src/communication/priority_lane.py)
+    MM_ROUTER_PORT =8092
+    CB_ROUTER_PORT =8093
+
+    # Telemetry PUB ports (server -> any number of subscribers)
+    MM_PUB_PORT =8084
+    CB_PUB_PORT =8085
+
+    # Shared-memory joint stream (single host only, falls back to ZMQ otherwise).
+    # Off by default: one target takes a median ~75-85 us one way through the ring (pop_wait spins, then yields)
+    # against ~30 us over ZMQ TCP loopback, p99 up to ~0.8 ms under load (benchmarks/bench_shared_memory_ring.py)
+    STREAM_SHM_ENABLED = False
+    STREAM_SHM_NAME = "abb_mm_joint_stream"
+    STREAM_SHM_SLOTS = 1024 # ring capacity in joint targets
+    STREAM_SHM_WIDTH = 12 # values per slot: a ROB1 + ROB2 pair, 6-axis targets are NaN padded
+    STREAM_SHM_POLL_MS = 1 # command-socket poll interval right after the ring delivered targets
+    STREAM_SHM_IDLE_POLL_MS = 50 # the interval doubles up to this while the ring stays empty
+    MM_SERVER_HOST = "localhost" # host running server_multiMove, as seen by the stream producer
+
+    # Compact joint frames (float32 keyframes + 16-bit deltas, see src/communication/protocol.py),
+    # negotiated per stream session with a (FRAME_FORMAT_OP, format) frame, answered with the accepted format
+    FRAME_FORMAT_OP = 65 # first value of the 2-value negotiation frame
+    FRAME_FORMAT_FLOAT64 = 0 # pack_data, one float64 frame per target
+    FRAME_FORMAT_DELTA_I16 = 1 # deltas in int16 steps of FRAME_DELTA_QUANTUM
+    FRAME_FORMAT_DELTA_F16 = 2 # deltas as float16, finer for small steps, coarser for large ones
+    FRAME_FORMAT = FRAME_FORMAT_FLOAT64 # format the client asks for when a stream starts
+    FRAME_FORMATS_ACCEPTED = (FRAME_FORMAT_FLOAT64, FRAME_FORMAT_DELTA_I16, FRAME_FORMAT_DELTA_F16) # servers answer anything else with FLOAT64
+    FRAME_KEYFRAME_INTERVAL = 50 # targets per float32 keyframe; a delta out of the 16-bit range starts one early
+    FRAME_DELTA_QUANTUM = 0.001 # degrees per int16 step: +/- 32.767 deg per target, 0.0005 deg rounding
+    FRAME_MAX_POINTS = 255 # targets per compact frame
+    # Bulk trajectory uploads: a (TRAJECTORY_OP, width) header and the float64 targets in one zero-copy multipart message
+    TRAJECTORY_OP = 66
+
+    # === Buffered Joint Streaming (rate controller, see src/streaming) ===
+    # Targets the controller buffers: commModule BUF_SIZE once the leaky-bucket buffer runs (PHASE_2.md),
+    # 1 = one target at a time, each answered after its motion (current commModule)
+    STREAM_CONTROLLER_BUFFER = 1
+    STREAM_TARGET_FILL = 5 # controller buffer level the send rate is steered to (capped at the buffer size)
+    STREAM_MIN_RATE_HZ = 2.0 # send rate bounds, targets per second
+    STREAM_MAX_RATE_HZ = 250.0
+    STREAM_MAX_BATCH = 5 # targets sent back to back in one send cycle
+    STREAM_FILL_GAIN = 0.5 # proportional gain of the fill error on the send rate
+    STREAM_RATE_SMOOTHING = 0.2 # EWMA weight of a new consumption rate sample
+    STREAM_RTT_WINDOW = 64 # ACK latencies kept for the (windowed minimum) RTT estimate
+    STREAM_LOCAL_BUFFER = 256 # targets queued in the server ahead of the controller buffer
+    STREAM_REPLY_REJECTED = 7 # first reply value for a target dropped by a full controller buffer
+    # 12-value ROB1 + ROB2 pairs ('J;', server_multiMove). commModule has no 'J;' case yet (a pair does not fit the
+    # 80-character string of SocketReceive), so while this is off the server answers pairs with ACK_COMMAND_FLUSHED
+    STREAM_DUAL_ARM_ENABLED = False
+
+    # === Kinematics (batch IK of Cartesian stream targets, see src/kinematics) ===
+    # Standard DH per robot: a and d in mm, alpha and theta offset in degrees, joint limits in degrees,
+    # base = pose [x, y, z, q1, q2, q3, q4] of the robot base in the world frame (wobj0),
+    # radii = capsule radius of each link (base to joint 2, ..., wrist to tool0) for the proximity check.
+    # The set below is the ABB IRB 120 (tool0 at [374, 0, 630] from its base for all joints at 0),
+    # with ROB2 facing ROB1 900 mm away; replace it with the models and layout of the cell.
+    KINEMATICS = {
+        name: {"a": [0, 270, 70, 0, 0, 0],
+               "alpha": [-90, 0, -90, 90, -90, 0],
+               "d": [290, 0, 0, 302, 0, 72],
+               "offset": [0, -90, 0, 0, 0, 180],
+               "limits": [[-165, 165], [-110, 110], [-110, 70], [-160, 160], [-120, 120], [-400, 400]],
+               "base": base,
+               "radii": [70, 50, 45, 40, 35, 35]}
+        for name, base in (("ROB1", [0, 0, 0, 1, 0, 0, 0]), ("ROB2", [900, 0, 0, 0, 0, 0, 1]),
+                           ("Cobot", [0, 0, 0, 1, 0, 0, 0]))
+    }
+    IK_MAX_ITERATIONS = 30 # damped least-squares iterations per pass
+    IK_MAX_ITERATION_STEP_DEG = 10.0 # largest joint change of one iteration
+    IK_DAMPING = 0.5 # damping of the least-squares step (mm), keeps the step bounded near singularities
+    IK_ORIENTATION_SCALE_MM = 200.0 # weight of 1 rad of orientation error against position error
+    IK_POSITION_TOLERANCE_MM = 0.01
+    IK_ORIENTATION_TOLERANCE_RAD = 1e-4
+    IK_MAX_JOINT_STEP_DEG = 30.0 # a solution further than this from the previous pose's is solved again from that one
+    IK_CONTINUITY_PASSES = 3 # re-seeding passes over the poses that failed or jumped
+    IK_SEED_SPAN = 100 # poses solved together from one seed, a longer batch is solved span after span
+    PROXIMITY_CHECK_ENABLED = False # check every streamed ROB1 + ROB2 pair before it is queued (server_multiMove)
+    PROXIMITY_CLEARANCE_MM = 50.0 # smallest allowed distance between the link capsules of ROB1 and ROB2
+    PROXIMITY_CHUNK = 32 # ring and upload targets checked together by the server, a ZMQ pair is checked alone
+
+    # === Cell Deployment ===
+    # "multi_process": clientUI launches server_multiMove/server_cobot as separate consoles (TCP loopback)
+    # "single_process": both server loops run as worker threads inside clientUI (inproc:// endpoints)
+    CELL_MODE = "multi_process"
+
+    # === Multi-cell Configuration ===
+    # One entry per MultiMove/Cobot pair driven by the orchestrator (src/cell), see CellRegistry.
+    # A JSON file with the same structure can be passed to CellRegistry.from_file instead.
+    CELLS = [
+        {"name": "cell_1",
+         "multimove": {"ip": "192.168.0.100", "port": 5024},
+         "cobot": {"ip": "192.168.0.100", "port": 5024}},
+    ]
+    CONTROLLER_CONNECT_TIMEOUT = 5.0 # seconds
+
     # === Execution Configuration ===
     IS_LAB_COMPUTER = True # Set to False if running on a non-lab computer 
 
@@ -36,9 +135,155 @@ class Config:
     SOCKET_RETRY_DELAY = 0.1 # 100 ms
 
     # === Acknowledgment Configuration ===
-    ACK_SERVER_INIT = (99, 99, 99)
-    ACK_MOTION_COMPLETE = (99, 99, 0)
+    ACK_SERVER_INIT = (99, 99, 99) # server ready, and every command that is only queued (joint targets, uploads)
+    ACK_MOTION_COMPLETE = (99, 99, 0) # state motion (elen 3) finished on the controller
     TERMINATION_CODE = [0, 0, 0]
+    ACK_COMMAND_FLUSHED = (99, 99, 1) # command dropped (queued or held) or motion interrupted by a STOP/ABORT on the control lane
+
+    # === Control Lane Codes (value is also the priority, lower is more urgent) ===
+    CONTROL_ABORT = 1
+    CONTROL_STOP = 2
+    CONTROL_PAUSE = 3
+    CONTROL_RESUME = 4
+    CONTROL_PROFILE = 5 # start/stop an on-demand profiling session, no effect on motion
+
+    # === Checkpoint Configuration (restartable sequences, see src/execution) ===
+    CHECKPOINT_DIR = "checkpoints" # one append-only <executor>.ckpt file per cell / server
+    CHECKPOINT_FSYNC = False # True = fsync every step record (survives power loss, not only crashes)
+    CHECKPOINT_MAX_RECORDS = 4096 # records appended before the file is compacted to its last record
+
+    # === Server-side Sequences (see src/execution/server_sequence.py) ===
+    SEQUENCE_SERVER_SIDE = True # upload the state steps once and let the servers run them; False = one client round trip per step
+    SEQUENCE_POLL_MS = 5 # lane poll interval of a server waiting at a barrier or paused between steps
+    SEQUENCE_OP_UPLOAD = 61 # first value of the sequence frames, the frame length is 1 modulo 3
+    SEQUENCE_OP_RELEASE = 62
+    SEQUENCE_OP_CANCEL = 63
+    SEQUENCE_OP_PROGRESS = 64
+
+    # === Lookahead Staging (see src/execution/lookahead.py) ===
+    LOOKAHEAD_ENABLED = False # send the next program step before the current motion is predicted to finish
+    LOOKAHEAD_LEAD_S = 0.02 # staged this long before the predicted finish (network + parse time of a 'd;' command)
+    LOOKAHEAD_SIGMA = 2.0 # predicted finish = mean - SIGMA deviations, so a faster run of the motion is not waited out
+    LOOKAHEAD_SMOOTHING = 0.2 # weight of the newest measured duration in the per-(robot, path, state) average
+    LOOKAHEAD_MIN_SAMPLES = 3 # measured runs of a motion before it is staged ahead
+    LOOKAHEAD_SAVE = True # keep the learned durations in CHECKPOINT_DIR/<robot>.durations.json across restarts
+
+    # === Multi-client Front-end (ROUTER next to the clientUI command socket, see src/communication/priority_lane.py) ===
+    FRONTEND_ENABLED = True # servers bind a ROUTER that monitoring tools and job runners connect DEALERs to
+    FRONTEND_SCHEDULING = "fair" # "fifo" = arrival order, "fair" = round robin over clients, "priority" = by class, round robin within
+    FRONTEND_HELLO_OP = 67 # (op, class) registers the sending client's scheduling class, answered with the class
+    FRONTEND_HMI_CLASS = 0 # class of clientUI on the command socket, lower is served first
+    FRONTEND_DEFAULT_CLASS = 1 # class of a front-end client that sent no hello
+
+    # === Clock Synchronization (NTP-style probes, see src/telemetry/clock_sync.py) ===
+    # The host timeline is time.monotonic() (flight recorder, telemetry frames); every link keeps the offset
+    # and drift of the clock at its far end: server -> controller ('C;'), client -> server (CLOCK_PROBE_OP)
+    # Off by default: enable it only once the controllers run a commModule.mod with CASE "C" (probe id echoed).
+    # An older commModule answers 'C;' with no reply of its own and a stray ACK_DONE on its next cycle,
+    # which the server would take as the end of the next state motion.
+    CLOCK_SYNC_ENABLED = False # servers probe the controller clock while idle
+    CLOCK_PROBE_OP = 68 # (op, t0) from a client, answered with (op, t0, t1, t2) in server monotonic time
+    CLOCK_REPLY = 8 # first value of the controller answer to 'C;id': (8, t1, t2, id, 0, 0) in controller seconds
+    CLOCK_PROBE_INTERVAL_S = 1.0 # probe period of an idle link
+    CLOCK_PROBE_TIMEOUT_S = 0.2 # a controller probe not answered by then is lost
+    CLOCK_REPLY_POLL_MS = 1 # server loop poll interval while a controller probe is unanswered
+    CLOCK_PROBE_MAX_TIMEOUTS = 3 # consecutive lost controller probes before probing stops (commModule without 'C;')
+    CLOCK_WINDOW = 32 # probe samples kept per link
+    CLOCK_FILTER_SHARE = 0.5 # share of the window with the shortest round trips used for the offset/drift fit
+    CLOCK_DRIFT_MIN_SPAN_S = 5.0 # drift is fitted once the fitted samples span this long (over less it is mostly jitter)
+    CLOCK_STEP_S = 0.05 # a sample this far from the fitted offset (beyond its own round trip) restarts the window
+
+    # === Job Queue Configuration (batch runner, see src/execution/job_queue.py) ===
+    JOB_QUEUE_ENDPOINT = "tcp://127.0.0.1:8088" # local PULL socket accepting one JSON job per message
+    JOB_QUEUE_WAIT = 0.0 # seconds the batch runner waits for a new job once the queue is empty
+
+    # === Logging Configuration (see src/telemetry/logger.py) ===
+    LOG_LEVEL = "INFO" # DEBUG, INFO, WARNING, ERROR or OFF; DEBUG shows every controller message
+    LOG_FILE = None # None = console, otherwise records are appended to this file
+    LOG_QUEUE_SIZE = 10000 # records waiting for the writer thread before new ones are dropped
+    LOG_RATE_LIMIT_S = 1.0 # rate-limit window per (logger, message)
+    LOG_RATE_LIMIT_BURST = 5 # records per window and message, further repeats are only counted
+
+    # === Flight Recorder Configuration (see src/telemetry/flight_recorder.py) ===
+    RECORDER_ENABLED = True # record every ZMQ frame and controller message of the servers
+    RECORDER_DIR = "flight_recorder" # <name>_NNNN.flr segment files
+    RECORDER_SEGMENT_BYTES = 16 * 1024 * 1024 # preallocated size of one memory-mapped segment
+    RECORDER_MAX_SEGMENTS = 8 # segments kept per recorder, the oldest is deleted on rollover
+
+    # === Metrics Configuration (see src/telemetry/metrics.py) ===
+    METRICS_ENABLED = True # serve the Prometheus text endpoint, metrics are always counted
+    METRICS_HOST = "127.0.0.1" # localhost only
+    MM_METRICS_PORT = 8089 # http://127.0.0.1:8089/metrics
+    CB_METRICS_PORT = 8090
+    UI_METRICS_PORT = 8091 # clientUI; in single_process cell mode this one serves every metric of the cell
+
+    # === Profiling Configuration (see src/telemetry/profiling.py) ===
+    PROFILE_DIR = "profiles" # <component>_<time>.collapsed / .prof / .tracemalloc and text summaries
+    PROFILE_MODE = "sample" # "sample" (every thread, low overhead) or "cprofile" (deterministic, one thread)
+    PROFILE_WINDOW_S = 30.0 # a session stops on its own after this many seconds
+    PROFILE_SAMPLE_INTERVAL_S = 0.005 # stack sampling period
+    PROFILE_MEMORY = False # tracemalloc snapshot of the same window (slows every allocation while it runs)
+    PROFILE_TRACEMALLOC_FRAMES = 5 # frames kept per allocation
+    PROFILE_TOP = 40 # entries in the text summaries
+
+    # === Telemetry Configuration ===
+    TELEMETRY_BUFFER_SIZE = 4096 # samples kept per robot (ring buffer capacity)
+    TELEMETRY_WIDTH = 6 # values per controller message
+    TELEMETRY_PUB_RATE_HZ = 50 # max publish rate per topic for state/buffer frames, 0 = unlimited
+    TELEMETRY_PUB_HWM = 100 # frames queued per subscriber before ZMQ drops them
+
+    @classmethod
+    def cell_endpoints(cls, robot: str, bind: bool = False) -> tuple:
+        """Get the ZMQ endpoints between clientUI and one robot server.
+        Args:
+            robot (str): "MM" for MultiMove or "CB" for Cobot
+            bind (bool): True for the binding side (clientUI), False for the connecting side (server)
+
+        Returns:
+            tuple: (command endpoint clientUI -> server, acknowledgement endpoint server -> clientUI)
+        """
+        if cls.CELL_MODE == "single_process":
+            return (f"inproc://{robot.lower()}_command", f"inproc://{robot.lower()}_ack")
+
+        port_mapping = {
+            "MM": (cls.MM_SEND_PORT, cls.MM_RECV_PORT),
+            "CB": (cls.CB_SEND_PORT, cls.CB_RECV_PORT),
+        }
+        send_port, recv_port = port_mapping[robot]
+        host = "*" if bind else "localhost"
+        return (f"tcp://{host}:{send_port}", f"tcp://{host}:{recv_port}")
+
+    @classmethod
+    def control_endpoint(cls, robot: str, bind: bool = False) -> str:
+        """Get the ZMQ endpoint of the priority control lane of one robot server.
+        Args:
+            robot (str): "MM" for MultiMove or "CB" for Cobot
+            bind (bool): True for the binding side (clientUI), False for the connecting side (server)
+
+        Returns:
+            str: control endpoint clientUI -> server
+        """
+        if cls.CELL_MODE == "single_process":
+            return f"inproc://{robot.lower()}_control"
+        port = {"MM": cls.MM_CONTROL_PORT, "CB": cls.CB_CONTROL_PORT}[robot]
+        host = "*" if bind else "localhost"
+        return f"tcp://{host}:{port}"
+
+    @classmethod
+    def router_endpoint(cls, robot: str, bind: bool = False) -> str:
+        """Get the ZMQ endpoint of the multi-client front-end of one robot server.
+        Args:
+            robot (str): "MM" for MultiMove or "CB" for Cobot
+            bind (bool): True for the binding side (the server), False for the connecting side (clients)
+
+        Returns:
+            str: front-end endpoint clients -> server
+        """
+        if cls.CELL_MODE == "single_process":
+            return f"inproc://{robot.lower()}_router"
+        port = {"MM": cls.MM_ROUTER_PORT, "CB": cls.CB_ROUTER_PORT}[robot]
+        host = "*" if bind else "localhost"
+        return f"tcp://{host}:{port}"
 
     @classmethod
     def get_operation_mode(cls, mode_str: str) -> tuple:
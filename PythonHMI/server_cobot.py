@@ -2,84 +2,112 @@ import zmq
 import struct
 import time
 import sys
+from typing import Optional
 from src.communication.socket_manager import ExtSocketServer
+from src.communication.priority_lane import PriorityCommandLane
+from src.communication.protocol import is_compact_frame, pack_data, unpack_trajectory
+from src.telemetry.ring_buffer import TelemetryStore
+from src.execution.robot_server import RobotServer
+from src.execution.server_sequence import SequenceProgram, ServerSequenceRunner, is_sequence_frame
+from src.execution.checkpoint import SequenceCheckpoint
+from src.telemetry import publisher as telemetry
+from src.telemetry.flight_recorder import FlightRecorder, CH_ZMQ_COMMAND, DIR_IN
+from src.telemetry.logger import flush as flush_log
+from src.telemetry import metrics
+from config.settings import Config
 from src import state_machines
-from config.constants import pathDict, stateSequence_Cobot
-from config.lookupTables import retrieve_motion_settings as retrieve_motion_settings_Cobot
+from config.constants import PathDict, StateSequence_CB
+from config.lookup_tables import retrieve_motion_settings
 import csv
 
-tempClientState = state_machine.CB_Home()
+tempClientState = state_machines.CB_Home()
 
 context = zmq.Context()
 socket_ext_Cobot = None
+client_router = None # ROUTER of the multi-client front-end, created in main() when enabled
+telemetry_store = TelemetryStore() # every controller message, per robot, for position reads without extra requests
 
 internal_socket_only = False
-previous_sequence = 99 # if we're running two consecutive identical sequnces, then skip it
 temporary_sequence = 00 # temporarily save the current sequence for the next loop to compare with previous sequence, if they are identical, then skip it
-wasPreviousExecutionSuccessful = False # to check sudden termination of the execution.
 
 MAX_PACKET_SIZE = 1024
 fmt_elen = "!I"  # unsigned int (4 bytes)
 PACKET_OFFSET = 4 # the first 4 bytes are used to indicate the length of the data packet, so the actual data starts from byte 5 (index 4)
 
+# command cache, lookahead, checkpoint, streamer and control lane (see src/execution/robot_server.py)
+server = RobotServer("Cobot", lambda path, sequence: build_state_command(path, sequence, tempClientState))
+log = server.log
+command_cache = server.command_cache
+lookahead = server.lookahead
+
 # Function to traverse and print the linked list
 # starting from the head node, recursively
 # return the array for debugging purpose
-def send_command_to_external_socket(userPathSelection: int, userSequenceSelection: int, tempClientState: state_machines, socket_ext_Cobot: ExtSocketServer)->list[int]:
-    global temporary_sequence
+def build_state_command(userPathSelection: int, userSequenceSelection: int, tempClientState: state_machines) -> list[int]:
+    """Resolve the (path, tool, speed, state) controller command for a path and state code from the client."""
 
-    userPathSelection = str(list(pathDict)[userPathSelection-1])
-    print(f"User path selection: {userPathSelection}")
-    userSequenceSelection = str(stateSequence_Cobot[userSequenceSelection-1])
-    print(f"User sequence selection: {userSequenceSelection}")
+    userPathSelection = str(list(PathDict)[userPathSelection-1])
+    log.debug("User path selection", path=userPathSelection)
+    userSequenceSelection = str(list(StateSequence_CB)[userSequenceSelection-1])
+    log.debug("User sequence selection", sequence=userSequenceSelection)
 
-    tempClientState = retrieveMotionSettings(tempClientState, userPathSelection, userSequenceSelection)
+    tempClientState = retrieve_motion_settings(tempClientState, userPathSelection, f"{userSequenceSelection}_CB")
 
     # Inherit the state machine class and create an instance of the selected sequence
     match userSequenceSelection:
         case "Standby":
-            data_list = list(tempClientState.grab_data_CB('1'))
+            data_list = list(tempClientState.grab_data_CB(1))
         case "Standby_R1":
-            data_list = list(tempClientState.grab_data_CB('2'))
+            data_list = list(tempClientState.grab_data_CB(2))
 
         case "Approach":
-            data_list = list(tempClientState.grab_data_CB('1'))
+            data_list = list(tempClientState.grab_data_CB(1))
         case "Approach_R1":
-            data_list = list(tempClientState.grab_data_CB('2'))
-
-    # send command to external sockt and receive the response
-    socket_ext_Cobot.send_data(data_list, 'd;')
-    print(f'Data sent to external socket: {data_list}   with length: {len(data_list)}  ')
-
-    # not looping if we don't complete the motion
-    done_Cobot = False
-    while not done_Cobot:
-        complete_flag_CB = socket_ext_Cobot.receive_data()
-        print(f"Response received from external socket: {complete_flag_CB}")
-        if not complete_flag_CB is None and len(complete_flag_CB) == 6 :
-            if complete_flag_CB[0] == 9:
-                print("Motion completed successfully.")
-                done_Cobot = True   
-            
+            data_list = list(tempClientState.grab_data_CB(2))
+        case _:
+            data_list = list(tempClientState.grab_data_CB(1))
+
     return data_list
 
-def main()->None:
-    global internal_socket_only, previous_sequence, wasPreviousExecutionSuccessful, fmt_elen, PACKET_OFFSET, MAX_PACKET_SIZE
+def main(cell_context: Optional[zmq.Context] = None)->None:
+    """Run the server loop.
 
+    Args:
+        cell_context: ZMQ context shared with clientUI in single-process cell mode (inproc endpoints).
+                      None when running as a separate process.
+    """
+    global context, client_router, internal_socket_only, fmt_elen, PACKET_OFFSET, MAX_PACKET_SIZE
+    server.reset() # no streamer, compact session or upload left from a previous run
 
     # socket to talk to client
-    print("Initializing external CB socket server...")
+    log.info("Initializing external CB socket server")
+    if cell_context is not None:
+        context = cell_context # inproc endpoints only work within one context
+    command_endpoint, ack_endpoint = Config.cell_endpoints("CB")
     soceketClient_receive = context.socket(zmq.PULL)
     soceketClient_receive.setsockopt(zmq.RCVTIMEO, 5000)  # 5s timeout so Ctrl+C can interrupt
-    soceketClient_receive.connect("tcp://localhost:8080")
+    soceketClient_receive.connect(command_endpoint)
     soceketClient_send = context.socket(zmq.PUSH)
-    soceketClient_send.connect("tcp://localhost:8081")
+    soceketClient_send.connect(ack_endpoint)
+    server.client_ack_socket = soceketClient_send
+    if Config.RECORDER_ENABLED:
+        server.recorder = FlightRecorder("Cobot")
+        log.info("Flight recorder ready", segment=server.recorder.path)
+    soceketClient_control = context.socket(zmq.PULL)
+    soceketClient_control.connect(Config.control_endpoint("CB"))
+    client_router = context.socket(zmq.ROUTER) if Config.FRONTEND_ENABLED else None
+    if client_router is not None:
+        client_router.setsockopt(zmq.ROUTER_HANDOVER, 1) # a client reconnecting under its name takes its ACKs over
+        client_router.bind(Config.router_endpoint("CB", bind=True)) # monitoring tools, job runners (see connect_frontend)
+    metrics.serve(Config.CB_METRICS_PORT)
+    server.profiler.install_signal_handler() # SIGUSR1 toggles profiling (separate process only)
+    server.telemetry_publisher = telemetry.TelemetryPublisher("Cobot", Config.CB_PUB_PORT, context).bind()
 
     # 0. acknowledgement to client after external socket
     acknowledgeToClient = [99,99,99]
     dataPkg_to_Client = struct.pack("!I" + "d"*len(acknowledgeToClient), len(acknowledgeToClient), *acknowledgeToClient)
-    soceketClient_send.send(dataPkg_to_Client)
-    print("Acknowledgement sent to client.")
+    server.send_to_client(dataPkg_to_Client)
+    log.info("Acknowledgement sent to client")
 
     # 1. Listen to the lcient & Connect to robot, see if this is VC or RC
     toggle_listeningFromClient = False
@@ -88,6 +116,8 @@ def main()->None:
             message = soceketClient_receive.recv(MAX_PACKET_SIZE)
         except zmq.Again:
             continue
+        if server.recorder is not None:
+            server.recorder.record(CH_ZMQ_COMMAND, DIR_IN, message)
         if not message is None:
             # Ensure the specific buffer size
             if len(message) >= struct.calcsize(fmt_elen):
@@ -97,43 +127,87 @@ def main()->None:
                 if len(message) == struct.calcsize(fmt_data) + PACKET_OFFSET:
                     data = struct.unpack_from(fmt_data, message, PACKET_OFFSET)
                     if data == (2, 2, 2): # Real Controller, RC
-                        print("Connected to Real Controller.")
-                        socket_ext_Cobot: ExtSocketServer = ExtSocketServer("192.168.0.100", 5024).create_socket()
+                        log.info("Connected to Real Controller")
+                        socket_ext_Cobot: ExtSocketServer = ExtSocketServer("192.168.0.100", 5024, telemetry=telemetry_store.buffer("Cobot"),
+                                                                            command_cache=command_cache, recorder=server.recorder, robot="Cobot").create_socket()
 
                     elif data == (1, 1, 1): # Virtual Controller, VC
-                        print("Connected to Virtual Controller.")
-                        socket_ext_Cobot: ExtSocketServer = ExtSocketServer("127.0.0.1", 5024).create_socket()
+                        log.info("Connected to Virtual Controller")
+                        socket_ext_Cobot: ExtSocketServer = ExtSocketServer("127.0.0.1", 5024, telemetry=telemetry_store.buffer("Cobot"),
+                                                                            command_cache=command_cache, recorder=server.recorder, robot="Cobot").create_socket()
                         socket_ext_Cobot.send_data([0,0,0], 'I;') # send array with I data type
                         acknowledgeFromServer = False
                         while not acknowledgeFromServer:
                             complete_flag_CB = socket_ext_Cobot.receive_data()
                             if not complete_flag_CB is None and len(complete_flag_CB) == 6 :
                                 if complete_flag_CB[0] == 1:
-                                    print("Acknowledgement received from virtual controller, Cobot")
+                                    log.info("Acknowledgement received from virtual controller")
                                     acknowledgeFromServer = True
                     elif data == (3,3,3): # internal socket
-                        print("Internal socket communication only, no connection to external socket.")
+                        log.info("Internal socket communication only, no connection to external socket")
                         internal_socket_only = True
                     toggle_listeningFromClient = True
                 else:
                     # mitigate buffer too small
-                    print(f"debugging buffer size: : {struct.calcsize(fmt_data)+PACKET_OFFSET}" )
+                    log.warning("Unexpected packet size", expected=struct.calcsize(fmt_data) + PACKET_OFFSET, actual=len(message))
                 
     # 2. Acknowledge back the client after external socket connection is established
     dataPkg_to_Client = struct.pack("!I" + "d"*len(acknowledgeToClient), len(acknowledgeToClient), *acknowledgeToClient)
-    soceketClient_send.send(dataPkg_to_Client)
-    print("Acknowledgement sent to client after external socket connection is established.")
+    server.send_to_client(dataPkg_to_Client)
+    log.info("Acknowledgement sent to client after external socket connection is established")
+
+    server.command_lane = PriorityCommandLane(soceketClient_receive, soceketClient_control, server.recorder, client_router)
+
+    def run_sequence_step(path: int, sequence: int, head_tail: int, next_sequence: Optional[int]) -> None:
+        log.info("Sequence step", path=path, sequence=sequence, head_tail=head_tail)
+        if not internal_socket_only:
+            server.execute_state_command(path, sequence, head_tail, socket_ext_Cobot, next_sequence)
+
+    server.sequence_runner = ServerSequenceRunner(server.command_lane, run_sequence_step,
+                                                  lambda frame: server.send_to_client(frame, zmq.NOBLOCK), server.handle_control)
+    lookahead.reset() # nothing is staged on a new controller connection
+    if not internal_socket_only:
+        if Config.LOOKAHEAD_SAVE:
+            lookahead.load()
+        server.checkpoint = SequenceCheckpoint("Cobot")
+        server.restore_checkpoint()
 
+    clock_sync = Config.CLOCK_SYNC_ENABLED and not internal_socket_only # controller clock probes while idle
+    idle_poll_ms = min(5000, int(Config.CLOCK_PROBE_INTERVAL_S * 1000)) if clock_sync else 5000
+    shutdown_requested = False
     while True:
         try:
             # 3. Always check the terminaation condition first:
             toggle_listeningFromClient = False
             while not toggle_listeningFromClient:
-                try:
-                    message = soceketClient_receive.recv(MAX_PACKET_SIZE)
-                except zmq.Again:
+                if server.trajectory_uploads:
+                    server.drain_trajectory_uploads(socket_ext_Cobot)
+                streaming = bool(server.trajectory_uploads) or server.joint_streamer is not None and not server.joint_streamer.idle
+                if streaming:
+                    server.joint_streamer.pump() # send the targets that are due, read the consumed ones
+                # Control commands (stop/pause/abort) are always handed out before queued motion
+                server.metric_loop_iterations.inc()
+                if server.profiler.active:
+                    server.profiler.poll() # close the session once its window has passed
+                poll_ms = Config.STREAM_SHM_POLL_MS if streaming else idle_poll_ms
+                if clock_sync and socket_ext_Cobot.clock_probe_pending:
+                    poll_ms = min(poll_ms, Config.CLOCK_REPLY_POLL_MS) # the answer is timed when it is read
+                item = server.command_lane.next(poll_ms)
+                if item is None:
+                    if clock_sync and not streaming:
+                        server.probe_controller_clock(socket_ext_Cobot)
                     continue
-                if not message is None:
+                if item.is_control:
+                    server.handle_control(item)
+                    continue
+                message = item.payload
+                server.current_client = item.client # the ACK goes back to the sender
+                if not message is None and is_compact_frame(message):
+                    # Compact joint frame of the negotiated stream format, the client ACK means "queued"
+                    queued = internal_socket_only or server.receive_compact_frame(message, socket_ext_Cobot)
+                    server.send_to_client(pack_data([99, 99, 99] if queued else list(Config.ACK_COMMAND_FLUSHED)), zmq.NOBLOCK)
+                    toggle_listeningFromClient = True
+                elif not message is None:
                     # Ensure the specific buffer size
                     if len(message) >= struct.calcsize(fmt_elen):
                         elen = struct.unpack_from(fmt_elen, message)[0]
@@ -142,39 +216,85 @@ def main()->None:
                         if len(message) == struct.calcsize(fmt_data) + PACKET_OFFSET:
                             data = struct.unpack_from(fmt_data, message, PACKET_OFFSET)
                             if data == (0, 0, 0): # termination command from client
-                                print("Termination command received from client.")
+                                log.info("Termination command received from client")
+                                server.finish_joint_stream()
+                                shutdown_requested = True
                                 break  # exit to cleanup below
 
+                            elif is_sequence_frame(data):
+                                # Uploaded sequence, run here; its progress frames replace the client ACK
+                                program = SequenceProgram.decode(data)
+                                if program is not None:
+                                    server.sequence_runner.run(program, item.client)
+                                    if not internal_socket_only:
+                                        server.finish_staged_command(socket_ext_Cobot) # the step after a stop was already sent
+                                    lookahead.reset()
+                                else:
+                                    log.debug("Sequence frame outside a program ignored", data=data)
+
+                            elif elen == 2 and data[0] == Config.FRAME_FORMAT_OP:
+                                # Stream session start: the granted frame format replaces the client ACK
+                                server.send_to_client(pack_data([Config.FRAME_FORMAT_OP, server.negotiate_frames(int(data[1]))]), zmq.NOBLOCK)
+
+                            elif elen == 2 and data[0] == Config.TRAJECTORY_OP:
+                                # Bulk upload: the targets stay in the received buffer and are drained into the streamer from the loop
+                                targets = unpack_trajectory(data, item.parts)
+                                uploaded = targets is not None and targets.shape[1] == 6
+                                if uploaded and not internal_socket_only:
+                                    server.trajectory_uploads.append(targets)
+                                    log.info("Trajectory uploaded", targets=len(targets), width=targets.shape[1])
+                                server.send_to_client(pack_data([99, 99, 99] if uploaded else list(Config.ACK_COMMAND_FLUSHED)), zmq.NOBLOCK)
+
+                            elif elen == 2 and data[0] == Config.CLOCK_PROBE_OP:
+                                # Clock probe: (op, t0) answered with the receive and reply times on this server's monotonic clock
+                                server.send_to_client(pack_data([Config.CLOCK_PROBE_OP, data[1], item.received_at, time.monotonic()]), zmq.NOBLOCK)
+
                             else:
-                                # forever loop begins here:
+                                # Dispatch based on message length (elen):
+                                # elen == 3: state motion from clientUI (path, sequence, head_or_tail)
+                                # elen == 6: joint streaming (j1, j2, j3, j4, j5, j6)
+                                flushed = False # dropped by a STOP/ABORT, acknowledged as flushed
                                 if not internal_socket_only:
-                                    if not previous_sequence == data[1]: # if we're running two consecutive identical sequnces, then skip it
-                                        send_command_to_external_socket(int(data[0]), int(data[1]), tempClientState, socket_ext_Cobot)
-                                        previous_sequence = data[1]
-                                        wasPreviousExecutionSuccessful = True
+                                    if elen == 6:
+                                        # Joint streaming mode, the client ACK below means "queued"
+                                        joint_values = [float(value) for value in data]
+                                        log.debug("Joint stream command", joints=joint_values)
+                                        flushed = not server.send_joint_stream(joint_values, socket_ext_Cobot)
+                                    elif elen == 3:
+                                        flushed = not server.execute_state_command(int(data[0]), int(data[1]), int(data[2]), socket_ext_Cobot)
+                                    else:
+                                        # a 12-value ROB1 + ROB2 pair is MultiMove only
+                                        log.warning("Unknown command", elen=elen, data=data)
 
                                 # send back the acknowledgement
-                                acknowledgeToClient = [99,99,99]
+                                if flushed:
+                                    acknowledgeToClient = list(Config.ACK_COMMAND_FLUSHED)
+                                elif elen == 3:
+                                    acknowledgeToClient = list(Config.ACK_MOTION_COMPLETE) # the state motion has finished
+                                else:
+                                    acknowledgeToClient = [99,99,99] # joint target queued
                                 dataPkg_to_Client = struct.pack("!I" + "d"*len(acknowledgeToClient), len(acknowledgeToClient), *acknowledgeToClient)
-                                soceketClient_send.send(dataPkg_to_Client, zmq.NOBLOCK)
-                                print("Acknowledgement sent to client after motion execution.")
+                                server.send_to_client(dataPkg_to_Client, zmq.NOBLOCK)
+                                log.debug("Acknowledgement sent to client after motion execution")
                             toggle_listeningFromClient = True
                         else:
                             # mitigate buffer too small
-                            print(f"debugging buffer size: : {struct.calcsize(fmt_data)+PACKET_OFFSET}" )
+                            log.warning("Unexpected packet size", expected=struct.calcsize(fmt_data) + PACKET_OFFSET, actual=len(message))
+            if shutdown_requested:
+                break
         
         except OSError as e:
             if e.errno == 11:  # EAGAIN error, no data received
-                print("No data received, continuing to listen...")
+                log.debug("No data received, continuing to listen")
                 continue
             else:
                 raise
         except KeyboardInterrupt:
-            print("\nCtrl+C detected. Shutting down...")
+            log.warning("Ctrl+C detected, shutting down")
             break
 
     # Cleanup: close all sockets regardless of how we exited the loop
-    print("Cleaning up sockets...")
+    log.info("Cleaning up sockets")
     try:
         if not internal_socket_only:
             socket_ext_Cobot.send_data([0,0,0], 'T;')
@@ -183,8 +303,27 @@ def main()->None:
         pass
     soceketClient_receive.close()
     soceketClient_send.close()
-    context.term()
-    print("Server shutdown complete.")
+    soceketClient_control.close()
+    if client_router is not None:
+        client_router.close()
+    if server.checkpoint is not None:
+        server.checkpoint.close()
+        if Config.LOOKAHEAD_SAVE:
+            lookahead.save()
+    if server.profiler.active:
+        server.profiler.toggle()
+    if server.recorder is not None:
+        log.info("Flight recorder closed", segment=server.recorder.path, records=server.recorder.records)
+        server.recorder.close()
+    if clock_sync:
+        log.info("Controller clock", estimate=str(socket_ext_Cobot.clock))
+    log.info("Command cache", hits=command_cache.hits, misses=command_cache.misses,
+             invalidations=command_cache.invalidations)
+    server.telemetry_publisher.close()
+    if cell_context is None: # the shared context belongs to clientUI
+        context.term()
+    log.info("Server shutdown complete")
+    flush_log()
 
 if __name__ == "__main__":
     main()
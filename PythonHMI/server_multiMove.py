@@ -2,143 +2,144 @@ import zmq
 import struct
 import time
 import sys
+from typing import Optional
 import math
 from src.communication.socket_manager import ExtSocketServer
+from src.communication.priority_lane import PriorityCommandLane
+from src.communication.protocol import is_compact_frame, pack_data, unpack_trajectory
+from src.communication.shared_memory_ring import SharedJointRing
+from src.telemetry.ring_buffer import TelemetryStore
+from src.kinematics.proximity import ProximityChecker
+from src.execution.robot_server import RobotServer
+from src.execution.server_sequence import SequenceProgram, ServerSequenceRunner, is_sequence_frame
+from src.execution.checkpoint import SequenceCheckpoint
+from src.telemetry import publisher as telemetry
+from src.telemetry.flight_recorder import FlightRecorder, CH_ZMQ_COMMAND, DIR_IN
+from src.telemetry.logger import flush as flush_log
+from src.telemetry import metrics
+from config.settings import Config
 from src import state_machines
-from config.constants import pathDict, stateSequence_MultiMove
-from config.lookupTables import retrieve_motion_settings as retrieve_motion_settings_MultiMove
+from config.constants import PathDict, StateSequence_MM
+from config.lookup_tables import retrieve_motion_settings
 import csv
 
-tempClientState = state_machine.MM_Home()
+tempClientState = state_machines.MM_Home()
 
 context = zmq.Context()
 socket_ext_Multimove = None
+client_router = None # ROUTER of the multi-client front-end, created in main() when enabled
+telemetry_store = TelemetryStore() # every controller message, per robot, for position reads without extra requests
 
 internal_socket_only = False
-previous_sequence = 99 # if we're running two consecutive identical sequnces, then skip it
 temporary_sequence = 00 # temporarily save the current sequence for the next loop to compare with previous sequence, if they are identical, then skip it
-wasPreviousExecutionSuccessful = False # to check sudden termination of the execution.
 
 MAX_PACKET_SIZE = 1024
 fmt_elen = "!I"  # unsigned int (4 bytes)
 PACKET_OFFSET = 4 # the first 4 bytes are used to indicate the length of the data packet, so the actual data starts from byte 5 (index 4)
 
+# command cache, lookahead, checkpoint, streamer and control lane (see src/execution/robot_server.py)
+server = RobotServer("MultiMove", lambda path, sequence: build_state_command(path, sequence, tempClientState), dual_arm=True)
+log = server.log
+command_cache = server.command_cache
+lookahead = server.lookahead
+
 # Function to traverse and print the linked list
 # starting from the head node, recursively
 # return the array for debugging purpose
-def send_command_to_external_socket(userPathSelection: int, userSequenceSelection: int, tempClientState: state_machines, socket_ext_Multimove: ExtSocketServer)->list[int]:
-    global temporary_sequence
+def build_state_command(userPathSelection: int, userSequenceSelection: int, tempClientState: state_machines) -> list[int]:
+    """Resolve the (path, tool, speed, state) controller command for a path and state code from the client."""
 
-    userPathSelection = str(list(pathDict)[userPathSelection-1])
-    print(f"User path selection: {userPathSelection}")
-    userSequenceSelection = str(stateSequence_MultiMove[userSequenceSelection-1])
-    print(f"User sequence selection: {userSequenceSelection}")
+    userPathSelection = str(list(PathDict)[userPathSelection-1])
+    log.debug("User path selection", path=userPathSelection)
+    userSequenceSelection = str(list(StateSequence_MM)[userSequenceSelection-1])
+    log.debug("User sequence selection", sequence=userSequenceSelection)
 
-    tempClientState = retrieveMotionSettings(tempClientState, userPathSelection, userSequenceSelection)
+    tempClientState = retrieve_motion_settings(tempClientState, userPathSelection, userSequenceSelection)
 
     # Inherit the state machine class and create an instance of the selected sequence
     match userSequenceSelection:
         case "Standby":
-            data_list = list(tempClientState.grab_data_MM('1'))
+            data_list = list(tempClientState.grab_data_MM(1))
         case "Standby_R1":
-            data_list = list(tempClientState.grab_data_MM('2'))
+            data_list = list(tempClientState.grab_data_MM(2))
 
         case "Approach":
-            data_list = list(tempClientState.grab_data_MM('1'))
+            data_list = list(tempClientState.grab_data_MM(1))
         case "Approach_R1":
-            data_list = list(tempClientState.grab_data_MM('2'))
-
-    # send command to external sockt and receive the response
-    socket_ext_Multimove.send_data(data_list, 'd;')
-    print(f'Data sent to external socket: {data_list}   with length: {len(data_list)}  ')
-
-    # not looping if we don't complete the motion
-    done_Multimove = False
-    while not done_Multimove:
-        complete_flag_MM = socket_ext_Multimove.receive_data()
-        print(f"Response received from external socket: {complete_flag_MM}")
-        if not complete_flag_MM is None and len(complete_flag_MM) == 6 :
-            if complete_flag_MM[0] == 9:
-                print("Motion completed successfully.")
-                done_Multimove = True   
-            
-    return data_list
-
-def send_joint_stream(joint_values: list[float], socket_ext: ExtSocketServer) -> bool:
-    """Send a single joint streaming packet to the robot controller.
-
-    Args:
-        joint_values: List of 6 float values [j1, j2, j3, j4, j5, j6] in degrees
-        socket_ext: The external socket connection to the robot controller
+            data_list = list(tempClientState.grab_data_MM(2))
+        case _:
+            data_list = list(tempClientState.grab_data_MM(1))
 
-    Returns:
-        True if motion completed successfully
-    """
-    socket_ext.send_data(joint_values, 'j;')
-    print(f'Joint stream sent: {joint_values}')
-
-    # Wait for acknowledgment
-    done = False
-    while not done:
-        response = socket_ext.receive_data()
-        if response is not None and len(response) == 6:
-            if response[0] == 9:
-                print("Joint stream motion completed.")
-                done = True
-    return True
+    return data_list
 
 def run_streaming_test(socket_ext: ExtSocketServer):
     """Test joint streaming with a simple sine wave motion pattern.
 
-    Sends 20 joint target points with a small oscillation on J1.
+    Sends 20 joint target points with a small oscillation on J1, as fast as
+    the streamer's rate controller lets the controller consume them.
     Safe for testing - only moves +/- 5 degrees on joint 1.
     """
-    print("Starting joint streaming test...")
+    log.info("Starting joint streaming test")
     t = 0
-    frequency = 2.0  # 2 Hz for safety during testing
-    period = 1.0 / frequency
 
     # Base joint position (safe starting position - adjust for your robot)
     base_joints = [0.0, 0.0, 0.0, 0.0, 0.0, 0.0]
 
     try:
         for i in range(20):  # 20 points for testing
-            start_time = time.time()
-
             # Small oscillation on joint 1 only (safe test)
             joints = base_joints.copy()
             joints[0] = base_joints[0] + 5.0 * math.sin(t)  # +/- 5 degrees on J1
 
-            send_joint_stream(joints, socket_ext)
+            if not server.send_joint_stream(joints, socket_ext):
+                break # stopped from the control lane
             t += 0.3
-
-            elapsed = time.time() - start_time
-            sleep_time = period - elapsed
-            if sleep_time > 0:
-                time.sleep(sleep_time)
+        server.finish_joint_stream()
 
     except KeyboardInterrupt:
-        print("Streaming test stopped by user.")
+        log.warning("Streaming test stopped by user")
 
-    print("Joint streaming test completed.")
+    log.info("Joint streaming test completed")
+def main(cell_context: Optional[zmq.Context] = None)->None:
+    """Run the server loop.
 
-def main()->None:
-    global internal_socket_only, previous_sequence, wasPreviousExecutionSuccessful, fmt_elen, PACKET_OFFSET, MAX_PACKET_SIZE
+    Args:
+        cell_context: ZMQ context shared with clientUI in single-process cell mode (inproc endpoints).
+                      None when running as a separate process.
+    """
+    global context, client_router, internal_socket_only, fmt_elen, PACKET_OFFSET, MAX_PACKET_SIZE
 
 
+    server.reset() # no streamer, compact session or upload left from a previous run
     # socket to talk to client
-    print("Initializing external MM socket server...")
+    log.info("Initializing external MM socket server")
+    if cell_context is not None:
+        context = cell_context # inproc endpoints only work within one context
+    command_endpoint, ack_endpoint = Config.cell_endpoints("MM")
     soceketClient_receive = context.socket(zmq.PULL)
     soceketClient_receive.setsockopt(zmq.RCVTIMEO, 5000)  # 5s timeout so Ctrl+C can interrupt
-    soceketClient_receive.connect("tcp://localhost:8080")
+    soceketClient_receive.connect(command_endpoint)
     soceketClient_send = context.socket(zmq.PUSH)
-    soceketClient_send.connect("tcp://localhost:8081")
+    soceketClient_send.connect(ack_endpoint)
+    server.client_ack_socket = soceketClient_send
+    if Config.RECORDER_ENABLED:
+        server.recorder = FlightRecorder("MultiMove")
+        log.info("Flight recorder ready", segment=server.recorder.path)
+    soceketClient_control = context.socket(zmq.PULL)
+    soceketClient_control.connect(Config.control_endpoint("MM"))
+    client_router = context.socket(zmq.ROUTER) if Config.FRONTEND_ENABLED else None
+    if client_router is not None:
+        client_router.setsockopt(zmq.ROUTER_HANDOVER, 1) # a client reconnecting under its name takes its ACKs over
+        client_router.bind(Config.router_endpoint("MM", bind=True)) # monitoring tools, job runners (see connect_frontend)
+    metrics.serve(Config.MM_METRICS_PORT)
+    server.profiler.install_signal_handler() # SIGUSR1 toggles profiling (separate process only)
+    server.telemetry_publisher = telemetry.TelemetryPublisher("MultiMove", Config.MM_PUB_PORT, context).bind()
 
     # 0. acknowledgement to client after external socket
     acknowledgeToClient = [99,99,99]
     dataPkg_to_Client = struct.pack("!I" + "d"*len(acknowledgeToClient), len(acknowledgeToClient), *acknowledgeToClient)
-    soceketClient_send.send(dataPkg_to_Client)
-    print("Acknowledgement sent to client.")
+    server.send_to_client(dataPkg_to_Client)
+    log.info("Acknowledgement sent to client")
 
     # 1. Listen to the lcient & Connect to robot, see if this is VC or RC
     toggle_listeningFromClient = False
@@ -147,6 +148,8 @@ def main()->None:
             message = soceketClient_receive.recv(MAX_PACKET_SIZE)
         except zmq.Again:
             continue
+        if server.recorder is not None:
+            server.recorder.record(CH_ZMQ_COMMAND, DIR_IN, message)
         if not message is None:
             # Ensure the specific buffer size
             if len(message) >= struct.calcsize(fmt_elen):
@@ -156,43 +159,107 @@ def main()->None:
                 if len(message) == struct.calcsize(fmt_data) + PACKET_OFFSET:
                     data = struct.unpack_from(fmt_data, message, PACKET_OFFSET)
                     if data == (2, 2, 2): # Real Controller, RC
-                        print("Connected to Real Controller.")
-                        socket_ext_Multimove: ExtSocketServer = ExtSocketServer("192.168.0.100", 5024).create_socket()
+                        log.info("Connected to Real Controller")
+                        socket_ext_Multimove: ExtSocketServer = ExtSocketServer("192.168.0.100", 5024, telemetry=telemetry_store.buffer("MultiMove"),
+                                                                                command_cache=command_cache, recorder=server.recorder, robot="MultiMove").create_socket()
 
                     elif data == (1, 1, 1): # Virtual Controller, VC
-                        print("Connected to Virtual Controller.")
-                        socket_ext_Multimove: ExtSocketServer = ExtSocketServer("127.0.0.1", 5024).create_socket()
+                        log.info("Connected to Virtual Controller")
+                        socket_ext_Multimove: ExtSocketServer = ExtSocketServer("127.0.0.1", 5024, telemetry=telemetry_store.buffer("MultiMove"),
+                                                                                command_cache=command_cache, recorder=server.recorder, robot="MultiMove").create_socket()
                         socket_ext_Multimove.send_data([0,0,0], 'I;') # send array with I data type
                         acknowledgeFromServer = False
                         while not acknowledgeFromServer:
                             complete_flag_MM = socket_ext_Multimove.receive_data()
                             if not complete_flag_MM is None and len(complete_flag_MM) == 6 :
                                 if complete_flag_MM[0] == 1:
-                                    print("Acknowledgement received from virtual controller, multimove")
+                                    log.info("Acknowledgement received from virtual controller")
                                     acknowledgeFromServer = True
                     elif data == (3,3,3): # internal socket
-                        print("Internal socket communication only, no connection to external socket.")
+                        log.info("Internal socket communication only, no connection to external socket")
                         internal_socket_only = True
                     toggle_listeningFromClient = True
                 else:
                     # mitigate buffer too small
-                    print(f"debugging buffer size: : {struct.calcsize(fmt_data)+PACKET_OFFSET}" )
+                    log.warning("Unexpected packet size", expected=struct.calcsize(fmt_data) + PACKET_OFFSET, actual=len(message))
                 
+    # Shared-memory ring for same-host stream producers (ZMQ elen==6/12 path stays available)
+    if Config.STREAM_SHM_ENABLED and not internal_socket_only:
+        server.stream_ring = SharedJointRing.create()
+        log.info("Shared memory joint ring ready", name=Config.STREAM_SHM_NAME, slots=Config.STREAM_SHM_SLOTS)
+    server.proximity_checker = ProximityChecker.from_config("ROB1", "ROB2") if Config.PROXIMITY_CHECK_ENABLED else None
+    if server.proximity_checker is not None:
+        log.info("Proximity check of the streamed pairs", clearance_mm=server.proximity_checker.clearance)
+
     # 2. Acknowledge back the client after external socket connection is established
     dataPkg_to_Client = struct.pack("!I" + "d"*len(acknowledgeToClient), len(acknowledgeToClient), *acknowledgeToClient)
-    soceketClient_send.send(dataPkg_to_Client)
-    print("Acknowledgement sent to client after external socket connection is established.")
+    server.send_to_client(dataPkg_to_Client)
+    log.info("Acknowledgement sent to client after external socket connection is established")
 
+    server.command_lane = PriorityCommandLane(soceketClient_receive, soceketClient_control, server.recorder, client_router)
+
+    def run_sequence_step(path: int, sequence: int, head_tail: int, next_sequence: Optional[int]) -> None:
+        log.info("Sequence step", path=path, sequence=sequence, head_tail=head_tail)
+        if not internal_socket_only:
+            server.execute_state_command(path, sequence, head_tail, socket_ext_Multimove, next_sequence)
+
+    server.sequence_runner = ServerSequenceRunner(server.command_lane, run_sequence_step,
+                                                  lambda frame: server.send_to_client(frame, zmq.NOBLOCK), server.handle_control)
+    lookahead.reset() # nothing is staged on a new controller connection
+    if not internal_socket_only:
+        if Config.LOOKAHEAD_SAVE:
+            lookahead.load()
+        server.checkpoint = SequenceCheckpoint("MultiMove")
+        server.restore_checkpoint()
+
+    clock_sync = Config.CLOCK_SYNC_ENABLED and not internal_socket_only # controller clock probes while idle
+    idle_poll_ms = min(5000, int(Config.CLOCK_PROBE_INTERVAL_S * 1000)) if clock_sync else 5000
+    ring_poll_ms = Config.STREAM_SHM_POLL_MS # backs off while the ring stays empty, no busy wake-ups
+    shutdown_requested = False
     while True:
         try:
             # 3. Always check the terminaation condition first:
             toggle_listeningFromClient = False
             while not toggle_listeningFromClient:
-                try:
-                    message = soceketClient_receive.recv(MAX_PACKET_SIZE)
-                except zmq.Again:
+                # Same-host producers stream through shared memory; keep the command socket polled
+                if server.stream_ring is not None:
+                    if server.drain_stream_ring(server.stream_ring, socket_ext_Multimove):
+                        ring_poll_ms = Config.STREAM_SHM_POLL_MS
+                    else:
+                        ring_poll_ms = min(ring_poll_ms * 2, Config.STREAM_SHM_IDLE_POLL_MS)
+                if server.trajectory_uploads:
+                    server.drain_trajectory_uploads(socket_ext_Multimove)
+                streaming = bool(server.trajectory_uploads) or server.joint_streamer is not None and not server.joint_streamer.idle
+                if streaming:
+                    server.joint_streamer.pump() # send the targets that are due, read the consumed ones
+                # Control commands (stop/pause/abort) are always handed out before queued motion
+                server.metric_loop_iterations.inc()
+                if server.profiler.active:
+                    server.profiler.poll() # close the session once its window has passed
+                if streaming:
+                    poll_ms = Config.STREAM_SHM_POLL_MS
+                elif server.stream_ring is not None:
+                    poll_ms = min(ring_poll_ms, idle_poll_ms)
+                else:
+                    poll_ms = idle_poll_ms
+                if clock_sync and socket_ext_Multimove.clock_probe_pending:
+                    poll_ms = min(poll_ms, Config.CLOCK_REPLY_POLL_MS) # the answer is timed when it is read
+                item = server.command_lane.next(poll_ms)
+                if item is None:
+                    if clock_sync and not streaming:
+                        server.probe_controller_clock(socket_ext_Multimove)
+                    continue
+                if item.is_control:
+                    server.handle_control(item)
                     continue
-                if not message is None:
+                message = item.payload
+                server.current_client = item.client # the ACK goes back to the sender
+                if not message is None and is_compact_frame(message):
+                    # Compact joint frame of the negotiated stream format, the client ACK means "queued"
+                    queued = internal_socket_only or server.receive_compact_frame(message, socket_ext_Multimove)
+                    server.send_to_client(pack_data([99, 99, 99] if queued else list(Config.ACK_COMMAND_FLUSHED)), zmq.NOBLOCK)
+                    toggle_listeningFromClient = True
+                elif not message is None:
                     # Ensure the specific buffer size
                     if len(message) >= struct.calcsize(fmt_elen):
                         elen = struct.unpack_from(fmt_elen, message)[0]
@@ -201,62 +268,123 @@ def main()->None:
                         if len(message) == struct.calcsize(fmt_data) + PACKET_OFFSET:
                             data = struct.unpack_from(fmt_data, message, PACKET_OFFSET)
                             if data == (0, 0, 0): # termination command from client
-                                print("Termination command received from client.")
+                                log.info("Termination command received from client")
+                                server.finish_joint_stream()
+                                shutdown_requested = True
                                 break  # exit to cleanup below
 
+                            elif is_sequence_frame(data):
+                                # Uploaded sequence, run here; its progress frames replace the client ACK
+                                program = SequenceProgram.decode(data)
+                                if program is not None:
+                                    server.sequence_runner.run(program, item.client)
+                                    if not internal_socket_only:
+                                        server.finish_staged_command(socket_ext_Multimove) # the step after a stop was already sent
+                                    lookahead.reset()
+                                else:
+                                    log.debug("Sequence frame outside a program ignored", data=data)
+
+                            elif elen == 2 and data[0] == Config.FRAME_FORMAT_OP:
+                                # Stream session start: the granted frame format replaces the client ACK
+                                server.send_to_client(pack_data([Config.FRAME_FORMAT_OP, server.negotiate_frames(int(data[1]))]), zmq.NOBLOCK)
+
+                            elif elen == 2 and data[0] == Config.TRAJECTORY_OP:
+                                # Bulk upload: the targets stay in the received buffer and are drained into the streamer from the loop
+                                targets = unpack_trajectory(data, item.parts)
+                                uploaded = targets is not None and targets.shape[1] in server.stream_widths
+                                if uploaded and not internal_socket_only:
+                                    server.trajectory_uploads.append(targets)
+                                    log.info("Trajectory uploaded", targets=len(targets), width=targets.shape[1])
+                                server.send_to_client(pack_data([99, 99, 99] if uploaded else list(Config.ACK_COMMAND_FLUSHED)), zmq.NOBLOCK)
+
+                            elif elen == 2 and data[0] == Config.CLOCK_PROBE_OP:
+                                # Clock probe: (op, t0) answered with the receive and reply times on this server's monotonic clock
+                                server.send_to_client(pack_data([Config.CLOCK_PROBE_OP, data[1], item.received_at, time.monotonic()]), zmq.NOBLOCK)
+
                             else:
                                 # Dispatch based on message length (elen):
                                 # elen == 3: state motion from clientUI (path, sequence, head_or_tail)
                                 # elen == 6: joint streaming (j1, j2, j3, j4, j5, j6)
+                                # elen == 12: dual-arm joint streaming (ROB1 j1..j6, ROB2 j1..j6), with Config.STREAM_DUAL_ARM_ENABLED
+                                flushed = False # rejected, or dropped by the proximity check or a STOP/ABORT: acknowledged as flushed
                                 if not internal_socket_only:
-                                    if elen == 6:
-                                        # PHASE 2: Joint streaming mode
-                                        joint_values = [float(data[i]) for i in range(6)]
-                                        print(f'[Joint Stream] joints: {joint_values}')
-                                        send_joint_stream(joint_values, socket_ext_Multimove)
+                                    if elen in (6, 12):
+                                        # PHASE 2: Joint streaming mode, the client ACK below means "queued"
+                                        joint_values = [float(value) for value in data]
+                                        log.debug("Joint stream command", joints=joint_values)
+                                        if elen not in server.stream_widths:
+                                            log.warning("ROB1 + ROB2 target rejected, dual-arm streaming is off")
+                                            flushed = True
+                                        else:
+                                            flushed = not (server.check_stream_proximity([joint_values])
+                                                           and server.send_joint_stream(joint_values, socket_ext_Multimove))
                                     elif elen == 3:
                                         # State motion: data = (path, sequence, head-1 or tail-3)
-                                        print(f'[State Motion] path: {data[0]}, sequence: {data[1]}, head/tail: {data[2]}')
-                                        # Only send if sequence changed (skip consecutive identical sequences)
-                                        if not previous_sequence == data[1]:
-                                            send_command_to_external_socket(int(data[0]), int(data[1]), tempClientState, socket_ext_Multimove)
-                                            previous_sequence = data[1]
-                                            wasPreviousExecutionSuccessful = True
+                                        log.info("State motion", path=data[0], sequence=data[1], head_tail=data[2])
+                                        flushed = not server.execute_state_command(int(data[0]), int(data[1]), int(data[2]), socket_ext_Multimove)
                                     else:
-                                        print(f'[Unknown] elen={elen}, data={data}')
+                                        log.warning("Unknown command", elen=elen, data=data)
 
                                 # send back the acknowledgement
-                                acknowledgeToClient = [99,99,99]
+                                if flushed:
+                                    acknowledgeToClient = list(Config.ACK_COMMAND_FLUSHED)
+                                elif elen == 3:
+                                    acknowledgeToClient = list(Config.ACK_MOTION_COMPLETE) # the state motion has finished
+                                else:
+                                    acknowledgeToClient = [99,99,99] # joint target queued
                                 dataPkg_to_Client = struct.pack("!I" + "d"*len(acknowledgeToClient), len(acknowledgeToClient), *acknowledgeToClient)
-                                soceketClient_send.send(dataPkg_to_Client, zmq.NOBLOCK)
-                                print("Acknowledgement sent to client after motion execution.")
+                                server.send_to_client(dataPkg_to_Client, zmq.NOBLOCK)
+                                log.debug("Acknowledgement sent to client after motion execution")
                             toggle_listeningFromClient = True
                         else:
                             # mitigate buffer too small
-                            print(f"debugging buffer size: : {struct.calcsize(fmt_data)+PACKET_OFFSET}" )
+                            log.warning("Unexpected packet size", expected=struct.calcsize(fmt_data) + PACKET_OFFSET, actual=len(message))
+            if shutdown_requested:
+                break
         
         except OSError as e:
             if e.errno == 11:  # EAGAIN error, no data received
-                print("No data received, continuing to listen...")
+                log.debug("No data received, continuing to listen")
                 continue
             else:
                 raise
         except KeyboardInterrupt:
-            print("\nCtrl+C detected. Shutting down...")
+            log.warning("Ctrl+C detected, shutting down")
             break
 
     # Cleanup: close all sockets regardless of how we exited the loop
-    print("Cleaning up sockets...")
+    log.info("Cleaning up sockets")
     try:
         if not internal_socket_only:
             socket_ext_Multimove.send_data([0,0,0], 'T;')
             socket_ext_Multimove.close_socket()
     except Exception:
         pass
+    if server.stream_ring is not None:
+        server.stream_ring.close()
     soceketClient_receive.close()
     soceketClient_send.close()
-    context.term()
-    print("Server shutdown complete.")
+    soceketClient_control.close()
+    if client_router is not None:
+        client_router.close()
+    if server.checkpoint is not None:
+        server.checkpoint.close()
+        if Config.LOOKAHEAD_SAVE:
+            lookahead.save()
+    if server.profiler.active:
+        server.profiler.toggle()
+    if server.recorder is not None:
+        log.info("Flight recorder closed", segment=server.recorder.path, records=server.recorder.records)
+        server.recorder.close()
+    if clock_sync:
+        log.info("Controller clock", estimate=str(socket_ext_Multimove.clock))
+    log.info("Command cache", hits=command_cache.hits, misses=command_cache.misses,
+             invalidations=command_cache.invalidations)
+    server.telemetry_publisher.close()
+    if cell_context is None: # the shared context belongs to clientUI
+        context.term()
+    log.info("Server shutdown complete")
+    flush_log()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,15 @@
+"""cell package for multi-cell registry and orchestration"""
+
+from .registry import CellRegistry, CellSpec, ControllerEndpoint
+from .orchestrator import CellOrchestrator, CellExecutor, CompiledStep, compile_sequence, run_cells
+
+__all__ = [
+    "CellRegistry",
+    "CellSpec",
+    "ControllerEndpoint",
+    "CellOrchestrator",
+    "CellExecutor",
+    "CompiledStep",
+    "compile_sequence",
+    "run_cells"
+]
@@ -0,0 +1,326 @@
+"""
+Docstring for PythonHMI.src.cell.orchestrator
+
+Multi-cell orchestrator driving many MultiMove/Cobot pairs from one process.
+
+Every cell of a CellRegistry gets its own CellExecutor with its own
+controller links, compiled sequence and counters, so nothing is shared
+across cells on the hot path. All executors run concurrently on a single
+asyncio event loop; within a cell each step is sent to both robots and the
+next step is released only after both ACK_DONE (same barrier as
+LinkedList.traverse_and_execute).
+
+With checkpointing enabled every confirmed step is appended to the cell's
+checkpoint file, and a restarted orchestrator resumes each cell from its
+last confirmed step. Cells are cancelled between steps through their
+CancellationToken. With a recorder directory, every controller message of a
+cell is kept in a flight recorder per robot link.
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Dict, List, Optional, Tuple
+
+from config.settings import Config
+from config.constants import StateSequence_MM
+from config.lookup_tables import retrieve_motion_settings
+from src.communication.socket_manager import encode_command, parse_position
+from src.communication.command_cache import CommandStateCache
+from src.execution.checkpoint import SequenceCheckpoint, STATUS_CANCELLED, STATUS_SEQUENCE_DONE, sequence_fingerprint
+from src.execution.cancellation import CancellationToken, SequenceCancelled
+from src.telemetry.ring_buffer import TelemetryRingBuffer
+from src.telemetry.flight_recorder import CH_CONTROLLER, DIR_IN, DIR_OUT, FlightRecorder
+from src.telemetry.logger import get_logger
+from .registry import CellRegistry, CellSpec, ControllerEndpoint
+
+log = get_logger("Orchestrator")
+
+ACK_DONE_FLAG = 9
+ACK_HANDSHAKE_FLAG = 1
+
+
+class CompiledStep:
+    """One sequence step, pre-compiled to controller command values."""
+    __slots__ = ("mm_command", "cb_command")
+
+    def __init__(self, mm_command: Optional[List[int]], cb_command: Optional[List[int]]) -> None:
+        """
+        Args:
+            mm_command: [path, tool, speed, state] for MultiMove, None to leave it idle
+            cb_command: [path, tool, speed, state] for Cobot, None to leave it idle
+        """
+        self.mm_command = mm_command
+        self.cb_command = cb_command
+
+    def __repr__(self) -> str:
+        return f"CompiledStep({self.mm_command}, {self.cb_command})"
+
+
+def compile_sequence(user_path_selection: str, steps: List[Tuple[str, str]]) -> List[CompiledStep]:
+    """Compile (MM state, CB state) pairs into controller commands once, off the hot path.
+
+    Args:
+        user_path_selection: Path identifier, e.g. "1A"
+        steps: State names in LinkedList.append form, e.g. [("Home", "CB_Home"), ("Standby", "CB_Standby")]
+
+    Returns:
+        List of compiled steps
+    """
+    compiled = []
+    for mm_state, cb_state in steps:
+        mm_command = None
+        if mm_state in StateSequence_MM:
+            mm_command = list(retrieve_motion_settings(None, user_path_selection, mm_state).grab_data_MM(1))
+        cb_command = None
+        if cb_state:
+            cb_sequence = cb_state[len("CB_"):] if cb_state.startswith("CB_") else cb_state
+            cb_command = list(retrieve_motion_settings(None, user_path_selection, f"{cb_sequence}_CB").grab_data_CB(1))
+        compiled.append(CompiledStep(mm_command, cb_command))
+    return compiled
+
+
+class AsyncControllerLink:
+    """asyncio counterpart of ExtSocketServer for one robot controller."""
+    def __init__(self, endpoint: ControllerEndpoint, telemetry: Optional[TelemetryRingBuffer] = None,
+                 command_cache: Optional[CommandStateCache] = None,
+                 recorder: Optional[FlightRecorder] = None) -> None:
+        """
+        Args:
+            endpoint: Controller endpoint
+            telemetry: Optional buffer recording every controller message
+            command_cache: Optional cache dropping state commands the robot has already confirmed
+            recorder: Optional flight recorder, records every message sent and received
+        """
+        self.endpoint = endpoint
+        self.telemetry = telemetry
+        self.command_cache = command_cache
+        self.recorder = recorder
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+    async def connect(self, handshake: bool = True) -> None:
+        """Open the connection, optionally performing the I; handshake (virtual controller)."""
+        if self.command_cache is not None:
+            self.command_cache.invalidate("reconnect")
+        self._reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(self.endpoint.ip_addr, self.endpoint.port_no),
+            Config.CONTROLLER_CONNECT_TIMEOUT)
+        if handshake:
+            self._send(encode_command([0, 0, 0], 'I;'))
+            await self._wait_for(ACK_HANDSHAKE_FLAG)
+
+    def _send(self, message: bytes) -> None:
+        if self.recorder is not None:
+            self.recorder.record(CH_CONTROLLER, DIR_OUT, message)
+        self._writer.write(message)
+
+    async def _wait_for(self, flag: int) -> List[float]:
+        """Read controller messages until one starts with the given flag."""
+        while True:
+            message = await self._reader.read(Config.MAX_PACKET_SIZE)
+            if not message:
+                raise ConnectionError(f"Controller {self.endpoint} closed the connection")
+            if self.recorder is not None:
+                self.recorder.record(CH_CONTROLLER, DIR_IN, message)
+            robot_pos = parse_position(message.decode('utf-8'))
+            if robot_pos:
+                if self.telemetry is not None:
+                    self.telemetry.append(robot_pos)
+                if robot_pos[0] == flag:
+                    return robot_pos
+
+    async def execute(self, data: List[float], header: str = 'd;') -> bool:
+        """Send one command and wait for ACK_DONE.
+
+        Returns:
+            False if the state command was skipped as already confirmed
+        """
+        if self.command_cache is not None:
+            if header != 'd;':
+                self.command_cache.invalidate("streaming")
+            elif self.command_cache.is_redundant(data):
+                return False
+        self._send(encode_command(data, header))
+        await self._wait_for(ACK_DONE_FLAG)
+        if self.command_cache is not None and header == 'd;':
+            self.command_cache.confirm(data)
+        return True
+
+    async def close(self) -> None:
+        """Send the termination command and close the connection."""
+        if self._writer is not None:
+            try:
+                self._send(encode_command([0, 0, 0], 'T;'))
+                await self._writer.drain()
+            except ConnectionError:
+                pass
+            self._writer.close()
+            self._writer = None
+        if self.recorder is not None:
+            self.recorder.close()
+
+
+class CellExecutor:
+    """Sequence executor owning everything one cell needs on the hot path."""
+    def __init__(self, spec: CellSpec, checkpoint: Optional[SequenceCheckpoint] = None,
+                 recorder_dir: Optional[str] = None) -> None:
+        """
+        Args:
+            spec: Cell definition
+            checkpoint: Checkpoint file of this cell, None to disable resuming
+            recorder_dir: Folder for the flight recorders of the cell's links, None to disable recording
+        """
+        self.spec = spec
+        self.mm_link = AsyncControllerLink(spec.multimove, TelemetryRingBuffer(),
+                                           CommandStateCache(f"{spec.name}/MultiMove"),
+                                           FlightRecorder(f"{spec.name}-MultiMove", recorder_dir) if recorder_dir else None)
+        self.cb_link = AsyncControllerLink(spec.cobot, TelemetryRingBuffer(),
+                                           CommandStateCache(f"{spec.name}/Cobot"),
+                                           FlightRecorder(f"{spec.name}-Cobot", recorder_dir) if recorder_dir else None
+                                           ) if spec.cobot else None
+        self.checkpoint = checkpoint
+        self.token = CancellationToken()
+        self.command_id = checkpoint.last_command_id() if checkpoint else 0  # last ACKed command
+        self.steps_completed = 0
+        self.steps_resumed = 0  # steps skipped because an earlier run had confirmed them
+        self.step_durations: List[float] = []
+
+    async def connect(self, handshake: bool = True) -> None:
+        """Connect both robot links of the cell."""
+        links = [self.mm_link] + ([self.cb_link] if self.cb_link else [])
+        await asyncio.gather(*(link.connect(handshake) for link in links))
+
+    async def run_sequence(self, steps: List[CompiledStep]) -> None:
+        """Execute the steps in order; both robots must ACK before the next step.
+
+        Resumes after the last confirmed step of the same sequence when a checkpoint is set.
+
+        Raises:
+            SequenceCancelled: The token was cancelled; the checkpoint points at the next step
+        """
+        fingerprint = sequence_fingerprint(steps)
+        first = self.checkpoint.resume_step(fingerprint) if self.checkpoint else 0
+        if first:
+            log.info("Resuming sequence", cell=self.spec.name, step=first, steps=len(steps))
+        self.steps_resumed = first
+        for index in range(first, len(steps)):
+            if self.token.cancelled:
+                if self.checkpoint:
+                    self.checkpoint.append(fingerprint, index, self.command_id, STATUS_CANCELLED)
+                self.token.raise_if_cancelled(index)
+            step = steps[index]
+            start = time.perf_counter()
+            pending = []
+            if step.mm_command is not None:
+                pending.append(self.mm_link.execute(step.mm_command))
+            if step.cb_command is not None and self.cb_link is not None:
+                pending.append(self.cb_link.execute(step.cb_command))
+            await asyncio.gather(*pending)
+            self.command_id += len(pending)
+            if self.checkpoint:
+                self.checkpoint.append(fingerprint, index + 1, self.command_id)
+            self.step_durations.append(time.perf_counter() - start)
+            self.steps_completed += 1
+        if self.checkpoint:
+            self.checkpoint.append(fingerprint, len(steps), self.command_id, STATUS_SEQUENCE_DONE)
+
+    async def close(self) -> None:
+        await self.mm_link.close()
+        if self.cb_link is not None:
+            await self.cb_link.close()
+        if self.checkpoint is not None:
+            self.checkpoint.close()
+
+
+class CellOrchestrator:
+    """Runs one CellExecutor per registered cell on a single event loop."""
+    def __init__(self, registry: CellRegistry, checkpoint_dir: Optional[str] = None,
+                 recorder_dir: Optional[str] = None) -> None:
+        """
+        Args:
+            registry: Cells to drive
+            checkpoint_dir: Folder for per-cell checkpoint files, None to always start from step 0
+            recorder_dir: Folder for per-link flight recorders, None to disable recording
+        """
+        self.registry = registry
+        self.executors: Dict[str, CellExecutor] = {
+            cell.name: CellExecutor(cell, SequenceCheckpoint(cell.name, checkpoint_dir) if checkpoint_dir else None,
+                                    recorder_dir)
+            for cell in registry}
+
+    async def start(self, handshake: bool = True) -> None:
+        """Connect every cell to its controllers."""
+        await asyncio.gather(*(executor.connect(handshake) for executor in self.executors.values()))
+
+    async def run(self, sequences: Dict[str, List[CompiledStep]]) -> Dict[str, BaseException]:
+        """Run a compiled sequence on each named cell concurrently.
+
+        A failing cell does not stop the others.
+
+        Returns:
+            Errors per cell name (empty if every cell completed)
+        """
+        names = list(sequences)
+        results = await asyncio.gather(
+            *(self.executors[name].run_sequence(sequences[name]) for name in names),
+            return_exceptions=True)
+        return {name: result for name, result in zip(names, results) if isinstance(result, BaseException)}
+
+    def cancel(self, name: Optional[str] = None, reason: str = "") -> None:
+        """Cancel one cell (or every cell) at its next step boundary."""
+        for executor in ([self.executors[name]] if name else self.executors.values()):
+            executor.token.cancel(reason)
+
+    async def stop(self) -> None:
+        """Terminate and close every controller link."""
+        await asyncio.gather(*(executor.close() for executor in self.executors.values()),
+                             return_exceptions=True)
+
+
+async def run_cells(registry: CellRegistry, user_path_selection: str,
+                    steps: List[Tuple[str, str]], handshake: bool = True,
+                    checkpoint_dir: Optional[str] = None,
+                    recorder_dir: Optional[str] = None) -> CellOrchestrator:
+    """Connect all cells, run the same sequence on each and disconnect.
+
+    Returns:
+        The orchestrator, for its per-cell counters and step durations
+    """
+    compiled = compile_sequence(user_path_selection, steps)
+    orchestrator = CellOrchestrator(registry, checkpoint_dir, recorder_dir)
+    await orchestrator.start(handshake)
+    try:
+        errors = await orchestrator.run({name: compiled for name in registry.names()})
+        for name, error in errors.items():
+            if isinstance(error, SequenceCancelled):
+                print(f"[{name}] {error}")
+            else:
+                print(f"[{name}] sequence failed: {error}")
+    finally:
+        await orchestrator.stop()
+    return orchestrator
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run one sequence on every configured cell.")
+    parser.add_argument("--cells", help="JSON cell file (defaults to Config.CELLS)")
+    parser.add_argument("--path", default="1A", help="Path selection, e.g. 1A")
+    parser.add_argument("--real", action="store_true", help="Real controllers (skip the I; handshake)")
+    parser.add_argument("--no-resume", action="store_true", help="Ignore checkpoints and start from step 0")
+    parser.add_argument("--no-record", action="store_true", help="Disable the flight recorders")
+    args = parser.parse_args()
+
+    registry = CellRegistry.from_file(args.cells) if args.cells else CellRegistry.from_config()
+    steps = [("Home", "CB_Home"), ("Standby", "CB_Standby"), ("Home", "CB_Home")]
+    checkpoint_dir = None if args.no_resume else Config.CHECKPOINT_DIR
+    orchestrator = asyncio.run(run_cells(registry, args.path, steps, handshake=not args.real,
+                                         checkpoint_dir=checkpoint_dir,
+                                         recorder_dir=None if args.no_record or not Config.RECORDER_ENABLED
+                                         else Config.RECORDER_DIR))
+    for name, executor in orchestrator.executors.items():
+        print(f"[{name}] {executor.steps_completed} steps completed, {executor.steps_resumed} resumed")
+
+
+if __name__ == "__main__":
+    main()
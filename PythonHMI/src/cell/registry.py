@@ -0,0 +1,117 @@
+"""
+Docstring for PythonHMI.src.cell.registry
+
+Cell registry for the multi-cell orchestrator.
+
+A cell is one MultiMove/Cobot pair, each robot with its own controller
+endpoint. The registry is built from Config.CELLS or from a JSON file with
+the same structure:
+
+    [{"name": "cell_1",
+      "multimove": {"ip": "192.168.0.100", "port": 5024},
+      "cobot": {"ip": "192.168.0.101", "port": 5024}}]
+
+"cobot" may be omitted for cells without a cobot.
+"""
+
+import json
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from config.settings import Config
+
+
+class ControllerEndpoint:
+    """TCP endpoint of one robot controller (commModule socket server)."""
+    def __init__(self, ip_addr: str, port_no: int) -> None:
+        """
+        Args:
+            ip_addr (str): IP address of the controller
+            port_no (int): Port of the controller socket server
+        """
+        self.ip_addr = ip_addr
+        self.port_no = int(port_no)
+
+    def __repr__(self) -> str:
+        return f"{self.ip_addr}:{self.port_no}"
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, ControllerEndpoint) and \
+            (self.ip_addr, self.port_no) == (other.ip_addr, other.port_no)
+
+    def __hash__(self) -> int:
+        return hash((self.ip_addr, self.port_no))
+
+
+class CellSpec:
+    """Static description of one cell."""
+    def __init__(self, name: str, multimove: ControllerEndpoint,
+                 cobot: Optional[ControllerEndpoint] = None) -> None:
+        """
+        Args:
+            name (str): Unique cell name
+            multimove (ControllerEndpoint): Endpoint of the MultiMove controller
+            cobot (ControllerEndpoint): Endpoint of the Cobot controller, None if the cell has no cobot
+        """
+        self.name = name
+        self.multimove = multimove
+        self.cobot = cobot
+
+    @classmethod
+    def from_dict(cls, entry: dict) -> 'CellSpec':
+        """Build a cell from one Config.CELLS / JSON entry."""
+        try:
+            multimove = ControllerEndpoint(entry["multimove"]["ip"], entry["multimove"]["port"])
+            cobot = None
+            if entry.get("cobot"):
+                cobot = ControllerEndpoint(entry["cobot"]["ip"], entry["cobot"]["port"])
+            return cls(entry["name"], multimove, cobot)
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"Invalid cell entry {entry}: missing {e}")
+
+    def __repr__(self) -> str:
+        return f"CellSpec({self.name}, MM={self.multimove}, CB={self.cobot})"
+
+
+class CellRegistry:
+    """Ordered collection of cells with unique names; cells never share a controller."""
+    def __init__(self, cells: Iterable[CellSpec]) -> None:
+        """Register the cells.
+
+        Raises:
+            ValueError: if two cells share a name or a controller endpoint
+        """
+        self._cells: Dict[str, CellSpec] = {}
+        endpoints = set()
+        for cell in cells:
+            if cell.name in self._cells:
+                raise ValueError(f"Duplicate cell name: {cell.name}")
+            cell_endpoints = {cell.multimove, cell.cobot} - {None}
+            shared = cell_endpoints & endpoints
+            if shared:
+                raise ValueError(f"Controller {shared.pop()} of {cell.name} is already used by another cell")
+            endpoints |= cell_endpoints
+            self._cells[cell.name] = cell
+
+    @classmethod
+    def from_config(cls, entries: Optional[List[dict]] = None) -> 'CellRegistry':
+        """Build the registry from Config.CELLS (or the given entries)."""
+        return cls(CellSpec.from_dict(entry) for entry in (entries if entries is not None else Config.CELLS))
+
+    @classmethod
+    def from_file(cls, path: str) -> 'CellRegistry':
+        """Build the registry from a JSON file with the Config.CELLS structure."""
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_config(json.load(f))
+
+    def get(self, name: str) -> CellSpec:
+        """Get a cell by name."""
+        return self._cells[name]
+
+    def names(self) -> List[str]:
+        return list(self._cells)
+
+    def __iter__(self) -> Iterator[CellSpec]:
+        return iter(self._cells.values())
+
+    def __len__(self) -> int:
+        return len(self._cells)
@@ -1,14 +1,30 @@
 """communication package for socket management and protocol handling"""
 
 from .socket_manager import ExtSocketServer
-from .protocol import ScoketManager, pack_data, unpack_data
-from .data_structure import LinkedList, Node
+from .protocol import SocketManager, pack_data, unpack_data, send_trajectory, unpack_trajectory, probe_clock, CompactFrameEncoder, CompactFrameDecoder
+from .data_structures import LinkedList, Node
+from .shared_memory_ring import SharedJointRing, JointStreamProducer
+from .fake_controller import FakeController
+from .priority_lane import PriorityCommandLane, ControlClient, connect_frontend
+from .command_cache import CommandStateCache
 
 __all__ = [
     "ExtSocketServer",
-    "ScoketManager",
+    "SocketManager",
     "pack_data",
     "unpack_data",
+    "send_trajectory",
+    "unpack_trajectory",
+    "probe_clock",
+    "CompactFrameEncoder",
+    "CompactFrameDecoder",
     "LinkedList",
-    "Node"
+    "Node",
+    "SharedJointRing",
+    "JointStreamProducer",
+    "FakeController",
+    "PriorityCommandLane",
+    "ControlClient",
+    "connect_frontend",
+    "CommandStateCache"
 ]
\ No newline at end of file
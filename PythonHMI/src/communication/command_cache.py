@@ -0,0 +1,58 @@
+"""
+Docstring for PythonHMI.src.communication.command_cache
+
+Per-robot cache of the last confirmed state command.
+
+A state command is the (path, tool, speed, state) list sent to the
+controller with the 'd;' header. Once the controller has confirmed it
+(ACK_DONE), sending the identical command again only costs a round-trip,
+so the cache reports it as redundant and the server skips it. Anything
+that may move the robot away from the confirmed state without a state
+command invalidates the cache: a STOP/ABORT, a (re)connect to the
+controller and joint streaming.
+"""
+
+from typing import List, Optional, Tuple
+
+
+class CommandStateCache:
+    """Last confirmed (path, tool, speed, state) of one robot, with hit/miss counters."""
+    def __init__(self, robot: str) -> None:
+        """
+        Args:
+            robot: Robot name used in log messages (e.g., "MultiMove", "Cobot")
+        """
+        self.robot = robot
+        self.confirmed: Optional[Tuple[float, ...]] = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.last_invalidation = ""
+
+    def is_redundant(self, command: List[float]) -> bool:
+        """True if the robot already sits in exactly this confirmed state (counts a hit)."""
+        if self.confirmed is not None and tuple(command) == self.confirmed:
+            self.hits += 1
+            return True
+        self.misses += 1
+        return False
+
+    def confirm(self, command: List[float]) -> None:
+        """Record a command the controller has acknowledged as completed."""
+        self.confirmed = tuple(command)
+
+    def invalidate(self, reason: str) -> None:
+        """Forget the confirmed state (interrupt, reconnect, streaming, ...)."""
+        if self.confirmed is not None:
+            self.invalidations += 1
+            self.last_invalidation = reason
+        self.confirmed = None
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __str__(self) -> str:
+        return (f"{self.robot} command cache: {self.hits} hits, {self.misses} misses "
+                f"({self.hit_rate:.0%}), {self.invalidations} invalidations")
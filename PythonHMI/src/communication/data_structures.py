@@ -7,15 +7,31 @@ command exeucution for tripple robot coordination (two robots in MultiMove and o
 import struct
 import time
 import zmq
-from typing import Optional
+from typing import List, Optional, Tuple
 
 from config.settings import Config
 from config.constants import StateSequence_MM, StateSequence_CB, PathDict, STREAMING_STATE_NAME
+from src.communication.protocol import unpack_data
+from src.execution.checkpoint import SequenceCheckpoint, STATUS_CANCELLED, STATUS_SEQUENCE_DONE, sequence_fingerprint
+from src.execution.cancellation import CancellationToken
+from src.execution import server_sequence
+from src.execution.server_sequence import ProgramStep, SequenceProgram
+from src.streaming.router import StreamRouter
+from src.telemetry.logger import get_logger
+from src.telemetry import metrics
+
+log = get_logger("Sequence")
+
+metric_steps = metrics.counter("abb_sequence_steps_total", "Sequence steps confirmed by both servers")
+metric_steps_flushed = metrics.counter("abb_sequence_steps_flushed_total", "Sequence steps stopped from the control lane")
+metric_step_duration = metrics.histogram("abb_sequence_step_seconds", "Step sent to both server ACKs (motion included)")
+metric_ack_retries = metrics.counter("abb_sequence_ack_retries_total",
+                                     "Server ACK reads that timed out and were retried (busy-loop iterations)")
 
 class Node:
     """Node in a linked list representing a robot command."""
     def __init__(self, new_data_server_1:str, new_data_server_2:str,
-                 this_head_1_tail_3: int, next_node=None, stream_count: int = 0):
+                 this_head_1_tail_3: int, next_node=None, stream_count: int = 0, sync: bool = False):
         """
         Initialize a command node.
 
@@ -25,13 +41,17 @@ class Node:
             this_head_1_tail_3 (int): Header flag (1= head, 2=middle, 3=tail)
             next_node: Net node in the list
             stream_count (int): For Stream nodes: 0=open-ended, >0=auto-terminate after N points
+            sync (bool): Neither robot starts this step before both have finished the previous one
+                         (a barrier for server-side sequences; client-released steps always are)
         """
 
         self.data_1 = new_data_server_1
         self.data_2 = new_data_server_2
         self.checkLineExec = this_head_1_tail_3
+        self.headerCHK = this_head_1_tail_3
         self.next = next_node
         self.stream_count = stream_count
+        self.sync = sync
 
         def __str__(self):
             return f"({self.data_1}, {self.data_2})"
@@ -44,14 +64,25 @@ class Node:
             """Get the command for server 2 (Cobot)."""
             return str(self.data_2)
         
+def streaming_robots(node: Node) -> Tuple[bool, bool]:
+    """(MultiMove streams, Cobot streams) in this node; a Stream node has at least one."""
+    return node.data_1 == STREAMING_STATE_NAME, node.data_2.removeprefix("CB_") == STREAMING_STATE_NAME
+
+
 class LinkedList:
     """Linked list to manage a sequence of robot commands."""
     def __init__(self):
         """Initialize an empty linked list."""
         self.head: Optional[Node] = None
+        # restartable execution, see execute_resumable()
+        self.checkpoint: Optional[SequenceCheckpoint] = None
+        self.cancel_token: Optional[CancellationToken] = None
+        self.fingerprint = 0
+        self.step_index = 0 # index of the node being executed
+        self.command_id = 0 # commands acknowledged by the servers so far
 
     def append(self, new_data_server_1:str, new_data_server_2:str,
-               this_head_1_tail_3: int, stream_count: int = 0) -> None:
+               this_head_1_tail_3: int, stream_count: int = 0, sync: bool = False) -> None:
         """Append a new command node to the end of the list.
 
         Args:
@@ -59,9 +90,10 @@ class LinkedList:
             new_data_server_2 (str): Command for server 2 (Cobot)
             this_head_1_tail_3 (int): Header flag (1= head, 2=middle, 3=tail)
             stream_count (int): For Stream nodes: 0=open-ended, >0=auto-terminate after N points
+            sync (bool): Barrier before this step when the servers run the sequence (see Node)
         """
         new_node = Node(new_data_server_1, new_data_server_2, this_head_1_tail_3,
-                        stream_count=stream_count)
+                        stream_count=stream_count, sync=sync)
 
         if not self.head:
             self.head = new_node
@@ -102,12 +134,266 @@ class LinkedList:
             return node
         return self.search_recursive(node.next, value)
     
+    def sequence_fingerprint(self, user_path_selection: str) -> int:
+        """Fingerprint of the path and node states, used to match a checkpoint to this sequence."""
+        parts = [user_path_selection]
+        node = self.head
+        while node is not None:
+            parts.append((node.data_1, node.data_2, node.stream_count))
+            node = node.next
+        return sequence_fingerprint(parts)
+
+    def execute_resumable(self, user_path_selection: str,
+                          socket_int_multimove_send: zmq.Socket,
+                          socket_int_multimove_recv: zmq.Socket,
+                          socket_int_cobot_send: zmq.Socket,
+                          socket_int_cobot_recv: zmq.Socket,
+                          streaming_handler=None,
+                          checkpoint: Optional[SequenceCheckpoint] = None,
+                          cancel_token: Optional[CancellationToken] = None) -> bool:
+        """Execute the list, resuming after the last confirmed step of a previous run.
+
+        Every confirmed step is appended to the checkpoint; the token is checked
+        between steps. With Config.SEQUENCE_SERVER_SIDE the servers run the state
+        steps (execute_on_servers), otherwise the client releases every step
+        (traverse_and_execute). Arguments as in traverse_and_execute.
+
+        Returns:
+            True if the sequence ran to its end, False if it was stopped from the control lane
+
+        Raises:
+            SequenceCancelled: The token was cancelled; the checkpoint points at the next step
+        """
+        self.checkpoint = checkpoint
+        self.cancel_token = cancel_token
+        self.fingerprint = self.sequence_fingerprint(user_path_selection)
+        self.step_index = checkpoint.resume_step(self.fingerprint) if checkpoint else 0
+        self.command_id = checkpoint.last_command_id() if checkpoint else 0
+
+        node = self.head
+        for _ in range(self.step_index):
+            node = node.next if node is not None else None
+        if node is None:
+            return True
+        if self.step_index:
+            log.info("Resuming sequence", step=self.step_index, mm=node.data_1, cb=node.data_2)
+            node.checkLineExec = True
+        execute = self.execute_on_servers if Config.SEQUENCE_SERVER_SIDE else self.traverse_and_execute
+        completed = execute(
+            node, user_path_selection,
+            socket_int_multimove_send, socket_int_multimove_recv,
+            socket_int_cobot_send, socket_int_cobot_recv,
+            streaming_handler
+        )
+        if completed and checkpoint is not None:
+            checkpoint.append(self.fingerprint, self.step_index, self.command_id, STATUS_SEQUENCE_DONE)
+        return completed
+
+    def _check_cancelled(self) -> None:
+        """Raise SequenceCancelled between steps once the token is set, recording it in the checkpoint."""
+        if self.cancel_token is not None and self.cancel_token.cancelled:
+            if self.checkpoint is not None:
+                self.checkpoint.append(self.fingerprint, self.step_index, self.command_id, STATUS_CANCELLED)
+            self.cancel_token.raise_if_cancelled(self.step_index)
+
+    def _confirm_step(self, step_started: float) -> None:
+        """Step confirmed by both servers: record it so a restart resumes after it."""
+        self.command_id += 2
+        self.step_index += 1
+        metric_steps.inc()
+        metric_step_duration.observe(time.perf_counter() - step_started)
+        if self.checkpoint is not None:
+            self.checkpoint.append(self.fingerprint, self.step_index, self.command_id)
+
+    def _send_state_and_wait(self, socket_send: zmq.Socket, socket_recv: zmq.Socket,
+                             state_machine_keyword: list, server: str, state: str) -> None:
+        """Send a state command to one server and wait for its motion-complete ACK.
+
+        Args:
+            socket_send: ZMQ socket for sending commands to the server
+            socket_recv: ZMQ socket for receiving responses from the server
+            state_machine_keyword: [path, state code, header flag]
+            server: "MM" or "CB", for the log messages
+            state: State name, for the log messages
+        """
+        data_pkg_to_int_sock = struct.pack(
+            "!I" + "d" * len(state_machine_keyword),
+            len(state_machine_keyword),
+            *state_machine_keyword
+        )
+        socket_send.send(data_pkg_to_int_sock, zmq.NOBLOCK)
+        log.info(f"Command sent to {server} server", state=state)
+
+        acknowledge_code_from_server = Config.ACK_MOTION_COMPLETE
+        acknowledged = False
+        while not acknowledged:
+            try:
+                data_from_server = socket_recv.recv()
+                if data_from_server is not None:
+                    if len(data_from_server) >= struct.calcsize(Config.PACKET_FORMAT_ELEN):
+                        elen = struct.unpack_from(Config.PACKET_FORMAT_ELEN, data_from_server)[0]
+                        fmt_data = "!" + "d" * elen
+                        if len(data_from_server) == struct.calcsize(fmt_data) + Config.PACKET_OFFSET:
+                            data = struct.unpack_from(fmt_data, data_from_server, Config.PACKET_OFFSET)
+                            if data == acknowledge_code_from_server:
+                                log.info(f"Acknowledgment received from {server} server")
+                                acknowledged = True
+            except zmq.Again:
+                metric_ack_retries.inc()
+                time.sleep(Config.SOCKET_RETRY_DELAY)
+
+    def _execute_stream_node(self, node: Node, path_int: int,
+                             socket_int_multimove_send: zmq.Socket, socket_int_multimove_recv: zmq.Socket,
+                             socket_int_cobot_send: zmq.Socket, socket_int_cobot_recv: zmq.Socket,
+                             streaming_handler=None) -> None:
+        """Run a Stream node: the streaming robots enter streaming, the other one gets its normal command."""
+        mm_streams, cb_streams = streaming_robots(node)
+        log.info("Stream node, entering streaming mode", mm=mm_streams, cb=cb_streams, count=node.stream_count)
+
+        # Send the holding robot its command and wait for its ACK before entering streaming
+        if not mm_streams:
+            self._send_state_and_wait(socket_int_multimove_send, socket_int_multimove_recv,
+                                      [path_int, StateSequence_MM[node.data_1], node.headerCHK],
+                                      "MM", node.data_1)
+        if not cb_streams:
+            self._send_state_and_wait(socket_int_cobot_send, socket_int_cobot_recv,
+                                      [path_int, StateSequence_CB[node.data_2.removeprefix("CB_")], node.headerCHK],
+                                      "CB", node.data_2)
+
+        # Enter streaming mode via the callback, one source for the streaming robot(s)
+        router = StreamRouter(
+            (socket_int_multimove_send, socket_int_multimove_recv) if mm_streams else None,
+            (socket_int_cobot_send, socket_int_cobot_recv) if cb_streams else None
+        )
+        if streaming_handler is not None:
+            streaming_handler(router, router, node.stream_count)
+        else:
+            log.warning("Stream node encountered but no streaming handler provided, skipping")
+
+    def execute_on_servers(self, node: Optional[Node], user_path_selection: str,
+                           socket_int_multimove_send: zmq.Socket,
+                           socket_int_multimove_recv: zmq.Socket,
+                           socket_int_cobot_send: zmq.Socket,
+                           socket_int_cobot_recv: zmq.Socket,
+                           streaming_handler=None) -> bool:
+        """Execute the list from node with the servers running the state steps.
+
+        Each run of state nodes up to the next Stream node is uploaded once, as
+        one SequenceProgram per server (see src/execution/server_sequence.py);
+        Stream nodes run here as in traverse_and_execute. A step is confirmed
+        once both servers have reported it. Arguments and return value as in
+        traverse_and_execute.
+        """
+        path_int = PathDict[user_path_selection]
+        while node is not None:
+            self._check_cancelled()
+            if any(streaming_robots(node)):
+                step_started = time.perf_counter()
+                self._execute_stream_node(node, path_int,
+                                          socket_int_multimove_send, socket_int_multimove_recv,
+                                          socket_int_cobot_send, socket_int_cobot_recv,
+                                          streaming_handler)
+                self._confirm_step(step_started)
+                node = node.next
+                continue
+            nodes: List[Node] = []
+            while node is not None and not any(streaming_robots(node)):
+                nodes.append(node)
+                node = node.next
+            if not self._execute_programs(nodes, path_int,
+                                          socket_int_multimove_send, socket_int_multimove_recv,
+                                          socket_int_cobot_send, socket_int_cobot_recv):
+                log.warning("Sequence stopped from the control lane")
+                metric_steps_flushed.inc()
+                return False
+        return True
+
+    def _execute_programs(self, nodes: List[Node], path_int: int,
+                          socket_int_multimove_send: zmq.Socket, socket_int_multimove_recv: zmq.Socket,
+                          socket_int_cobot_send: zmq.Socket, socket_int_cobot_recv: zmq.Socket) -> bool:
+        """Upload the state nodes to both servers and follow their progress until both have stopped.
+
+        Returns:
+            True if every step was confirmed, False if a server aborted (STOP/ABORT)
+
+        Raises:
+            SequenceCancelled: The token was cancelled; both programs are cancelled first
+        """
+        sequence_id = server_sequence.next_sequence_id()
+        programs = {
+            "MM": SequenceProgram(sequence_id, path_int, [
+                ProgramStep(StateSequence_MM[node.data_1], node.headerCHK, node.sync) for node in nodes]),
+            "CB": SequenceProgram(sequence_id, path_int, [
+                ProgramStep(StateSequence_CB[node.data_2.removeprefix("CB_")], node.headerCHK, node.sync)
+                for node in nodes]),
+        }
+        sockets = {"MM": (socket_int_multimove_send, socket_int_multimove_recv),
+                   "CB": (socket_int_cobot_send, socket_int_cobot_recv)}
+        for server, (socket_send, _) in sockets.items():
+            socket_send.send(programs[server].encode(), zmq.NOBLOCK)
+        log.info("Sequence uploaded", sequence=sequence_id, steps=len(nodes))
+
+        poller = zmq.Poller()
+        for _, socket_recv in sockets.values():
+            poller.register(socket_recv, zmq.POLLIN)
+        done = {server: 0 for server in sockets} # steps reported done
+        at_barrier = {server: None for server in sockets}
+        finished = set()
+        aborted = cancelling = False
+        confirmed = 0
+        step_started = time.perf_counter()
+        while len(finished) < len(sockets):
+            if not cancelling and self.cancel_token is not None and self.cancel_token.cancelled:
+                # the servers stop before their next step; raised once both have
+                for server, (socket_send, _) in sockets.items():
+                    if server not in finished:
+                        socket_send.send(server_sequence.cancel_frame(sequence_id), zmq.NOBLOCK)
+                cancelling = True
+            events = dict(poller.poll(Config.SEQUENCE_POLL_MS))
+            for server, (_, socket_recv) in sockets.items():
+                if socket_recv not in events:
+                    continue
+                data = unpack_data(socket_recv.recv())
+                if data == Config.ACK_COMMAND_FLUSHED and done[server] == 0 and at_barrier[server] is None:
+                    data = (server_sequence.OP_PROGRESS, sequence_id, 0, server_sequence.SEQUENCE_ABORTED) # upload dropped by a STOP
+                if data is None or not server_sequence.is_sequence_frame(data) or int(data[1]) != sequence_id:
+                    continue # a late ACK of an earlier command
+                step, status = int(data[2]), int(data[3])
+                if status == server_sequence.STEP_DONE:
+                    done[server] = step + 1
+                    while confirmed < min(done.values()):
+                        nodes[confirmed].checkLineExec = True
+                        confirmed += 1
+                        self._confirm_step(step_started)
+                        step_started = time.perf_counter()
+                elif status == server_sequence.STEP_BARRIER:
+                    at_barrier[server] = step
+                    if all(waiting == step for waiting in at_barrier.values()):
+                        for socket_send, _ in sockets.values():
+                            socket_send.send(server_sequence.release_frame(sequence_id, step), zmq.NOBLOCK)
+                        at_barrier = {server: None for server in sockets}
+                        log.info("Barrier released", sequence=sequence_id, step=step)
+                elif status == server_sequence.SEQUENCE_DONE:
+                    finished.add(server)
+                elif status == server_sequence.SEQUENCE_ABORTED:
+                    log.warning(f"Sequence aborted by {server} server", sequence=sequence_id, step=step)
+                    finished.add(server)
+                    if not aborted:
+                        # stop the other server too, and wait for it so no STOP is still in flight
+                        for other, (socket_send, _) in sockets.items():
+                            if other not in finished:
+                                socket_send.send(server_sequence.cancel_frame(sequence_id), zmq.NOBLOCK)
+                    aborted = True
+        if cancelling:
+            self._check_cancelled()
+        return not aborted
+
     def traverse_and_execute(self, node: Optional[Node], user_path_selection:str,
                              socket_int_multimove_send: zmq.Socket,
                              socket_int_multimove_recv: zmq.Socket,
                                 socket_int_cobot_send: zmq.Socket,
                                 socket_int_cobot_recv: zmq.Socket,
-                                streaming_handler=None) -> None:
+                                streaming_handler=None) -> bool:
         """Traverse the linked list and execute commands sequentially.
         Args:
             node: Current node in the recursion
@@ -116,66 +402,37 @@ class LinkedList:
             socket_int_multimove_recv: ZMQ socket for receiving responses from MultiMove
             socket_int_cobot_send: ZMQ socket for sending commands to Cobot
             socket_int_cobot_recv: ZMQ socket for receiving responses from Cobot
-            streaming_handler: Callable(send_socket, recv_socket, max_points) for streaming nodes.
+            streaming_handler: Callable(send_socket, recv_socket, max_points) for streaming nodes, given a
+                              StreamRouter to the robot(s) whose state is "Stream" (MM, "CB_Stream", or both).
                               For PHASE 2: interactive_streaming_handler (manual joint input).
                               For PHASE 3: ROS2 callback (external joint feed).
+
+        Returns:
+            True if the list ran to its end, False if a server flushed a command (STOP/ABORT)
         """
         # if the node is empty, stop
         if node is None:
-            return
+            return True
+        self._check_cancelled()
 
         # if the line is ready to run
         toggle_listening_from_client_MM = False
         toggle_listening_from_client_CB = False
 
-        is_streaming_node = (node.data_1 == STREAMING_STATE_NAME)
+        is_streaming_node = any(streaming_robots(node))
+        step_started = time.perf_counter()
 
         if (node.headerCHK == 1) or node.checkLineExec:
             path_int = PathDict[user_path_selection]
 
             if is_streaming_node:
-                # --- STREAMING NODE: MM enters streaming, CB gets its normal command ---
-                print(f'[Stream node] MM entering streaming mode (count={node.stream_count})')
-
-                # Send CB command normally
-                state_machine_keyword_cb = [
-                    path_int,
-                    StateSequence_CB[node.data_2],
-                    node.headerCHK
-                ]
-                data_pkg_to_int_sock_cb = struct.pack(
-                    "!I" + "d" * len(state_machine_keyword_cb),
-                    len(state_machine_keyword_cb),
-                    *state_machine_keyword_cb
-                )
-                socket_int_cobot_send.send(data_pkg_to_int_sock_cb, zmq.NOBLOCK)
-                print(f'command sent to CB server: {node.data_2}')
-
-                # Wait for CB ACK before entering streaming
-                acknowledge_code_from_server = Config.ACK_MOTION_COMPLETE
-                while not toggle_listening_from_client_CB:
-                    try:
-                        data_from_server_cb = socket_int_cobot_recv.recv(Config.MAX_BUFFER_SIZE)
-                        if data_from_server_cb is not None:
-                            if len(data_from_server_cb) >= struct.calcsize(Config.PACKET_FORMAT_ELEN):
-                                elen = struct.unpack_from(Config.PACKET_FORMAT_ELEN, data_from_server_cb)[0]
-                                fmt_data = "!" + "d" * elen
-                                if len(data_from_server_cb) == struct.calcsize(fmt_data) + Config.PACKET_OFFSET:
-                                    data = struct.unpack_from(fmt_data, data_from_server_cb, Config.PACKET_OFFSET)
-                                    if data == acknowledge_code_from_server:
-                                        print(f'Acknowledgment received from CB server for command')
-                                        toggle_listening_from_client_CB = True
-                    except zmq.Again:
-                        time.sleep(Config.SOCKET_RETRY_DELAY)
-
-                # Enter streaming mode for MM via the callback
-                if streaming_handler is not None:
-                    streaming_handler(socket_int_multimove_send, socket_int_multimove_recv, node.stream_count)
-                else:
-                    print("Warning: Stream node encountered but no streaming handler provided. Skipping.")
-
-                # Both sides are done — mark MM as complete too
+                self._execute_stream_node(node, path_int,
+                                          socket_int_multimove_send, socket_int_multimove_recv,
+                                          socket_int_cobot_send, socket_int_cobot_recv,
+                                          streaming_handler)
+                # Both sides are done
                 toggle_listening_from_client_MM = True
+                toggle_listening_from_client_CB = True
 
             else:
                 # --- NORMAL STATE NODE: send both MM and CB commands ---
@@ -191,12 +448,12 @@ class LinkedList:
                     *state_machine_keyword_mm
                 )
                 socket_int_multimove_send.send(data_pkg_to_int_sock_mm, zmq.NOBLOCK)
-                print(f'command sent to MM server: {node.data_1}')
+                log.info("Command sent to MM server", state=node.data_1)
 
                 # For CB, send cmd (async version-- non-blocking for fire-and-forget)
                 state_machine_keyword_cb = [
                     path_int,
-                    StateSequence_CB[node.data_2],
+                    StateSequence_CB[node.data_2.removeprefix("CB_")], # clientUI names Cobot states "CB_<state>"
                     node.headerCHK
                 ]
                 data_pkg_to_int_sock_cb = struct.pack(
@@ -205,9 +462,10 @@ class LinkedList:
                     *state_machine_keyword_cb
                 )
                 socket_int_cobot_send.send(data_pkg_to_int_sock_cb, zmq.NOBLOCK)
-                print(f'command sent to CB server: {node.data_2}')
+                log.info("Command sent to CB server", state=node.data_2)
 
         # For normal nodes, wait for ACKs from both servers
+        was_flushed = False
         if not is_streaming_node:
             acknowledge_code_from_server = Config.ACK_MOTION_COMPLETE
 
@@ -215,7 +473,7 @@ class LinkedList:
                 # Listen for MM response
                 if not toggle_listening_from_client_MM:
                     try:
-                        data_from_server_mm = socket_int_multimove_recv.recv(Config.MAX_BUFFER_SIZE)
+                        data_from_server_mm = socket_int_multimove_recv.recv()
                         if data_from_server_mm is not None:
                             if len(data_from_server_mm) >= struct.calcsize(Config.PACKET_FORMAT_ELEN):
                                 elen = struct.unpack_from(Config.PACKET_FORMAT_ELEN, data_from_server_mm)[0]
@@ -223,16 +481,22 @@ class LinkedList:
                                 if len(data_from_server_mm) == struct.calcsize(fmt_data) + Config.PACKET_OFFSET:
                                     data = struct.unpack_from(fmt_data, data_from_server_mm, Config.PACKET_OFFSET)
                                     if data == acknowledge_code_from_server:
-                                        print(f'Acknowledgment received from MM server for command')
+                                        log.info("Acknowledgment received from MM server")
                                         toggle_listening_from_client_MM = True
+                                    elif data == Config.ACK_COMMAND_FLUSHED:
+                                        # dropped by a STOP/ABORT on the control lane
+                                        log.warning("Command flushed by MM server")
+                                        toggle_listening_from_client_MM = True
+                                        was_flushed = True
                                     else:
-                                        print(f' debugging buffer size-1: {struct.calcsize(fmt_data) + Config.PACKET_OFFSET}')
+                                        log.debug("Unexpected MM reply", data=data)
                     except zmq.Again:
+                        metric_ack_retries.inc()
                         time.sleep(Config.SOCKET_RETRY_DELAY)
 
                 if not toggle_listening_from_client_CB:
                     try:
-                        data_from_server_cb = socket_int_cobot_recv.recv(Config.MAX_BUFFER_SIZE)
+                        data_from_server_cb = socket_int_cobot_recv.recv()
                         if data_from_server_cb is not None:
                             if len(data_from_server_cb) >= struct.calcsize(Config.PACKET_FORMAT_ELEN):
                                 elen = struct.unpack_from(Config.PACKET_FORMAT_ELEN, data_from_server_cb)[0]
@@ -240,20 +504,33 @@ class LinkedList:
                                 if len(data_from_server_cb) == struct.calcsize(fmt_data) + Config.PACKET_OFFSET:
                                     data = struct.unpack_from(fmt_data, data_from_server_cb, Config.PACKET_OFFSET)
                                     if data == acknowledge_code_from_server:
-                                        print(f'Acknowledgment received from CB server for command')
+                                        log.info("Acknowledgment received from CB server")
+                                        toggle_listening_from_client_CB = True
+                                    elif data == Config.ACK_COMMAND_FLUSHED:
+                                        # dropped by a STOP/ABORT on the control lane
+                                        log.warning("Command flushed by CB server")
                                         toggle_listening_from_client_CB = True
+                                        was_flushed = True
                                     else:
-                                        print(f' debugging buffer size-2: {struct.calcsize(fmt_data) + Config.PACKET_OFFSET}')
+                                        log.debug("Unexpected CB reply", data=data)
                     except zmq.Again:
+                        metric_ack_retries.inc()
                         time.sleep(Config.SOCKET_RETRY_DELAY)
 
+        if was_flushed:
+            log.warning("Sequence stopped from the control lane")
+            metric_steps_flushed.inc()
+            return False
+
+        self._confirm_step(step_started)
+
         # Allow next line command only if the current line is done
         if node.next is not None:
             node.next.checkLineExec =  True
 
         # Loop at configured frequency
         time.sleep(Config.EXECUTION_LOOP_FREQ)
-        self.traverse_and_execute(
+        return self.traverse_and_execute(
             node.next, user_path_selection,
             socket_int_multimove_send, socket_int_multimove_recv,
             socket_int_cobot_send, socket_int_cobot_recv,
@@ -0,0 +1,200 @@
+"""
+Docstring for PythonHMI.src.communication.fake_controller
+
+Fake robot controller for local benchmarks and replay.
+
+This module provides an asyncio TCP server that speaks the same text protocol
+as commModule.mod on the ABB controller:
+    I;...  -> "1,1,1,1,1,1"  (connection handshake)
+    d;...  -> "9,0,0,0,0,0"  after the simulated motion time (state motion done)
+    j;...  -> "9,0,0,0,0,0"  after the simulated motion time (joint stream done)
+    J;...  -> "9,0,0,0,0,0"  same, for a 12-value ROB1 + ROB2 joint pair
+    C;...  -> "8,t1,t2,id,0,0"  receive and send time on the controller clock, probe id echoed (clock probe)
+    T;...  -> connection closed
+Replies are terminated by "\n". With a stream buffer, j;/J; targets are queued
+like in the leaky-bucket commModule (PHASE_2.md) and consumed one motion
+time apart (a pair takes one slot); each consumed target is answered with ACK_DONE, and a target
+arriving at a full buffer is dropped and answered with ACK_REJECTED.
+The idle time of the robot between two state motions of a connection is
+kept in state_idle_gaps (a command sent before the previous motion ended
+starts right away).
+The controller clock is time.monotonic() scaled by 1 + clock_drift and
+shifted by clock_offset, so clock estimators can be checked against a
+known offset.
+It can run inside an existing event loop or in a background thread for
+blocking users such as ExtSocketServer.
+"""
+
+import asyncio
+import re
+import threading
+import time
+from collections import deque
+from typing import List, Optional
+
+from config.settings import Config
+
+ACK_HANDSHAKE = b"1,1,1,1,1,1\n"
+ACK_DONE = b"9,0,0,0,0,0\n"
+ACK_REJECTED = f"{Config.STREAM_REPLY_REJECTED},0,0,0,0,0\n".encode("ascii")
+
+_COMMAND_START = re.compile(rb"(?<![A-Za-z])(?=[A-Za-z];)")
+
+
+def split_commands(data: bytes) -> List[bytes]:
+    """Split one read into commands: pipelined commands can arrive in the same segment."""
+    return [command for command in _COMMAND_START.split(data) if command]
+
+
+class _StreamBuffer:
+    """Joint targets of one connection waiting for the motion task."""
+    def __init__(self) -> None:
+        self.targets: deque = deque()
+        self.ready = asyncio.Event()
+        self.moving = False
+
+
+class FakeController:
+    """Asyncio TCP server emulating the commModule message handling."""
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, motion_time: float = 0.0,
+                 stream_buffer: int = 0, clock_offset: float = 0.0, clock_drift: float = 0.0) -> None:
+        """Initialize the fake controller.
+
+        Args:
+            host (str): Address to listen on
+            port (int): Port to listen on, 0 picks a free port (see .port after start)
+            motion_time (float): Simulated duration of every motion command, in seconds
+            stream_buffer (int): Joint targets buffered for streaming, 0 = one j; target at a time
+            clock_offset (float): Controller clock minus time.monotonic(), in seconds
+            clock_drift (float): Controller seconds gained per host second (50e-6 = 50 ppm fast)
+        """
+        self.host = host
+        self.port = port
+        self.motion_time = motion_time
+        self.stream_buffer = stream_buffer
+        self.clock_offset = clock_offset
+        self.clock_drift = clock_drift
+        self.commands_received = 0
+        self.stream_overflows = 0 # targets dropped because the stream buffer was full
+        self.stream_underruns = 0 # the robot stopped mid-stream because the buffer ran empty
+        self.stream_max_fill = 0
+        self.state_idle_gaps: List[float] = [] # seconds between the end of a d; motion and the start of the next
+        self._writers: set = set()
+        self._server: Optional[asyncio.base_events.Server] = None
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def clock(self, now: Optional[float] = None) -> float:
+        """Controller clock at a host time (time.monotonic() by default)."""
+        now = time.monotonic() if now is None else now
+        return now * (1 + self.clock_drift) + self.clock_offset
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve one client connection, one command per read (like SocketReceive)."""
+        self._writers.add(writer)
+        stream = _StreamBuffer()
+        consumer = asyncio.ensure_future(self._consume(stream, writer)) if self.stream_buffer > 0 else None
+        motion_end = None
+        try:
+            while True:
+                message = await reader.read(Config.MAX_PACKET_SIZE)
+                if not message:
+                    break
+                for command in split_commands(message):
+                    header = command[:1]
+                    self.commands_received += 1
+                    if header == b"C":
+                        received = self.clock()
+                        probe_id = command[2:].split(b";")[0].decode("ascii") or "0"
+                        writer.write(f"{Config.CLOCK_REPLY},{received!r},{self.clock()!r},{probe_id},0,0\n".encode("ascii"))
+                    elif header == b"I":
+                        writer.write(ACK_HANDSHAKE)
+                    elif header in (b"j", b"J") and consumer is not None:
+                        if len(stream.targets) >= self.stream_buffer:
+                            self.stream_overflows += 1
+                            writer.write(ACK_REJECTED)
+                        else:
+                            stream.targets.append(command)
+                            self.stream_max_fill = max(self.stream_max_fill, len(stream.targets))
+                            stream.ready.set()
+                    elif header in (b"d", b"j", b"J"):
+                        while stream.targets: # a state motion starts once the streamed targets are done
+                            await asyncio.sleep(self.motion_time or 0.001)
+                        stream.moving = False # the stream has ended, the next one starts from rest
+                        if header == b"d" and motion_end is not None:
+                            self.state_idle_gaps.append(time.perf_counter() - motion_end)
+                        if self.motion_time > 0:
+                            await asyncio.sleep(self.motion_time)
+                        writer.write(ACK_DONE)
+                        motion_end = time.perf_counter() if header == b"d" else None
+                    elif header == b"T":
+                        return
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            if consumer is not None:
+                consumer.cancel()
+            self._writers.discard(writer)
+            writer.close()
+
+    async def _consume(self, stream: '_StreamBuffer', writer: asyncio.StreamWriter) -> None:
+        """Motion task of a buffered stream: execute the queued targets one motion time apart."""
+        while True:
+            if not stream.targets:
+                stream.ready.clear()
+                await stream.ready.wait()
+                if stream.moving:
+                    self.stream_underruns += 1 # the robot stopped before the next target arrived
+            stream.moving = True
+            if self.motion_time > 0:
+                await asyncio.sleep(self.motion_time)
+            stream.targets.popleft()
+            writer.write(ACK_DONE)
+
+    async def start(self) -> 'FakeController':
+        """Start listening in the running event loop.
+
+        Returns:
+            self for method chaining
+        """
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self) -> None:
+        """Stop listening and close the server."""
+        if self._server is not None:
+            self._server.close()
+            for writer in list(self._writers):
+                writer.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def start_in_thread(self) -> 'FakeController':
+        """Run the controller in its own event loop on a daemon thread.
+
+        Returns:
+            self for method chaining, once the port is bound
+        """
+        ready = threading.Event()
+
+        def run() -> None:
+            self._loop = asyncio.new_event_loop()
+            self._loop.run_until_complete(self.start())
+            ready.set()
+            self._loop.run_forever()
+            self._loop.run_until_complete(self.stop())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, name=f"FakeController:{self.port}", daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self
+
+    def stop_thread(self) -> None:
+        """Stop a controller started with start_in_thread()."""
+        if self._loop is not None and self._thread is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,348 @@
+"""
+Docstring for PythonHMI.src.communication.priority_lane
+
+High-priority control lane for stop, pause and abort.
+
+Control commands travel on their own PUSH/PULL socket pair so they never
+queue behind motion commands. On the server side, PriorityCommandLane polls
+both sockets and hands out work from a priority queue: control commands
+always come before pending motion commands, STOP/ABORT flush every queued
+motion command, and PAUSE holds motion until RESUME. PROFILE has no effect
+on motion; the server starts or stops an on-demand profiling session.
+
+Control message format (pack_data): (code, command id, send time as time.time()).
+The send time lets the server measure the propagation latency of each control.
+
+Note: a motion already executing on the controller is interrupted by the
+PHASE 1 DI-signal TRAP; this lane makes sure nothing queued is released after it.
+
+Multi-client front-end: next to the clientUI command socket, the lane reads a
+ROUTER socket that any number of clients (monitoring tools, job runners)
+connect a DEALER to (connect_frontend). Every motion item carries the
+identity of its client, b"" for the command socket, so the server sends the
+ACK back to the client that sent the command (reply()). Among motion items,
+FRONTEND_SCHEDULING picks the order: arrival ("fifo"), fair queuing, where a
+client's n-th waiting command goes in round n so clients alternate ("fair"),
+or the client class first, registered with a (FRONTEND_HELLO_OP, class) frame,
+then fair queuing within a class ("priority"). Controls stay on the control
+socket of clientUI, and only the command socket can terminate the server.
+"""
+
+import heapq
+import itertools
+import time
+from typing import Dict, List, Optional
+
+import zmq
+
+from config.settings import Config
+from src.telemetry.flight_recorder import CH_ZMQ_ACK, CH_ZMQ_COMMAND, CH_ZMQ_CONTROL, DIR_IN, DIR_OUT, FlightRecorder
+from src.telemetry.logger import get_logger
+from .protocol import pack_data, unpack_data
+
+log = get_logger("PriorityLane")
+
+# control codes (1..4) are their own priority, lower is more urgent
+PRIORITY_TERMINATION = 50  # termination is never flushed by STOP/ABORT
+PRIORITY_MOTION = 100
+TERMINATION_PACKET = pack_data(Config.TERMINATION_CODE)
+HELLO_SIZE = len(pack_data([Config.FRONTEND_HELLO_OP, 0]))
+
+CONTROL_NAMES = {
+    Config.CONTROL_ABORT: "ABORT",
+    Config.CONTROL_STOP: "STOP",
+    Config.CONTROL_PAUSE: "PAUSE",
+    Config.CONTROL_RESUME: "RESUME",
+    Config.CONTROL_PROFILE: "PROFILE",
+}
+
+
+class LaneItem:
+    """One unit of work handed out by the lane."""
+    __slots__ = ("priority", "code", "command_id", "sent_at", "received_at", "payload", "parts", "client", "flushed")
+
+    def __init__(self, priority: int, code: int = 0, command_id: int = 0, sent_at: float = 0.0,
+                 payload: Optional[bytes] = None, parts: Optional[List[zmq.Frame]] = None,
+                 client: bytes = b"") -> None:
+        self.priority = priority
+        self.code = code
+        self.command_id = command_id
+        self.sent_at = sent_at
+        self.received_at = time.monotonic() # server timeline, the t1 of a clock probe
+        self.payload = payload
+        self.parts = parts or [] # frames after the payload of a multipart command, received without copy
+        self.client = client # front-end identity of the sender, b"" for the command socket
+        self.flushed: List['LaneItem'] = []  # motion items dropped by this STOP/ABORT
+
+    @property
+    def is_control(self) -> bool:
+        return self.code in CONTROL_NAMES
+
+    @property
+    def latency(self) -> float:
+        """Seconds from the client sending this control to now."""
+        return time.time() - self.sent_at
+
+
+class LatencyStats:
+    """Running statistics of control propagation latency."""
+    def __init__(self) -> None:
+        self.count = 0
+        self.last = 0.0
+        self.max = 0.0
+        self._sum = 0.0
+
+    def record(self, latency: float) -> None:
+        self.count += 1
+        self.last = latency
+        self.max = max(self.max, latency)
+        self._sum += latency
+
+    @property
+    def mean(self) -> float:
+        return self._sum / self.count if self.count else 0.0
+
+    def __str__(self) -> str:
+        return (f"n={self.count} last={self.last * 1e3:.3f} ms "
+                f"mean={self.mean * 1e3:.3f} ms max={self.max * 1e3:.3f} ms")
+
+
+class PriorityCommandLane:
+    """Server side: merges the command and control sockets into one priority queue."""
+    def __init__(self, command_socket: zmq.Socket, control_socket: zmq.Socket,
+                 recorder: Optional[FlightRecorder] = None, router_socket: Optional[zmq.Socket] = None) -> None:
+        """
+        Args:
+            command_socket: PULL socket carrying motion commands from the client
+            control_socket: PULL socket carrying stop/pause/abort/resume
+            recorder: Optional flight recorder, records every received frame
+            router_socket: Optional ROUTER socket of the multi-client front-end
+        """
+        self.command_socket = command_socket
+        self.control_socket = control_socket
+        self.router_socket = router_socket
+        self.recorder = recorder
+        self.poller = zmq.Poller()
+        self.poller.register(control_socket, zmq.POLLIN)
+        self.poller.register(command_socket, zmq.POLLIN)
+        if router_socket is not None:
+            self.poller.register(router_socket, zmq.POLLIN)
+        self.paused = False
+        self.stats = LatencyStats()
+        self.classes: Dict[bytes, int] = {b"": Config.FRONTEND_HMI_CLASS} # scheduling class per client
+        self._heap: List[tuple] = []
+        self._order = itertools.count()  # FIFO among equal keys
+        self._rounds: Dict[bytes, int] = {} # next fair-queuing round per client
+        self._round = 0 # round of the last motion item handed out
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def _push(self, item: LaneItem) -> None:
+        scheduling = Config.FRONTEND_SCHEDULING
+        if item.priority != PRIORITY_MOTION or scheduling == "fifo":
+            key = (0, 0, next(self._order))
+        else:
+            rank = self.classes.get(item.client, Config.FRONTEND_DEFAULT_CLASS) if scheduling == "priority" else 0
+            rounds = max(self._rounds.get(item.client, 0), self._round)
+            self._rounds[item.client] = rounds + 1
+            key = (rank, rounds, next(self._order))
+        heapq.heappush(self._heap, (item.priority, key, item))
+
+    def _drain_control(self) -> None:
+        while True:
+            try:
+                message = self.control_socket.recv(zmq.NOBLOCK)
+            except zmq.Again:
+                return
+            if self.recorder is not None:
+                self.recorder.record(CH_ZMQ_CONTROL, DIR_IN, message)
+            data = unpack_data(message)
+            if data is not None and len(data) == 3 and int(data[0]) in CONTROL_NAMES:
+                code = int(data[0])
+                self._push(LaneItem(code, code, int(data[1]), data[2]))
+
+    def _drain_commands(self) -> None:
+        while True:
+            try:
+                message = self.command_socket.recv(zmq.NOBLOCK)
+            except zmq.Again:
+                return
+            if self.recorder is not None:
+                self.recorder.record(CH_ZMQ_COMMAND, DIR_IN, message) # the first part only, not bulk buffers
+            parts = []
+            while self.command_socket.rcvmore: # the rest of a multipart message has arrived with its first part
+                parts.append(self.command_socket.recv(copy=False))
+            priority = PRIORITY_TERMINATION if message == TERMINATION_PACKET else PRIORITY_MOTION
+            self._push(LaneItem(priority, payload=message, parts=parts))
+
+    def _drain_router(self) -> None:
+        while True:
+            try:
+                client = self.router_socket.recv(zmq.NOBLOCK)
+            except zmq.Again:
+                return
+            message = self.router_socket.recv() if self.router_socket.rcvmore else b""
+            parts = []
+            while self.router_socket.rcvmore:
+                parts.append(self.router_socket.recv(copy=False))
+            if self.recorder is not None:
+                self.recorder.record(CH_ZMQ_COMMAND, DIR_IN, message)
+            data = unpack_data(message) if len(message) == HELLO_SIZE else None
+            if data is not None and data[0] == Config.FRONTEND_HELLO_OP:
+                self.classes[client] = max(0, int(data[1]))
+                log.info("Front-end client registered", client=client, scheduling_class=self.classes[client])
+                self.reply(client, pack_data([Config.FRONTEND_HELLO_OP, self.classes[client]]))
+            elif message == TERMINATION_PACKET:
+                log.warning("Termination refused from a front-end client", client=client)
+                self.reply(client, pack_data(list(Config.ACK_COMMAND_FLUSHED)))
+            else:
+                self._push(LaneItem(PRIORITY_MOTION, payload=message, parts=parts, client=client))
+
+    def reply(self, client: bytes, payload: bytes, flags: int = zmq.NOBLOCK) -> None:
+        """Send a frame to one front-end client; dropped if it has disconnected."""
+        if self.recorder is not None:
+            self.recorder.record(CH_ZMQ_ACK, DIR_OUT, payload)
+        try:
+            self.router_socket.send_multipart([client, payload], flags)
+        except zmq.Again:
+            log.warning("Front-end client not reading, frame dropped", client=client)
+
+    def poll(self, timeout_ms: int = 0) -> None:
+        """Move everything waiting on both sockets into the queue."""
+        if self._heap:
+            timeout_ms = 0
+        events = dict(self.poller.poll(timeout_ms))
+        if self.control_socket in events:
+            self._drain_control()
+            if self._heap and self._heap[0][0] < PRIORITY_TERMINATION:
+                return  # hand the control out before reading the motion backlog
+        if self.command_socket in events:
+            self._drain_commands()
+        if self.router_socket is not None and self.router_socket in events:
+            self._drain_router()
+
+    def next(self, timeout_ms: int = 0) -> Optional[LaneItem]:
+        """Get the most urgent item; motion is withheld while paused.
+
+        Control items are applied to the lane (flush/pause/resume) before being
+        returned, so the caller only has to handle its own state.
+        """
+        self.poll(timeout_ms)
+        if not self._heap:
+            return None
+        if self.paused and self._heap[0][0] == PRIORITY_MOTION:
+            return None
+        priority, key, item = heapq.heappop(self._heap)
+        if item.is_control:
+            self.apply(item)
+        elif priority == PRIORITY_MOTION:
+            self._round = max(self._round, key[1])
+        return item
+
+    def requeue(self, item: LaneItem) -> None:
+        """Put an item handed out by next() back, ahead of the items of the same priority."""
+        heapq.heappush(self._heap, (item.priority, (-1, 0, next(self._order)), item))
+
+    def check_control(self) -> Optional[LaneItem]:
+        """Non-blocking check for a control command, for use inside motion wait loops."""
+        self._drain_control()
+        if self._heap and self._heap[0][0] < PRIORITY_TERMINATION:
+            item = heapq.heappop(self._heap)[2]
+            self.apply(item)
+            return item
+        return None
+
+    def apply(self, item: LaneItem) -> None:
+        """Record the propagation latency of a control item and apply its lane-level effect."""
+        self.stats.record(item.latency)
+        if item.code in (Config.CONTROL_STOP, Config.CONTROL_ABORT):
+            item.flushed = self.flush_motion()
+            self.paused = False
+        elif item.code == Config.CONTROL_PAUSE:
+            self.paused = True
+        elif item.code == Config.CONTROL_RESUME:
+            self.paused = False
+
+    def flush_motion(self) -> List[LaneItem]:
+        """Drop every queued motion command (the socket backlog included).
+
+        Returns:
+            The dropped items, so the caller can acknowledge them as flushed
+        """
+        self._drain_commands()
+        if self.router_socket is not None:
+            self._drain_router()
+        flushed = [entry[2] for entry in self._heap if entry[0] == PRIORITY_MOTION]
+        self._heap = [entry for entry in self._heap if entry[0] != PRIORITY_MOTION]
+        heapq.heapify(self._heap)
+        self._rounds.clear()
+        return flushed
+
+
+class ControlClient:
+    """Client side of the control lane."""
+    def __init__(self, socket_send: zmq.Socket) -> None:
+        """
+        Args:
+            socket_send: PUSH socket bound to Config.control_endpoint(robot, bind=True)
+        """
+        self.socket_send = socket_send
+        self._ids = itertools.count(1)
+
+    def send(self, code: int) -> int:
+        """Send a control command, never blocking.
+
+        Returns:
+            The command id
+        """
+        command_id = next(self._ids)
+        try:
+            self.socket_send.send(pack_data([code, command_id, time.time()]), zmq.NOBLOCK)
+        except zmq.Again:
+            log.error("Control lane full, control not sent", control=CONTROL_NAMES.get(code, code))
+        return command_id
+
+    def stop(self) -> int:
+        return self.send(Config.CONTROL_STOP)
+
+    def pause(self) -> int:
+        return self.send(Config.CONTROL_PAUSE)
+
+    def resume(self) -> int:
+        return self.send(Config.CONTROL_RESUME)
+
+    def abort(self) -> int:
+        return self.send(Config.CONTROL_ABORT)
+
+    def profile(self) -> int:
+        """Start or stop a profiling session on the server."""
+        return self.send(Config.CONTROL_PROFILE)
+
+
+def connect_frontend(context: zmq.Context, robot: str, name: Optional[str] = None,
+                     scheduling_class: Optional[int] = None) -> zmq.Socket:
+    """Connect a client to the front-end of a robot server.
+
+    The returned DEALER socket stands in for both sockets of the clientUI
+    (command, ACK) pair, e.g. StreamRouter((dealer, dealer)); every ACK comes
+    back on it.
+
+    Args:
+        context: ZMQ context (the cell context in single_process cell mode)
+        robot: "MM" for MultiMove or "CB" for Cobot
+        name: Client identity in the server log, random if None
+        scheduling_class: Registered with a hello frame when given, lower is served first
+                          under FRONTEND_SCHEDULING "priority"
+    Raises:
+        zmq.Again: The server did not answer the hello
+    """
+    socket = context.socket(zmq.DEALER)
+    socket.setsockopt(zmq.RCVTIMEO, Config.ZMQ_RECV_TIMEOUT)
+    if name is not None:
+        socket.setsockopt(zmq.IDENTITY, name.encode())
+    socket.connect(Config.router_endpoint(robot))
+    if scheduling_class is not None:
+        socket.send(pack_data([Config.FRONTEND_HELLO_OP, scheduling_class]))
+        socket.recv()
+    return socket
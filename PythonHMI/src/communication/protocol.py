@@ -5,12 +5,45 @@ Protocol handling for ZMQ socket communication.
 
 This module provides functions for packing and unpacking data and managing 
 ZMQ sockets for internal communication between client and server processes.
+
+Compact joint frames: a dense joint stream spends most of a pack_data frame
+(4-byte length + float64 values) on precision nobody uses. After a stream
+session negotiates a compact format ((FRAME_FORMAT_OP, format) answered with
+the accepted format), the client sends CompactFrameEncoder frames instead:
+    header      magic 0xC5, flags (keyframe bit + delta format), width,
+                target count, sequence number of the first target (!BBBBH)
+    keyframe    float32 absolute values, every FRAME_KEYFRAME_INTERVAL targets
+    deltas      per target and joint, int16 steps of FRAME_DELTA_QUANTUM from
+                the keyframe (DELTA_I16) or float16 differences to the
+                previous target (DELTA_F16)
+Deltas are taken against what the decoder reconstructs, so rounding never
+accumulates: DELTA_I16 stays within half a quantum of the sent targets. A
+pack_data frame starts with the high byte of its length (0), never the magic.
+The decoder drops delta frames after a gap in the sequence numbers (a frame
+flushed by STOP) until the next keyframe.
+
+Bulk trajectory uploads: send_trajectory() sends a whole (N, width) float64
+array as one two-part message, a pack_data header (TRAJECTORY_OP, width) and
+the array buffer itself with copy=False; unpack_trajectory() reads the
+received buffer frame as an array without copying it. Building one pack_data
+frame instead goes through a Python float per value and two more copies.
+
+Clock probes: probe_clock() sends (CLOCK_PROBE_OP, t0) on a server command
+socket; the server answers in turn with (CLOCK_PROBE_OP, t0, t1, t2), the
+receive and reply times on its time.monotonic(), which gives one sample of
+the server clock against this process (see src/telemetry/clock_sync.py).
 """
 
 import struct
+import time
+import numpy as np
 import zmq
 from typing import List, Tuple, Optional
 from config.settings import Config
+from src.telemetry.logger import get_logger
+from src.telemetry.clock_sync import ClockOffsetEstimator, ClockSample
+
+log = get_logger("Protocol")
 
 class SocketManager:
     """Manages ZMQ sockets PUSH/PULL socket pairs"""
@@ -83,12 +116,250 @@ def unpack_data(message: bytes) -> Optional[Tuple[float,...]]:
         # Ensure the buffer is large enough for the expected data
         expected_size = struct.calcsize(fmt_data) + Config.PACKET_OFFSET
         if len(message) != expected_size:
-            print(f"Received message size {len(message)} does not match expected size {expected_size}")
+            log.warning("Received message size does not match", size=len(message), expected=expected_size)
             return None
         
         data = struct.unpack_from(fmt_data, message, Config.PACKET_OFFSET)
         return data
     
     except struct.error as e:
-        print(f"Error unpacking data: {e}")
-        return None
\ No newline at end of file
+        log.warning("Error unpacking data", error=e)
+        return None
+
+
+COMPACT_MAGIC = 0xC5
+COMPACT_HEADER = struct.Struct("!BBBBH") # magic, flags, width, target count, sequence number of the first target
+COMPACT_FLAG_KEYFRAME = 0x80 # the first target is a float32 keyframe
+COMPACT_FORMAT_MASK = 0x0F
+_INT16_MAX = 32767
+
+
+def send_trajectory(socket: zmq.Socket, points, flags: int = 0) -> zmq.MessageTracker:
+    """Send (N, width) joint targets as one multipart upload without copying the array.
+
+    ZMQ reads the buffer while sending: do not modify the array before the
+    returned tracker is done (or the server has acknowledged the upload).
+
+    Args:
+        socket: PUSH socket to the server
+        points: (N, width) joint values in degrees; a little-endian float64 C-contiguous array is sent as is
+        flags: ZMQ send flags
+    """
+    points = np.ascontiguousarray(np.atleast_2d(points), dtype="<f8")
+    socket.send(pack_data([Config.TRAJECTORY_OP, points.shape[1]]), flags | zmq.SNDMORE)
+    return socket.send(points, flags, copy=False, track=True)
+
+def unpack_trajectory(header: Tuple[float, ...], parts: List) -> Optional[np.ndarray]:
+    """(N, width) read-only view of an uploaded trajectory (see send_trajectory).
+
+    Args:
+        header: Unpacked header frame, (TRAJECTORY_OP, width)
+        parts: Frames after the header as received (zmq.Frame or bytes), one buffer expected
+    Returns:
+        The targets, or None if the buffer is missing or not a whole number of targets
+    """
+    width = int(header[1])
+    size = len(parts[0]) if len(parts) == 1 else 0
+    if width <= 0 or not size or size % (8 * width):
+        log.warning("Malformed trajectory upload", parts=len(parts), size=size, width=width)
+        return None
+    return np.frombuffer(parts[0], dtype="<f8").reshape(-1, width)
+
+def probe_clock(send_socket: zmq.Socket, recv_socket: zmq.Socket,
+                estimator: Optional[ClockOffsetEstimator] = None) -> Optional[ClockSample]:
+    """Measure a server clock with one (CLOCK_PROBE_OP, t0) round trip.
+
+    The answer comes in order with the ACKs: probe only with no ACK outstanding.
+
+    Args:
+        send_socket: PUSH (or front-end DEALER) socket to the server
+        recv_socket: PULL socket of its ACKs (the same DEALER)
+        estimator: Optional estimator of this server's clock, the sample is added to it
+
+    Returns:
+        The sample, or None if the server did not answer within the receive timeout
+    """
+    t0 = time.monotonic()
+    send_socket.send(pack_data([Config.CLOCK_PROBE_OP, t0]))
+    try:
+        reply = unpack_data(recv_socket.recv(Config.MAX_PACKET_SIZE))
+    except zmq.Again:
+        return None
+    t3 = time.monotonic()
+    if reply is None or len(reply) != 4 or reply[0] != Config.CLOCK_PROBE_OP or reply[1] != t0:
+        log.warning("Unexpected answer to a clock probe", reply=reply)
+        return None
+    sample = ClockSample(t0, reply[2], reply[3], t3)
+    if estimator is not None:
+        estimator.add(sample)
+    return sample
+
+def is_compact_frame(message: bytes) -> bool:
+    """True for a CompactFrameEncoder frame (never for a pack_data frame)."""
+    return len(message) >= COMPACT_HEADER.size and message[0] == COMPACT_MAGIC
+
+def negotiate_frame_format(requested: int) -> int:
+    """Server side: the frame format granted for a requested one, FLOAT64 if it is not accepted."""
+    return requested if requested in Config.FRAME_FORMATS_ACCEPTED else Config.FRAME_FORMAT_FLOAT64
+
+def _check_compact_format(frame_format: int) -> None:
+    if frame_format not in (Config.FRAME_FORMAT_DELTA_I16, Config.FRAME_FORMAT_DELTA_F16):
+        raise ValueError(f"not a compact frame format: {frame_format}")
+
+
+class CompactFrameEncoder:
+    """Client side: joint targets to compact frames, for one stream session."""
+    def __init__(self, frame_format: int, width: int, keyframe_interval: Optional[int] = None,
+                 quantum: Optional[float] = None) -> None:
+        """
+        Args:
+            frame_format: Config.FRAME_FORMAT_DELTA_I16 or FRAME_FORMAT_DELTA_F16
+            width: Values per target (6 or 12)
+            keyframe_interval: Targets per keyframe, Config.FRAME_KEYFRAME_INTERVAL by default
+            quantum: Degrees per int16 step, Config.FRAME_DELTA_QUANTUM by default (must match the decoder)
+        Raises:
+            ValueError: frame_format is not a compact format
+        """
+        _check_compact_format(frame_format)
+        self.frame_format = frame_format
+        self.width = width
+        self.keyframe_interval = max(1, keyframe_interval or Config.FRAME_KEYFRAME_INTERVAL)
+        self.quantum = quantum or Config.FRAME_DELTA_QUANTUM
+        self.keyframes = 0
+        self._sequence = 0
+        self.force_keyframe()
+
+    def force_keyframe(self) -> None:
+        """Start the next frame with a keyframe, e.g. after the server flushed or dropped a frame."""
+        self._key: Optional[np.ndarray] = None # keyframe as the decoder reads it
+        self._steps = np.zeros(self.width) # DELTA_I16: quanta from the keyframe to the last target
+        self._last = np.zeros(self.width) # DELTA_F16: last target as the decoder reconstructs it
+        self._since_key = 0 # targets sent since the keyframe, the keyframe included
+
+    def encode(self, points) -> List[bytes]:
+        """Encode targets, in order, into as few frames as the keyframes and FRAME_MAX_POINTS allow.
+
+        Args:
+            points: (N, width) joint values in degrees, or one target
+        Raises:
+            ValueError: Target width is not the encoder's width
+        """
+        points = np.atleast_2d(np.asarray(points, dtype=np.float64))
+        if points.shape[1] != self.width:
+            raise ValueError(f"this encoder takes {self.width} values per target, got {points.shape[1]}")
+        frames = []
+        start = 0
+        while start < len(points):
+            parts = []
+            keyframe = self._key is None or self._since_key >= self.keyframe_interval
+            if keyframe:
+                parts.append(self._start_keyframe(points[start]))
+            limit = min(Config.FRAME_MAX_POINTS - keyframe, self.keyframe_interval - self._since_key)
+            chunk = points[start + keyframe:start + keyframe + limit]
+            deltas = self._deltas(chunk) if len(chunk) else b""
+            count = keyframe + len(deltas) // (2 * self.width)
+            if count < keyframe + len(chunk):
+                self._since_key = self.keyframe_interval # out of the 16-bit range: the next target is a keyframe
+            flags = self.frame_format | (COMPACT_FLAG_KEYFRAME if keyframe else 0)
+            if count:
+                frames.append(COMPACT_HEADER.pack(COMPACT_MAGIC, flags, self.width, count, self._sequence)
+                              + b"".join(parts) + deltas)
+                self._sequence = (self._sequence + count) & 0xFFFF
+            start += count
+        return frames
+
+    def _start_keyframe(self, point: np.ndarray) -> bytes:
+        key = point.astype(">f4")
+        self._key = key.astype(np.float64)
+        self._steps = np.zeros(self.width)
+        self._last = self._key.copy()
+        self._since_key = 1
+        self.keyframes += 1
+        return key.tobytes()
+
+    def _deltas(self, chunk: np.ndarray) -> bytes:
+        """Deltas of the leading targets of chunk that fit the format, advancing the decoder state."""
+        if self.frame_format == Config.FRAME_FORMAT_DELTA_I16:
+            steps = np.rint((chunk - self._key) / self.quantum)
+            deltas = np.diff(steps, axis=0, prepend=self._steps[None])
+            overflow = np.flatnonzero((np.abs(deltas) > _INT16_MAX).any(axis=1))
+            fits = int(overflow[0]) if len(overflow) else len(chunk)
+            if fits:
+                self._steps = steps[fits - 1]
+            payload = deltas[:fits].astype(">i2").tobytes()
+        else:
+            payload = bytearray()
+            fits = 0
+            last = self._last
+            for point in chunk: # each delta is taken from the rounded previous target
+                with np.errstate(over="ignore"): # out of the float16 range: inf, caught below
+                    delta = (point - last).astype(">f2")
+                if not np.isfinite(delta).all():
+                    break
+                payload += delta.tobytes()
+                last = last + delta.astype(np.float64)
+                fits += 1
+            self._last = last
+            payload = bytes(payload)
+        self._since_key += fits
+        return payload
+
+
+class CompactFrameDecoder:
+    """Server side: compact frames back to joint targets, for one stream session."""
+    def __init__(self, frame_format: int, quantum: Optional[float] = None) -> None:
+        """
+        Args:
+            frame_format: The negotiated Config.FRAME_FORMAT_DELTA_I16 or FRAME_FORMAT_DELTA_F16
+            quantum: Degrees per int16 step, Config.FRAME_DELTA_QUANTUM by default
+        Raises:
+            ValueError: frame_format is not a compact format
+        """
+        _check_compact_format(frame_format)
+        self.frame_format = frame_format
+        self.quantum = quantum or Config.FRAME_DELTA_QUANTUM
+        self.lost = 0 # targets of delta frames dropped for a missing reference
+        self._key: Optional[np.ndarray] = None
+        self._steps = np.zeros(0, dtype=np.int64)
+        self._last = np.zeros(0)
+        self._expected = 0 # sequence number of the next target
+
+    def decode(self, message: bytes) -> Optional[np.ndarray]:
+        """(count, width) joint targets in degrees.
+
+        Returns None for a malformed frame, or a delta frame whose reference
+        was lost (a frame in between was flushed); deltas are dropped until
+        the next keyframe.
+        """
+        if not is_compact_frame(message):
+            return None
+        _, flags, width, count, sequence = COMPACT_HEADER.unpack_from(message)
+        keyframe = bool(flags & COMPACT_FLAG_KEYFRAME)
+        deltas = count - keyframe
+        expected_size = COMPACT_HEADER.size + (4 * keyframe + 2 * deltas) * width
+        if flags & COMPACT_FORMAT_MASK != self.frame_format or not count or len(message) != expected_size:
+            log.warning("Malformed compact frame", size=len(message), expected=expected_size, flags=flags)
+            return None
+        offset = COMPACT_HEADER.size
+        if keyframe:
+            self._key = np.frombuffer(message, ">f4", width, offset).astype(np.float64)
+            self._steps = np.zeros(width, dtype=np.int64)
+            self._last = self._key
+            offset += 4 * width
+        elif self._key is None or sequence != self._expected or width != len(self._key):
+            self._key = None
+            self.lost += count
+            return None
+        self._expected = (sequence + count) & 0xFFFF
+        if self.frame_format == Config.FRAME_FORMAT_DELTA_I16:
+            steps = np.frombuffer(message, ">i2", deltas * width, offset).reshape(deltas, width)
+            steps = self._steps + np.cumsum(steps, axis=0)
+            points = self._key + steps * self.quantum
+            if deltas:
+                self._steps = steps[-1]
+        else:
+            steps = np.frombuffer(message, ">f2", deltas * width, offset).reshape(deltas, width)
+            points = np.cumsum(np.vstack([self._last, steps.astype(np.float64)]), axis=0)[1:]
+            if deltas:
+                self._last = points[-1]
+        return np.vstack([self._key, points]) if keyframe else points
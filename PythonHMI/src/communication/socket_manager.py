@@ -5,25 +5,96 @@ External socket server for TCP/IP communication with MultiMove and Cobot servers
 
 This module provides the ExtSocketServer class for managing external socket connctions to ABB robot controllers
 
+Clock probes measure the controller clock against the host timeline: a
+'C;<probe id>' command is answered by commModule with (CLOCK_REPLY, receive
+time, send time, probe id) on its own clock, and the sample goes to the
+connection's ClockOffsetEstimator. send_clock_probe() does not wait: the
+answer is taken by the next read of the socket, poll_clock_probe() while the
+server idles or receive_data()/receive_messages() in a motion wait loop,
+which never hand a clock reply to their caller. probe_clock() waits for it.
+
 """
 
+import select
 import socket
 import struct
+import time
 from typing import List, Optional
 from config.settings import Config
+from src.telemetry.ring_buffer import TelemetryRingBuffer
+from src.telemetry.clock_sync import ClockOffsetEstimator, ClockSample
+from src.telemetry.flight_recorder import CH_CONTROLLER, DIR_IN, DIR_OUT, FlightRecorder
+from src.telemetry.logger import get_logger
+from src.telemetry import metrics
+from .command_cache import CommandStateCache
+
+log = get_logger("ExtSocketServer")
+
+CLOCK_PROBE_IDS = 100000 # probe ids cycle through 1..CLOCK_PROBE_IDS (exact in a RAPID num)
+
+def encode_command(data: List[float], header: str) -> bytes:
+    """Encode a command in the controller text format, e.g. "d;1;2;1;1".
+
+    Args:
+        data: Command values
+        header: ID header letter with separator, e.g. 'd;', 'j;', 'I;', 'T;'
+    """
+    return (header + ";".join(str(value) for value in data)).encode('utf-8')
+
+def parse_position(decoded_str: str) -> List[float]:
+    """Parse a controller message of 6 comma separated values.
+
+    Returns:
+        List of 6 float values, or empty list if the message is not a position
+    """
+    decoded_str_splitted = decoded_str.split(",")
+    if len(decoded_str_splitted) != 6:
+        return []
+    try:
+        return [float(str_data) for str_data in decoded_str_splitted]
+    except ValueError:
+        return []
 
 class ExtSocketServer:
     """External socket server for TCP/IP communication with robot controllers."""
-    def __init__(self, ip_addr:str, port_no:int) -> None:
+    def __init__(self, ip_addr:str, port_no:int,
+                 telemetry: Optional[TelemetryRingBuffer] = None,
+                 command_cache: Optional[CommandStateCache] = None,
+                 recorder: Optional[FlightRecorder] = None,
+                 robot: str = "controller") -> None:
         """Initialize the external socket server.
 
         Args:
             ip_addr (str): IP address to bind the server
             port_no (int): Port number to listen on
+            telemetry (TelemetryRingBuffer): Optional buffer recording every controller message
+            command_cache (CommandStateCache): Optional cache, invalidated on every (re)connect
+            recorder (FlightRecorder): Optional flight recorder, records every message sent and received
+            robot (str): Robot label of this connection's metrics, e.g. "MultiMove"
         """
         self.ip_addr = ip_addr
         self.port_no = port_no
         self.server_socket: Optional[socket.socket] = None
+        self.telemetry = telemetry
+        self.command_cache = command_cache
+        self.recorder = recorder
+        self._partial = "" # unterminated tail of the last read, see receive_messages()
+        self.clock = ClockOffsetEstimator(f"{robot}-controller") # controller clock, fed by the clock probes
+        self.clock_timeouts = 0 # consecutive probes without an answer
+        self.clock_probe_id = 0 # id of the last probe sent, echoed by its answer
+        self.clock_probe_sent: Optional[float] = None # send time of the unanswered probe
+        self.clock_sample: Optional[ClockSample] = None # last answered probe
+        self.metric_sent = metrics.counter("abb_controller_messages_sent_total",
+                                           "Commands written to the controller socket", robot=robot)
+        self.metric_received = metrics.counter("abb_controller_messages_received_total",
+                                               "Messages read from the controller socket", robot=robot)
+        self.metric_send_failures = metrics.counter("abb_controller_send_failures_total",
+                                                    "Commands dropped because the socket was not ready", robot=robot)
+        self.metric_connects = metrics.counter("abb_controller_connects_total",
+                                               "Controller connections opened (reconnects = value - 1)", robot=robot)
+        self.metric_empty_reads = metrics.counter("abb_controller_empty_reads_total",
+                                                  "Non-blocking reads that returned no data (busy-loop iterations)",
+                                                  robot=robot)
 
     def create_socket(self) -> 'ExtSocketServer':
         """Create and bind the server socket to the robot controller.
@@ -31,6 +102,12 @@ class ExtSocketServer:
         Returns:
             self for method chaining
         """
+        if self.command_cache is not None:
+            self.command_cache.invalidate("reconnect")
+        self.clock.reset() # the controller clock may have restarted
+        self.clock_timeouts = 0
+        self.clock_probe_sent = None
+        self.metric_connects.inc()
         self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.server_socket.setblocking(False)
         try:
@@ -43,36 +120,70 @@ class ExtSocketServer:
     def receive_data(self) -> List[float]:
         """Receive data from the robot controller.
 
+        Every well-formed 6-value message is also recorded in the attached telemetry buffer.
+
         Returns:
             List of float values representing robot position, or empty list if no data received
         """
         try:
-            rec_data = self.server_socket.recv(Config.MAX_PACKET_SIZE)
+            rcv_data = self.server_socket.recv(Config.MAX_PACKET_SIZE)
+            received_at = time.monotonic()
+            if self.recorder is not None:
+                self.recorder.record(CH_CONTROLLER, DIR_IN, rcv_data)
+            self.metric_received.inc()
             decoded_str = rcv_data.decode('utf-8')
 
-            if decoded_str[:11] != "IP Accepted":
-                decoded_str_splitted = decoded_str.split(",")
-                if len(decoded_str_splitted) != 6:
-                    return []
-                
-                robot_pos = []
-                for str_data in decoded_str_splitted:
-                    robot_pos.append(float(str_data))
-                return robot_pos
-            else:
-                print(f"IP({self.ip_addr}) re-accepted at the server")
-                decoded_str_splitted = decoded_str.split(",")
-                if len(decoded_str_splitted) != 6:
-                    return []
-                
-                robot_pos = []
-                for str_data in decoded_str_splitted:
-                    robot_pos.append(float(str_data))
-                return robot_pos
-            
+            if decoded_str[:11] == "IP Accepted":
+                log.info("IP re-accepted at the server", ip=self.ip_addr)
+
+            robot_pos = parse_position(decoded_str)
+            if robot_pos and robot_pos[0] == Config.CLOCK_REPLY:
+                self._take_clock_reply(robot_pos, received_at)
+                return []
+            if robot_pos and self.telemetry is not None:
+                self.telemetry.append(robot_pos)
+            return robot_pos
+
         except BlockingIOError:
+            self.metric_empty_reads.inc()
             return []  # No data received, return empty list
         
+    def receive_messages(self) -> List[List[float]]:
+        """Receive every controller message waiting on the socket.
+
+        Used when several commands are in flight (buffered joint streaming), where
+        one read can hold several replies. Messages are separated by "\n"; an
+        unterminated message is taken as complete once it parses as 6 values,
+        since a controller answering one command at a time does not terminate them.
+
+        Returns:
+            Positions of the received messages, oldest first (empty list if none)
+        """
+        try:
+            rcv_data = self.server_socket.recv(Config.MAX_PACKET_SIZE)
+        except BlockingIOError:
+            self.metric_empty_reads.inc()
+            return []
+        received_at = time.monotonic()
+        if self.recorder is not None:
+            self.recorder.record(CH_CONTROLLER, DIR_IN, rcv_data)
+        self.metric_received.inc()
+        chunks = (self._partial + rcv_data.decode('utf-8')).split("\n")
+        self._partial = chunks.pop()
+        positions = [position for position in map(parse_position, chunks) if position]
+        if self._partial:
+            position = parse_position(self._partial)
+            if position:
+                positions.append(position)
+                self._partial = ""
+        for reply in [position for position in positions if position[0] == Config.CLOCK_REPLY]:
+            self._take_clock_reply(reply, received_at)
+            positions.remove(reply)
+        if self.telemetry is not None:
+            for position in positions:
+                self.telemetry.append(position)
+        return positions
+
     def send_data(self, data: List[int], write_data_formatted: str) -> None:
         """Send data to the robot controller.
 
@@ -80,17 +191,82 @@ class ExtSocketServer:
             data: List of command integer values to send
             write_data_formatted: ID header letter for the command
         """
-        for i in range(len(data)):
-            write_data_formatted += str(data[i])
-            if i + 1 < len(data):
-                write_data_formatted += ";"
-
+        message = encode_command(data, write_data_formatted)
+        if self.recorder is not None:
+            self.recorder.record(CH_CONTROLLER, DIR_OUT, message)
         try:
-            self.server_socket.send(bytes(write_data_formatted, 'utf-8'))
+            self.server_socket.send(message)
+            self.metric_sent.inc()
         except BlockingIOError:
-            print("Failed to send data: Socket is not ready for sending.")
-            pass
+            self.metric_send_failures.inc()
+            log.warning("Failed to send data: socket is not ready for sending", ip=self.ip_addr)
     
+    @property
+    def clock_probe_pending(self) -> bool:
+        return self.clock_probe_sent is not None
+
+    def send_clock_probe(self) -> None:
+        """Send a 'C;' clock probe without waiting for its answer (see the module docstring)."""
+        self.clock_probe_id = self.clock_probe_id % CLOCK_PROBE_IDS + 1
+        self.clock_probe_sent = time.monotonic()
+        self.send_data([self.clock_probe_id, 0, 0], 'C;')
+
+    def poll_clock_probe(self, timeout: Optional[float] = None) -> Optional[ClockSample]:
+        """Collect the answer of the pending clock probe, without blocking.
+
+        Call it only while no other reply is expected (no motion or stream in
+        flight): the other messages read meanwhile are dropped.
+
+        Args:
+            timeout: Seconds after which the probe counts as unanswered, Config.CLOCK_PROBE_TIMEOUT_S by default
+
+        Returns:
+            The sample once the answer is in, else None
+        """
+        if self.clock_probe_sent is None:
+            return None
+        if select.select([self.server_socket], [], [], 0)[0]:
+            self.receive_messages()
+            if self.clock_probe_sent is None:
+                return self.clock_sample
+        timeout = Config.CLOCK_PROBE_TIMEOUT_S if timeout is None else timeout
+        if time.monotonic() - self.clock_probe_sent >= timeout:
+            self.clock_probe_sent = None # its late answer is dropped, the next probe has another id
+            self.clock_timeouts += 1
+            log.debug("Clock probe not answered", ip=self.ip_addr, timeouts=self.clock_timeouts)
+        return None
+
+    def probe_clock(self, timeout: Optional[float] = None) -> Optional[ClockSample]:
+        """Measure the controller clock with one 'C;' round trip, waiting for the answer.
+
+        Blocks for up to the timeout, so the server loops use send_clock_probe()
+        and poll_clock_probe() instead; same caveat as poll_clock_probe().
+
+        Args:
+            timeout: Seconds to wait for the answer, Config.CLOCK_PROBE_TIMEOUT_S by default
+
+        Returns:
+            The sample, or None if the controller did not answer in time
+        """
+        timeout = Config.CLOCK_PROBE_TIMEOUT_S if timeout is None else timeout
+        self.send_clock_probe()
+        deadline = self.clock_probe_sent + timeout
+        while True:
+            sample = self.poll_clock_probe(timeout)
+            if sample is not None or self.clock_probe_sent is None:
+                return sample
+            select.select([self.server_socket], [], [], max(0.0, deadline - time.monotonic()))
+
+    def _take_clock_reply(self, reply: List[float], received_at: float) -> None:
+        """Add the answer of the pending probe to self.clock; a late or foreign one is dropped."""
+        if self.clock_probe_sent is None or reply[3] != self.clock_probe_id:
+            log.debug("Stale clock reply dropped", ip=self.ip_addr, probe_id=reply[3])
+            return
+        self.clock_sample = ClockSample(self.clock_probe_sent, reply[1], reply[2], received_at)
+        self.clock_probe_sent = None
+        self.clock_timeouts = 0
+        self.clock.add(self.clock_sample)
+
     def close_socket(self) -> None:
         """Close the server socket."""
         if self.server_socket:
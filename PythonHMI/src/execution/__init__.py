@@ -0,0 +1,14 @@
+"""execution package for restartable, cancellable sequence execution"""
+
+from .checkpoint import SequenceCheckpoint, CheckpointRecord, sequence_fingerprint
+from .cancellation import CancellationToken, SequenceCancelled
+# job_queue is imported directly (src.execution.job_queue): it builds on LinkedList,
+# which itself imports the checkpoint module from this package
+
+__all__ = [
+    "SequenceCheckpoint",
+    "CheckpointRecord",
+    "sequence_fingerprint",
+    "CancellationToken",
+    "SequenceCancelled"
+]
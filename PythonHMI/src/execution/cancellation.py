@@ -0,0 +1,46 @@
+"""
+Docstring for PythonHMI.src.execution.cancellation
+
+Cancellation tokens for sequence execution.
+
+A token is handed to an executor and checked between steps, so a cancelled
+sequence always stops on a confirmed step (and a matching checkpoint). It
+is a plain thread-safe flag, usable from the blocking client loop and from
+the asyncio orchestrator alike. Stopping a motion that is already executing
+is the job of the control lane (STOP) and the PHASE 1 DI-signal TRAP.
+"""
+
+import threading
+from typing import Optional
+
+
+class SequenceCancelled(Exception):
+    """Raised by an executor when its cancellation token is set."""
+    def __init__(self, step_index: int, reason: str = "") -> None:
+        super().__init__(f"Sequence cancelled before step {step_index}" + (f": {reason}" if reason else ""))
+        self.step_index = step_index
+        self.reason = reason
+
+
+class CancellationToken:
+    """Thread-safe, one-shot cancellation flag."""
+    def __init__(self) -> None:
+        self._event = threading.Event()
+        self.reason = ""
+
+    def cancel(self, reason: str = "") -> None:
+        self.reason = reason
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def raise_if_cancelled(self, step_index: int) -> None:
+        """Raise SequenceCancelled if the token is set."""
+        if self._event.is_set():
+            raise SequenceCancelled(step_index, self.reason)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until cancelled or the timeout expires."""
+        return self._event.wait(timeout)
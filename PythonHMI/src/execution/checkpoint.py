@@ -0,0 +1,110 @@
+"""
+Docstring for PythonHMI.src.execution.checkpoint
+
+Append-only checkpoint file for restartable sequence execution.
+
+After every confirmed step the executor appends one fixed-size binary record
+(timestamp, sequence fingerprint, next step index, last ACKed command id,
+status). Appending 21 bytes keeps the cost per step negligible, and a torn
+trailing record left by a crash is simply ignored on load. A restarted
+executor reads the last record and, if it belongs to the same sequence and
+the sequence was not finished, resumes from the step after the last
+confirmed one instead of starting over from Home.
+"""
+
+import os
+import struct
+import time
+import zlib
+from typing import Iterable, NamedTuple, Optional
+
+from config.settings import Config
+
+RECORD_FORMAT = "!dIIIB"  # time.time(), fingerprint, next step index, last ACKed command id, status
+RECORD_SIZE = struct.calcsize(RECORD_FORMAT)
+
+# Record status codes
+STATUS_STEP_DONE = 1
+STATUS_SEQUENCE_DONE = 2
+STATUS_CANCELLED = 3
+STATUS_STEP_SENT = 4  # command sent, not yet confirmed (a restart must not trust the step)
+
+
+class CheckpointRecord(NamedTuple):
+    timestamp: float
+    fingerprint: int
+    step_index: int  # index of the next step to execute
+    command_id: int  # last command id acknowledged by the controller(s)
+    status: int
+
+
+def sequence_fingerprint(parts: Iterable) -> int:
+    """CRC32 over the sequence definition, so a checkpoint is only resumed by the same sequence."""
+    return zlib.crc32(repr(list(parts)).encode("utf-8"))
+
+
+class SequenceCheckpoint:
+    """Append-only checkpoint file of one executor (one cell, or one robot server)."""
+    def __init__(self, name: str, directory: str = Config.CHECKPOINT_DIR,
+                 fsync: bool = Config.CHECKPOINT_FSYNC) -> None:
+        """
+        Args:
+            name: Executor name, used as file name (e.g. "cell_1", "MultiMove")
+            directory: Folder holding the checkpoint files
+            fsync: Force every record to disk (survives power loss, costs a few ms per step)
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"{name}.ckpt")
+        self.fsync = fsync
+        self._record = struct.Struct(RECORD_FORMAT)
+        self._records_written = 0
+        self._file = open(self.path, "ab", buffering=0)
+
+    def load(self) -> Optional[CheckpointRecord]:
+        """Read the last complete record, None if the file is empty."""
+        with open(self.path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            complete = f.tell() - f.tell() % RECORD_SIZE  # drop a torn trailing record
+            if complete == 0:
+                return None
+            f.seek(complete - RECORD_SIZE)
+            return CheckpointRecord(*self._record.unpack(f.read(RECORD_SIZE)))
+
+    def resume_step(self, fingerprint: int) -> int:
+        """Index of the first step to execute for the given sequence (0 = from the start)."""
+        record = self.load()
+        if record is None or record.fingerprint != fingerprint or record.status == STATUS_SEQUENCE_DONE:
+            return 0
+        return record.step_index
+
+    def last_command_id(self) -> int:
+        """Last command id acknowledged before the previous shutdown (0 if none)."""
+        record = self.load()
+        return record.command_id if record is not None else 0
+
+    def append(self, fingerprint: int, step_index: int, command_id: int,
+               status: int = STATUS_STEP_DONE) -> None:
+        """Append one record; the file is compacted to its last record when it grows too long."""
+        if self._records_written >= Config.CHECKPOINT_MAX_RECORDS:
+            self._compact()
+        self._file.write(self._record.pack(time.time(), fingerprint, step_index, command_id, status))
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self._records_written += 1
+
+    def _compact(self) -> None:
+        """Atomically replace the file with its last record."""
+        record = self.load()
+        self._file.close()
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            if record is not None:
+                f.write(self._record.pack(*record))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._file = open(self.path, "ab", buffering=0)
+        self._records_written = 0
+
+    def close(self) -> None:
+        self._file.close()
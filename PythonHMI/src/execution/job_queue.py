@@ -0,0 +1,263 @@
+"""
+Docstring for PythonHMI.src.execution.job_queue
+
+Job queue and batch runner for back-to-back sequences.
+
+A job is one path to run for one object, e.g. {"path": "1A", "object": "object1"}.
+The object group picks the sequence template (object_group_1 includes a
+streaming step, object_group_2 is state-only), or a job lists its own steps.
+Jobs reach the JobQueue from a JSON-lines file, from a local ZMQ PULL socket
+(Config.JOB_QUEUE_ENDPOINT, one JSON job per message) or from submit().
+
+BatchRunner executes the queued jobs back-to-back. While one job runs, the
+next one is already compiled and validated on a worker thread, so the cell
+moves straight on to the next job. Cycle time per job and throughput in
+jobs/hour are recorded.
+"""
+
+import itertools
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+import zmq
+
+from config.settings import Config
+from config.constants import (
+    PathDict,
+    StateSequence_MM,
+    StateSequence_CB,
+    object_group_1,
+    object_group_2,
+    STREAMING_STATE_NAME,
+)
+from src.communication.data_structures import LinkedList
+from src.telemetry.logger import get_logger
+
+log = get_logger("BatchRunner")
+
+# Sequence templates per object group, (MM state, CB state) as in clientUI
+SEQUENCE_WITH_STREAM = [("Home", "CB_Home"), ("Standby", "CB_Standby"),
+                        (STREAMING_STATE_NAME, "CB_Home"), ("Home", "CB_Home")]
+SEQUENCE_STATE_ONLY = [("Home", "CB_Home"), ("Standby", "CB_Standby"), ("Home", "CB_Home")]
+
+
+class Job:
+    """One queued sequence run."""
+    _ids = itertools.count(1)
+
+    def __init__(self, path: str, object_name: Optional[str] = None,
+                 steps: Optional[List[Tuple[str, str]]] = None, job_id: Optional[int] = None) -> None:
+        """
+        Args:
+            path: Path selection, e.g. "1A"
+            object_name: Object to process, selects the sequence template by object group
+            steps: Explicit (MM state, CB state) steps, overrides the template
+            job_id: Defaults to a process-wide counter
+        """
+        self.job_id = job_id if job_id is not None else next(Job._ids)
+        self.path = path
+        self.object_name = object_name
+        self.steps = [tuple(step) for step in steps] if steps else None
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Job':
+        return cls(data["path"], data.get("object"), data.get("steps"), data.get("id"))
+
+    def __repr__(self) -> str:
+        return f"Job({self.job_id}, {self.path}, {self.object_name or self.steps})"
+
+
+class CompiledJob:
+    """A validated job, ready to execute."""
+    def __init__(self, job: Job, steps: List[Tuple[str, str]], sequence: LinkedList) -> None:
+        self.job = job
+        self.steps = steps
+        self.sequence = sequence
+
+
+class JobResult:
+    """Outcome of one job."""
+    def __init__(self, job: Job, ok: bool, cycle_time: float = 0.0, error: str = "") -> None:
+        self.job = job
+        self.ok = ok
+        self.cycle_time = cycle_time
+        self.error = error
+
+
+def compile_job(job: Job) -> CompiledJob:
+    """Resolve the job's steps, validate them and build its LinkedList.
+
+    Raises:
+        ValueError: Unknown path, object or state
+    """
+    if job.path not in PathDict:
+        raise ValueError(f"unknown path {job.path!r}")
+    steps = job.steps
+    if steps is None:
+        if job.object_name in object_group_1:
+            steps = SEQUENCE_WITH_STREAM
+        elif job.object_name in object_group_2:
+            steps = SEQUENCE_STATE_ONLY
+        else:
+            raise ValueError(f"object {job.object_name!r} is not in a known object group")
+    for mm_state, cb_state in steps:
+        if mm_state not in StateSequence_MM and mm_state != STREAMING_STATE_NAME:
+            raise ValueError(f"unknown MultiMove state {mm_state!r}")
+        if cb_state.removeprefix("CB_") not in StateSequence_CB and cb_state.removeprefix("CB_") != STREAMING_STATE_NAME:
+            raise ValueError(f"unknown Cobot state {cb_state!r}")
+
+    sequence = LinkedList()
+    for index, (mm_state, cb_state) in enumerate(steps):
+        header = 1 if index == 0 else 3 if index == len(steps) - 1 else 2
+        sequence.append(mm_state, cb_state, header)
+    return CompiledJob(job, list(steps), sequence)
+
+
+class JobQueue:
+    """Thread-safe FIFO of jobs with file, socket and API feeders."""
+    def __init__(self) -> None:
+        self._jobs: "queue.Queue[Job]" = queue.Queue()
+        self._socket_thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def submit(self, job: Job) -> Job:
+        """Queue a job (API feeder)."""
+        self._jobs.put(job)
+        return job
+
+    def load_file(self, file_path: str) -> int:
+        """Queue every job of a JSON-lines file (blank lines and # comments skipped).
+
+        Returns:
+            Number of jobs queued
+        """
+        count = 0
+        with open(file_path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    self.submit(Job.from_dict(json.loads(line)))
+                    count += 1
+        return count
+
+    def serve_socket(self, endpoint: str = Config.JOB_QUEUE_ENDPOINT,
+                     context: Optional[zmq.Context] = None) -> None:
+        """Accept JSON jobs on a local PULL socket from a background thread."""
+        context = context or zmq.Context.instance()
+
+        def serve() -> None:
+            socket = context.socket(zmq.PULL)
+            socket.setsockopt(zmq.LINGER, 0)
+            socket.bind(endpoint)
+            while not self._stop.is_set():
+                if socket.poll(100):
+                    try:
+                        data = json.loads(socket.recv())
+                        if not isinstance(data, dict):
+                            raise ValueError(f"expected a JSON object, got {type(data).__name__}")
+                        self.submit(Job.from_dict(data))
+                    except (ValueError, KeyError, TypeError) as e:
+                        log.warning("Rejected job message", error=e)
+            socket.close()
+
+        self._socket_thread = threading.Thread(target=serve, name="job-queue-socket", daemon=True)
+        self._socket_thread.start()
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Job]:
+        """Next job, None if none arrives within the timeout (0 = do not wait)."""
+        try:
+            return self._jobs.get(timeout=timeout) if timeout != 0 else self._jobs.get_nowait()
+        except queue.Empty:
+            return None
+
+    def __len__(self) -> int:
+        return self._jobs.qsize()
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._socket_thread is not None:
+            self._socket_thread.join()
+
+
+class BatchRunner:
+    """Runs queued jobs back-to-back, compiling the next job while the current one executes."""
+    def __init__(self, job_queue: JobQueue, execute: Callable[[CompiledJob], None],
+                 compile_fn: Callable[[Job], CompiledJob] = compile_job) -> None:
+        """
+        Args:
+            job_queue: Source of jobs
+            execute: Runs one compiled job to completion on the cell (raises on failure)
+            compile_fn: Compiles and validates one job
+        """
+        self.job_queue = job_queue
+        self.execute = execute
+        self.compile_fn = compile_fn
+        self.results: List[JobResult] = []
+        self.busy_time = 0.0 # seconds from the start of each run() to its last finished job
+        self._compiler = ThreadPoolExecutor(max_workers=1, thread_name_prefix="job-compile")
+
+    def _prefetch(self, wait: Optional[float]) -> Optional[Tuple[Job, Future]]:
+        job = self.job_queue.get(wait)
+        return (job, self._compiler.submit(self.compile_fn, job)) if job is not None else None
+
+    def run(self, wait_for_jobs: float = 0.0, max_jobs: Optional[int] = None) -> List[JobResult]:
+        """Execute jobs until the queue stays empty for `wait_for_jobs` seconds.
+
+        Args:
+            wait_for_jobs: How long to wait for a new job once the queue is empty
+            max_jobs: Stop after this many jobs (None = no limit)
+
+        Returns:
+            Results of the jobs run by this call
+        """
+        first_result = len(self.results)
+        run_started = time.perf_counter()
+        busy_before = self.busy_time # idle time between run() calls does not count
+        pending = self._prefetch(wait_for_jobs)
+        while pending is not None:
+            job, compiled_future = pending
+            pending = None
+            try:
+                compiled = compiled_future.result()
+            except ValueError as e:
+                self.results.append(JobResult(job, False, error=f"invalid: {e}"))
+                self.busy_time = busy_before + time.perf_counter() - run_started
+                log.warning("Job skipped", job=job.job_id, error=e)
+            else:
+                start = time.perf_counter()
+                # compile the next job while this one runs
+                if max_jobs is None or len(self.results) - first_result + 1 < max_jobs:
+                    pending = self._prefetch(0)
+                try:
+                    self.execute(compiled)
+                    result = JobResult(job, True, time.perf_counter() - start)
+                except Exception as e:
+                    result = JobResult(job, False, time.perf_counter() - start, str(e))
+                self.results.append(result)
+                self.busy_time = busy_before + time.perf_counter() - run_started
+                log.info("Job finished", job=job.job_id, path=job.path, ok=result.ok, error=result.error,
+                         cycle_s=round(result.cycle_time, 3), jobs_per_hour=round(self.jobs_per_hour, 1))
+            if max_jobs is not None and len(self.results) - first_result >= max_jobs:
+                break
+            if pending is None:
+                pending = self._prefetch(wait_for_jobs)
+        return self.results[first_result:]
+
+    @property
+    def jobs_per_hour(self) -> float:
+        """Completed jobs per hour of run() time, up to the last finished job of each call."""
+        done = sum(1 for result in self.results if result.ok)
+        return done / self.busy_time * 3600 if self.busy_time > 0 else 0.0
+
+    def summary(self) -> str:
+        done = [result.cycle_time for result in self.results if result.ok]
+        mean = sum(done) / len(done) if done else 0.0
+        return (f"{len(done)}/{len(self.results)} jobs done, mean cycle {mean:.2f} s, "
+                f"{self.jobs_per_hour:.1f} jobs/h")
+
+    def close(self) -> None:
+        self._compiler.shutdown(wait=False)
@@ -0,0 +1,198 @@
+"""
+Docstring for PythonHMI.src.execution.lookahead
+
+Lookahead staging of state commands from learned motion durations.
+
+The controller answers a 'd;' command once its motion is done, and a server
+sends the next command only after that ACK, so the robot idles for a network
+and parse cycle between two steps. MotionDurationStats learns how long each
+(robot, path, state) motion takes from the measured ACK times, and
+CommandLookahead uses it to send the next step of an uploaded program
+LOOKAHEAD_LEAD_S before the current motion is predicted to finish. The staged
+command waits in the controller's socket buffer, and SocketReceive reads it
+as soon as the motion ends (commModule takes one command per read, in order).
+
+At most one command is staged, and only for the steps a server knows ahead
+(server-side programs, without a barrier in between). A staged command has
+already left the server: a STOP or PAUSE arriving within the lead window
+takes effect one step later.
+"""
+
+import json
+import math
+import os
+from typing import Dict, List, Optional, Tuple
+
+from config.settings import Config
+from src.telemetry import metrics
+from src.telemetry.logger import get_logger
+
+log = get_logger("Lookahead")
+
+DurationKey = Tuple[str, int, int] # (robot, path code, state code)
+
+
+class DurationEstimate:
+    """Exponentially weighted mean and variance of one motion's duration."""
+    __slots__ = ("count", "mean", "variance")
+
+    def __init__(self, count: int = 0, mean: float = 0.0, variance: float = 0.0) -> None:
+        self.count = count
+        self.mean = mean
+        self.variance = variance
+
+    def update(self, duration: float, smoothing: float) -> None:
+        if self.count == 0:
+            self.mean = duration
+        else:
+            delta = duration - self.mean
+            self.mean += smoothing * delta
+            self.variance = (1 - smoothing) * (self.variance + smoothing * delta * delta)
+        self.count += 1
+
+    @property
+    def deviation(self) -> float:
+        return math.sqrt(self.variance)
+
+
+class MotionDurationStats:
+    """Measured motion durations per (robot, path, state)."""
+    def __init__(self, smoothing: Optional[float] = None, min_samples: Optional[int] = None) -> None:
+        """
+        Args:
+            smoothing: Weight of the newest duration, Config.LOOKAHEAD_SMOOTHING by default
+            min_samples: Durations measured before a motion is predicted, Config.LOOKAHEAD_MIN_SAMPLES by default
+        """
+        self.smoothing = Config.LOOKAHEAD_SMOOTHING if smoothing is None else smoothing
+        self.min_samples = Config.LOOKAHEAD_MIN_SAMPLES if min_samples is None else min_samples
+        self.estimates: Dict[DurationKey, DurationEstimate] = {}
+
+    def observe(self, robot: str, path: int, state: int, duration: float) -> None:
+        """Record the duration of one motion, from its start to its ACK (seconds)."""
+        self.estimates.setdefault((robot, path, state), DurationEstimate()).update(duration, self.smoothing)
+
+    def predict(self, robot: str, path: int, state: int) -> Optional[float]:
+        """Shortest likely duration of the motion (mean - LOOKAHEAD_SIGMA deviations), None until learned."""
+        estimate = self.estimates.get((robot, path, state))
+        if estimate is None or estimate.count < self.min_samples:
+            return None
+        return max(0.0, estimate.mean - Config.LOOKAHEAD_SIGMA * estimate.deviation)
+
+    def save(self, path: str) -> None:
+        """Write the estimates to a JSON file, so a restarted server does not relearn them."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        rows = [[robot, path_code, state, estimate.count, estimate.mean, estimate.variance]
+                for (robot, path_code, state), estimate in self.estimates.items()]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(rows, f)
+
+    def load(self, path: str) -> int:
+        """Read the estimates written by save(); a missing or unreadable file is ignored.
+
+        Returns:
+            Number of estimates loaded
+        """
+        try:
+            with open(path, encoding="utf-8") as f:
+                rows = json.load(f)
+            for robot, path_code, state, count, mean, variance in rows:
+                self.estimates[(robot, int(path_code), int(state))] = DurationEstimate(int(count), mean, variance)
+        except (OSError, ValueError, TypeError) as e:
+            if not isinstance(e, FileNotFoundError):
+                log.warning("Motion duration file ignored", path=path, error=str(e))
+            return 0
+        return len(rows)
+
+
+class StagedCommand:
+    """A state command sent before the previous motion was done."""
+    def __init__(self, command: List[float], path: int, state: int, command_id: int, sent_at: float) -> None:
+        self.command = command
+        self.path = path
+        self.state = state
+        self.command_id = command_id
+        self.sent_at = sent_at
+        self.started: Optional[float] = None # ACK time of the previous motion, when the controller starts this one
+        self.acked_at: Optional[float] = None # its own ACK, if it arrived with the previous one
+
+
+class CommandLookahead:
+    """Staging decisions and idle-gap accounting of one server."""
+    def __init__(self, robot: str, stats: Optional[MotionDurationStats] = None) -> None:
+        """
+        Args:
+            robot: Robot name of the statistics keys and metrics (e.g., "MultiMove", "Cobot")
+            stats: Duration store, a new one by default
+        """
+        self.robot = robot
+        self.stats = stats or MotionDurationStats()
+        self.staged: Optional[StagedCommand] = None
+        self._chained_at: Optional[float] = None # ACK time of a step whose next step follows right away
+        self.metric_staged = metrics.counter("abb_commands_staged_total",
+                                             "State commands sent ahead of the previous motion's ACK", robot=robot)
+        self.metric_idle = metrics.histogram("abb_step_idle_seconds",
+                                             "Controller idle time between two program steps (estimated by the server)",
+                                             robot=robot)
+
+    @property
+    def stats_path(self) -> str:
+        return os.path.join(Config.CHECKPOINT_DIR, f"{self.robot}.durations.json")
+
+    def stage_at(self, path: int, state: int, started: float) -> Optional[float]:
+        """perf_counter() time at which to send the next step, None to wait for the ACK (disabled or not learned)."""
+        if not Config.LOOKAHEAD_ENABLED:
+            return None
+        predicted = self.stats.predict(self.robot, path, state)
+        if predicted is None:
+            return None
+        return started + max(0.0, predicted - Config.LOOKAHEAD_LEAD_S)
+
+    def stage(self, command: List[float], path: int, state: int, command_id: int, sent_at: float) -> None:
+        self.staged = StagedCommand(command, path, state, command_id, sent_at)
+        self.metric_staged.inc()
+
+    def holds(self, path: int, state: int) -> bool:
+        """This step's command is the staged one."""
+        return self.staged is not None and (self.staged.path, self.staged.state) == (path, state)
+
+    def take(self, path: int, state: int) -> Optional[StagedCommand]:
+        """The staged command if it is this step's, which is then no longer staged."""
+        if not self.holds(path, state):
+            return None
+        staged = self.staged
+        self.staged = None
+        self._chained_at = None
+        self.metric_idle.observe(0.0) # queued at the controller when the previous motion ended
+        return staged
+
+    def sent(self, sent_at: float) -> None:
+        """A command was sent after the previous ACK; counts the gap if it continues a program."""
+        if self._chained_at is not None:
+            self.metric_idle.observe(max(0.0, sent_at - self._chained_at))
+        self._chained_at = None
+
+    def completed(self, path: int, state: int, started: float, done_at: float, chained: bool) -> None:
+        """A motion was acknowledged.
+
+        Args:
+            started: When the controller started it (its send time, or the previous ACK if it was staged)
+            chained: The next program step follows, its send is an idle gap of the robot
+        """
+        self.stats.observe(self.robot, path, state, done_at - started)
+        if self.staged is not None and self.staged.started is None:
+            self.staged.started = done_at
+        self._chained_at = done_at if chained and self.staged is None else None
+
+    def reset(self) -> None:
+        """Forget the chain and the staged command (program ended, new controller connection)."""
+        self.staged = None
+        self._chained_at = None
+
+    def load(self) -> None:
+        count = self.stats.load(self.stats_path)
+        if count:
+            log.info("Motion durations loaded", robot=self.robot, motions=count)
+
+    def save(self) -> None:
+        if self.stats.estimates:
+            self.stats.save(self.stats_path)
@@ -0,0 +1,545 @@
+"""
+Docstring for PythonHMI.src.execution.robot_server
+
+Controller plumbing shared by server_multiMove and server_cobot.
+
+Both servers take the same client commands and drive their controller the
+same way; they differ in their ports, their state machine and the ROB1 + ROB2
+extras of MultiMove (12-value targets, shared-memory ring, proximity check).
+RobotServer holds the command state of one server and the steps around a
+controller command:
+    state motions    execute_state_command, with the command cache, the
+                     lookahead staging and the checkpoint records
+    joint targets    send_joint_stream / finish_joint_stream on the JointStreamer,
+                     fed by compact frames, the shared-memory ring and uploads
+    controls         handle_control / check_control_lane (stop, pause, abort, profile)
+    clock probes     probe_controller_clock while the server is idle
+Each server keeps its main loop (sockets, handshake, command dispatch) and sets
+the per-connection attributes (command_lane, checkpoint, ...) from main().
+"""
+
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+import zmq
+
+from config.settings import Config
+from src.communication.command_cache import CommandStateCache
+from src.communication.priority_lane import CONTROL_NAMES, LaneItem
+from src.communication.protocol import CompactFrameDecoder, negotiate_frame_format, pack_data
+from src.communication.shared_memory_ring import SharedJointRing
+from src.communication.socket_manager import ExtSocketServer
+from src.execution.checkpoint import STATUS_CANCELLED, STATUS_STEP_DONE, STATUS_STEP_SENT
+from src.execution.lookahead import CommandLookahead
+from src.streaming.joint_streamer import JointStreamer
+from src.telemetry import metrics
+from src.telemetry import publisher as telemetry
+from src.telemetry.flight_recorder import CH_ZMQ_ACK, DIR_OUT
+from src.telemetry.logger import get_logger
+from src.telemetry.profiling import OnDemandProfiler
+
+
+class RobotServer:
+    """Command state and controller plumbing of one robot server.
+
+    Args:
+        robot: Robot name of the logs, metrics and streamer ("MultiMove", "Cobot")
+        build_state_command: (path, state code) -> controller command of a state motion
+        dual_arm: Accept 12-value ROB1 + ROB2 targets (with Config.STREAM_DUAL_ARM_ENABLED),
+                  checked by proximity_checker when set
+    """
+
+    def __init__(self, robot: str, build_state_command: Callable[[int, int], List[int]], dual_arm: bool = False) -> None:
+        self.robot = robot
+        self.build_state_command = build_state_command
+        self.dual_arm = dual_arm
+        self.log = get_logger(robot) # queue-backed, keeps console output off the motion loops
+        self.command_cache = CommandStateCache(robot) # last confirmed (path, tool, speed, state), drops redundant state commands
+        self.lookahead = CommandLookahead(robot) # learned motion durations, stages the next program step before the ACK
+        self.profiler = OnDemandProfiler(robot) # on-demand profiling, started from the control lane or SIGUSR1
+
+        # set by the server's main() for each run
+        self.telemetry_publisher = None # PUB stream of state, buffer level and progress
+        self.command_lane = None # priority queue over the command and control sockets
+        self.client_ack_socket = None # PUSH socket back to the client, used to acknowledge flushed commands
+        self.recorder = None # flight recorder of every ZMQ frame and controller message, when enabled
+        self.checkpoint = None # append-only record of the last confirmed state, survives a server restart
+        self.sequence_runner = None # runs the sequences uploaded by the client (see src/execution/server_sequence.py)
+        self.stream_ring = None # shared-memory joint ring, when enabled
+        self.proximity_checker = None # ROB1/ROB2 capsule distance check of the streamed pairs, when enabled
+        self.current_client = b"" # front-end identity of the client whose command is handled, b"" = clientUI
+
+        self.command_counter = 0 # id of the last command sent to the controller, used in progress frames
+        self.joint_streamer = None # rate-controlled joint target feed to the controller, created on the first target
+        self.frame_decoders: Dict[bytes, CompactFrameDecoder] = {} # compact joint frame decoder per front-end client
+        self.trajectory_uploads = deque() # (N, width) targets of multipart uploads not yet queued, views of the received buffers
+        self.previous_execution_successful = False # to check sudden termination of the execution
+        self.interrupted = False # a STOP/ABORT was handled since the last state command was sent
+        self.stops = 0 # STOP/ABORT controls handled, tells a caller that its wait loop was stopped
+
+        # runtime metrics, served by metrics.serve() (see src/telemetry/metrics.py)
+        self.metric_state_commands = metrics.counter("abb_commands_total", "Commands sent to the controller", robot=robot, kind="state")
+        self.metric_skipped_commands = metrics.counter("abb_commands_total", "Commands sent to the controller", robot=robot, kind="skipped")
+        self.metric_state_ack_latency = metrics.histogram("abb_ack_latency_seconds", "Command sent to controller ACK (motion included)",
+                                                          robot=robot, kind="state")
+        self.metric_ack_wait_iterations = metrics.counter("abb_ack_wait_iterations_total", "Iterations of the controller ACK wait loops",
+                                                          robot=robot)
+        self.metric_loop_iterations = metrics.counter("abb_main_loop_iterations_total", "Iterations of the server main loop", robot=robot)
+        self.metric_flushed_commands = metrics.counter("abb_commands_flushed_total", "Queued commands dropped by STOP/ABORT", robot=robot)
+        self.metric_compact_lost = metrics.counter("abb_compact_targets_lost_total",
+                                                   "Streamed targets of compact frames dropped for a lost reference", robot=robot)
+        if dual_arm:
+            self.metric_proximity_rejected = metrics.counter("abb_proximity_rejected_total",
+                                                             "Streamed targets dropped by the ROB1/ROB2 proximity check", robot=robot)
+            self.metric_stream_buffer_fill = metrics.gauge("abb_stream_buffer_fill", "Joint targets waiting in the shared-memory ring",
+                                                           robot=robot)
+
+    @property
+    def stream_widths(self) -> Tuple[int, ...]:
+        """Joint target widths the controller takes: 6 (ROB1), and 12 (ROB1 + ROB2) once commModule parses 'J;'."""
+        return (6, 12) if self.dual_arm and Config.STREAM_DUAL_ARM_ENABLED else (6,)
+
+    def reset(self) -> None:
+        """Forget the stream state of a previous run, before a new controller connection."""
+        self.joint_streamer = None # bound to this run's controller connection on the first target
+        self.frame_decoders.clear() # pack_data frames until a stream session negotiates a compact format
+        self.trajectory_uploads.clear()
+        self.current_client = b""
+        self.interrupted = False
+
+    # ----- state motions -----
+
+    def send_command_to_external_socket(self, path: int, sequence: int, socket_ext: ExtSocketServer,
+                                        next_sequence: Optional[int] = None) -> Optional[List[int]]:
+        """Send one state command and wait for its motion to complete.
+
+        next_sequence is the following step of a server-side program; with LOOKAHEAD_ENABLED
+        it is staged before this motion is predicted to end (see src/execution/lookahead.py).
+
+        Returns:
+            The controller command, None if a STOP/ABORT dropped it before it was sent
+        """
+        lookahead = self.lookahead
+        stops = self.stops
+        data_list = self.build_state_command(path, sequence)
+        chained = next_sequence is not None
+
+        staged = lookahead.take(path, sequence)
+        if staged is not None:
+            # sent during the previous motion, the controller started it on that ACK
+            sent_at, started, command_id = staged.sent_at, staged.started, staged.command_id
+            if staged.acked_at is not None: # its ACK came in the same read as the previous one
+                self.confirm_state_motion(path, sequence, data_list, command_id, sent_at, started, staged.acked_at, chained)
+                return data_list
+        else:
+            self.finish_staged_command(socket_ext) # another step was staged, its motion runs first
+            if self.stops != stops:
+                return None # stopped during the staged motion, this command is not sent
+
+            # skip the controller round-trip if the robot already sits in this exact confirmed state
+            if self.command_cache.is_redundant(data_list):
+                self.log.info("Command skipped, state already confirmed", command=data_list, cache_hits=self.command_cache.hits)
+                self.metric_skipped_commands.inc()
+                lookahead.reset()
+                if self.telemetry_publisher is not None:
+                    self.telemetry_publisher.publish_progress(self.command_counter, telemetry.PROGRESS_SKIPPED)
+                return data_list
+
+            # send command to external sockt and receive the response
+            socket_ext.send_data(data_list, 'd;')
+            self.interrupted = False
+            sent_at = started = time.perf_counter()
+            lookahead.sent(sent_at)
+            self.metric_state_commands.inc()
+            self.log.info("Data sent to external socket", command_id=self.command_counter + 1, data=data_list)
+            self.command_counter += 1
+            command_id = self.command_counter
+            if self.telemetry_publisher is not None:
+                self.telemetry_publisher.publish_progress(self.command_counter, telemetry.PROGRESS_SENT)
+
+        stage_at = lookahead.stage_at(path, sequence, started) if chained else None
+        # not looping if we don't complete the motion
+        done = False
+        while not done:
+            self.check_control_lane()
+            self.metric_ack_wait_iterations.inc()
+            if stage_at is not None and time.perf_counter() >= stage_at:
+                stage_at = None
+                self.stage_state_command(path, next_sequence, data_list, socket_ext)
+            # a staged command can be answered in the same read
+            for complete_flag in socket_ext.receive_messages():
+                self.log.debug("Response received from external socket", values=complete_flag)
+                if len(complete_flag) != 6:
+                    continue
+                if self.telemetry_publisher is not None:
+                    self.telemetry_publisher.publish_state(complete_flag)
+                if complete_flag[0] == 9:
+                    if done:
+                        if lookahead.staged is not None:
+                            lookahead.staged.acked_at = time.perf_counter()
+                        continue
+                    self.confirm_state_motion(path, sequence, data_list, command_id, sent_at, started, time.perf_counter(), chained)
+                    done = True
+
+        return data_list
+
+    def confirm_state_motion(self, path: int, sequence: int, data_list: List[int], command_id: int,
+                             sent_at: float, started: float, done_at: float, chained: bool) -> None:
+        """Record a state motion acknowledged by the controller.
+
+        The controller also answers a motion cut short by a STOP/ABORT; such a motion did
+        not reach its state, so it is neither confirmed in the cache nor timed.
+        """
+        if self.interrupted:
+            self.log.warning("Motion interrupted, state not confirmed", command_id=command_id)
+            if self.telemetry_publisher is not None:
+                self.telemetry_publisher.publish_progress(command_id, telemetry.PROGRESS_FAILED)
+            return
+        self.log.info("Motion completed successfully", command_id=command_id)
+        self.metric_state_ack_latency.observe(done_at - sent_at)
+        if self.telemetry_publisher is not None:
+            self.telemetry_publisher.publish_progress(command_id, telemetry.PROGRESS_DONE)
+        self.command_cache.confirm(data_list)
+        self.lookahead.completed(path, sequence, started, done_at, chained)
+
+    def stage_state_command(self, path: int, sequence: int, current: List[int], socket_ext: ExtSocketServer) -> None:
+        """Send the next program step while the current motion still runs (lookahead)."""
+        if self.command_lane.paused or (self.sequence_runner is not None and self.sequence_runner.aborted):
+            return # PAUSE/STOP hold the next step in the server
+        data_list = self.build_state_command(path, sequence)
+        if data_list == current:
+            return # reached once the current motion ends, the cache skips it
+        self.checkpoint.append(path, sequence, self.command_counter + 1, STATUS_STEP_SENT)
+        socket_ext.send_data(data_list, 'd;')
+        self.metric_state_commands.inc()
+        self.command_counter += 1
+        self.log.info("Data staged to external socket", command_id=self.command_counter, data=data_list)
+        self.lookahead.stage(data_list, path, sequence, self.command_counter, time.perf_counter())
+        if self.telemetry_publisher is not None:
+            self.telemetry_publisher.publish_progress(self.command_counter, telemetry.PROGRESS_SENT)
+
+    def finish_staged_command(self, socket_ext: ExtSocketServer) -> None:
+        """Wait for the motion of a staged command whose step did not run (program stopped or replaced)."""
+        staged = self.lookahead.staged
+        if staged is not None:
+            self.execute_state_command(staged.path, staged.state, 0, socket_ext)
+
+    def execute_state_command(self, path: int, sequence: int, head_tail: int, socket_ext: ExtSocketServer,
+                              next_sequence: Optional[int] = None) -> bool:
+        """Run one state motion to completion, recording it in the checkpoint.
+
+        Used for the state commands of the client and the steps of an uploaded sequence;
+        next_sequence is the program step that may be staged during this motion.
+
+        Returns:
+            False if a STOP/ABORT dropped the command while it waited for the stream (or a
+            staged motion) to finish, or interrupted its motion; the client ACK is then
+            ACK_COMMAND_FLUSHED
+        """
+        # Redundant (already confirmed) state commands are dropped by command_cache
+        if not self.finish_joint_stream(): # the controller takes a state motion once the stream is done
+            self.log.warning("State motion dropped by a STOP/ABORT", path=path, sequence=sequence)
+            return False
+        if not self.lookahead.holds(path, sequence): # a staged step was recorded when it was sent
+            self.checkpoint.append(path, sequence, self.command_counter + 1, STATUS_STEP_SENT)
+        if self.send_command_to_external_socket(path, sequence, socket_ext, next_sequence) is None:
+            self.log.warning("State motion dropped by a STOP/ABORT", path=path, sequence=sequence)
+            return False
+        if self.interrupted: # stopped mid-motion, the STEP_SENT (or ABORT's CANCELLED) record stays the last one
+            return False
+        if self.lookahead.staged is None: # otherwise the staged step's STEP_SENT stays the last record
+            self.checkpoint.append(path, sequence, self.command_counter)
+        self.previous_execution_successful = True
+        return True
+
+    def restore_checkpoint(self) -> None:
+        """Continue the command ids of the checkpoint file after a restart.
+
+        The command cache stays empty: the robot may have been moved (jogged, stopped,
+        another program run) while no server was connected, so its first state command
+        always goes to the controller.
+        """
+        record = self.checkpoint.load()
+        if record is None:
+            return
+        self.command_counter = record.command_id
+        self.log.info("Checkpoint restored", command_id=record.command_id, last_state=record.step_index,
+                      confirmed=record.status == STATUS_STEP_DONE)
+
+    # ----- joint targets -----
+
+    def send_joint_stream(self, joint_values: List[float], socket_ext: ExtSocketServer) -> bool:
+        """Queue a joint target for the controller on the buffered streamer.
+
+        The streamer sends it at the rate set from the controller's ACK timing
+        (see src/streaming); this only waits while the server queue is full.
+
+        Args:
+            joint_values: 6 float values [j1, j2, j3, j4, j5, j6] for ROB1, or on a dual-arm server
+                          12 for a synchronized ROB1 + ROB2 pair (ROB1 first), in degrees
+            socket_ext: The external socket connection to the robot controller
+
+        Returns:
+            True once the target is queued, False if a STOP/ABORT flushed the stream while
+            it waited: the target is dropped with the rest of the stream
+        """
+        if self.joint_streamer is None or self.joint_streamer.socket_ext is not socket_ext:
+            self.joint_streamer = JointStreamer(socket_ext, self.robot, publisher=self.telemetry_publisher)
+        joint_streamer = self.joint_streamer
+        self.command_cache.invalidate("streaming") # joint targets move the robot off its confirmed state
+        while not joint_streamer.push(joint_values):
+            joint_streamer.pump(Config.SOCKET_RETRY_DELAY)
+            if self.check_control_lane():
+                return False
+        self.log.debug("Joint stream queued", joints=joint_values)
+        joint_streamer.pump()
+        return True
+
+    def finish_joint_stream(self) -> bool:
+        """Wait until every streamed target has been consumed, before a state motion or shutdown.
+
+        Returns:
+            False if a STOP/ABORT flushed the stream meanwhile
+        """
+        stops = self.stops
+        while self.trajectory_uploads and self.joint_streamer is not None: # the main loop has started draining them
+            self.joint_streamer.pump(Config.SOCKET_RETRY_DELAY)
+            if self.check_control_lane():
+                return False
+            self.drain_trajectory_uploads(self.joint_streamer.socket_ext)
+        joint_streamer = self.joint_streamer
+        if joint_streamer is not None and not joint_streamer.idle:
+            joint_streamer.drain(self.check_control_lane)
+            self.log.info("Joint stream drained", sent=joint_streamer.sent, underruns=joint_streamer.underruns,
+                          rate_hz=round(joint_streamer.rate.rate, 1), consumption_hz=round(joint_streamer.rate.consumption_rate, 1))
+        return self.stops == stops
+
+    def check_stream_proximity(self, targets: List[List[float]]) -> int:
+        """Number of targets, from the first, that keep ROB1 and ROB2 apart (see src/kinematics/proximity.py).
+
+        Only ROB1 + ROB2 pairs are checked: a 6-value target moves ROB1 alone, from a ROB2
+        pose the server does not know.
+        """
+        if self.proximity_checker is None:
+            return len(targets)
+        pairs = [index for index, target in enumerate(targets) if len(target) == 12]
+        if not pairs:
+            return len(targets)
+        report = self.proximity_checker.check_pairs([targets[index] for index in pairs])
+        if report.first_violation is None:
+            return len(targets)
+        clear = pairs[report.first_violation]
+        self.metric_proximity_rejected.inc(len(targets) - clear)
+        self.log.error("Joint stream stopped by the proximity check", target=clear,
+                       distance_mm=round(float(report.distances[report.first_violation]), 1),
+                       clearance_mm=self.proximity_checker.clearance)
+        return clear
+
+    def negotiate_frames(self, requested: int) -> int:
+        """Start a stream session of the current client in the requested joint frame format (see src/communication/protocol.py).
+
+        Returns:
+            The granted format, FLOAT64 (pack_data frames) if the requested one is not accepted
+        """
+        granted = negotiate_frame_format(requested)
+        self.frame_decoders.pop(self.current_client, None)
+        if granted != Config.FRAME_FORMAT_FLOAT64:
+            self.frame_decoders[self.current_client] = CompactFrameDecoder(granted)
+        self.log.info("Stream frame format", requested=requested, granted=granted)
+        return granted
+
+    def receive_compact_frame(self, message: bytes, socket_ext: ExtSocketServer) -> bool:
+        """Queue the joint targets of a compact frame.
+
+        Returns:
+            False if targets were dropped: the frame could not be decoded (no compact
+            session, or a frame before it was flushed), or the proximity check stopped
+            the stream
+        """
+        frame_decoder = self.frame_decoders.get(self.current_client)
+        if frame_decoder is None:
+            self.log.warning("Compact frame outside a compact stream session", size=len(message))
+            return False
+        lost = frame_decoder.lost
+        targets = frame_decoder.decode(message)
+        if targets is None or targets.shape[1] not in self.stream_widths:
+            self.metric_compact_lost.inc(frame_decoder.lost - lost)
+            self.log.warning("Compact frame dropped", size=len(message), lost=frame_decoder.lost)
+            return False
+        targets = targets.tolist()
+        clear = self.check_stream_proximity(targets)
+        for joint_values in targets[:clear]:
+            if not self.send_joint_stream(joint_values, socket_ext):
+                return False # the rest of the frame went with the flushed stream
+        return clear == len(targets)
+
+    def drain_stream_ring(self, stream_ring: SharedJointRing, socket_ext: ExtSocketServer) -> int:
+        """Move the joint targets waiting in the shared-memory ring to the streamer.
+
+        Targets are taken in chunks of PROXIMITY_CHUNK, checked together by the proximity check;
+        the targets from the first violation on, and the rest of the ring, are dropped. A STOP/ABORT
+        handled while the streamer is full drops the rest of the chunk (the ring is flushed). ROB1 +
+        ROB2 pairs are dropped while dual-arm streaming is off (Config.STREAM_DUAL_ARM_ENABLED).
+
+        Args:
+            stream_ring: Ring written by a producer on the same host
+            socket_ext: The external socket connection to the robot controller
+
+        Returns:
+            Number of joint targets queued
+        """
+        widths = self.stream_widths
+        queued = unsupported = 0
+        while True:
+            chunk = []
+            joint_values = stream_ring.pop()
+            while joint_values is not None:
+                if len(joint_values) in widths:
+                    chunk.append(joint_values.tolist())
+                    if len(chunk) == Config.PROXIMITY_CHUNK:
+                        break
+                else:
+                    unsupported += 1
+                joint_values = stream_ring.pop()
+            if not chunk:
+                break
+            clear = self.check_stream_proximity(chunk)
+            for index, joint_values in enumerate(chunk[:clear]):
+                self.metric_stream_buffer_fill.set(len(stream_ring) + len(chunk) - index)
+                if not self.send_joint_stream(joint_values, socket_ext):
+                    self.metric_stream_buffer_fill.set(0)
+                    return queued # stopped, the ring has been flushed
+                queued += 1
+            if clear < len(chunk):
+                self.metric_proximity_rejected.inc(stream_ring.flush()) # the rest of the trajectory leads through the violation
+                break
+        if unsupported:
+            self.log.warning("ROB1 + ROB2 targets dropped, dual-arm streaming is off", targets=unsupported)
+        if queued:
+            self.metric_stream_buffer_fill.set(0)
+        return queued
+
+    def drain_trajectory_uploads(self, socket_ext: ExtSocketServer) -> int:
+        """Move uploaded targets to the streamer, as many as its queue has room for.
+
+        With the proximity check, targets go through it in chunks of PROXIMITY_CHUNK like the
+        ring; the targets from the first violation on, and the uploads still waiting, are dropped.
+        A STOP/ABORT handled while the streamer is full drops the rest of the chunk (the uploads
+        are flushed).
+
+        Returns:
+            Number of joint targets queued
+        """
+        uploads = self.trajectory_uploads
+        queued = 0
+        while uploads:
+            joint_streamer = self.joint_streamer
+            room = joint_streamer.capacity - len(joint_streamer.pending) if joint_streamer is not None else Config.STREAM_LOCAL_BUFFER
+            if room <= 0:
+                break
+            if self.proximity_checker is not None:
+                room = min(room, Config.PROXIMITY_CHUNK)
+            chunk = uploads[0][:room]
+            uploads[0] = uploads[0][len(chunk):]
+            if not len(uploads[0]):
+                uploads.popleft()
+            targets = chunk.tolist()
+            clear = self.check_stream_proximity(targets)
+            for joint_values in targets[:clear]:
+                if not self.send_joint_stream(joint_values, socket_ext):
+                    return queued # stopped, the uploads have been flushed
+                queued += 1
+            if clear < len(targets):
+                self.metric_proximity_rejected.inc(sum(len(upload) for upload in uploads))
+                uploads.clear() # the rest of the trajectory leads through the violation
+        return queued
+
+    # ----- controls and clock -----
+
+    def handle_control(self, item: LaneItem) -> None:
+        """Apply a stop/pause/resume/abort received on the priority control lane.
+
+        The lane has already flushed the queued motion commands; this acknowledges them
+        as flushed, drops the pending stream points and forgets the confirmed state.
+        """
+        dropped_points = 0
+        if item.code in (Config.CONTROL_STOP, Config.CONTROL_ABORT):
+            self.command_cache.invalidate(CONTROL_NAMES[item.code].lower()) # the robot may have stopped mid-motion
+            self.interrupted = True # the ACK of the motion in flight does not confirm its state
+            self.stops += 1
+            self.metric_flushed_commands.inc(len(item.flushed))
+            for flushed in item.flushed:
+                self.send_to_client(pack_data(list(Config.ACK_COMMAND_FLUSHED)), zmq.NOBLOCK, flushed.client)
+            if self.sequence_runner is not None:
+                self.sequence_runner.abort() # the uploaded sequence stops before its next step
+            if self.stream_ring is not None:
+                dropped_points = self.stream_ring.flush()
+            if self.joint_streamer is not None:
+                dropped_points += self.joint_streamer.flush()
+            dropped_points += sum(len(upload) for upload in self.trajectory_uploads)
+            self.trajectory_uploads.clear()
+        if item.code == Config.CONTROL_PROFILE:
+            self.profiler.toggle()
+        if item.code == Config.CONTROL_ABORT:
+            self.previous_execution_successful = False
+            if self.checkpoint is not None:
+                self.checkpoint.append(0, 0, self.command_counter, STATUS_CANCELLED)
+
+        stats = self.command_lane.stats
+        metrics.counter("abb_controls_total", "Controls handled from the priority lane",
+                        robot=self.robot, control=CONTROL_NAMES[item.code]).inc()
+        self.log.warning("Control handled", control=CONTROL_NAMES[item.code], id=item.command_id,
+                         flushed=len(item.flushed), stream_points=dropped_points,
+                         latency_ms=round(stats.last * 1e3, 3), max_latency_ms=round(stats.max * 1e3, 3))
+        if self.telemetry_publisher is not None:
+            self.telemetry_publisher.publish_control(item.command_id, item.code, stats.last)
+
+    def check_control_lane(self) -> bool:
+        """Service the control lane from inside a motion wait loop.
+
+        Returns:
+            True if a STOP/ABORT was handled: the caller drops the work it holds
+        """
+        if self.command_lane is None:
+            return False
+        control = self.command_lane.check_control()
+        if control is None:
+            return False
+        self.handle_control(control)
+        return control.code in (Config.CONTROL_STOP, Config.CONTROL_ABORT)
+
+    def send_to_client(self, payload: bytes, flags: int = 0, client: Optional[bytes] = None) -> None:
+        """Send a frame to a client, recording it in the flight recorder.
+
+        Args:
+            payload: The frame
+            flags: ZMQ send flags
+            client: Front-end identity, by default the client whose command is handled;
+                    b"" is clientUI on the ACK socket
+        """
+        client = self.current_client if client is None else client
+        if client:
+            self.command_lane.reply(client, payload, flags)
+            return
+        if self.recorder is not None:
+            self.recorder.record(CH_ZMQ_ACK, DIR_OUT, payload)
+        self.client_ack_socket.send(payload, flags)
+
+    def probe_controller_clock(self, socket_ext: ExtSocketServer) -> None:
+        """Sample the controller clock (see src/telemetry/clock_sync.py), once per CLOCK_PROBE_INTERVAL_S while idle.
+
+        Never waits: the probe is sent on one idle iteration and its answer collected
+        on the following ones, so the control lane is served in between.
+        """
+        if self.lookahead.staged is not None:
+            return # the staged command is answered next, its motion loop takes the clock reply too
+        if socket_ext.clock_probe_pending:
+            sample = socket_ext.poll_clock_probe()
+            if sample is not None and len(socket_ext.clock.samples) == 1:
+                self.log.info("Controller clock probed", offset=sample.offset, round_trip=sample.delay)
+            elif not socket_ext.clock_probe_pending and socket_ext.clock_timeouts == Config.CLOCK_PROBE_MAX_TIMEOUTS:
+                self.log.warning("Controller does not answer clock probes, probing stopped", timeouts=socket_ext.clock_timeouts)
+            return
+        if socket_ext.clock_timeouts < Config.CLOCK_PROBE_MAX_TIMEOUTS and socket_ext.clock.probe_due():
+            socket_ext.send_clock_probe()
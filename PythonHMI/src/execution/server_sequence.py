@@ -0,0 +1,218 @@
+"""
+Docstring for PythonHMI.src.execution.server_sequence
+
+Server-side execution of uploaded sequences.
+
+Releasing every step from clientUI costs a ZMQ hop to each server and an ACK
+back before the next step can start. Instead, clientUI compiles the state
+steps of a sequence into one SequenceProgram per server and uploads it once;
+the server runs the steps back to back, so a step costs the controller round
+trip alone. Progress frames flow back without the server ever waiting for
+them. The client only takes part at barriers, the steps where one robot must
+not start before the other is ready (Node.sync): both servers report the
+barrier, and the client releases them once both have. Within a run of
+steps without a barrier, the server may send the next step to the controller
+before the current one is done (lookahead staging, src/execution/lookahead.py).
+
+Frames travel on the command/ACK channel (pack_data, first value is the op
+code). Their length is 1 modulo 3, so they are never mistaken for a state
+command (3 values) or a joint target (6 or 12):
+    upload    [OP_UPLOAD, sequence id, path, steps, (state, header, barrier) * steps]
+    release   [OP_RELEASE, sequence id, step, 0]       client -> server
+    cancel    [OP_CANCEL, sequence id, 0, 0]           client -> server
+    progress  [OP_PROGRESS, sequence id, step, status] server -> client
+"""
+
+import itertools
+import time
+from typing import Callable, List, NamedTuple, Optional, Sequence
+
+from config.settings import Config
+from src.communication.priority_lane import PRIORITY_TERMINATION, LaneItem, PriorityCommandLane
+from src.communication.protocol import pack_data, unpack_data
+from src.telemetry.logger import get_logger
+
+log = get_logger("ServerSequence")
+
+OP_UPLOAD = Config.SEQUENCE_OP_UPLOAD
+OP_RELEASE = Config.SEQUENCE_OP_RELEASE
+OP_CANCEL = Config.SEQUENCE_OP_CANCEL
+OP_PROGRESS = Config.SEQUENCE_OP_PROGRESS
+
+# Progress status codes
+STEP_DONE = 1 # the step's motion is confirmed
+STEP_BARRIER = 2 # waiting at the step for the client release
+SEQUENCE_DONE = 3 # every step done, step = number of steps
+SEQUENCE_ABORTED = 4 # stopped by STOP/ABORT or a client cancel, step = first step not done
+
+HEADER_VALUES = 4 # op, sequence id, path, steps
+STEP_VALUES = 3 # state, header flag, barrier
+
+# unique enough across clientUI restarts, exact as a double
+_sequence_ids = itertools.count(int(time.time() * 1000) % 2**40)
+
+
+def next_sequence_id() -> int:
+    return next(_sequence_ids)
+
+
+def is_sequence_frame(values: Sequence[float]) -> bool:
+    """A frame of this module (never a state command or joint target)."""
+    return len(values) % STEP_VALUES == 1 and int(values[0]) in (OP_UPLOAD, OP_RELEASE, OP_CANCEL, OP_PROGRESS)
+
+
+class ProgramStep(NamedTuple):
+    state: int # state code of the server's StateSequence
+    header: int # header flag (1 = head, 2 = middle, 3 = tail)
+    barrier: bool # wait for the client release before starting the step
+
+
+class SequenceProgram:
+    """The state steps of one server for a run of a sequence."""
+    def __init__(self, sequence_id: int, path: int, steps: List[ProgramStep]) -> None:
+        """
+        Args:
+            sequence_id: Shared by the programs of both servers, tags every frame
+            path: Path code (PathDict)
+            steps: Steps in execution order
+        """
+        self.sequence_id = sequence_id
+        self.path = path
+        self.steps = steps
+
+    def encode(self) -> bytes:
+        values = [OP_UPLOAD, self.sequence_id, self.path, len(self.steps)]
+        for step in self.steps:
+            values += [step.state, step.header, 1 if step.barrier else 0]
+        return pack_data(values)
+
+    @classmethod
+    def decode(cls, values: Sequence[float]) -> Optional['SequenceProgram']:
+        """Program from the values of an upload frame, None if malformed."""
+        if len(values) < HEADER_VALUES or int(values[0]) != OP_UPLOAD:
+            return None
+        count = int(values[3])
+        if len(values) != HEADER_VALUES + STEP_VALUES * count:
+            return None
+        steps = [ProgramStep(int(values[i]), int(values[i + 1]), bool(values[i + 2]))
+                 for i in range(HEADER_VALUES, len(values), STEP_VALUES)]
+        return cls(int(values[1]), int(values[2]), steps)
+
+
+def release_frame(sequence_id: int, step: int) -> bytes:
+    return pack_data([OP_RELEASE, sequence_id, step, 0])
+
+
+def cancel_frame(sequence_id: int) -> bytes:
+    return pack_data([OP_CANCEL, sequence_id, 0, 0])
+
+
+def progress_frame(sequence_id: int, step: int, status: int) -> bytes:
+    return pack_data([OP_PROGRESS, sequence_id, step, status])
+
+
+class ServerSequenceRunner:
+    """Runs uploaded programs inside a server loop."""
+    def __init__(self, lane: PriorityCommandLane, execute_step: Callable[[int, int, int, Optional[int]], None],
+                 send_progress: Callable[[bytes], None], handle_control: Callable[[LaneItem], None]) -> None:
+        """
+        Args:
+            lane: The server's command lane, read for releases, cancels and controls
+            execute_step: Runs one state motion to completion, called with (path, state, header,
+                          next state); the next state is None when a barrier or the end follows
+            send_progress: Sends a progress frame to the client without blocking
+            handle_control: The server's handler of STOP/PAUSE/RESUME/ABORT/PROFILE
+        """
+        self.lane = lane
+        self.execute_step = execute_step
+        self.send_progress = send_progress
+        self.handle_control = handle_control
+        self.program: Optional[SequenceProgram] = None
+        self.client = b"" # front-end identity of the client that uploaded the program
+        self.aborted = False
+
+    def abort(self) -> None:
+        """Stop the running program before its next step (STOP/ABORT)."""
+        if self.program is not None:
+            self.aborted = True
+
+    def run(self, program: SequenceProgram, client: bytes = b"") -> bool:
+        """Execute every step of the program.
+
+        Args:
+            program: The uploaded program
+            client: Front-end identity of the uploading client (b"" = clientUI); commands
+                    of other clients wait in the lane until the program returns
+
+        Returns:
+            True if the program completed, False if it was aborted
+        """
+        self.program = program
+        self.client = client
+        self.aborted = False
+        started = time.perf_counter()
+        log.info("Sequence program started", sequence=program.sequence_id, steps=len(program.steps))
+        try:
+            for index, step in enumerate(program.steps):
+                self._service_lane(0)
+                while self.lane.paused and not self.aborted:
+                    self._service_lane(Config.SEQUENCE_POLL_MS) # PAUSE holds the next step until RESUME
+                if step.barrier and not self.aborted:
+                    self.send_progress(progress_frame(program.sequence_id, index, STEP_BARRIER))
+                    self._wait_release(index)
+                if self.aborted:
+                    self.send_progress(progress_frame(program.sequence_id, index, SEQUENCE_ABORTED))
+                    log.warning("Sequence program aborted", sequence=program.sequence_id, step=index)
+                    return False
+                following = program.steps[index + 1] if index + 1 < len(program.steps) else None
+                next_state = following.state if following is not None and not following.barrier else None
+                self.execute_step(program.path, step.state, step.header, next_state)
+                self.send_progress(progress_frame(program.sequence_id, index, STEP_DONE))
+            self.send_progress(progress_frame(program.sequence_id, len(program.steps), SEQUENCE_DONE))
+            log.info("Sequence program done", sequence=program.sequence_id, steps=len(program.steps),
+                     elapsed_s=round(time.perf_counter() - started, 3))
+            return True
+        finally:
+            self.program = None
+
+    def _wait_release(self, step: int) -> None:
+        released = False
+        while not released and not self.aborted:
+            released = self._service_lane(Config.SEQUENCE_POLL_MS, step)
+
+    def _service_lane(self, timeout_ms: int, barrier_step: Optional[int] = None) -> bool:
+        """Handle the controls and frames waiting on the lane.
+
+        Returns:
+            True if the release of barrier_step arrived
+        """
+        deferred = [] # other clients' commands, put back for the server loop
+        try:
+            return self._read_lane(timeout_ms, barrier_step, deferred)
+        finally:
+            for item in deferred:
+                self.lane.requeue(item)
+
+    def _read_lane(self, timeout_ms: int, barrier_step: Optional[int], deferred: List[LaneItem]) -> bool:
+        item = self.lane.next(timeout_ms)
+        while item is not None:
+            if item.is_control:
+                self.handle_control(item) # STOP/ABORT call abort()
+            elif item.client != self.client:
+                deferred.append(item)
+            else:
+                values = unpack_data(item.payload) or ()
+                if is_sequence_frame(values) and int(values[1]) == self.program.sequence_id:
+                    if int(values[0]) == OP_CANCEL:
+                        self.aborted = True
+                    elif int(values[0]) == OP_RELEASE and int(values[2]) == barrier_step:
+                        return True
+                elif item.priority == PRIORITY_TERMINATION or (is_sequence_frame(values) and int(values[0]) == OP_UPLOAD):
+                    # the client has moved on: stop here, the server loop takes the item once the program has returned
+                    self.lane.requeue(item)
+                    self.aborted = True
+                    return False
+                else:
+                    log.warning("Frame ignored while a sequence program runs", values=values)
+            item = self.lane.next(0)
+        return False
@@ -0,0 +1,13 @@
+"""kinematics package for batch IK/FK of Cartesian stream targets and the arm proximity check"""
+
+from .batch_ik import BatchIKSolver, IKResult, RobotModel, feed
+from .proximity import ProximityChecker, ProximityReport
+
+__all__ = [
+    "BatchIKSolver",
+    "IKResult",
+    "RobotModel",
+    "feed",
+    "ProximityChecker",
+    "ProximityReport"
+]
@@ -0,0 +1,244 @@
+"""
+Docstring for PythonHMI.src.kinematics.batch_ik
+
+Vectorized forward and inverse kinematics of 6-axis arms from DH parameters.
+
+A Cartesian target from an external source (camera detections, PHASE_3.md)
+is a pose in the robtarget convention: [x, y, z] in mm and the quaternion
+[q1, q2, q3, q4] (w first), of tool0 in the world frame (wobj0, the robot
+base frame unless Config.KINEMATICS places the base). BatchIKSolver turns
+a batch of such poses into joint targets in degrees, ready for the joint
+streaming pipeline (feed()), with every pose of the batch solved at once:
+each damped least-squares iteration is a handful of NumPy operations over
+(N, 6, 6) arrays instead of N Python-level solves.
+
+Seed continuity: the batch is seeded with the last solution of the previous
+batch, so a trajectory keeps its arm configuration across batches; a batch
+longer than IK_SEED_SPAN poses is solved span by span the same way. A pose
+whose solution failed, or jumped more than IK_MAX_JOINT_STEP_DEG from the
+pose before it, is solved again seeded from that pose's solution, for up to
+IK_CONTINUITY_PASSES passes.
+"""
+
+from typing import Iterable, NamedTuple, Optional
+
+import numpy as np
+
+from config.settings import Config
+
+
+def quaternion_to_matrix(quaternions: np.ndarray) -> np.ndarray:
+    """(N, 4) quaternions [w, x, y, z] to (N, 3, 3) rotation matrices."""
+    q = quaternions / np.linalg.norm(quaternions, axis=-1, keepdims=True)
+    w, x, y, z = q[..., 0], q[..., 1], q[..., 2], q[..., 3]
+    return np.stack([
+        np.stack([1 - 2 * (y * y + z * z), 2 * (x * y - w * z), 2 * (x * z + w * y)], axis=-1),
+        np.stack([2 * (x * y + w * z), 1 - 2 * (x * x + z * z), 2 * (y * z - w * x)], axis=-1),
+        np.stack([2 * (x * z - w * y), 2 * (y * z + w * x), 1 - 2 * (x * x + y * y)], axis=-1),
+    ], axis=-2)
+
+
+def matrix_to_quaternion(rotations: np.ndarray) -> np.ndarray:
+    """(N, 3, 3) rotation matrices to (N, 4) quaternions [w, x, y, z], w >= 0."""
+    m = rotations
+    w = 0.5 * np.sqrt(np.maximum(0.0, 1 + m[..., 0, 0] + m[..., 1, 1] + m[..., 2, 2]))
+    x = np.copysign(0.5 * np.sqrt(np.maximum(0.0, 1 + m[..., 0, 0] - m[..., 1, 1] - m[..., 2, 2])), m[..., 2, 1] - m[..., 1, 2])
+    y = np.copysign(0.5 * np.sqrt(np.maximum(0.0, 1 - m[..., 0, 0] + m[..., 1, 1] - m[..., 2, 2])), m[..., 0, 2] - m[..., 2, 0])
+    z = np.copysign(0.5 * np.sqrt(np.maximum(0.0, 1 - m[..., 0, 0] - m[..., 1, 1] + m[..., 2, 2])), m[..., 1, 0] - m[..., 0, 1])
+    q = np.stack([w, x, y, z], axis=-1)
+    return q / np.linalg.norm(q, axis=-1, keepdims=True)
+
+
+class RobotModel:
+    """Standard DH chain of a 6-axis arm, tool0 as the last frame."""
+    def __init__(self, name: str, a: Iterable[float], alpha: Iterable[float], d: Iterable[float],
+                 offset: Iterable[float], limits: Iterable[Iterable[float]],
+                 base: Optional[Iterable[float]] = None, radii: Optional[Iterable[float]] = None) -> None:
+        """
+        Args:
+            name: Robot name (e.g., "ROB1", "Cobot")
+            a: Link lengths, mm
+            alpha: Link twists, degrees
+            d: Link offsets, mm
+            offset: Joint angle of the DH zero at joint value 0, degrees
+            limits: (min, max) of each joint, degrees
+            base: Pose [x, y, z, q1, q2, q3, q4] of the base in the world frame, the world frame by default
+            radii: Capsule radius of each link, mm (proximity check), 0 by default
+        """
+        self.name = name
+        self.a = np.asarray(a, dtype=np.float64)
+        self.alpha = np.radians(np.asarray(alpha, dtype=np.float64))
+        self.d = np.asarray(d, dtype=np.float64)
+        self.offset = np.radians(np.asarray(offset, dtype=np.float64))
+        limits = np.radians(np.asarray(limits, dtype=np.float64))
+        self.lower, self.upper = limits[:, 0], limits[:, 1]
+        self._cos_alpha = np.cos(self.alpha)
+        self._sin_alpha = np.sin(self.alpha)
+        self.base = np.eye(4)
+        if base is not None:
+            base = np.asarray(base, dtype=np.float64)
+            self.base[:3, :3] = quaternion_to_matrix(base[None, 3:7])[0]
+            self.base[:3, 3] = base[:3]
+        self.radii = np.zeros(6) if radii is None else np.asarray(radii, dtype=np.float64)
+
+    @classmethod
+    def from_config(cls, name: str) -> 'RobotModel':
+        """Model of a robot of Config.KINEMATICS."""
+        return cls(name, **Config.KINEMATICS[name])
+
+    def frames(self, joints: np.ndarray) -> np.ndarray:
+        """Base-to-frame transforms of every link.
+
+        Args:
+            joints: (N, 6) joint values, radians
+
+        Returns:
+            (N, 7, 4, 4) world-frame transforms, index 0 is the base and 6 is tool0
+        """
+        theta = joints + self.offset
+        ct, st = np.cos(theta), np.sin(theta)
+        ca = np.broadcast_to(self._cos_alpha, theta.shape)
+        sa = np.broadcast_to(self._sin_alpha, theta.shape)
+        links = np.zeros(theta.shape + (4, 4))
+        links[..., 0, 0], links[..., 0, 1], links[..., 0, 2], links[..., 0, 3] = ct, -st * ca, st * sa, self.a * ct
+        links[..., 1, 0], links[..., 1, 1], links[..., 1, 2], links[..., 1, 3] = st, ct * ca, -ct * sa, self.a * st
+        links[..., 2, 1], links[..., 2, 2], links[..., 2, 3] = sa, ca, self.d
+        links[..., 3, 3] = 1.0
+        frames = np.empty((theta.shape[0], 7, 4, 4))
+        frames[:, 0] = self.base
+        for i in range(6):
+            np.matmul(frames[:, i], links[:, i], out=frames[:, i + 1])
+        return frames
+
+    def forward(self, joints_deg: np.ndarray) -> np.ndarray:
+        """tool0 poses [x, y, z, q1, q2, q3, q4] (mm, quaternion w first) of (N, 6) joint values in degrees."""
+        tool = self.frames(np.radians(np.atleast_2d(joints_deg)))[:, 6]
+        return np.concatenate([tool[:, :3, 3], matrix_to_quaternion(tool[:, :3, :3])], axis=1)
+
+    def jacobian(self, frames: np.ndarray) -> np.ndarray:
+        """(N, 6, 6) geometric Jacobian of tool0, rows [vx, vy, vz, wx, wy, wz] (mm and rad per rad)."""
+        z = frames[:, :6, :3, 2]
+        origins = frames[:, :6, :3, 3]
+        tool = frames[:, 6, :3, 3][:, None, :]
+        return np.concatenate([np.cross(z, tool - origins), z], axis=2).transpose(0, 2, 1)
+
+
+class IKResult(NamedTuple):
+    joints: np.ndarray # (N, 6) joint values, degrees
+    converged: np.ndarray # (N,) pose reached within the tolerances
+    position_error: np.ndarray # (N,) mm
+    orientation_error: np.ndarray # (N,) rad
+    iterations: int # damped least-squares iterations over all passes
+
+
+class BatchIKSolver:
+    """Batched damped least-squares IK of one robot, seeded from its previous solution."""
+    def __init__(self, model: RobotModel, seed_deg: Optional[Iterable[float]] = None) -> None:
+        """
+        Args:
+            model: DH model of the robot
+            seed_deg: Joint values to start the first batch from, all zero by default
+        """
+        self.model = model
+        self.seed = np.radians(np.asarray(seed_deg if seed_deg is not None else np.zeros(6), dtype=np.float64))
+
+    def solve(self, poses: np.ndarray) -> IKResult:
+        """Joint values reaching a batch of tool0 poses, in trajectory order.
+
+        Args:
+            poses: (N, 7) poses [x, y, z, q1, q2, q3, q4], mm and quaternion (w first)
+
+        Returns:
+            IKResult; the last solution becomes the seed of the next batch
+        """
+        poses = np.atleast_2d(np.asarray(poses, dtype=np.float64))
+        target_position = poses[:, :3]
+        target_rotation = quaternion_to_matrix(poses[:, 3:7])
+        joints = np.empty((len(poses), 6))
+        iterations = 0
+        # poses far down a long batch are out of reach of one seed: solve span by span
+        for first in range(0, len(poses), Config.IK_SEED_SPAN):
+            span = slice(first, first + Config.IK_SEED_SPAN)
+            joints[span], used = self._solve_span(target_position[span], target_rotation[span])
+            iterations += used
+        position_error, orientation_error = self._errors(joints, target_position, target_rotation)
+        return IKResult(np.degrees(joints), self._converged(position_error, orientation_error),
+                        position_error, orientation_error, iterations)
+
+    def _solve_span(self, target_position: np.ndarray, target_rotation: np.ndarray):
+        """Solve poses from the current seed, with the continuity passes; moves the seed to the last solution."""
+        joints = np.repeat(self.seed[None, :], len(target_position), axis=0)
+        todo = np.arange(len(target_position))
+        iterations = 0
+        max_step = np.radians(Config.IK_MAX_JOINT_STEP_DEG)
+        for attempt in range(1 + Config.IK_CONTINUITY_PASSES):
+            joints[todo], used = self._iterate(joints[todo], target_position[todo], target_rotation[todo])
+            iterations += used
+            position_error, orientation_error = self._errors(joints, target_position, target_rotation)
+            converged = self._converged(position_error, orientation_error)
+            previous = np.vstack([self.seed[None, :], joints[:-1]])
+            jumped = np.abs(joints - previous).max(axis=1) > max_step
+            todo = np.flatnonzero(~converged | jumped)
+            if len(todo) == 0 or attempt == Config.IK_CONTINUITY_PASSES:
+                break
+            joints[todo] = previous[todo] # solve again from the solution of the pose before
+        if converged[-1]:
+            self.seed = joints[-1].copy()
+        return joints, iterations
+
+    def _iterate(self, joints: np.ndarray, target_position: np.ndarray, target_rotation: np.ndarray):
+        """Damped least-squares steps until every pose is within the tolerances."""
+        damping = np.eye(6) * Config.IK_DAMPING ** 2
+        scale = Config.IK_ORIENTATION_SCALE_MM
+        max_step = np.radians(Config.IK_MAX_ITERATION_STEP_DEG)
+        active = np.arange(len(joints))
+        used = 0
+        for used in range(1, Config.IK_MAX_ITERATIONS + 1):
+            frames = self.model.frames(joints[active])
+            tool = frames[:, 6]
+            error = np.concatenate([target_position[active] - tool[:, :3, 3],
+                                    scale * self._rotation_error(tool[:, :3, :3], target_rotation[active])], axis=1)
+            jacobian = self.model.jacobian(frames)
+            jacobian[:, 3:] *= scale
+            step = np.linalg.solve(jacobian @ jacobian.transpose(0, 2, 1) + damping, error[:, :, None])
+            delta = (jacobian.transpose(0, 2, 1) @ step)[:, :, 0]
+            # a bounded step walks towards the target instead of jumping to another arm configuration
+            delta *= np.minimum(1.0, max_step / np.maximum(np.abs(delta).max(axis=1, keepdims=True), 1e-12))
+            joints[active] = np.clip(joints[active] + delta, self.model.lower, self.model.upper)
+            position_error = np.linalg.norm(error[:, :3], axis=1)
+            orientation_error = np.linalg.norm(error[:, 3:], axis=1) / scale
+            active = active[~self._converged(position_error, orientation_error)]
+            if len(active) == 0:
+                break
+        return joints, used
+
+    def _errors(self, joints: np.ndarray, target_position: np.ndarray, target_rotation: np.ndarray):
+        tool = self.model.frames(joints)[:, 6]
+        position_error = np.linalg.norm(target_position - tool[:, :3, 3], axis=1)
+        orientation_error = np.linalg.norm(self._rotation_error(tool[:, :3, :3], target_rotation), axis=1)
+        return position_error, orientation_error
+
+    @staticmethod
+    def _rotation_error(rotation: np.ndarray, target: np.ndarray) -> np.ndarray:
+        """Small-angle orientation error (N, 3) turning rotation into target, in the base frame."""
+        return 0.5 * np.cross(rotation, target, axis=1).sum(axis=2)
+
+    @staticmethod
+    def _converged(position_error: np.ndarray, orientation_error: np.ndarray) -> np.ndarray:
+        return (position_error < Config.IK_POSITION_TOLERANCE_MM) & (orientation_error < Config.IK_ORIENTATION_TOLERANCE_RAD)
+
+
+def feed(producer, joints: np.ndarray) -> int:
+    """Send solved joint targets to the joint stream, in order.
+
+    Args:
+        producer: JointStreamProducer, or anything with send(joint_values) -> bool
+        joints: (N, 6) ROB1 targets, or (N, 12) ROB1 + ROB2 pairs (hstack two results), degrees
+
+    Returns:
+        Targets sent; fewer than N if the stream refused one (ring full, or flushed by a STOP)
+    """
+    for sent, row in enumerate(np.asarray(joints, dtype=np.float64)):
+        if not producer.send(row.tolist()):
+            return sent
+    return len(joints)
@@ -0,0 +1,114 @@
+"""
+Docstring for PythonHMI.src.kinematics.proximity
+
+Pre-flight proximity check between the two arms of a MultiMove cell.
+
+ROB1 and ROB2 share a workspace, and the controller is the only thing that
+would notice them coming close. ProximityChecker takes both arms' joint
+trajectories, computes the forward kinematics of every index in one batch
+(RobotModel.frames, world frame) and approximates each link by a capsule:
+the segment between two consecutive DH frame origins, with the link radius
+of Config.KINEMATICS. The distance between the arms at an index is the
+smallest segment-to-segment distance over the 6 x 6 link pairs minus both
+radii, all indices and pairs evaluated at once; negative means overlap.
+
+server_multiMove checks the streamed pairs before they are queued
+(PROXIMITY_CHECK_ENABLED). The cost is mostly numpy call overhead, so it
+depends on the batch (benchmarks/bench_proximity.py, 4 ms stream period):
+    1 pair      ~230-300 us per target, 6-7% of the period
+    32 pairs    ~25 us per target, under 1% (PROXIMITY_CHUNK)
+The ring and trajectory uploads are checked in chunks of PROXIMITY_CHUNK.
+A 12-value ZMQ target is checked on its own. The client waits for its
+ACK before sending the next one, so pairs never arrive together, and
+holding them back until a chunk fills would leave the controller without
+targets. That path is off unless Config.STREAM_DUAL_ARM_ENABLED is set,
+and a stream that needs the throughput uses the ring or an upload.
+"""
+
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from config.settings import Config
+from .batch_ik import RobotModel
+
+_EPSILON = 1e-9
+
+
+def segment_distances(p1: np.ndarray, q1: np.ndarray, p2: np.ndarray, q2: np.ndarray) -> np.ndarray:
+    """Closest distance between segments p1-q1 and p2-q2 (broadcast over the leading axes, last axis xyz).
+
+    A zero-length segment is a point: its squared length is raised to a tiny
+    value, which leaves its direction zero and turns the formulas below into
+    the point-to-segment projection.
+    """
+    d1, d2, r = q1 - p1, q2 - p2, p1 - p2
+    a = np.maximum((d1 * d1).sum(axis=-1), _EPSILON)
+    e = np.maximum((d2 * d2).sum(axis=-1), _EPSILON)
+    b = (d1 * d2).sum(axis=-1)
+    c = (d1 * r).sum(axis=-1)
+    f = (d2 * r).sum(axis=-1)
+    denominator = a * e - b * b
+    # closest point of the first segment to the second line; parallel segments: any point, take 0
+    s = np.where(denominator > _EPSILON * a * e, (b * f - c * e) / np.maximum(denominator, _EPSILON), 0.0)
+    np.clip(s, 0, 1, out=s)
+    t = (b * s + f) / e
+    # t outside the second segment: clamp it and take the point of the first closest to the clamped end
+    s = np.where(t < 0, -c / a, np.where(t > 1, (b - c) / a, s))
+    np.clip(s, 0, 1, out=s)
+    np.clip(t, 0, 1, out=t)
+    closest = r + d1 * s[..., None] - d2 * t[..., None]
+    return np.sqrt((closest * closest).sum(axis=-1))
+
+
+class ProximityReport(NamedTuple):
+    min_distance: float # mm between the closest link capsules of the trajectory, negative if they overlap
+    min_index: int # trajectory index of min_distance
+    first_violation: Optional[int] # first index closer than the clearance, None if the trajectory is clear
+    distances: np.ndarray # (N,) capsule distance at every index, mm
+
+
+class ProximityChecker:
+    """Capsule distance between two arms over whole joint trajectories."""
+    def __init__(self, first: RobotModel, second: RobotModel, clearance_mm: Optional[float] = None) -> None:
+        """
+        Args:
+            first: Model of one arm (world-frame base and link radii set)
+            second: Model of the other arm
+            clearance_mm: Smallest allowed distance, Config.PROXIMITY_CLEARANCE_MM by default
+        """
+        self.first = first
+        self.second = second
+        self.clearance = Config.PROXIMITY_CLEARANCE_MM if clearance_mm is None else clearance_mm
+        self._radii = first.radii[:, None] + second.radii[None, :] # (6, 6) per link pair
+
+    @classmethod
+    def from_config(cls, first: str = "ROB1", second: str = "ROB2") -> 'ProximityChecker':
+        return cls(RobotModel.from_config(first), RobotModel.from_config(second))
+
+    def check(self, first_joints: np.ndarray, second_joints: np.ndarray) -> ProximityReport:
+        """Distance between the arms at every index of two synchronized trajectories.
+
+        Args:
+            first_joints: (N, 6) joint values of the first arm, degrees
+            second_joints: (N, 6) joint values of the second arm, degrees
+        """
+        first = self._links(self.first, first_joints)
+        second = self._links(self.second, second_joints)
+        distances = segment_distances(first[0][:, :, None], first[1][:, :, None],
+                                      second[0][:, None, :], second[1][:, None, :]) - self._radii
+        distances = distances.min(axis=(1, 2))
+        min_index = int(np.argmin(distances))
+        violations = np.flatnonzero(distances < self.clearance)
+        return ProximityReport(float(distances[min_index]), min_index,
+                               int(violations[0]) if len(violations) else None, distances)
+
+    def check_pairs(self, pairs: np.ndarray) -> ProximityReport:
+        """Same as check() for (N, 12) ROB1 + ROB2 stream targets (first arm first, like 'J;')."""
+        pairs = np.atleast_2d(np.asarray(pairs, dtype=np.float64))
+        return self.check(pairs[:, :6], pairs[:, 6:12])
+
+    @staticmethod
+    def _links(model: RobotModel, joints: np.ndarray):
+        origins = model.frames(np.radians(np.atleast_2d(np.asarray(joints, dtype=np.float64))))[:, :, :3, 3]
+        return origins[:, :-1], origins[:, 1:] # (N, 6, 3) link start and end points
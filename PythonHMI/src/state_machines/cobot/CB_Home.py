@@ -1,11 +1,14 @@
 from unicodedata import category
 from ..Base import Base
 from config.constants import PathDict, ToolDict_MM, ToolDict_CB, SpeedDict
+from src.telemetry.logger import get_logger
+
+log = get_logger("StateMachine")
 
 class CB_Home(Base):
     def __init__(self, path:str = "1A", tool_MM:str = "tool0", 
                     tool_CB:str = "tool0", speed_MM:str = "speed0", speed_CB:str = "speed0"):
-        print(f'Home state, default')
+        log.debug("Home state, default")
         super().__init__(path=path, tool_MM=tool_MM, tool_CB=tool_CB, speed_MM=speed_MM, speed_CB=speed_CB)
 
     def prep_data_CB(self) -> None:
@@ -0,0 +1,11 @@
+"""streaming package for buffered, rate-controlled joint streaming"""
+
+from .rate_controller import StreamRateController
+from .joint_streamer import JointStreamer
+from .router import StreamRouter
+
+__all__ = [
+    "StreamRateController",
+    "JointStreamer",
+    "StreamRouter"
+]
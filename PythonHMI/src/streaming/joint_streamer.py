@@ -0,0 +1,183 @@
+"""
+Docstring for PythonHMI.src.streaming.joint_streamer
+
+Buffered joint streaming to one controller connection.
+
+A JointStreamer queues joint targets in the server and feeds them to the
+controller at the rate and batch size chosen by its StreamRateController,
+without ever overflowing the controller buffer. It never blocks on its own:
+the owner calls pump() from its loop, which reads the ACKs that arrived and
+sends the targets that are due, waiting at most until the next send time.
+
+A target is 6 joint values for ROB1 ("j;") or 12 for a synchronized ROB1 +
+ROB2 pair ("J;", ROB1 first). A pair travels as one message and fills one
+controller buffer slot, answered by one ACK once both arms have reached it,
+so both kinds share the same queue, flow control and round trips. The
+current commModule does not parse "J;" yet: server_multiMove only queues
+pairs with Config.STREAM_DUAL_ARM_ENABLED.
+"""
+
+import select
+import time
+from collections import deque
+from typing import Callable, Deque, List, Optional
+
+from config.settings import Config
+from src.communication.socket_manager import ExtSocketServer
+from src.telemetry import metrics
+from src.telemetry.logger import get_logger
+from src.telemetry.publisher import TelemetryPublisher
+from .rate_controller import StreamRateController
+
+log = get_logger("JointStreamer")
+
+TARGET_HEADERS = {6: 'j;', 12: 'J;'} # controller header by target width
+TARGET_KINDS = {6: "joint", 12: "joint_dual"} # abb_commands_total kind label
+
+
+class JointStreamer:
+    """Rate-controlled feed of joint targets to one controller."""
+    def __init__(self, socket_ext: ExtSocketServer, robot: str,
+                 capacity: int = Config.STREAM_LOCAL_BUFFER,
+                 controller: Optional[StreamRateController] = None,
+                 publisher: Optional[TelemetryPublisher] = None) -> None:
+        """
+        Args:
+            socket_ext: Connection to the robot controller
+            robot: Robot label of the metrics and log messages, e.g. "MultiMove"
+            capacity: Targets queued in the server before push() refuses new ones
+            controller: Rate controller, one with the configured bounds by default
+            publisher: Optional telemetry publisher for buffer level and state frames
+        """
+        self.socket_ext = socket_ext
+        self.robot = robot
+        self.capacity = capacity
+        self.rate = controller or StreamRateController(robot)
+        self.publisher = publisher
+        self.pending: Deque[List[float]] = deque()
+        self.sent = 0
+        self.acknowledged = 0
+        self.rejected = 0
+        self.underruns = 0
+        self._next_send = 0.0
+        self.metric_commands = {width: metrics.counter("abb_commands_total", "Commands sent to the controller",
+                                                       robot=robot, kind=kind)
+                                for width, kind in TARGET_KINDS.items()}
+        self.metric_ack_latency = metrics.histogram("abb_ack_latency_seconds",
+                                                    "Command sent to controller ACK (motion included)",
+                                                    robot=robot, kind="joint")
+        self.metric_pending = metrics.gauge("abb_stream_pending_points", "Joint targets queued in the server",
+                                            robot=robot)
+        self.metric_rejected = metrics.counter("abb_stream_rejected_total",
+                                               "Joint targets dropped by a full controller buffer", robot=robot)
+        self.metric_underruns = metrics.counter("abb_stream_underruns_total",
+                                                "Controller buffer ran empty while targets were queued", robot=robot)
+
+    @property
+    def idle(self) -> bool:
+        """Nothing queued and nothing in flight."""
+        return not self.pending and not self.rate.in_flight
+
+    def push(self, joint_values: List[float]) -> bool:
+        """Queue one target.
+
+        Args:
+            joint_values: 6 ROB1 joint values, or 12 for a ROB1 + ROB2 pair (degrees)
+
+        Returns:
+            False if the server queue is full (pump and retry)
+        """
+        if len(joint_values) not in TARGET_HEADERS:
+            raise ValueError(f"a joint target has 6 or 12 values, got {len(joint_values)}")
+        if len(self.pending) >= self.capacity:
+            return False
+        self.pending.append(joint_values)
+        return True
+
+    def pump(self, timeout: float = 0.0) -> int:
+        """Read the ACKs that arrived and send the targets that are due.
+
+        Args:
+            timeout: Seconds to wait for an ACK when nothing can be sent yet
+
+        Returns:
+            Number of targets sent
+        """
+        now = time.perf_counter()
+        if self.rate.in_flight:
+            wait = timeout
+            if self.pending and self.rate.room > 0:
+                wait = min(wait, max(0.0, self._next_send - now))
+            if wait > 0:
+                select.select([self.socket_ext.server_socket], [], [], wait)
+            self._read_replies()
+            now = time.perf_counter()
+        elif self.pending and self._next_send > now:
+            time.sleep(min(timeout, self._next_send - now))
+            now = time.perf_counter()
+        sent = 0
+        if self.pending and now >= self._next_send:
+            count = min(self.rate.batch, self.rate.room, len(self.pending))
+            for _ in range(count):
+                target = self.pending.popleft()
+                self.socket_ext.send_data(target, TARGET_HEADERS[len(target)])
+                self.rate.on_sent(time.perf_counter())
+                self.metric_commands[len(target)].inc()
+            sent = count
+            if count:
+                self.sent += count
+                self._next_send = now + count / self.rate.rate
+        self.metric_pending.set(len(self.pending))
+        if sent and self.publisher is not None:
+            self.publisher.publish_buffer(self.rate.fill, self.rate.capacity)
+        return sent
+
+    def _read_replies(self) -> None:
+        replies = self.socket_ext.receive_messages()
+        if not replies:
+            return
+        now = time.perf_counter()
+        for reply in replies:
+            if reply[0] == 9:
+                if self.rate.in_flight:
+                    self.metric_ack_latency.observe(now - self.rate.in_flight[0])
+                self.rate.on_ack(now)
+                self.acknowledged += 1
+            elif reply[0] == Config.STREAM_REPLY_REJECTED:
+                self.rate.on_rejected()
+                self.rejected += 1
+                self.metric_rejected.inc()
+                log.warning("Joint target rejected by a full controller buffer", robot=self.robot,
+                            fill=self.rate.fill, capacity=self.rate.capacity)
+            if self.publisher is not None:
+                self.publisher.publish_state(reply)
+        if self.pending and not self.rate.in_flight:
+            self.underruns += 1
+            self.metric_underruns.inc()
+        if self.publisher is not None:
+            self.publisher.publish_buffer(self.rate.fill, self.rate.capacity)
+
+    def drain(self, between: Optional[Callable[[], None]] = None) -> None:
+        """Pump until every queued target has been consumed.
+
+        Args:
+            between: Called between two pumps, e.g. to service the control lane
+        """
+        while not self.idle:
+            self.pump(Config.SOCKET_RETRY_DELAY)
+            if between is not None:
+                between()
+
+    def flush(self) -> int:
+        """Drop the queued targets and stop waiting for the ones in flight (STOP/ABORT).
+
+        The controller clears its own buffer on a stop; late ACKs are ignored.
+
+        Returns:
+            Number of queued targets dropped
+        """
+        dropped = len(self.pending)
+        self.pending.clear()
+        self.rate.reset()
+        self.metric_pending.set(0)
+        return dropped
@@ -0,0 +1,128 @@
+"""
+Docstring for PythonHMI.src.streaming.rate_controller
+
+Send rate and batch size of a joint stream, driven by the ACK timing.
+
+The controller answers every streamed target once it has consumed it, so the
+targets sent but not yet acknowledged are exactly the fill of its buffer
+(the leaky bucket of PHASE_2.md). From the ACKs the controller estimates:
+    rtt          windowed minimum of the round trip of one target, from the
+                 moment it could start (sent, or the previous ACK if it was
+                 queued behind it) to its ACK; queueing is left out, so the
+                 estimate holds while the buffer never runs empty
+    consumption  EWMA of the ACK rate, sampled only while the buffer held
+                 the next target (otherwise the gap is starvation, not speed)
+and steers the send rate to keep the fill at the target level:
+    rate  = consumption * (1 + gain * (target - fill) / target)
+    batch = rate * rtt  (targets per round trip), within [1, max_batch]
+both clamped to the configured bounds. Until the first consumption sample
+the stream is primed at the maximum rate up to the target fill. Sends that
+would overflow the buffer are held back whatever the rate.
+"""
+
+import math
+from collections import deque
+from typing import Deque, Optional
+
+from config.settings import Config
+from src.telemetry import metrics
+
+
+class StreamRateController:
+    """Flow control of one stream, fed with the send and ACK times."""
+    def __init__(self, robot: str, capacity: int = Config.STREAM_CONTROLLER_BUFFER,
+                 target_fill: int = Config.STREAM_TARGET_FILL,
+                 min_rate: float = Config.STREAM_MIN_RATE_HZ, max_rate: float = Config.STREAM_MAX_RATE_HZ,
+                 max_batch: int = Config.STREAM_MAX_BATCH) -> None:
+        """
+        Args:
+            robot: Robot label of the metrics, e.g. "MultiMove"
+            capacity: Targets the controller buffers
+            target_fill: Buffer level to steer to, capped at the capacity
+            min_rate: Lowest send rate, targets per second
+            max_rate: Highest send rate, targets per second
+            max_batch: Most targets sent back to back in one cycle
+        """
+        self.capacity = max(1, capacity)
+        self.target_fill = min(max(1, target_fill), self.capacity)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.max_batch = max(1, max_batch)
+        self.rate = max_rate
+        self.batch = 1
+        self.rtt = 0.0
+        self.consumption_rate = 0.0
+        self.in_flight: Deque[float] = deque() # send times of the unacknowledged targets, oldest first
+        self._latencies: Deque[float] = deque(maxlen=Config.STREAM_RTT_WINDOW)
+        self._last_ack: Optional[float] = None
+        self.metric_rate = metrics.gauge("abb_stream_send_rate_hz", "Joint stream send rate set by the rate controller",
+                                         robot=robot)
+        self.metric_batch = metrics.gauge("abb_stream_batch_size", "Joint targets sent per send cycle", robot=robot)
+        self.metric_rtt = metrics.gauge("abb_stream_rtt_seconds", "Estimated round trip of one target, queueing excluded",
+                                        robot=robot)
+        self.metric_consumption = metrics.gauge("abb_stream_consumption_rate_hz",
+                                                "Estimated controller consumption rate, targets per second", robot=robot)
+        self.metric_fill = metrics.gauge("abb_stream_controller_fill", "Joint targets buffered in the controller",
+                                         robot=robot)
+        self.metric_target_fill = metrics.gauge("abb_stream_controller_target_fill",
+                                                "Controller buffer level the rate controller steers to", robot=robot)
+        self.metric_target_fill.set(self.target_fill)
+        self._update()
+
+    @property
+    def fill(self) -> int:
+        return len(self.in_flight)
+
+    @property
+    def room(self) -> int:
+        """Targets that can be sent without overflowing the controller buffer."""
+        return self.capacity - len(self.in_flight)
+
+    def on_sent(self, now: float) -> None:
+        self.in_flight.append(now)
+        self.metric_fill.set(len(self.in_flight))
+
+    def on_ack(self, now: float) -> None:
+        """A target was consumed; ACKs arrive in send order."""
+        if not self.in_flight:
+            return
+        sent_at = self.in_flight.popleft()
+        queued = self._last_ack is not None and sent_at <= self._last_ack
+        self._latencies.append(now - (self._last_ack if queued else sent_at))
+        self.rtt = min(self._latencies)
+        if queued and now > self._last_ack:
+            # the target was already buffered when the previous one finished: the gap is its consumption time
+            sample = 1.0 / (now - self._last_ack)
+            if self.consumption_rate == 0.0:
+                self.consumption_rate = sample
+            else:
+                self.consumption_rate += Config.STREAM_RATE_SMOOTHING * (sample - self.consumption_rate)
+        self._last_ack = now
+        self._update()
+
+    def on_rejected(self) -> None:
+        """The controller dropped the newest target (buffer full)."""
+        if self.in_flight:
+            self.in_flight.pop()
+        self._update()
+
+    def reset(self) -> None:
+        """Forget the targets in flight (stream flushed or connection lost); rate estimates are kept."""
+        self.in_flight.clear()
+        self._last_ack = None
+        self._update()
+
+    def _update(self) -> None:
+        if self.consumption_rate > 0.0:
+            error = (self.target_fill - len(self.in_flight)) / self.target_fill
+            rate = self.consumption_rate * (1.0 + Config.STREAM_FILL_GAIN * error)
+        else:
+            # priming: no consumption measured yet, fill up to the target as fast as allowed
+            rate = self.max_rate if len(self.in_flight) < self.target_fill else self.min_rate
+        self.rate = min(max(rate, self.min_rate), self.max_rate)
+        self.batch = min(max(1, math.ceil(self.rate * self.rtt)), self.max_batch)
+        self.metric_rate.set(self.rate)
+        self.metric_batch.set(self.batch)
+        self.metric_rtt.set(self.rtt)
+        self.metric_consumption.set(self.consumption_rate)
+        self.metric_fill.set(len(self.in_flight))
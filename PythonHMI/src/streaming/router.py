@@ -0,0 +1,158 @@
+"""
+Docstring for PythonHMI.src.streaming.router
+
+Fan-out of one joint stream source to the MultiMove and Cobot servers.
+
+A StreamRouter looks like the PUSH/PULL socket pair of one server, so a
+stream source (interactive_streaming_handler, a ROS2 callback) drives one
+robot or both without knowing which. Each server streams its part through
+its own JointStreamer, with independent buffers, rate control and metrics.
+
+With both robots streaming, the Cobot target is always the last 6 values of
+a frame and the rest goes to MultiMove:
+    12 values   ROB1 (6) + Cobot (6)
+    18 values   ROB1 + ROB2 pair (12) + Cobot (6)
+recv() returns once every server the frame was sent to has queued its part.
+
+negotiate() switches the servers that accept it to compact frames (float32
+keyframes + 16-bit deltas, see src/communication/protocol.py); send() and
+send_points() then encode the targets, and a frame the server reports as
+flushed makes the next one a keyframe. upload() sends a whole precomputed
+trajectory as one zero-copy multipart message per server.
+"""
+
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+import zmq
+
+from config.settings import Config
+from src.communication.protocol import CompactFrameEncoder, pack_data, send_trajectory, unpack_data
+
+COBOT_WIDTH = 6
+SocketPair = Tuple[zmq.Socket, zmq.Socket] # (PUSH to the server, PULL of its ACKs)
+
+
+class StreamRouter:
+    """Socket-like stream target for the MultiMove server, the Cobot server, or both."""
+    def __init__(self, multimove: Optional[SocketPair] = None, cobot: Optional[SocketPair] = None) -> None:
+        """
+        Args:
+            multimove: Sockets of the MultiMove server, None if it does not stream
+            cobot: Sockets of the Cobot server, None if it does not stream
+        """
+        if multimove is None and cobot is None:
+            raise ValueError("a stream needs at least one robot")
+        self.multimove = multimove
+        self.cobot = cobot
+        self._waiting: Deque[zmq.Socket] = deque() # ACK sockets still owing a reply, in send order
+        self._formats: Dict[zmq.Socket, int] = {} # granted compact frame format per ACK socket
+        self._encoders: Dict[zmq.Socket, CompactFrameEncoder] = {}
+
+    @property
+    def widths(self) -> Tuple[int, ...]:
+        """Accepted frame widths, narrowest first."""
+        if self.multimove is None:
+            return (COBOT_WIDTH,)
+        if self.cobot is None:
+            return (6, 12)
+        return (6 + COBOT_WIDTH, 12 + COBOT_WIDTH)
+
+    def negotiate(self, frame_format: Optional[int] = None) -> Dict[str, int]:
+        """Start a stream session: ask every server for a joint frame format (Config.FRAME_FORMAT by default).
+
+        A server that does not know the negotiation answers it like any other
+        command and keeps pack_data frames. Call it before the first target.
+
+        Returns:
+            Granted format per server ("multimove", "cobot")
+        """
+        frame_format = Config.FRAME_FORMAT if frame_format is None else frame_format
+        self.recv()
+        self._formats.clear()
+        self._encoders.clear()
+        granted = {}
+        for name, pair in (("multimove", self.multimove), ("cobot", self.cobot)):
+            if pair is None:
+                continue
+            pair[0].send(pack_data([Config.FRAME_FORMAT_OP, frame_format]))
+            reply = unpack_data(pair[1].recv(Config.MAX_PACKET_SIZE)) or ()
+            granted[name] = int(reply[1]) if len(reply) == 2 and reply[0] == Config.FRAME_FORMAT_OP else Config.FRAME_FORMAT_FLOAT64
+            if granted[name] != Config.FRAME_FORMAT_FLOAT64:
+                self._formats[pair[1]] = granted[name]
+        return granted
+
+    def send(self, payload: bytes, flags: int = 0) -> None:
+        """Route one packed frame (pack_data) to the streaming servers.
+
+        Raises:
+            ValueError: Frame width not in widths
+        """
+        self.send_points([list(unpack_data(payload) or ())], flags)
+
+    def send_points(self, points: List[List[float]], flags: int = 0) -> None:
+        """Route several targets of the same width; one frame per server with compact frames.
+
+        Raises:
+            ValueError: Target width not in widths
+        """
+        if not points:
+            return
+        self._check(len(points[0]))
+        if self.multimove is None or self.cobot is None:
+            self._send_part(self.multimove or self.cobot, points, flags)
+            return
+        self._send_part(self.multimove, [values[:-COBOT_WIDTH] for values in points], flags)
+        self._send_part(self.cobot, [values[-COBOT_WIDTH:] for values in points], flags)
+
+    def upload(self, points, flags: int = 0) -> None:
+        """Send a whole trajectory, (N, width) targets, as one multipart upload per server.
+
+        With one server a float64 array is sent without a copy: keep it unchanged
+        until recv() returns (the servers acknowledge once they hold the targets).
+
+        Raises:
+            ValueError: Target width not in widths
+        """
+        points = np.atleast_2d(points)
+        self._check(points.shape[1])
+        if self.multimove is None or self.cobot is None:
+            pairs = [(self.multimove or self.cobot, points)]
+        else:
+            pairs = [(self.multimove, points[:, :-COBOT_WIDTH]), (self.cobot, points[:, -COBOT_WIDTH:])]
+        for (send, recv), part in pairs:
+            send_trajectory(send, part, flags)
+            self._waiting.append(recv)
+
+    def recv(self, size: int = Config.MAX_PACKET_SIZE) -> bytes:
+        """Wait for the ACKs of the last frame; returns the last one.
+
+        Raises:
+            zmq.Again: A server did not answer within its receive timeout; its
+                       ACK is still expected by the next recv()
+        """
+        ack = b""
+        while self._waiting:
+            ack = self._waiting[0].recv(size)
+            encoder = self._encoders.get(self._waiting.popleft())
+            if encoder is not None and unpack_data(ack) == Config.ACK_COMMAND_FLUSHED:
+                encoder.force_keyframe() # the server lost the delta reference
+        return ack
+
+    def _send_part(self, pair: SocketPair, points: List[List[float]], flags: int) -> None:
+        send, recv = pair
+        if recv not in self._formats:
+            frames = [pack_data(values) for values in points]
+        else:
+            encoder = self._encoders.get(recv)
+            if encoder is None or encoder.width != len(points[0]): # 6-value targets and 12-value pairs share no deltas
+                encoder = self._encoders[recv] = CompactFrameEncoder(self._formats[recv], len(points[0]))
+            frames = encoder.encode(points)
+        for frame in frames:
+            send.send(frame, flags)
+            self._waiting.append(recv)
+
+    def _check(self, width: int) -> None:
+        if width not in self.widths:
+            raise ValueError(f"this stream takes {' or '.join(map(str, self.widths))} values, got {width}")
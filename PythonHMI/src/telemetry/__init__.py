@@ -0,0 +1,18 @@
+"""telemetry package for robot state caching and distribution"""
+
+from .ring_buffer import TelemetryRingBuffer, TelemetryStore
+from .publisher import TelemetryPublisher, TelemetrySubscriber, decode_frame
+from .logger import get_logger, set_level
+from .clock_sync import ClockOffsetEstimator, ClockSample
+
+__all__ = [
+    "TelemetryRingBuffer",
+    "TelemetryStore",
+    "TelemetryPublisher",
+    "TelemetrySubscriber",
+    "decode_frame",
+    "get_logger",
+    "set_level",
+    "ClockOffsetEstimator",
+    "ClockSample"
+]
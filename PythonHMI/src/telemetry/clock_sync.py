@@ -0,0 +1,165 @@
+"""
+Docstring for PythonHMI.src.telemetry.clock_sync
+
+Clock offset and drift between this host and the far end of a link.
+
+Every timestamp this process writes (flight recorder, telemetry frames,
+ring buffer) is time.monotonic() of its host; the controller and the other
+processes of the cell count on clocks of their own. A link is probed like
+NTP: the prober notes its send time t0, the far end its receive and send
+times t1 and t2 on its clock, and the prober the reply time t3. Then
+
+    offset = ((t1 - t0) + (t2 - t3)) / 2     far-end clock minus local clock
+    delay  = (t3 - t0) - (t2 - t1)           round trip without the far-end time
+
+and the true offset is within delay / 2 of the estimate. ClockOffsetEstimator
+keeps the last CLOCK_WINDOW samples of a link, takes the CLOCK_FILTER_SHARE
+with the shortest round trips (the ones least disturbed by queuing) and fits
+a line through their offsets over local time: the offset at the newest
+samples and, once they span CLOCK_DRIFT_MIN_SPAN_S, the drift of the
+far-end clock. A sample further than CLOCK_STEP_S from the line (a
+restarted controller clock) starts the window over. to_local() then puts a
+far-end timestamp on the host timeline.
+
+Probes: ExtSocketServer.send_clock_probe() / probe_clock() over the controller
+socket ('C;', needs the commModule.mod that echoes the probe id, hence
+CLOCK_SYNC_ENABLED off by default), protocol.probe_clock() over a ZMQ command
+socket of a server (CLOCK_PROBE_OP).
+"""
+
+import time
+from collections import deque
+from typing import Deque, NamedTuple, Optional
+
+from config.settings import Config
+from .logger import get_logger
+from . import metrics
+
+log = get_logger("ClockSync")
+
+# probe round trips, in seconds (inproc 10 us .. a busy controller 1 s)
+RTT_BUCKETS = (0.00001, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+
+class ClockSample(NamedTuple):
+    t0: float # request sent, local clock
+    t1: float # request received, far-end clock
+    t2: float # reply sent, far-end clock
+    t3: float # reply received, local clock
+
+    @property
+    def offset(self) -> float:
+        return ((self.t1 - self.t0) + (self.t2 - self.t3)) / 2
+
+    @property
+    def delay(self) -> float:
+        return (self.t3 - self.t0) - (self.t2 - self.t1)
+
+    @property
+    def local_time(self) -> float:
+        """Local time the offset is measured at (midpoint of the round trip)."""
+        return (self.t0 + self.t3) / 2
+
+
+class ClockOffsetEstimator:
+    """Offset and drift of the clock at the far end of one link, from round-trip probes."""
+    def __init__(self, link: str, window: Optional[int] = None, filter_share: Optional[float] = None) -> None:
+        """
+        Args:
+            link: Link label of the metrics, e.g. "MultiMove-controller"
+            window: Samples kept, Config.CLOCK_WINDOW by default
+            filter_share: Share of the window fitted, Config.CLOCK_FILTER_SHARE by default
+        """
+        self.link = link
+        self.filter_share = Config.CLOCK_FILTER_SHARE if filter_share is None else filter_share
+        self.samples: Deque[ClockSample] = deque(maxlen=Config.CLOCK_WINDOW if window is None else window)
+        self.offset = 0.0 # far-end minus local clock at the reference time, seconds
+        self.drift = 0.0 # far-end seconds gained per local second
+        self.reference = 0.0 # local time of the offset
+        self.delay = 0.0 # shortest round trip of the window
+        self.steps = 0 # times the window was restarted by a clock step
+        self.probed_at: Optional[float] = None
+        self.metric_offset = metrics.gauge("abb_clock_offset_seconds", "Far-end clock minus host clock", link=link)
+        self.metric_drift = metrics.gauge("abb_clock_drift_ppm", "Far-end clock rate against the host clock", link=link)
+        self.metric_delay = metrics.gauge("abb_clock_delay_seconds",
+                                          "Shortest probe round trip of the window (twice the offset error bound)", link=link)
+        self.metric_rtt = metrics.histogram("abb_clock_probe_rtt_seconds", "Round trip of every clock probe",
+                                            RTT_BUCKETS, link=link)
+        self.metric_steps = metrics.counter("abb_clock_steps_total", "Clock steps that restarted the estimate", link=link)
+
+    @property
+    def synchronized(self) -> bool:
+        return bool(self.samples)
+
+    @property
+    def error_bound(self) -> float:
+        """Largest error of the offset, half the shortest round trip (inf before the first sample)."""
+        return self.delay / 2 if self.samples else float("inf")
+
+    def add(self, sample: ClockSample) -> bool:
+        """Fold one probe into the estimate.
+
+        Returns:
+            False if the sample was rejected (negative round trip)
+        """
+        if sample.delay < 0:
+            return False
+        self.metric_rtt.observe(sample.delay)
+        if self.samples and abs(sample.offset - self.offset_at(sample.local_time)) > Config.CLOCK_STEP_S + sample.delay:
+            log.warning("Clock step, estimate restarted", link=self.link,
+                        step=sample.offset - self.offset_at(sample.local_time))
+            self.samples.clear()
+            self.steps += 1
+            self.metric_steps.inc()
+        self.samples.append(sample)
+        self._fit()
+        return True
+
+    def _fit(self) -> None:
+        ranked = sorted(self.samples, key=lambda sample: sample.delay)
+        chosen = ranked[:max(1, round(len(ranked) * self.filter_share))]
+        self.delay = ranked[0].delay
+        times = [sample.local_time for sample in chosen]
+        offsets = [sample.offset for sample in chosen]
+        self.reference = sum(times) / len(times)
+        self.offset = sum(offsets) / len(offsets)
+        spread = sum((t - self.reference) ** 2 for t in times)
+        if len(chosen) >= 3 and max(times) - min(times) >= Config.CLOCK_DRIFT_MIN_SPAN_S:
+            self.drift = sum((t - self.reference) * (o - self.offset) for t, o in zip(times, offsets)) / spread
+        else:
+            self.drift = 0.0 # too short a span to tell drift from jitter
+        self.metric_offset.set(self.offset_at(self.samples[-1].local_time))
+        self.metric_drift.set(self.drift * 1e6)
+        self.metric_delay.set(self.delay)
+
+    def offset_at(self, local_time: float) -> float:
+        """Far-end minus local clock at a local time."""
+        return self.offset + self.drift * (local_time - self.reference)
+
+    def to_local(self, remote_time: float) -> float:
+        """A far-end timestamp on the local timeline."""
+        return (remote_time - self.offset + self.drift * self.reference) / (1 + self.drift)
+
+    def to_remote(self, local_time: float) -> float:
+        """A local timestamp on the far-end timeline."""
+        return local_time + self.offset_at(local_time)
+
+    def probe_due(self, now: Optional[float] = None) -> bool:
+        """True once every CLOCK_PROBE_INTERVAL_S; the caller is expected to probe then."""
+        now = time.monotonic() if now is None else now
+        if self.probed_at is not None and now - self.probed_at < Config.CLOCK_PROBE_INTERVAL_S:
+            return False
+        self.probed_at = now
+        return True
+
+    def reset(self) -> None:
+        """Forget the samples, e.g. on a reconnect (the far end may have restarted)."""
+        self.samples.clear()
+        self.offset = self.drift = self.reference = self.delay = 0.0
+        self.probed_at = None
+
+    def __str__(self) -> str:
+        if not self.samples:
+            return f"{self.link}: not synchronized"
+        return (f"{self.link}: offset {self.offset_at(self.samples[-1].local_time) * 1e3:+.3f} ms "
+                f"(+/- {self.error_bound * 1e3:.3f} ms), drift {self.drift * 1e6:+.1f} ppm, n={len(self.samples)}")
@@ -0,0 +1,163 @@
+"""
+Docstring for PythonHMI.src.telemetry.flight_recorder
+
+Binary flight recorder of the protocol traffic of one server.
+
+Every ZMQ frame (commands, controls, ACKs) and every controller TCP message
+is appended, with its channel, direction and a monotonic timestamp, to a
+preallocated segment file mapped into memory. Recording is a struct pack
+and a memcpy into the mapping, so it can stay enabled in production; the
+OS writes the pages back, so the log survives a crash of the process.
+When a segment is full the recorder rolls over to the next one and keeps
+the last Config.RECORDER_MAX_SEGMENTS segments.
+
+Segment layout: 64-byte header (magic, version, end offset), then records
+of "<dBBI" (monotonic time, channel, direction, payload length) + payload.
+See src/telemetry/replay.py for dumping and replaying a recording.
+"""
+
+import glob
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Iterator, List, NamedTuple, Optional
+
+from config.settings import Config
+
+MAGIC = b"ABBFLR01"
+HEADER_FORMAT = "<8sIQ"  # magic, version, end offset of the last complete record
+HEADER_SIZE = 64
+RECORD_HEADER = struct.Struct("<dBBI")  # time.monotonic(), channel, direction, payload length
+VERSION = 1
+
+# Channels
+CH_ZMQ_COMMAND = 1  # clientUI -> server command socket
+CH_ZMQ_CONTROL = 2  # clientUI -> server priority control lane
+CH_ZMQ_ACK = 3  # server -> clientUI acknowledgements
+CH_CONTROLLER = 4  # server <-> robot controller TCP
+
+CHANNEL_NAMES = {CH_ZMQ_COMMAND: "zmq_command", CH_ZMQ_CONTROL: "zmq_control",
+                 CH_ZMQ_ACK: "zmq_ack", CH_CONTROLLER: "controller"}
+
+# Directions, seen from the recording server
+DIR_IN = 0
+DIR_OUT = 1
+
+
+class FlightRecord(NamedTuple):
+    timestamp: float
+    channel: int
+    direction: int
+    payload: bytes
+
+
+class FlightRecorder:
+    """Append-only, memory-mapped recorder with segment rollover."""
+    def __init__(self, name: str, directory: str = Config.RECORDER_DIR,
+                 segment_bytes: int = Config.RECORDER_SEGMENT_BYTES,
+                 max_segments: int = Config.RECORDER_MAX_SEGMENTS) -> None:
+        """
+        Args:
+            name: Recorder name, used as segment file prefix (e.g. "MultiMove")
+            directory: Folder holding the segment files
+            segment_bytes: Size of one preallocated segment
+            max_segments: Segments kept on disk, the oldest are deleted on rollover
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.prefix = os.path.join(directory, name)
+        self.segment_bytes = segment_bytes
+        self.max_segments = max_segments
+        self.records = 0
+        self.dropped = 0  # payloads larger than a whole segment
+        self._lock = threading.Lock()
+        self._file = None
+        self._map: Optional[mmap.mmap] = None
+        self._offset = HEADER_SIZE
+        existing = segment_paths(self.prefix)
+        self._index = _segment_index(existing[-1]) + 1 if existing else 0
+        self._open_segment()
+
+    @property
+    def path(self) -> str:
+        return f"{self.prefix}_{self._index:04d}.flr"
+
+    def _open_segment(self) -> None:
+        self._file = open(self.path, "w+b")
+        if hasattr(os, "posix_fallocate"):
+            os.posix_fallocate(self._file.fileno(), 0, self.segment_bytes)
+        else:
+            self._file.truncate(self.segment_bytes)
+        self._map = mmap.mmap(self._file.fileno(), self.segment_bytes)
+        self._offset = HEADER_SIZE
+        struct.pack_into(HEADER_FORMAT, self._map, 0, MAGIC, VERSION, self._offset)
+        stale = self._index - self.max_segments
+        if stale >= 0 and os.path.exists(f"{self.prefix}_{stale:04d}.flr"):
+            os.remove(f"{self.prefix}_{stale:04d}.flr")
+
+    def _roll_over(self) -> None:
+        self._close_segment()
+        self._index += 1
+        self._open_segment()
+
+    def _close_segment(self) -> None:
+        if self._map is not None:
+            self._map.flush()
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def record(self, channel: int, direction: int, payload: bytes) -> None:
+        """Append one message."""
+        size = RECORD_HEADER.size + len(payload)
+        with self._lock:
+            if self._map is None:
+                return
+            if self._offset + size > self.segment_bytes:
+                if HEADER_SIZE + size > self.segment_bytes:
+                    self.dropped += 1
+                    return
+                self._roll_over()
+            offset = self._offset
+            RECORD_HEADER.pack_into(self._map, offset, time.monotonic(), channel, direction, len(payload))
+            self._map[offset + RECORD_HEADER.size:offset + size] = payload
+            self._offset = offset + size
+            struct.pack_into("<Q", self._map, 12, self._offset)  # publish the record in the header
+            self.records += 1
+
+    def close(self) -> None:
+        with self._lock:
+            self._close_segment()
+
+
+def _segment_index(path: str) -> int:
+    return int(path.rsplit("_", 1)[1].split(".")[0])
+
+
+def segment_paths(prefix: str) -> List[str]:
+    """Segment files of a recorder prefix (e.g. "flight_recorder/MultiMove"), oldest first."""
+    return sorted(glob.glob(f"{glob.escape(prefix)}_[0-9][0-9][0-9][0-9].flr"), key=_segment_index)
+
+
+def read_segment(path: str) -> Iterator[FlightRecord]:
+    """Yield every complete record of one segment file."""
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, end = struct.unpack_from(HEADER_FORMAT, data, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not a flight recorder segment")
+    offset = HEADER_SIZE
+    while offset + RECORD_HEADER.size <= end:
+        timestamp, channel, direction, length = RECORD_HEADER.unpack_from(data, offset)
+        start = offset + RECORD_HEADER.size
+        yield FlightRecord(timestamp, channel, direction, data[start:start + length])
+        offset = start + length
+
+
+def read_recording(prefix: str) -> Iterator[FlightRecord]:
+    """Yield the records of every segment of a recorder prefix, in order."""
+    for path in segment_paths(prefix):
+        yield from read_segment(path)
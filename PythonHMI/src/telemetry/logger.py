@@ -0,0 +1,185 @@
+"""
+Docstring for PythonHMI.src.telemetry.logger
+
+Queue-backed structured logger that keeps console output off the motion hot path.
+
+A log call only checks the level, applies the rate limit and puts a tuple
+(timestamp, level, logger name, message, fields) on a SimpleQueue; a single
+background thread formats the records and writes them to the console or
+Config.LOG_FILE. Fields are passed as keyword arguments and formatted by the
+writer thread, so the caller never builds strings:
+
+    log = get_logger("MultiMove")
+    log.debug("Response received from external socket", values=complete_flag_MM)
+
+Each (logger, message) pair may emit Config.LOG_RATE_LIMIT_BURST records per
+Config.LOG_RATE_LIMIT_S window; further repeats are counted and reported
+with the next record that gets through.
+"""
+
+import atexit
+import queue
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, TextIO
+
+from config.settings import Config
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+OFF = 100
+
+LEVELS = {"DEBUG": DEBUG, "INFO": INFO, "WARNING": WARNING, "ERROR": ERROR, "OFF": OFF}
+LEVEL_NAMES = {value: name for name, value in LEVELS.items()}
+
+
+def format_record(record: tuple) -> str:
+    """Format one record as "HH:MM:SS.mmm LEVEL   name message key=value ..."."""
+    timestamp, level, name, message, fields, suppressed = record
+    clock = time.strftime("%H:%M:%S", time.localtime(timestamp))
+    line = f"{clock}.{int(timestamp % 1 * 1000):03d} {LEVEL_NAMES.get(level, level):<7} {name} {message}"
+    if fields:
+        line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+    if suppressed:
+        line += f" (+{suppressed} repeats suppressed)"
+    return line
+
+
+class LogWriter:
+    """Background thread draining log records into a text stream."""
+    def __init__(self, stream: Optional[TextIO] = None, max_queued: int = Config.LOG_QUEUE_SIZE) -> None:
+        """
+        Args:
+            stream: Output stream, defaults to Config.LOG_FILE or stdout
+            max_queued: Records kept waiting before new ones are dropped
+        """
+        self._owns_stream = stream is None and Config.LOG_FILE is not None
+        self.stream = stream or (open(Config.LOG_FILE, "a", encoding="utf-8") if Config.LOG_FILE else sys.stdout)
+        self.max_queued = max_queued
+        self.written = 0
+        self.dropped = 0
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def put(self, record: tuple) -> None:
+        if self._queue.qsize() >= self.max_queued:
+            self.dropped += 1
+            return
+        self._queue.put(record)
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while True:  # write everything that is waiting in one go
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            for item in batch:
+                if item is None:
+                    self.stream.flush()
+                    return
+                if isinstance(item, threading.Event):  # flush marker
+                    self.stream.flush()
+                    item.set()
+                    continue
+                self.stream.write(format_record(item) + "\n")
+                self.written += 1
+            self.stream.flush()
+
+    def flush(self, timeout: float = 1.0) -> None:
+        """Wait until every record queued so far has been written."""
+        if self._thread.is_alive():
+            done = threading.Event()
+            self._queue.put(done)
+            done.wait(timeout)
+
+    def close(self) -> None:
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(1.0)
+        if self._owns_stream:
+            self.stream.close()
+
+
+class StructuredLogger:
+    """Named logger with a level and per-message rate limiting."""
+    def __init__(self, name: str, writer: LogWriter, level: int = INFO) -> None:
+        self.name = name
+        self.writer = writer
+        self.level = level
+        self._window = Config.LOG_RATE_LIMIT_S
+        self._burst = Config.LOG_RATE_LIMIT_BURST
+        self._rate: Dict[str, List] = {}  # message -> [window start, emitted in window, suppressed]
+
+    def enabled_for(self, level: int) -> bool:
+        return level >= self.level
+
+    def log(self, level: int, message: str, **fields) -> None:
+        if level < self.level:
+            return
+        now = time.monotonic()
+        state = self._rate.get(message)
+        if state is None:
+            state = self._rate[message] = [now, 0, 0]
+        elif now - state[0] >= self._window:
+            state[0] = now
+            state[1] = 0
+        if state[1] >= self._burst:
+            state[2] += 1
+            return
+        state[1] += 1
+        suppressed, state[2] = state[2], 0
+        self.writer.put((time.time(), level, self.name, message, fields, suppressed))
+
+    def debug(self, message: str, **fields) -> None:
+        if DEBUG >= self.level:
+            self.log(DEBUG, message, **fields)
+
+    def info(self, message: str, **fields) -> None:
+        if INFO >= self.level:
+            self.log(INFO, message, **fields)
+
+    def warning(self, message: str, **fields) -> None:
+        if WARNING >= self.level:
+            self.log(WARNING, message, **fields)
+
+    def error(self, message: str, **fields) -> None:
+        if ERROR >= self.level:
+            self.log(ERROR, message, **fields)
+
+
+_writer: Optional[LogWriter] = None
+_loggers: Dict[str, StructuredLogger] = {}
+_lock = threading.Lock()
+
+
+def get_logger(name: str) -> StructuredLogger:
+    """Get the process-wide logger for a name (level from Config.LOG_LEVEL)."""
+    global _writer
+    with _lock:
+        if _writer is None:
+            _writer = LogWriter()
+            atexit.register(_writer.close)
+        logger = _loggers.get(name)
+        if logger is None:
+            logger = _loggers[name] = StructuredLogger(name, _writer, LEVELS[Config.LOG_LEVEL])
+        return logger
+
+
+def set_level(level: str) -> None:
+    """Change the level of every logger, e.g. set_level("DEBUG") or set_level("OFF")."""
+    Config.LOG_LEVEL = level
+    with _lock:
+        for logger in _loggers.values():
+            logger.level = LEVELS[level]
+
+
+def flush() -> None:
+    """Write out every record queued so far."""
+    if _writer is not None:
+        _writer.flush()
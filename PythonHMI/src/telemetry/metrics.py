@@ -0,0 +1,232 @@
+"""
+Docstring for PythonHMI.src.telemetry.metrics
+
+Runtime metrics registry with a Prometheus text exposition endpoint.
+
+Counters, gauges and fixed-bucket histograms are plain Python objects
+updated without locks: every metric has a single writer (the thread that
+owns the socket or loop it measures) and the HTTP thread only reads, so a
+scrape never blocks the control loop. Metrics are registered once, at
+start-up, under a name and a fixed set of labels:
+
+    sent = metrics.counter("abb_controller_messages_sent_total", "Messages sent", robot="MultiMove")
+    sent.inc()
+
+serve() exposes the process-wide registry at http://127.0.0.1:<port>/metrics
+from a daemon thread, in the Prometheus text format (version 0.0.4).
+"""
+
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from config.settings import Config
+from .logger import get_logger
+
+log = get_logger("Metrics")
+
+# ACK latency / step duration buckets, in seconds (1 ms .. 30 s, motions included)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter, single writer."""
+    kind = "counter"
+    __slots__ = ("labels", "value", "_prefix")
+
+    def __init__(self, name: str, labels: Labels) -> None:
+        self.labels = labels
+        self.value = 0
+        self._prefix = f"{name}{_format_labels(labels)} "
+
+    def inc(self, amount: int = 1) -> None:
+        self.value += amount
+
+    def samples(self) -> List[str]:
+        return [self._prefix + _format_value(self.value)]
+
+
+class Gauge:
+    """Value that goes up and down (buffer fill, queue length), single writer."""
+    kind = "gauge"
+    __slots__ = ("labels", "value", "_prefix")
+
+    def __init__(self, name: str, labels: Labels) -> None:
+        self.labels = labels
+        self.value = 0.0
+        self._prefix = f"{name}{_format_labels(labels)} "
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def samples(self) -> List[str]:
+        return [self._prefix + _format_value(self.value)]
+
+
+class Histogram:
+    """Fixed-bucket histogram, single writer.
+
+    observe() is one bisect and two additions; buckets are stored
+    non-cumulative and accumulated only when rendered.
+    """
+    kind = "histogram"
+    __slots__ = ("labels", "bounds", "counts", "sum", "count", "_bucket_prefixes", "_sum_prefix", "_count_prefix")
+
+    def __init__(self, name: str, labels: Labels, buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
+        self.labels = labels
+        self.bounds = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.bounds) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._bucket_prefixes = [f"{name}_bucket{_format_labels(labels, ('le', _format_value(bound)))} "
+                                 for bound in self.bounds + (float("inf"),)]
+        self._sum_prefix = f"{name}_sum{_format_labels(labels)} "
+        self._count_prefix = f"{name}_count{_format_labels(labels)} "
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self) -> List[str]:
+        lines = []
+        cumulative = 0
+        for prefix, count in zip(self._bucket_prefixes, list(self.counts)):  # one copy of the buckets
+            cumulative += count
+            lines.append(prefix + str(cumulative))
+        lines.append(self._sum_prefix + _format_value(self.sum))
+        lines.append(self._count_prefix + str(cumulative))
+        return lines
+
+
+class MetricsRegistry:
+    """Named metric families; registration is locked, updates and scrapes are not."""
+    def __init__(self) -> None:
+        self._families: Dict[str, Tuple[str, str, Dict[Labels, object]]] = {}  # name -> (kind, help, children)
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name: str, help_text: str, labels: Dict[str, str], **kwargs):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            family = self._families.get(name)
+            if family is None:
+                family = self._families[name] = (cls.kind, help_text, {})
+            elif family[0] != cls.kind:
+                raise ValueError(f"metric {name} is already registered as a {family[0]}")
+            metric = family[2].get(key)
+            if metric is None:
+                metric = family[2][key] = cls(name, key, **kwargs)
+            return metric
+
+    def counter(self, name: str, help_text: str, **labels: str) -> Counter:
+        return self._get(Counter, name, help_text, labels)
+
+    def gauge(self, name: str, help_text: str, **labels: str) -> Gauge:
+        return self._get(Gauge, name, help_text, labels)
+
+    def histogram(self, name: str, help_text: str, buckets: Sequence[float] = LATENCY_BUCKETS,
+                  **labels: str) -> Histogram:
+        return self._get(Histogram, name, help_text, labels, buckets=buckets)
+
+    def render(self) -> str:
+        """Prometheus text exposition of every registered metric."""
+        with self._lock:
+            families = [(name, kind, help_text, list(children.values()))
+                        for name, (kind, help_text, children) in sorted(self._families.items())]
+        lines = []
+        for name, kind, help_text, children in families:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for metric in children:
+                lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry: MetricsRegistry
+
+    def do_GET(self) -> None:
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        pass  # no console line per scrape
+
+
+class MetricsServer:
+    """HTTP endpoint serving a registry from a daemon thread."""
+    def __init__(self, registry: MetricsRegistry, port: int, host: str = Config.METRICS_HOST) -> None:
+        handler = type("MetricsHandler", (_MetricsHandler,), {"registry": registry})
+        self.httpd = HTTPServer((host, port), handler)  # one thread for every scrape, no thread per request
+        self.port = self.httpd.server_address[1]
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name=f"metrics:{self.port}", daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+REGISTRY = MetricsRegistry()
+_server: Optional[MetricsServer] = None
+_server_lock = threading.Lock()
+
+
+def counter(name: str, help_text: str, **labels: str) -> Counter:
+    """Get or register a counter in the process-wide registry."""
+    return REGISTRY.counter(name, help_text, **labels)
+
+
+def gauge(name: str, help_text: str, **labels: str) -> Gauge:
+    """Get or register a gauge in the process-wide registry."""
+    return REGISTRY.gauge(name, help_text, **labels)
+
+
+def histogram(name: str, help_text: str, buckets: Sequence[float] = LATENCY_BUCKETS, **labels: str) -> Histogram:
+    """Get or register a histogram in the process-wide registry."""
+    return REGISTRY.histogram(name, help_text, buckets, **labels)
+
+
+def serve(port: int) -> Optional[MetricsServer]:
+    """Serve the process-wide registry on localhost, once per process.
+
+    In single-process cell mode clientUI and both servers share one registry,
+    so the first caller's port serves all of them and later calls are no-ops.
+
+    Returns:
+        The running server, or None if Config.METRICS_ENABLED is off or the port is taken
+    """
+    global _server
+    if not Config.METRICS_ENABLED:
+        return None
+    with _server_lock:
+        if _server is None:
+            try:
+                _server = MetricsServer(REGISTRY, port)
+                log.info("Metrics endpoint ready", url=f"http://{Config.METRICS_HOST}:{_server.port}/metrics")
+            except OSError as e:
+                log.warning("Metrics endpoint not started", port=port, error=e)
+        return _server
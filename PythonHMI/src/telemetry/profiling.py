@@ -0,0 +1,228 @@
+"""
+Docstring for PythonHMI.src.telemetry.profiling
+
+On-demand profiling of a running server or clientUI.
+
+A ProfilingSession runs for a bounded window (Config.PROFILE_WINDOW_S) and
+writes its results to Config.PROFILE_DIR:
+    sample    a background thread samples the stacks of every thread every
+              Config.PROFILE_SAMPLE_INTERVAL_S and writes <name>_<time>.collapsed
+              (one "frame;frame;frame count" line per stack, flamegraph input)
+    cprofile  deterministic cProfile of the thread that starts the session,
+              writes <name>_<time>.prof (snakeviz / pstats) and a text summary
+With memory enabled, tracemalloc runs for the same window and the snapshot is
+written as <name>_<time>.tracemalloc plus a text summary of the top allocators.
+tracemalloc hooks every allocation and slows the servers several times over
+while it runs, so it is off unless Config.PROFILE_MEMORY is set.
+
+Sessions are started and stopped through an OnDemandProfiler: from the
+PROFILE control on the priority lane (servers), from SIGUSR1 where the
+platform has it, or from the clientUI menu. Nothing is installed or traced
+while no session runs, so profiling costs nothing until it is triggered.
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import signal
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import List, Optional
+
+from config.settings import Config
+from .logger import get_logger
+
+log = get_logger("Profiler")
+
+MODE_SAMPLE = "sample"
+MODE_CPROFILE = "cprofile"
+
+
+class ProfilingSession:
+    """One bounded profiling window."""
+    def __init__(self, name: str, mode: str = Config.PROFILE_MODE, window: float = Config.PROFILE_WINDOW_S,
+                 memory: bool = Config.PROFILE_MEMORY, directory: str = Config.PROFILE_DIR) -> None:
+        """
+        Args:
+            name: Output file prefix, e.g. "MultiMove"
+            mode: MODE_SAMPLE or MODE_CPROFILE
+            window: Seconds until the session stops on its own
+            memory: Also record tracemalloc allocations
+            directory: Output folder
+        """
+        if mode not in (MODE_SAMPLE, MODE_CPROFILE):
+            raise ValueError(f"unknown profiling mode {mode!r}")
+        self.mode = mode
+        self.memory = memory
+        self.deadline = 0.0
+        self.window = window
+        self.files: List[str] = []
+        os.makedirs(directory, exist_ok=True)
+        self.prefix = os.path.join(directory, f"{name}_{time.strftime('%Y%m%d_%H%M%S')}")
+        self._profile: Optional[cProfile.Profile] = None
+        self._stacks: Counter = Counter()
+        self._samples = 0
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self._stopped = threading.Lock()
+        self._started_tracemalloc = False
+        self.done = False
+
+    def start(self) -> 'ProfilingSession':
+        """Start profiling; MODE_CPROFILE profiles the calling thread only."""
+        self.deadline = time.monotonic() + self.window
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start(Config.PROFILE_TRACEMALLOC_FRAMES)
+            self._started_tracemalloc = True
+        if self.mode == MODE_CPROFILE:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        else:
+            self._sampler = threading.Thread(target=self._sample, name="profiler-sampler", daemon=True)
+            self._sampler.start()
+        log.warning("Profiling started", mode=self.mode, window_s=self.window, memory=self.memory)
+        return self
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.deadline
+
+    def _sample(self) -> None:
+        """Sampler thread: collect the stack of every other thread until stopped or expired.
+
+        Stacks are counted as tuples of code objects and only formatted when
+        the session stops, so a sample allocates little while the servers run.
+        """
+        own = threading.get_ident()
+        while not self._stop.wait(Config.PROFILE_SAMPLE_INTERVAL_S):
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                codes = []
+                while frame is not None:
+                    codes.append(frame.f_code)
+                    frame = frame.f_back
+                self._stacks[(ident, tuple(codes))] += 1
+            self._samples += 1
+            if self.expired:
+                self.stop()
+                return
+
+    def _collapsed(self) -> List[str]:
+        """Sampled stacks as "thread;outer;...;inner count" lines, most frequent first."""
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        labels = {}
+        lines = []
+        for (ident, codes), count in self._stacks.most_common():
+            frames = [names.get(ident, str(ident))]
+            for code in reversed(codes):
+                label = labels.get(code)
+                if label is None:
+                    label = labels[code] = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+                frames.append(label)
+            lines.append(f"{';'.join(frames)} {count}")
+        return lines
+
+    def stop(self) -> List[str]:
+        """Stop profiling and write the results (idempotent).
+
+        MODE_CPROFILE sessions must be stopped from the thread that started them.
+
+        Returns:
+            Paths of the files written
+        """
+        if not self._stopped.acquire(blocking=False):
+            return self.files
+        if self._profile is not None:
+            self._profile.disable()
+            path = self.prefix + ".prof"
+            self._profile.dump_stats(path)
+            summary = io.StringIO()
+            pstats.Stats(self._profile, stream=summary).sort_stats("cumulative").print_stats(Config.PROFILE_TOP)
+            self.files += [path, self._write_text("_cprofile.txt", summary.getvalue())]
+        if self._sampler is not None:
+            self._stop.set()
+            if threading.current_thread() is not self._sampler:
+                self._sampler.join()
+            self.files.append(self._write_text(".collapsed", "\n".join(self._collapsed()) + "\n"))
+        if self.memory and tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot()
+            path = self.prefix + ".tracemalloc"
+            snapshot.dump(path)
+            current, peak = tracemalloc.get_traced_memory()
+            lines = [f"traced {current / 1024:.1f} KiB, peak {peak / 1024:.1f} KiB"]
+            lines += [str(stat) for stat in snapshot.statistics("lineno")[:Config.PROFILE_TOP]]
+            self.files += [path, self._write_text("_memory.txt", "\n".join(lines) + "\n")]
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+        self.done = True
+        log.warning("Profiling stopped", mode=self.mode, samples=self._samples, files=self.files)
+        return self.files
+
+    def _write_text(self, suffix: str, text: str) -> str:
+        path = self.prefix + suffix
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        return path
+
+
+class OnDemandProfiler:
+    """Starts and stops ProfilingSessions for one component."""
+    def __init__(self, name: str) -> None:
+        """
+        Args:
+            name: Component name, used as output file prefix
+        """
+        self.name = name
+        self.session: Optional[ProfilingSession] = None
+
+    @property
+    def active(self) -> bool:
+        return self.session is not None
+
+    def toggle(self, mode: Optional[str] = None, memory: Optional[bool] = None) -> Optional[ProfilingSession]:
+        """Start a session, or stop the running one.
+
+        A session whose window has already passed counts as stopped, so the
+        toggle starts a new one.
+
+        Returns:
+            The started session, None if one was stopped
+        """
+        if self.session is not None:
+            running = not self.session.done
+            self.session.stop()  # writes the results, or returns them if the window already closed it
+            self.session = None
+            if running:
+                return None
+        # settings are read now, so they can be changed while the process runs
+        self.session = ProfilingSession(self.name, mode or Config.PROFILE_MODE, Config.PROFILE_WINDOW_S,
+                                        Config.PROFILE_MEMORY if memory is None else memory,
+                                        Config.PROFILE_DIR).start()
+        return self.session
+
+    def poll(self) -> None:
+        """Close the running session once its window has passed.
+
+        Call from the loop of the profiled thread: a cProfile session can only
+        be stopped there. Sample sessions stop on their own, this only clears them.
+        """
+        if self.session is not None and (self.session.done or self.session.expired):
+            self.session.stop()
+            self.session = None
+
+    def install_signal_handler(self) -> bool:
+        """Toggle profiling on SIGUSR1 (POSIX only, main thread only).
+
+        Returns:
+            True if the handler was installed
+        """
+        signum = getattr(signal, "SIGUSR1", None)
+        if signum is None or threading.current_thread() is not threading.main_thread():
+            return False
+        signal.signal(signum, lambda *_: self.toggle())
+        return True
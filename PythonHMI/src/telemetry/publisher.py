@@ -0,0 +1,197 @@
+"""
+Docstring for PythonHMI.src.telemetry.publisher
+
+PUB/SUB telemetry channel from the robot servers to the HMI.
+
+Each server owns one ZMQ PUB socket that publishes compact binary frames,
+independent of the PUSH/PULL command channel. Frames are two-part messages:
+a topic frame "<robot>/<kind>" (used for SUB prefix filtering) and a
+fixed-size struct payload. State and buffer frames are rate limited per
+topic; sends never block so the motion path is never slowed down.
+"""
+
+import struct
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import zmq
+
+from config.settings import Config
+
+# Frame kinds
+TOPIC_STATE = "state"
+TOPIC_BUFFER = "buffer"
+TOPIC_PROGRESS = "progress"
+TOPIC_CONTROL = "control"
+
+# Payload formats (network byte order)
+FMT_STATE = "!d6f"  # monotonic timestamp, 6 position values (float32)
+FMT_BUFFER = "!dII"  # monotonic timestamp, buffered points, buffer capacity
+FMT_PROGRESS = "!dIB"  # monotonic timestamp, command id, status
+FMT_CONTROL = "!dIBd"  # monotonic timestamp, control id, control code, propagation latency (s)
+
+# Progress status codes
+PROGRESS_SENT = 1
+PROGRESS_DONE = 2
+PROGRESS_SKIPPED = 3
+PROGRESS_FAILED = 4
+
+_PAYLOAD_FORMATS = {
+    TOPIC_STATE: FMT_STATE,
+    TOPIC_BUFFER: FMT_BUFFER,
+    TOPIC_PROGRESS: FMT_PROGRESS,
+    TOPIC_CONTROL: FMT_CONTROL,
+}
+
+
+def make_topic(robot: str, kind: str) -> bytes:
+    """Build the topic frame for a robot and frame kind, e.g. b"MultiMove/state"."""
+    return f"{robot}/{kind}".encode("ascii")
+
+
+def decode_frame(topic: bytes, payload: bytes) -> Optional[Tuple[str, str, tuple]]:
+    """Decode a received telemetry frame.
+
+    Args:
+        topic: The topic frame
+        payload: The binary payload frame
+
+    Returns:
+        (robot, kind, fields) or None if the frame is unknown or malformed
+    """
+    try:
+        robot, kind = topic.decode("ascii").split("/", 1)
+        fmt = _PAYLOAD_FORMATS[kind]
+        if len(payload) != struct.calcsize(fmt):
+            return None
+        return robot, kind, struct.unpack(fmt, payload)
+    except (UnicodeDecodeError, ValueError, KeyError, struct.error):
+        return None
+
+
+class TelemetryPublisher:
+    """Non-blocking, rate-limited telemetry publisher for one robot server."""
+    def __init__(self, robot: str, port: int, context: Optional[zmq.Context] = None,
+                 max_rate_hz: float = Config.TELEMETRY_PUB_RATE_HZ) -> None:
+        """Initialize the publisher.
+
+        Args:
+            robot (str): Robot name used as topic prefix (e.g., "MultiMove", "Cobot")
+            port (int): TCP port to bind the PUB socket on
+            context: ZMQ context to use, defaults to the global instance
+            max_rate_hz (float): Max publish rate per state/buffer topic, 0 = unlimited
+        """
+        self.robot = robot
+        self.port = port
+        self.context = context or zmq.Context.instance()
+        self.min_interval = 1.0 / max_rate_hz if max_rate_hz > 0 else 0.0
+        self.socket: Optional[zmq.Socket] = None
+        self._topics = {kind: make_topic(robot, kind) for kind in _PAYLOAD_FORMATS}
+        self._structs = {kind: struct.Struct(fmt) for kind, fmt in _PAYLOAD_FORMATS.items()}
+        self._last_sent: Dict[str, float] = {}
+        self.frames_sent = 0
+        self.frames_dropped = 0
+
+    def bind(self, endpoint: Optional[str] = None) -> 'TelemetryPublisher':
+        """Create and bind the PUB socket.
+
+        Args:
+            endpoint: Explicit endpoint, defaults to tcp://*:<port>
+
+        Returns:
+            self for method chaining
+        """
+        self.socket = self.context.socket(zmq.PUB)
+        self.socket.setsockopt(zmq.SNDHWM, Config.TELEMETRY_PUB_HWM)
+        self.socket.setsockopt(zmq.LINGER, 0)
+        self.socket.bind(endpoint or f"tcp://*:{self.port}")
+        return self
+
+    def _publish(self, kind: str, *fields, rate_limited: bool = True) -> bool:
+        """Pack and send one frame, dropping it if rate limited or the socket is full."""
+        if self.socket is None:
+            return False
+        now = time.monotonic()
+        if rate_limited and self.min_interval:
+            last = self._last_sent.get(kind)
+            if last is not None and now - last < self.min_interval:
+                self.frames_dropped += 1
+                return False
+        try:
+            self.socket.send_multipart(
+                [self._topics[kind], self._structs[kind].pack(now, *fields)], zmq.NOBLOCK)
+        except zmq.Again:
+            self.frames_dropped += 1
+            return False
+        self._last_sent[kind] = now
+        self.frames_sent += 1
+        return True
+
+    def publish_state(self, values: Iterable[float]) -> bool:
+        """Publish the latest 6-value robot state (rate limited)."""
+        return self._publish(TOPIC_STATE, *values)
+
+    def publish_buffer(self, fill: int, capacity: int) -> bool:
+        """Publish the streaming buffer level (rate limited)."""
+        return self._publish(TOPIC_BUFFER, fill, capacity)
+
+    def publish_progress(self, command_id: int, status: int) -> bool:
+        """Publish a command progress event (never rate limited)."""
+        return self._publish(TOPIC_PROGRESS, command_id, status, rate_limited=False)
+
+    def publish_control(self, command_id: int, code: int, latency: float) -> bool:
+        """Publish a handled control command and its propagation latency (never rate limited)."""
+        return self._publish(TOPIC_CONTROL, command_id, code, latency, rate_limited=False)
+
+    def close(self) -> None:
+        """Close the PUB socket."""
+        if self.socket:
+            self.socket.close()
+            self.socket = None
+
+
+class TelemetrySubscriber:
+    """SUB side of the telemetry channel, used by the HMI and monitoring tools."""
+    def __init__(self, endpoints: Iterable[str], topics: Iterable[str] = ("",),
+                 context: Optional[zmq.Context] = None) -> None:
+        """Connect to one or more telemetry publishers.
+
+        Args:
+            endpoints: Publisher endpoints, e.g. ["tcp://localhost:8084"]
+            topics: Topic prefixes to subscribe to, e.g. ["MultiMove/state"]; "" = everything
+            context: ZMQ context to use, defaults to the global instance
+        """
+        self.context = context or zmq.Context.instance()
+        self.socket = self.context.socket(zmq.SUB)
+        self.socket.setsockopt(zmq.LINGER, 0)
+        for topic in topics:
+            self.socket.setsockopt(zmq.SUBSCRIBE, topic.encode("ascii"))
+        for endpoint in endpoints:
+            self.socket.connect(endpoint)
+
+    def poll(self, timeout_ms: int = 0) -> List[Tuple[str, str, tuple]]:
+        """Receive every frame currently available.
+
+        Args:
+            timeout_ms: How long to wait for the first frame
+
+        Returns:
+            List of decoded (robot, kind, fields) frames
+        """
+        frames = []
+        if not self.socket.poll(timeout_ms):
+            return frames
+        while True:
+            try:
+                parts = self.socket.recv_multipart(zmq.NOBLOCK)
+            except zmq.Again:
+                break
+            if len(parts) == 2:
+                decoded = decode_frame(parts[0], parts[1])
+                if decoded is not None:
+                    frames.append(decoded)
+        return frames
+
+    def close(self) -> None:
+        """Close the SUB socket."""
+        self.socket.close()
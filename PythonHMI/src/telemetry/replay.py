@@ -0,0 +1,128 @@
+"""
+Docstring for PythonHMI.src.telemetry.replay
+
+Dump and replay flight recorder sessions.
+
+dump prints every record of a recording. replay re-drives the controller
+traffic of a recording against a FakeController: each recorded message sent
+to the controller is sent again at its original time offset (divided by
+--speed), and each motion/handshake command waits for its reply like the
+server did. The report compares the recorded and replayed durations and
+shows where the replay fell behind the recorded schedule, which points at
+the step a stalled sequence was waiting on.
+
+Run from the PythonHMI directory:
+    python -m src.telemetry.replay dump flight_recorder/MultiMove
+    python -m src.telemetry.replay replay flight_recorder/MultiMove_0003.flr --speed 10
+"""
+
+import argparse
+import socket
+import time
+from typing import Iterable, List
+
+from config.settings import Config
+from src.communication.fake_controller import FakeController
+from src.communication.protocol import unpack_data
+from .flight_recorder import (
+    CHANNEL_NAMES,
+    CH_CONTROLLER,
+    DIR_OUT,
+    FlightRecord,
+    read_recording,
+    read_segment,
+)
+
+REPLY_HEADERS = (b"I", b"d", b"j")  # commands the controller answers
+
+
+def load(target: str) -> List[FlightRecord]:
+    """Records of one segment file (*.flr) or of every segment of a recorder prefix."""
+    return list(read_segment(target) if target.endswith(".flr") else read_recording(target))
+
+
+def format_payload(record: FlightRecord) -> str:
+    if record.channel == CH_CONTROLLER:
+        return record.payload.decode("utf-8", errors="replace")
+    data = unpack_data(record.payload)
+    return str(data) if data is not None else record.payload.hex()
+
+
+def dump(records: Iterable[FlightRecord]) -> None:
+    start = None
+    for record in records:
+        start = record.timestamp if start is None else start
+        direction = "->" if record.direction == DIR_OUT else "<-"
+        print(f"{record.timestamp - start:12.6f} {CHANNEL_NAMES.get(record.channel, record.channel):<11} "
+              f"{direction} {format_payload(record)}")
+
+
+def replay(records: List[FlightRecord], speed: float = 1.0, motion_time: float = 0.0,
+           reply_timeout: float = 5.0) -> None:
+    """Re-send the recorded controller commands to a FakeController.
+
+    Args:
+        records: Recording to replay
+        speed: Time scale, 1.0 = original timing, 10.0 = ten times faster, 0 = as fast as possible
+        motion_time: Simulated motion duration of the fake controller, in seconds
+        reply_timeout: Seconds to wait for the reply to one command
+    """
+    commands = [record for record in records if record.channel == CH_CONTROLLER and record.direction == DIR_OUT]
+    if not commands:
+        print("No controller commands in the recording")
+        return
+    controller = FakeController(motion_time=motion_time).start_in_thread()
+    connection = socket.create_connection(("127.0.0.1", controller.port))
+    connection.settimeout(reply_timeout)
+    recorded_start = commands[0].timestamp
+    replay_start = time.monotonic()
+    max_lag, max_lag_index = 0.0, 0
+    try:
+        for index, record in enumerate(commands):
+            if speed > 0:
+                due = replay_start + (record.timestamp - recorded_start) / speed
+                delay = due - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                elif -delay > max_lag:
+                    max_lag, max_lag_index = -delay, index
+            connection.sendall(record.payload)
+            if record.payload[:1] == b"T":
+                break
+            if record.payload[:1] in REPLY_HEADERS:
+                try:
+                    connection.recv(Config.MAX_PACKET_SIZE)
+                except socket.timeout:
+                    print(f"#{index} {record.payload!r}: no reply within {reply_timeout} s")
+                    break
+    finally:
+        connection.close()
+        controller.stop_thread()
+    recorded = commands[-1].timestamp - recorded_start
+    replayed = time.monotonic() - replay_start
+    print(f"{len(commands)} commands, recorded {recorded:.3f} s, replayed {replayed:.3f} s at speed {speed}")
+    if max_lag > 0:
+        print(f"max lag behind schedule {max_lag * 1e3:.3f} ms before #{max_lag_index} "
+              f"{commands[max_lag_index].payload!r}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    dump_parser = subparsers.add_parser("dump", help="Print every record")
+    dump_parser.add_argument("target", help="Segment file (*.flr) or recorder prefix, e.g. flight_recorder/MultiMove")
+    replay_parser = subparsers.add_parser("replay", help="Re-drive the controller traffic against a FakeController")
+    replay_parser.add_argument("target", help="Segment file (*.flr) or recorder prefix, e.g. flight_recorder/MultiMove")
+    replay_parser.add_argument("--speed", type=float, default=1.0, help="Time scale, 0 = as fast as possible")
+    replay_parser.add_argument("--motion-ms", type=float, default=0.0, help="Simulated motion time per command")
+    args = parser.parse_args()
+
+    records = load(args.target)
+    if args.command == "dump":
+        dump(records)
+    else:
+        replay(records, args.speed, args.motion_ms / 1000)
+
+
+if __name__ == "__main__":
+    main()
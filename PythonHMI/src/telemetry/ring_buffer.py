@@ -0,0 +1,174 @@
+"""
+Docstring for PythonHMI.src.telemetry.ring_buffer
+
+Timestamped telemetry cache for robot controller messages.
+
+This module provides a NumPy-backed ring buffer that keeps the most recent
+(monotonic timestamp, 6 values) samples received from a robot controller,
+and a per-robot store so the servers, the client and the streaming engine can
+read the actual robot position without issuing extra requests.
+"""
+
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from config.settings import Config
+
+
+class TelemetryRingBuffer:
+    """Fixed-capacity ring buffer of timestamped controller samples.
+
+    Each row holds [timestamp, v1, ..., vN]. Writes and latest-value reads are O(1);
+    windowed queries use a binary search on the (monotonic) timestamps.
+    """
+    def __init__(self, capacity: int = Config.TELEMETRY_BUFFER_SIZE,
+                 width: int = Config.TELEMETRY_WIDTH) -> None:
+        """Initialize the ring buffer.
+
+        Args:
+            capacity (int): Maximum number of samples kept before overwriting the oldest
+            width (int): Number of values per sample (6 for a controller message)
+        """
+        if capacity <= 0:
+            raise ValueError(f"Invalid telemetry capacity: {capacity}")
+        self.capacity = capacity
+        self.width = width
+        self._data = np.zeros((capacity, width + 1), dtype=np.float64)
+        self._head = 0  # index of the next write
+        self._count = 0
+        self._total = 0  # samples recorded since creation (never wraps)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def total_recorded(self) -> int:
+        """Number of samples recorded since creation, including overwritten ones."""
+        return self._total
+
+    def append(self, values: Iterable[float], timestamp: Optional[float] = None) -> None:
+        """Record one sample.
+
+        Args:
+            values: The values of the sample (must contain `width` elements)
+            timestamp: Monotonic timestamp in seconds, defaults to time.monotonic()
+        """
+        if timestamp is None:
+            timestamp = time.monotonic()
+        with self._lock:
+            row = self._data[self._head]
+            row[0] = timestamp
+            row[1:] = values
+            self._head = (self._head + 1) % self.capacity
+            if self._count < self.capacity:
+                self._count += 1
+            self._total += 1
+
+    def latest(self) -> Optional[Tuple[float, np.ndarray]]:
+        """Get the most recent sample.
+
+        Returns:
+            (timestamp, values) of the last sample, or None if nothing was recorded yet
+        """
+        with self._lock:
+            if self._count == 0:
+                return None
+            row = self._data[self._head - 1].copy()
+        return float(row[0]), row[1:]
+
+    def _ordered_segments(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the stored rows as (older, newer) views in chronological order."""
+        if self._count < self.capacity:
+            return self._data[:0], self._data[:self._count]
+        return self._data[self._head:], self._data[:self._head]
+
+    def between(self, t_start: float, t_end: float = float("inf")) -> np.ndarray:
+        """Get all samples with t_start <= timestamp <= t_end.
+
+        Returns:
+            Array of shape (n, width + 1) in chronological order (copy)
+        """
+        with self._lock:
+            parts = []
+            for segment in self._ordered_segments():
+                if len(segment) == 0:
+                    continue
+                stamps = segment[:, 0]
+                lo = np.searchsorted(stamps, t_start, side="left")
+                hi = np.searchsorted(stamps, t_end, side="right")
+                if hi > lo:
+                    parts.append(segment[lo:hi])
+            if not parts:
+                return np.empty((0, self.width + 1), dtype=np.float64)
+            return np.concatenate(parts)
+
+    def window(self, seconds: float, now: Optional[float] = None) -> np.ndarray:
+        """Get the samples recorded during the last `seconds` seconds.
+
+        Args:
+            seconds: Length of the window
+            now: Reference time, defaults to time.monotonic()
+        """
+        if now is None:
+            now = time.monotonic()
+        return self.between(now - seconds, now)
+
+    def last_n(self, n: int) -> np.ndarray:
+        """Get the last n samples in chronological order (copy)."""
+        with self._lock:
+            n = min(n, self._count)
+            if n <= 0:
+                return np.empty((0, self.width + 1), dtype=np.float64)
+            idx = (self._head - n + np.arange(n)) % self.capacity
+            return self._data[idx]
+
+    def clear(self) -> None:
+        """Drop every stored sample."""
+        with self._lock:
+            self._head = 0
+            self._count = 0
+
+
+class TelemetryStore:
+    """Per-robot collection of telemetry ring buffers."""
+    def __init__(self, capacity: int = Config.TELEMETRY_BUFFER_SIZE,
+                 width: int = Config.TELEMETRY_WIDTH) -> None:
+        """Initialize an empty store.
+
+        Args:
+            capacity (int): Capacity of each robot buffer
+            width (int): Values per sample of each robot buffer
+        """
+        self.capacity = capacity
+        self.width = width
+        self._buffers: Dict[str, TelemetryRingBuffer] = {}
+        self._lock = threading.Lock()
+
+    def buffer(self, robot: str) -> TelemetryRingBuffer:
+        """Get (or create) the ring buffer of a robot."""
+        buf = self._buffers.get(robot)
+        if buf is None:
+            with self._lock:
+                buf = self._buffers.setdefault(robot, TelemetryRingBuffer(self.capacity, self.width))
+        return buf
+
+    def record(self, robot: str, values: Iterable[float], timestamp: Optional[float] = None) -> None:
+        """Record one controller message for a robot."""
+        self.buffer(robot).append(values, timestamp)
+
+    def latest(self, robot: str) -> Optional[Tuple[float, np.ndarray]]:
+        """Get the latest (timestamp, values) sample of a robot, or None."""
+        buf = self._buffers.get(robot)
+        return buf.latest() if buf is not None else None
+
+    def window(self, robot: str, seconds: float) -> np.ndarray:
+        """Get the samples of a robot recorded during the last `seconds` seconds."""
+        return self.buffer(robot).window(seconds)
+
+    def robots(self) -> list[str]:
+        """Names of all robots with a buffer."""
+        return list(self._buffers)